@@ -37,7 +37,7 @@ class SchedulerConfig:
         'NVD_API_BASE': os.getenv('NVD_API_BASE', 'https://services.nvd.nist.gov/rest/json/cves/2.0'),
         'NVD_API_KEY': os.getenv('NVD_API_KEY'),
         'NVD_RATE_LIMIT': (2, 1),  # 2 requests per second
-        'NVD_CACHE_DIR': os.getenv('NVD_CACHE_DIR', 'cache'),
+        'NVD_CACHE_DIR': os.getenv('NVD_CACHE_DIR'),  # None: instance/cache/nvd
         'NVD_REQUEST_TIMEOUT': int(os.getenv('NVD_REQUEST_TIMEOUT', '30')),
         'NVD_USER_AGENT': os.getenv('NVD_USER_AGENT', 'Sec4all.co NVD Fetcher')
     }
@@ -32,9 +32,10 @@ from app.services.vulnerability_service import VulnerabilityService
 
 # Optional Redis-based cache
 try:
-    from app.services.redis_cache_service import RedisCacheService
+    from app.services.redis_cache_service import RedisCacheService, get_cache_service
 except Exception:
     RedisCacheService = None
+    get_cache_service = None
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -77,21 +78,11 @@ def get_analytics_overview() -> Response:
         # Initialize cache if available
         cache = None
         if RedisCacheService and current_app:
-            redis_config = {
-                'REDIS_CACHE_ENABLED': current_app.config.get('REDIS_CACHE_ENABLED', True),
-                'REDIS_URL': current_app.config.get('REDIS_URL', 'redis://localhost:6379/0'),
-                'REDIS_HOST': current_app.config.get('REDIS_HOST', 'localhost'),
-                'REDIS_PORT': current_app.config.get('REDIS_PORT', 6379),
-                'REDIS_DB': current_app.config.get('REDIS_DB', 0),
-                'REDIS_PASSWORD': current_app.config.get('REDIS_PASSWORD'),
-                'CACHE_DEFAULT_TTL': current_app.config.get('ANALYTICS_CACHE_TTL', 900),
-                'CACHE_MAX_TTL': current_app.config.get('CACHE_MAX_TTL', 86400),
-                'CACHE_KEY_PREFIX': current_app.config.get('CACHE_KEY_PREFIX', 'analytics_cache:'),
-                'CACHE_USE_COMPRESSION': current_app.config.get('CACHE_USE_COMPRESSION', True),
-                'CACHE_COMPRESSION_THRESHOLD': current_app.config.get('CACHE_COMPRESSION_THRESHOLD', 1024)
-            }
             try:
-                cache = RedisCacheService(redis_config)
+                cache = get_cache_service(
+                    CACHE_DEFAULT_TTL=current_app.config.get('ANALYTICS_CACHE_TTL', 900),
+                    CACHE_KEY_PREFIX=current_app.config.get('CACHE_KEY_PREFIX', 'analytics_cache:'),
+                )
             except Exception:
                 cache = None
         session = db.session
@@ -174,20 +165,9 @@ def get_analytics_overview() -> Response:
         if selected_vendor_ids:
             try:
                 # Use union of CVEs associated directly to vendor and via products from vendor
-                from sqlalchemy import union
+                from app.services.vendor_scope_service import VendorScopeService
                 from app.models.product import Product
-                cves_por_vendor = (
-                    session
-                    .query(CVEVendor.cve_id)
-                    .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                )
-                cves_por_produto_vendor = (
-                    session
-                    .query(CVEProduct.cve_id)
-                    .join(Product, Product.id == CVEProduct.product_id)
-                    .filter(Product.vendor_id.in_(selected_vendor_ids))
-                )
-                cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                cves_unificados_sq = VendorScopeService(session).cve_id_subquery(selected_vendor_ids).subquery()
                 base_query = base_query.filter(
                     Vulnerability.cve_id.in_(session.query(cves_unificados_sq.c.cve_id))
                 ).distinct()
@@ -225,20 +205,9 @@ def get_analytics_overview() -> Response:
             if selected_vendor_ids:
                 try:
                     # Align exploitability scoping to unified vendor filter
-                    from sqlalchemy import union
+                    from app.services.vendor_scope_service import VendorScopeService
                     from app.models.product import Product
-                    cves_por_vendor = (
-                        session
-                        .query(CVEVendor.cve_id)
-                        .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_por_produto_vendor = (
-                        session
-                        .query(CVEProduct.cve_id)
-                        .join(Product, Product.id == CVEProduct.product_id)
-                        .filter(Product.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                    cves_unificados_sq = VendorScopeService(session).cve_id_subquery(selected_vendor_ids).subquery()
                     avg_exploit_query = avg_exploit_query.filter(
                         Vulnerability.cve_id.in_(session.query(cves_unificados_sq.c.cve_id))
                     ).distinct()
@@ -326,20 +295,9 @@ def get_analytics_overview() -> Response:
                     product_count = 0
             try:
                 # Count CWEs for CVEs scoped by unified vendor filter
-                from sqlalchemy import union
+                from app.services.vendor_scope_service import VendorScopeService
                 from app.models.product import Product
-                cves_por_vendor = (
-                    session
-                    .query(CVEVendor.cve_id)
-                    .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                )
-                cves_por_produto_vendor = (
-                    session
-                    .query(CVEProduct.cve_id)
-                    .join(Product, Product.id == CVEProduct.product_id)
-                    .filter(Product.vendor_id.in_(selected_vendor_ids))
-                )
-                cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                cves_unificados_sq = VendorScopeService(session).cve_id_subquery(selected_vendor_ids).subquery()
                 cwe_count = (
                     session.query(func.count(func.distinct(Weakness.cwe_id)))
                     .join(Vulnerability, Vulnerability.cve_id == Weakness.cve_id)
@@ -464,21 +422,11 @@ def get_analytics_details(category: str) -> Response:
         # Prepare cache
         cache = None
         if RedisCacheService and current_app:
-            redis_config = {
-                'REDIS_CACHE_ENABLED': current_app.config.get('REDIS_CACHE_ENABLED', True),
-                'REDIS_URL': current_app.config.get('REDIS_URL', 'redis://localhost:6379/0'),
-                'REDIS_HOST': current_app.config.get('REDIS_HOST', 'localhost'),
-                'REDIS_PORT': current_app.config.get('REDIS_PORT', 6379),
-                'REDIS_DB': current_app.config.get('REDIS_DB', 0),
-                'REDIS_PASSWORD': current_app.config.get('REDIS_PASSWORD'),
-                'CACHE_DEFAULT_TTL': current_app.config.get('ANALYTICS_CACHE_TTL', 900),
-                'CACHE_MAX_TTL': current_app.config.get('CACHE_MAX_TTL', 86400),
-                'CACHE_KEY_PREFIX': current_app.config.get('CACHE_KEY_PREFIX', 'analytics_cache:'),
-                'CACHE_USE_COMPRESSION': current_app.config.get('CACHE_USE_COMPRESSION', True),
-                'CACHE_COMPRESSION_THRESHOLD': current_app.config.get('CACHE_COMPRESSION_THRESHOLD', 1024)
-            }
             try:
-                cache = RedisCacheService(redis_config)
+                cache = get_cache_service(
+                    CACHE_DEFAULT_TTL=current_app.config.get('ANALYTICS_CACHE_TTL', 900),
+                    CACHE_KEY_PREFIX=current_app.config.get('CACHE_KEY_PREFIX', 'analytics_cache:'),
+                )
             except Exception:
                 cache = None
         # Validar categoria permitida
@@ -699,22 +647,8 @@ def get_analytics_details(category: str) -> Response:
                     base_vuln_query = session.query(Vulnerability)
                     if selected_vendor_ids:
                         try:
-                            from sqlalchemy import union
-                            from app.models.cve_vendor import CVEVendor
-                            from app.models.cve_product import CVEProduct
-                            from app.models.product import Product
-                            cves_por_vendor = (
-                                session
-                                .query(CVEVendor.cve_id)
-                                .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                            )
-                            cves_por_produto_vendor = (
-                                session
-                                .query(CVEProduct.cve_id)
-                                .join(Product, Product.id == CVEProduct.product_id)
-                                .filter(Product.vendor_id.in_(selected_vendor_ids))
-                            )
-                            cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                            from app.services.vendor_scope_service import VendorScopeService
+                            cves_unificados_sq = VendorScopeService(session).cve_id_subquery(selected_vendor_ids).subquery()
                             base_vuln_query = base_vuln_query.filter(
                                 Vulnerability.cve_id.in_(session.query(cves_unificados_sq.c.cve_id))
                             ).distinct()
@@ -979,22 +913,9 @@ def get_analytics_details(category: str) -> Response:
                 )
                 if selected_vendor_ids:
                     try:
-                        from sqlalchemy import union
+                        from app.services.vendor_scope_service import VendorScopeService
                         from app.models.cve_vendor import CVEVendor
-                        from app.models.cve_product import CVEProduct
-                        from app.models.product import Product
-                        cves_por_vendor = (
-                            session
-                            .query(CVEVendor.cve_id)
-                            .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                        )
-                        cves_por_produto_vendor = (
-                            session
-                            .query(CVEProduct.cve_id)
-                            .join(Product, Product.id == CVEProduct.product_id)
-                            .filter(Product.vendor_id.in_(selected_vendor_ids))
-                        )
-                        cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                        cves_unificados_sq = VendorScopeService(session).cve_id_subquery(selected_vendor_ids).subquery()
                         vquery = vquery.filter(
                             Vulnerability.cve_id.in_(session.query(cves_unificados_sq.c.cve_id))
                         ).distinct()
@@ -1176,53 +1097,25 @@ def get_timeseries_data(metric_id: str) -> Response:
             end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         
         if metric_id == 'cve_history':
-            # Get CVE count by day - using simple approach
+            # Contagem diária a partir do agregado vulnerability_daily_stats / severity_daily_rollup
             try:
-                # Build base query within date range
-                query = session.query(Vulnerability).filter(
-                    Vulnerability.published_date >= datetime.combine(start_date, datetime.min.time()),
-                    Vulnerability.published_date <= datetime.combine(end_date, datetime.max.time())
-                )
-
-                # Apply user vendor preferences if present
-                try:
-                    from flask_login import current_user
-                    from app.models.sync_metadata import SyncMetadata
-                    from app.models.cve_vendor import CVEVendor
-                    # Prefer explicit vendor_ids from query string; fallback to user preferences
-                    selected_vendor_ids = []
-                    vendor_ids_param = request.args.get('vendor_ids')
-                    if vendor_ids_param:
-                        selected_vendor_ids = [int(x) for x in vendor_ids_param.split(',') if x.strip().isdigit()]
-                    if current_user.is_authenticated:
-                        key = f'user_vendor_preferences:{current_user.id}'
-                        pref = session.query(SyncMetadata).filter_by(key=key).first()
-                        if not selected_vendor_ids and pref and pref.value:
-                            selected_vendor_ids = [int(x) for x in pref.value.split(',') if x.strip().isdigit()]
-                    if selected_vendor_ids:
-                        query = (
-                            query
-                            .join(CVEVendor, CVEVendor.cve_id == Vulnerability.cve_id)
-                            .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                            .distinct()
-                        )
-                except Exception:
-                    pass
+                from app.services.daily_stats_service import DailyStatsService
+                from app.services.vendor_scope_service import VendorScopeService, parse_vendor_ids
 
-                vulnerabilities = query.all()
-                
-                # Group by date manually
-                date_counts = {}
-                for vuln in vulnerabilities:
-                    if vuln.published_date:
-                        date_str = vuln.published_date.strftime('%Y-%m-%d')
-                        date_counts[date_str] = date_counts.get(date_str, 0) + 1
-                
-                # Convert to sorted list
+                # Prefer explicit vendor_ids from query string; fallback to user preferences
+                selected_vendor_ids = VendorScopeService(session).selected_vendor_ids(
+                    parse_vendor_ids(request.args.getlist('vendor_ids'))
+                )
+                daily = DailyStatsService(session).daily_counts(
+                    start_date,
+                    end_date,
+                    vendor_ids=selected_vendor_ids,
+                    part=(request.args.get('part') or None),
+                )
                 data = [{
                     'date': date_str,
-                    'value': count
-                } for date_str, count in sorted(date_counts.items())]
+                    'value': sum(by_severity.values())
+                } for date_str, by_severity in sorted(daily.items())]
                 
             except Exception as e:
                 logger.error(f"Error in cve_history query: {e}")
@@ -1464,19 +1357,8 @@ def get_dashboard_counts() -> Response:
             except Exception:
                 product_count = 0
             try:
-                from sqlalchemy import union
-                cves_por_vendor = (
-                    session
-                    .query(CVEVendor.cve_id)
-                    .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                )
-                cves_por_produto_vendor = (
-                    session
-                    .query(CVEProduct.cve_id)
-                    .join(Product, Product.id == CVEProduct.product_id)
-                    .filter(Product.vendor_id.in_(selected_vendor_ids))
-                )
-                cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                from app.services.vendor_scope_service import VendorScopeService
+                cves_unificados_sq = VendorScopeService(session).cve_id_subquery(selected_vendor_ids).subquery()
                 cwe_count = (
                     session.query(func.count(func.distinct(Weakness.cwe_id)))
                     .join(Vulnerability, Vulnerability.cve_id == Weakness.cve_id)
@@ -1490,20 +1372,9 @@ def get_dashboard_counts() -> Response:
                     Vulnerability.nvd_products_data
                 )
                 try:
-                    from sqlalchemy import union
+                    from app.services.vendor_scope_service import VendorScopeService
                     from app.models.product import Product
-                    cves_por_vendor = (
-                        session
-                        .query(CVEVendor.cve_id)
-                        .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_por_produto_vendor = (
-                        session
-                        .query(CVEProduct.cve_id)
-                        .join(Product, Product.id == CVEProduct.product_id)
-                        .filter(Product.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                    cves_unificados_sq = VendorScopeService(session).cve_id_subquery(selected_vendor_ids).subquery()
                     base_v = base_v.filter(
                         Vulnerability.cve_id.in_(session.query(cves_unificados_sq.c.cve_id))
                     ).distinct()
@@ -1525,20 +1396,9 @@ def get_dashboard_counts() -> Response:
             if cwe_count == 0:
                 vq = session.query(Vulnerability.description)
                 try:
-                    from sqlalchemy import union
+                    from app.services.vendor_scope_service import VendorScopeService
                     from app.models.product import Product
-                    cves_por_vendor = (
-                        session
-                        .query(CVEVendor.cve_id)
-                        .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_por_produto_vendor = (
-                        session
-                        .query(CVEProduct.cve_id)
-                        .join(Product, Product.id == CVEProduct.product_id)
-                        .filter(Product.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                    cves_unificados_sq = VendorScopeService(session).cve_id_subquery(selected_vendor_ids).subquery()
                     vq = vq.filter(
                         Vulnerability.cve_id.in_(session.query(cves_unificados_sq.c.cve_id))
                     ).distinct()
@@ -1895,22 +1755,11 @@ def get_top_cwes() -> Response:
         if selected_vendor_ids:
             # Restrict weaknesses to CVEs for selected vendors using unified filter (direct vendor and via products)
             try:
-                from sqlalchemy import union
+                from app.services.vendor_scope_service import VendorScopeService
                 from app.models.cve_vendor import CVEVendor
                 from app.models.cve_product import CVEProduct
                 from app.models.product import Product
-                cves_por_vendor = (
-                    session
-                    .query(CVEVendor.cve_id)
-                    .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                )
-                cves_por_produto_vendor = (
-                    session
-                    .query(CVEProduct.cve_id)
-                    .join(Product, Product.id == CVEProduct.product_id)
-                    .filter(Product.vendor_id.in_(selected_vendor_ids))
-                )
-                cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                cves_unificados_sq = VendorScopeService(session).cve_id_subquery(selected_vendor_ids).subquery()
                 base_query = (
                     base_query
                     .filter(Weakness.cve_id.in_(session.query(cves_unificados_sq.c.cve_id)))
@@ -1952,22 +1801,11 @@ def get_top_cwes() -> Response:
             )
             if selected_vendor_ids:
                 try:
-                    from sqlalchemy import union
+                    from app.services.vendor_scope_service import VendorScopeService
                     from app.models.cve_vendor import CVEVendor
                     from app.models.cve_product import CVEProduct
                     from app.models.product import Product
-                    cves_por_vendor = (
-                        session
-                        .query(CVEVendor.cve_id)
-                        .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_por_produto_vendor = (
-                        session
-                        .query(CVEProduct.cve_id)
-                        .join(Product, Product.id == CVEProduct.product_id)
-                        .filter(Product.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                    cves_unificados_sq = VendorScopeService(session).cve_id_subquery(selected_vendor_ids).subquery()
                     vquery = vquery.filter(
                         Vulnerability.cve_id.in_(session.query(cves_unificados_sq.c.cve_id))
                     ).distinct()
@@ -2120,22 +1958,11 @@ def get_top_cwes() -> Response:
                 )
                 try:
                     if selected_vendor_ids:
-                        from sqlalchemy import union
+                        from app.services.vendor_scope_service import VendorScopeService
                         from app.models.cve_vendor import CVEVendor
                         from app.models.cve_product import CVEProduct
                         from app.models.product import Product
-                        cves_por_vendor = (
-                            session
-                            .query(CVEVendor.cve_id)
-                            .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                        )
-                        cves_por_produto_vendor = (
-                            session
-                            .query(CVEProduct.cve_id)
-                            .join(Product, Product.id == CVEProduct.product_id)
-                            .filter(Product.vendor_id.in_(selected_vendor_ids))
-                        )
-                        cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                        cves_unificados_sq = VendorScopeService(session).cve_id_subquery(selected_vendor_ids).subquery()
                         enhanced_metrics = enhanced_metrics.filter(
                             Vulnerability.cve_id.in_(session.query(cves_unificados_sq.c.cve_id))
                         )
@@ -2339,22 +2166,11 @@ def get_latest_cves() -> Response:
         # Apply unified vendor filter (direct vendor CVEs and via products from vendor)
         if selected_vendor_ids:
             try:
-                from sqlalchemy import union
+                from app.services.vendor_scope_service import VendorScopeService
                 from app.models.cve_vendor import CVEVendor
                 from app.models.cve_product import CVEProduct
                 from app.models.product import Product
-                cves_por_vendor = (
-                    session
-                    .query(CVEVendor.cve_id)
-                    .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                )
-                cves_por_produto_vendor = (
-                    session
-                    .query(CVEProduct.cve_id)
-                    .join(Product, Product.id == CVEProduct.product_id)
-                    .filter(Product.vendor_id.in_(selected_vendor_ids))
-                )
-                cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                cves_unificados_sq = VendorScopeService(session).cve_id_subquery(selected_vendor_ids).subquery()
                 query = query.filter(
                     Vulnerability.cve_id.in_(session.query(cves_unificados_sq.c.cve_id))
                 ).distinct()
@@ -2725,38 +2541,14 @@ def get_top_assigners():
         from sqlalchemy import func, desc
         session = db.session
         # Parse vendor_ids explícitos da query; fallback para preferências do usuário
-        explicit_vendor_ids: List[int] = []
+        from app.services.vendor_scope_service import VendorScopeService, parse_vendor_ids
+        vendor_scope = VendorScopeService(session)
         try:
-            raw_multi = request.args.getlist('vendor_ids')
-            raw_single = request.args.get('vendor_ids')
-            parsed: List[int] = []
-            for v in raw_multi:
-                for p in str(v).split(','):
-                    p = p.strip()
-                    if p.isdigit():
-                        parsed.append(int(p))
-            if raw_single:
-                for p in str(raw_single).split(','):
-                    p = p.strip()
-                    if p.isdigit():
-                        parsed.append(int(p))
-            if parsed:
-                explicit_vendor_ids = sorted(list(set(parsed)))
+            selected_vendor_ids: List[int] = vendor_scope.selected_vendor_ids(
+                parse_vendor_ids(request.args.getlist('vendor_ids'))
+            )
         except Exception:
-            explicit_vendor_ids = []
-
-        selected_vendor_ids: List[int] = explicit_vendor_ids[:]
-        if not selected_vendor_ids:
-            try:
-                from flask_login import current_user
-                from app.models.sync_metadata import SyncMetadata
-                if current_user.is_authenticated:
-                    key = f'user_vendor_preferences:{current_user.id}'
-                    pref = session.query(SyncMetadata).filter_by(key=key).first()
-                    if pref and pref.value:
-                        selected_vendor_ids = [int(x) for x in pref.value.split(',') if x.strip().isdigit()]
-            except Exception:
-                selected_vendor_ids = []
+            selected_vendor_ids = []
 
         # Query para contar CVEs por assigner, usando fallback para source_identifier (NVD 2.0)
         # Coalesce garante compatibilidade com dados onde "assigner" não é populado
@@ -2772,12 +2564,8 @@ def get_top_assigners():
         # Apply vendor scoping if present; otherwise use base query
         if selected_vendor_ids:
             try:
-                from app.models.cve_vendor import CVEVendor
-                results_query = (
-                    results_query
-                    .join(CVEVendor, CVEVendor.cve_id == Vulnerability.cve_id)
-                    .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                )
+                # Semi-join no escopo materializado: cada CVE conta uma vez mesmo com vários vendors
+                results_query = vendor_scope.apply(results_query, selected_vendor_ids)
             except Exception as e:
                 logger.warning(f"Top Assigners: falha ao aplicar filtro de vendor, usando fallback vazio. erro={e}")
                 data = {
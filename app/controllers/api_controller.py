@@ -362,22 +362,67 @@ def get_system_bootstrap() -> Response:
         current_app.logger.error(f"Erro ao obter bootstrap status: {e}", exc_info=True)
         return jsonify({'error': 'Erro ao obter bootstrap status'}), 500
 
+def _sync_progress_auth_error():
+    """Progresso é público até a primeira sincronização; depois exige administrador."""
+    allow_public = False
+    try:
+        first_done_meta = db.session.query(SyncMetadata).filter_by(key='nvd_first_sync_completed').first()
+        first_done_val = (first_done_meta.value or '').strip().lower() if first_done_meta and first_done_meta.value else ''
+        if first_done_val not in ('1','true','yes'):
+            allow_public = True
+    except Exception:
+        allow_public = True
+    if not allow_public:
+        if not getattr(current_user, 'is_authenticated', False):
+            return jsonify({'status': 'error', 'message': 'Auth required'}), 401
+        if not getattr(current_user, 'is_admin', False):
+            return jsonify({'status': 'error', 'message': 'Forbidden'}), 403
+    return None
+
+@api_v1_bp.route('/sync/progress/stream', methods=['GET'])
+def stream_sync_progress() -> Response:
+    """
+    Server-Sent Events com o progresso da sincronização.
+
+    Envia um evento ``snapshot`` com o estado completo e depois eventos ``progress``
+    apenas com os campos alterados, alimentados pelo canal de progresso (Redis
+    pub/sub ou local) sem consultar o banco a cada cliente. Acima de
+    SYNC_PROGRESS_STREAM_MAX conexões no processo responde 503 e o cliente volta
+    ao polling de /sync/progress.
+    """
+    auth_error = _sync_progress_auth_error()
+    if auth_error is not None:
+        return auth_error
+    from flask import stream_with_context
+    from app.utils.sync_progress import load_progress_from_db, sync_progress
+
+    def _load():
+        try:
+            return load_progress_from_db(db.session)
+        finally:
+            # Não manter uma conexão do pool presa durante o stream
+            db.session.remove()
+
+    limit = int(current_app.config.get('SYNC_PROGRESS_STREAM_MAX', 2) or 0)
+    if not sync_progress.try_open_stream(limit):
+        db.session.remove()
+        return jsonify({'status': 'error', 'message': 'Too many progress streams'}), 503, {'Retry-After': '30'}
+    db.session.remove()
+    max_duration = float(current_app.config.get('SYNC_PROGRESS_STREAM_TIMEOUT', 300.0) or 300.0)
+    response = Response(
+        stream_with_context(sync_progress.stream(_load, max_duration=max_duration)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+    response.call_on_close(sync_progress.close_stream)
+    return response
+
 @api_v1_bp.route('/sync/progress', methods=['GET'])
 def get_sync_progress() -> Response:
     try:
-        allow_public = False
-        try:
-            first_done_meta = db.session.query(SyncMetadata).filter_by(key='nvd_first_sync_completed').first()
-            first_done_val = (first_done_meta.value or '').strip().lower() if first_done_meta and first_done_meta.value else ''
-            if first_done_val not in ('1','true','yes'):
-                allow_public = True
-        except Exception:
-            allow_public = True
-        if not allow_public:
-            if not getattr(current_user, 'is_authenticated', False):
-                return jsonify({'status': 'error', 'message': 'Auth required'}), 401
-            if not getattr(current_user, 'is_admin', False):
-                return jsonify({'status': 'error', 'message': 'Forbidden'}), 403
+        auth_error = _sync_progress_auth_error()
+        if auth_error is not None:
+            return auth_error
         from app.models.sync_metadata import SyncMetadata
         from sqlalchemy import func
         count = int(db.session.query(func.count(Vulnerability.cve_id)).scalar() or 0)
@@ -390,25 +435,25 @@ def get_sync_progress() -> Response:
             saving_count = None
             saving_start = None
             try:
-                from app.services.redis_cache_service import RedisCacheService
-                cfg = {
-                    'REDIS_CACHE_ENABLED': current_app.config.get('REDIS_CACHE_ENABLED', False),
-                    'REDIS_URL': current_app.config.get('REDIS_URL', 'redis://localhost:6379/0'),
-                    'REDIS_HOST': current_app.config.get('REDIS_HOST', 'localhost'),
-                    'REDIS_PORT': current_app.config.get('REDIS_PORT', 6379),
-                    'REDIS_DB': current_app.config.get('REDIS_DB', 0),
-                    'REDIS_PASSWORD': current_app.config.get('REDIS_PASSWORD'),
-                    'CACHE_KEY_PREFIX': current_app.config.get('CACHE_KEY_PREFIX', 'nvd_cache:')
-                }
-                rc = RedisCacheService(cfg)
-                if getattr(rc, 'enabled', False) and getattr(rc, 'redis_client', None):
+                from app.services.redis_cache_service import get_cache_service
+                rc = get_cache_service()
+                if rc.available:
                     try:
-                        cv = rc.get('nvd_sync_progress_current', namespace='sync_status')
-                        tv = rc.get('nvd_sync_progress_total', namespace='sync_status')
-                        sv = rc.get('nvd_sync_progress_status', namespace='sync_status')
-                        lv = rc.get('nvd_sync_progress_last_cve', namespace='sync_status')
-                        sc = rc.get('nvd_sync_progress_saving', namespace='sync_status')
-                        ss = rc.get('nvd_sync_progress_saving_start', namespace='sync_status')
+                        # Uma única ida ao Redis (MGET) para todas as chaves de progresso
+                        values = rc.get_many([
+                            'nvd_sync_progress_current',
+                            'nvd_sync_progress_total',
+                            'nvd_sync_progress_status',
+                            'nvd_sync_progress_last_cve',
+                            'nvd_sync_progress_saving',
+                            'nvd_sync_progress_saving_start',
+                        ], namespace='sync_status')
+                        cv = values.get('nvd_sync_progress_current')
+                        tv = values.get('nvd_sync_progress_total')
+                        sv = values.get('nvd_sync_progress_status')
+                        lv = values.get('nvd_sync_progress_last_cve')
+                        sc = values.get('nvd_sync_progress_saving')
+                        ss = values.get('nvd_sync_progress_saving_start')
                         if isinstance(cv, (int, float, str)):
                             try: current_val = int(cv)
                             except Exception: current_val = None
@@ -431,18 +476,25 @@ def get_sync_progress() -> Response:
                 pass
             if (total is None) or (current_val is None) or (status_val is None) or (saving_start is None):
                 try:
-                    total_meta = db.session.query(SyncMetadata).filter_by(key='nvd_sync_progress_total').first()
-                    current_meta = db.session.query(SyncMetadata).filter_by(key='nvd_sync_progress_current').first()
-                    status_meta = db.session.query(SyncMetadata).filter_by(key='nvd_sync_progress_status').first()
-                    last_cve_meta = db.session.query(SyncMetadata).filter_by(key='nvd_sync_progress_last_cve').first()
-                    saving_meta = db.session.query(SyncMetadata).filter_by(key='nvd_sync_progress_saving').first()
-                    saving_start_meta = db.session.query(SyncMetadata).filter_by(key='nvd_sync_progress_saving_start').first()
-                    total = int(total_meta.value) if total_meta and total_meta.value and str(total_meta.value).isdigit() else total
-                    current_val = int(current_meta.value) if current_meta and current_meta.value and str(current_meta.value).isdigit() else current_val
-                    status_val = status_meta.value if status_meta else status_val
-                    last_cve_id = (last_cve_meta.value if last_cve_meta else last_cve_id)
-                    saving_count = int(saving_meta.value) if saving_meta and saving_meta.value and str(saving_meta.value).isdigit() else saving_count
-                    saving_start = int(saving_start_meta.value) if saving_start_meta and saving_start_meta.value and str(saving_start_meta.value).isdigit() else saving_start
+                    metas = dict(
+                        db.session.query(SyncMetadata.key, SyncMetadata.value).filter(SyncMetadata.key.in_([
+                            'nvd_sync_progress_total',
+                            'nvd_sync_progress_current',
+                            'nvd_sync_progress_status',
+                            'nvd_sync_progress_last_cve',
+                            'nvd_sync_progress_saving',
+                            'nvd_sync_progress_saving_start',
+                        ])).all()
+                    )
+                    def _meta_int(key, default):
+                        value = metas.get(key)
+                        return int(value) if value and str(value).isdigit() else default
+                    total = _meta_int('nvd_sync_progress_total', total)
+                    current_val = _meta_int('nvd_sync_progress_current', current_val)
+                    status_val = metas['nvd_sync_progress_status'] if 'nvd_sync_progress_status' in metas else status_val
+                    last_cve_id = metas['nvd_sync_progress_last_cve'] if 'nvd_sync_progress_last_cve' in metas else last_cve_id
+                    saving_count = _meta_int('nvd_sync_progress_saving', saving_count)
+                    saving_start = _meta_int('nvd_sync_progress_saving_start', saving_start)
                 except Exception:
                     pass
             overall_percentage = None
@@ -1868,10 +1920,7 @@ def get_dashboard_charts_data() -> Response:
     try:
         from app.services.vulnerability_service import VulnerabilityService
         # Imports adicionais para filtro por vendors
-        from sqlalchemy import union
         from app.models.cve_vendor import CVEVendor
-        from app.models.cve_product import CVEProduct
-        from app.models.product import Product
         from app.models.sync_metadata import SyncMetadata
         from flask_login import current_user
         
@@ -1909,18 +1958,8 @@ def get_dashboard_charts_data() -> Response:
         base_query = db.session.query(Vulnerability)
         if selected_vendor_ids:
             try:
-                cves_por_vendor = (
-                    db.session
-                    .query(CVEVendor.cve_id)
-                    .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                )
-                cves_por_produto_vendor = (
-                    db.session
-                    .query(CVEProduct.cve_id)
-                    .join(Product, Product.id == CVEProduct.product_id)
-                    .filter(Product.vendor_id.in_(selected_vendor_ids))
-                )
-                cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+                from app.services.vendor_scope_service import VendorScopeService
+                cves_unificados_sq = VendorScopeService(db.session).cve_id_subquery(selected_vendor_ids).subquery()
                 base_query = base_query.filter(
                     Vulnerability.cve_id.in_(db.session.query(cves_unificados_sq.c.cve_id))
                 ).distinct()
@@ -1949,47 +1988,30 @@ def get_dashboard_charts_data() -> Response:
             'data': [item[1] for item in severity_data]
         }
         
-        # Tendência semanal (últimas 8 semanas)
+        # Tendência semanal (últimas 8 semanas) e timeline (últimos 30 dias) a partir do agregado diário
+        from app.services.daily_stats_service import DailyStatsService
         end_date = datetime.now()
         start_date = end_date - timedelta(weeks=8)
-        
-        # Para SQLite, usar strftime para agrupar por semana
-        weekly_data = (
-            base_query
-            .with_entities(
-                func.strftime('%Y-%W', Vulnerability.published_date).label('week'),
-                func.count(Vulnerability.cve_id).label('count')
-            )
-            .filter(Vulnerability.published_date >= start_date)
-            .group_by(func.strftime('%Y-%W', Vulnerability.published_date))
-            .order_by('week')
-            .all()
-        )
+        daily = DailyStatsService(db.session).daily_counts(start_date, end_date, vendor_ids=selected_vendor_ids)
+        daily_totals = {day: sum(by_severity.values()) for day, by_severity in daily.items()}
+
+        # Semanas no mesmo formato do strftime('%Y-%W') do SQLite
+        weekly_totals: Dict[str, int] = {}
+        for day, count in daily_totals.items():
+            week = datetime.strptime(day, '%Y-%m-%d').strftime('%Y-%W')
+            weekly_totals[week] = weekly_totals.get(week, 0) + count
         
         weekly_trend = {
-            'labels': [f'Semana {item[0]}' if item[0] else 'Unknown' for item in weekly_data],
-            'data': [item[1] for item in weekly_data]
+            'labels': [f'Semana {week}' for week in sorted(weekly_totals)],
+            'data': [weekly_totals[week] for week in sorted(weekly_totals)]
         }
         
-        # Timeline de vulnerabilidades (últimos 30 dias)
-        timeline_start = end_date - timedelta(days=30)
-        
-        # Para SQLite, usar strftime para agrupar por data
-        timeline_data = (
-            base_query
-            .with_entities(
-                func.strftime('%Y-%m-%d', Vulnerability.published_date).label('date'),
-                func.count(Vulnerability.cve_id).label('count')
-            )
-            .filter(Vulnerability.published_date >= timeline_start)
-            .group_by(func.strftime('%Y-%m-%d', Vulnerability.published_date))
-            .order_by('date')
-            .all()
-        )
+        timeline_start = (end_date - timedelta(days=30)).strftime('%Y-%m-%d')
+        timeline_days = sorted(day for day in daily_totals if day >= timeline_start)
         
         vulnerability_timeline = {
-            'labels': [item[0] if item[0] else 'Unknown' for item in timeline_data],
-            'data': [item[1] for item in timeline_data]
+            'labels': timeline_days,
+            'data': [daily_totals[day] for day in timeline_days]
         }
         
         # Top 5 CVSS Scores
@@ -2027,6 +2049,36 @@ def get_dashboard_charts_data() -> Response:
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
 
+@api_v1_bp.route('/search/cves', methods=['GET'])
+def search_cves() -> Response:
+    """
+    GET /api/v1/search/cves?q=<texto>&cursor=<next_cursor>&limit=20&severity=&vendor=&year=
+    Busca textual ranqueada de CVEs com paginação por keyset e facetas.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'status': 'error', 'message': 'Parâmetro "q" é obrigatório.'}), 400
+
+    try:
+        from app.services.search_service import CVESearchService
+        cursor = request.args.get('cursor') or None
+        page = CVESearchService(db.session).search(
+            query,
+            cursor=cursor,
+            limit=max(min(request.args.get('limit', 20, type=int) or 20, 100), 1),
+            severity=request.args.get('severity') or None,
+            vendor_id=request.args.get('vendor', type=int),
+            year=request.args.get('year', type=int),
+            # Facetas e total apenas na primeira página
+            with_facets=cursor is None,
+        )
+        return jsonify(page.to_dict()), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Erro na busca de CVEs: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': 'Erro interno do servidor.'}), 500
+
+
 # IP geolocation lookup endpoint
 @api_v1_bp.route('/search/ip', methods=['GET'])
 def ip_lookup() -> Response:
@@ -341,23 +341,10 @@ def asset_detail(asset_id):
         severity_counts = {'critical': 0, 'high': 0, 'medium': 0, 'low': 0}
 
         if getattr(asset, 'vendor', None) and getattr(asset.vendor, 'id', None):
-            from sqlalchemy import union
-            from app.models.cve_vendor import CVEVendor
-            from app.models.cve_product import CVEProduct
+            from app.services.vendor_scope_service import VendorScopeService
 
             base_vuln_query = db.session.query(Vulnerability)
-            cves_por_vendor = (
-                db.session
-                .query(CVEVendor.cve_id)
-                .filter(CVEVendor.vendor_id == asset.vendor.id)
-            )
-            cves_por_produto_vendor = (
-                db.session
-                .query(CVEProduct.cve_id)
-                .join(Product, Product.id == CVEProduct.product_id)
-                .filter(Product.vendor_id == asset.vendor.id)
-            )
-            cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
+            cves_unificados_sq = VendorScopeService(db.session).cve_id_subquery([asset.vendor.id]).subquery()
             base_vuln_query = (
                 base_vuln_query
                 .filter(Vulnerability.cve_id.in_(db.session.query(cves_unificados_sq.c.cve_id)))
@@ -451,8 +451,15 @@ def search() -> str:
 
 
     # Lógica para exibir resultados da busca (GET)
-    search_results: List[Any] = [] # Placeholder
-    total_results: int = 0 # Placeholder
+    search_results: List[Any] = []
+    total_results: int = 0
+    search_facets: Dict[str, Any] = {}
+    next_cursor: Optional[str] = None
+    cursor: str = request.args.get('cursor', '').strip()
+    severity_filter: str = request.args.get('severity', '').strip()
+    vendor_filter = request.args.get('vendor', type=int)
+    year_filter = request.args.get('year', type=int)
+    page_size = max(min(request.args.get('per_page', 20, type=int) or 20, 100), 1)
 
     # GeoIP: posição padrão baseada no IP 8.8.8.8
     try:
@@ -469,12 +476,24 @@ def search() -> str:
 
     if query: # Só realiza a busca se houver um termo na URL (após GET ou redirecionamento)
         logger.info(f"Performing search for query: '{query}'")
-        # TODO: Add logic to perform the search (from DB or service)
-        # search_results = SearchService.search(query)
-        # total_results = len(search_results) # Ou obtido do service
-
-        # TODO: Implementar paginação para resultados da busca, se necessário
-
+        try:
+            from app.services.search_service import CVESearchService
+            page = CVESearchService(db.session).search(
+                query,
+                cursor=cursor or None,
+                limit=page_size,
+                severity=severity_filter or None,
+                vendor_id=vendor_filter,
+                year=year_filter,
+            )
+            search_results = page.results
+            total_results = page.total
+            search_facets = page.facets
+            next_cursor = page.next_cursor
+        except Exception as e:
+            logger.error(f"Search failed for query '{query}': {e}", exc_info=True)
+            db.session.rollback()
+            flash('Não foi possível concluir a busca no momento.', 'danger')
 
     return render_page(
         'search', # Passa a chave da rota
@@ -484,7 +503,13 @@ def search() -> str:
         map_center_lat=map_center_lat,
         map_center_lng=map_center_lng,
         map_center_label=map_center_label,
-        # TODO: Passar variáveis de paginação, se aplicável
+        search_facets=search_facets,
+        next_cursor=next_cursor,
+        cursor=cursor,
+        search_page_size=page_size,
+        severity_filter=severity_filter,
+        vendor_filter=vendor_filter,
+        year_filter=year_filter,
     )
 
 # ============================================================================
@@ -8,7 +8,7 @@ Responsável por processar solicitações de relatórios, compilar dados e gerar
 import logging
 import json
 from datetime import datetime, timedelta, timezone
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, current_app
 from flask.wrappers import Response
 from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.exceptions import BadRequest, NotFound, InternalServerError
@@ -34,6 +34,9 @@ from app.services.report_badge_service import ReportBadgeService
 from app.services.report_notification_service import ReportNotificationService, NotificationEvent, NotificationPriority
 from app.services.report_config_service import ReportConfigService
 from app.services.report_cache_service import ReportCacheService
+from app.services.report_job_service import (
+    PRIORITY_HIGH, PRIORITY_NORMAL, ReportJobCancelled, checkpoint, get_report_job_service,
+)
 
 # Schemas
 from app.schemas.report_schema import ReportResponseSchema, ReportContentSchema, ReportStatsSchema
@@ -638,7 +641,7 @@ def quick_create_report():
                     pass
 
                 try:
-                    _generate_report_async(report.id)
+                    _generate_report_async(report.id, priority=PRIORITY_HIGH)
                     flash('Relatório rápido criado e geração iniciada!', 'success')
                 except Exception as e:
                     logger.error(f"Erro ao gerar relatório rápido {report.id}: {e}")
@@ -864,7 +867,7 @@ def quick_create_report():
             
             # Iniciar geração
             try:
-                _generate_report_async(report.id)
+                _generate_report_async(report.id, priority=PRIORITY_HIGH)
                 flash('Relatório rápido criado e geração iniciada!', 'success')
             except Exception as e:
                 logger.error(f"Erro ao gerar relatório rápido {report.id}: {e}")
@@ -1019,6 +1022,10 @@ def delete_report(report_id):
             'title': report.title
         })
         
+        try:
+            _report_jobs().cancel(report.id)
+        except Exception as e:
+            logger.warning(f"Falha ao cancelar job do relatório {report.id}: {e}")
         db.session.delete(report)
         db.session.commit()
         
@@ -1163,18 +1170,52 @@ def api_report_status(report_id):
             logger.warning(f"Falha ao serializar status do relatório {report.id}: {status_err}")
             status_str = None
 
+        # Estado do job na fila de geração (queued/running/succeeded/failed/cancelled)
+        job_info = None
+        try:
+            service = _report_jobs()
+            job = service.latest_job(report.id)
+            if job is not None:
+                job_info = job.to_dict()
+                job_info['queue_position'] = service.queue_position(job)
+        except Exception as job_err:
+            logger.warning(f"Falha ao obter job do relatório {report.id}: {job_err}")
+
         return jsonify({
             'id': report.id,
             'status': status_str,
             'progress': progress,
             'error_message': error_msg,
-            'generated_at': generated_at
+            'generated_at': generated_at,
+            'job': job_info
         })
     except Exception as e:
         logger.error(f"Erro na API de status: {e}")
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
 
+@report_bp.route('/api/reports/<int:report_id>/cancel', methods=['POST'])
+def api_cancel_report(report_id):
+    """API para cancelar a geração de um relatório na fila ou em execução."""
+    try:
+        report = Report.query.filter(
+            Report.id == report_id,
+            Report.generated_by_id == current_user.id
+        ).first_or_404()
+        result = _report_jobs().cancel(report.id)
+        if result is None:
+            return jsonify({'success': False, 'error': 'Nenhuma geração em andamento'}), 409
+        if result == 'cancelled':
+            _mark_report_cancelled(report)
+        audit_log('cancel', 'report', str(report.id), {'title': report.title, 'result': result})
+        return jsonify({'success': True, 'id': report.id, 'job_status': result})
+    except NotFound:
+        raise
+    except Exception as e:
+        logger.error(f"Erro na API de cancelamento: {e}")
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+
 @report_bp.route('/api/stats', methods=['GET'])
 def api_report_stats():
     """API para estatísticas de relatórios."""
@@ -1317,11 +1358,50 @@ def api_notification_history():
 
 # Funções auxiliares
 
-def _generate_report_async(report_id):
+def _report_jobs():
+    return get_report_job_service(current_app._get_current_object(), _generate_report, _report_job_failed)
+
+
+def start_report_job_workers(app):
+    """Inicia as threads da fila de relatórios (retoma jobs pendentes após reinício)."""
+    if app.config.get('TESTING'):
+        return
+    service = get_report_job_service(app, _generate_report, _report_job_failed)
+    with app.app_context():
+        if service.tables_ready():
+            service.start()
+
+
+def _generate_report_async(report_id, priority=PRIORITY_NORMAL):
+    """
+    Enfileira a geração do relatório na fila persistente (report_jobs).
+    Sem a tabela de jobs, gera inline na thread do request como antes.
+    """
+    try:
+        job_id = _report_jobs().enqueue(report_id, priority=priority)
+    except Exception as e:
+        logger.warning(f"Fila de relatórios indisponível ({e}); gerando relatório {report_id} inline")
+        job_id = None
+    if job_id is not None:
+        logger.info(f"Relatório {report_id} enfileirado (job {job_id})")
+        return
+    try:
+        _generate_report(report_id)
+    except Exception:
+        # Falha já registrada no relatório por _generate_report
+        pass
+
+
+def _generate_report(report_id, attempt=1, max_attempts=1):
     """
-    Gera um relatório de forma assíncrona.
-    Em uma implementação real, isso seria executado em uma task queue (Celery, RQ, etc.)
+    Gera o relatório (executado pelas threads da fila de jobs).
+
+    Levanta a exceção em caso de falha para que o job seja reprocessado; o
+    relatório só é marcado como FAILED (e a notificação de falha enviada) na
+    última tentativa. `checkpoint()` entre as etapas interrompe jobs cancelados.
     """
+    final_attempt = attempt >= max_attempts
+    report_data = None
     try:
         report = Report.query.get(report_id)
         if not report:
@@ -1331,6 +1411,7 @@ def _generate_report_async(report_id):
         # Marcar como em processamento
         report.status = ReportStatus.GENERATING
         db.session.commit()
+        checkpoint()
         
         # Verificar cache primeiro
         cache_key = f"report_data_{report_id}"
@@ -1357,6 +1438,7 @@ def _generate_report_async(report_id):
         else:
             logger.info(f"Dados do relatório {report_id} obtidos do cache")
         
+        checkpoint()
         # Gerar conteúdo base
         content = _generate_base_content(report, report_data)
         
@@ -1365,6 +1447,7 @@ def _generate_report_async(report_id):
         if report.include_ai_analysis and report.ai_analysis_types:
             logger.info(f"Gerando análise de IA para relatório {report_id}")
             ai_analysis = _generate_ai_analysis(report, report_data)
+            checkpoint()
         
         # Gerar dados de gráficos se solicitado
         chart_data = {}
@@ -1405,6 +1488,7 @@ def _generate_report_async(report_id):
         except Exception:
             pass
 
+        checkpoint()
         # Compor conteúdo final conforme estrutura esperada pelo template
         try:
             composed_content = _compose_display_content(
@@ -1463,8 +1547,8 @@ def _generate_report_async(report_id):
                 'critical_vulnerabilities': critical_count,
                 'high_vulnerabilities': high_count,
                 'risk_score': risk_score,
-                'attempts': 1,
-                'max_attempts': 1,
+                'attempts': attempt,
+                'max_attempts': max_attempts,
             }
             meta = report.report_metadata or {}
             notify_enabled = bool(meta.get('notify_completion'))
@@ -1494,7 +1578,9 @@ def _generate_report_async(report_id):
             meta = report.report_metadata or {}
             if bool(meta.get('auto_export')):
                 export_format = (meta.get('export_format') or 'pdf').lower()
+                # O caminho fica nos metadados: não pode apontar para o cache de PDFs (sujeito a evict)
                 result = pdf_service.export_report(report, format_type=export_format)
+                result = pdf_service.persist_export(report, result)
                 filepath = result.get('filepath')
                 meta['auto_export_result'] = {
                     'format': export_format,
@@ -1509,51 +1595,89 @@ def _generate_report_async(report_id):
 
         logger.info(f"Relatório {report_id} gerado com sucesso")
         
+    except ReportJobCancelled:
+        logger.info(f"Geração do relatório {report_id} cancelada")
+        db.session.rollback()
+        report = Report.query.get(report_id)
+        if report:
+            _mark_report_cancelled(report)
+        raise
     except Exception as e:
         logger.error(f"Erro ao gerar relatório {report_id}: {e}")
+        db.session.rollback()
         report = Report.query.get(report_id)
-        if report:
-            report.status = ReportStatus.FAILED
+        if report and not final_attempt:
+            # Nova tentativa agendada pela fila; manter o relatório pendente
+            report.status = ReportStatus.PENDING
             meta = report.report_metadata or {}
-            meta['error_message'] = str(e)
+            meta['error_message'] = f"Tentativa falhou, nova tentativa agendada: {e}"
             report.report_metadata = meta
             db.session.commit()
-            
-            # Enviar notificação de falha (respeitando preferências)
-            try:
-                user = User.query.get(report.generated_by_id)
+            raise
+        if report:
+            _mark_report_failed(report, str(e), report_data, attempts=attempt, max_attempts=max_attempts)
+        raise
 
-                report_url = url_for('report.view_report', report_id=report.id, _external=True)
-                failure_payload = {
-                    'title': report.title,
-                    'type': report.report_type.value,
-                    'url': report_url,
-                    'created_at': report.created_at or datetime.now(timezone.utc),
-                    'created_by': (getattr(user, 'username', None) or getattr(user, 'email', None) or 'Sistema'),
-                    'scope': report.scope.value,
-                    'completed_at': report.generated_at,
-                    'failed_at': datetime.now(timezone.utc),
-                    'processing_time': 'N/A',
-                    'total_vulnerabilities': report_data.get('vulnerabilities', {}).get('total_vulnerabilities', 0) if 'vulnerabilities' in (report_data or {}) else 0,
-                    'risk_score': report_data.get('risks', {}).get('overall_score', 0) if 'risks' in (report_data or {}) else 0,
-                    'error_message': str(e),
-                    'attempts': 1,
-                    'max_attempts': 3,
-                }
 
-                meta = report.report_metadata or {}
-                notify_enabled = bool(meta.get('notify_completion'))
-                recipient_email = meta.get('notification_email')
+def _mark_report_failed(report, error, report_data=None, attempts=1, max_attempts=1):
+    """Marca o relatório como FAILED e envia a notificação de falha (respeitando preferências)."""
+    report.status = ReportStatus.FAILED
+    meta = report.report_metadata or {}
+    meta['error_message'] = error
+    report.report_metadata = meta
+    db.session.commit()
+
+    try:
+        user = User.query.get(report.generated_by_id)
+
+        report_url = url_for('report.view_report', report_id=report.id, _external=True)
+        failure_payload = {
+            'title': report.title,
+            'type': report.report_type.value,
+            'url': report_url,
+            'created_at': report.created_at or datetime.now(timezone.utc),
+            'created_by': (getattr(user, 'username', None) or getattr(user, 'email', None) or 'Sistema'),
+            'scope': report.scope.value,
+            'completed_at': report.generated_at,
+            'failed_at': datetime.now(timezone.utc),
+            'processing_time': 'N/A',
+            'total_vulnerabilities': report_data.get('vulnerabilities', {}).get('total_vulnerabilities', 0) if 'vulnerabilities' in (report_data or {}) else 0,
+            'risk_score': report_data.get('risks', {}).get('overall_score', 0) if 'risks' in (report_data or {}) else 0,
+            'error_message': error,
+            'attempts': attempts,
+            'max_attempts': max_attempts,
+        }
+
+        meta = report.report_metadata or {}
+        notify_enabled = bool(meta.get('notify_completion'))
+        recipient_email = meta.get('notification_email')
+
+        if notify_enabled:
+            notification_service.send_notification(
+                event=NotificationEvent.REPORT_FAILED,
+                report_data=failure_payload,
+                priority=NotificationPriority.HIGH,
+                custom_data={'recipient_email': recipient_email} if recipient_email else None,
+            )
+    except Exception as notify_error:
+        logger.warning(f"Erro ao enviar notificação de falha do relatório {report.id}: {notify_error}")
 
-                if notify_enabled:
-                    notification_service.send_notification(
-                        event=NotificationEvent.REPORT_FAILED,
-                        report_data=failure_payload,
-                        priority=NotificationPriority.HIGH,
-                        custom_data={'recipient_email': recipient_email} if recipient_email else None,
-                    )
-            except Exception as notify_error:
-                logger.warning(f"Erro ao enviar notificação de falha do relatório {report_id}: {notify_error}")
+
+def _report_job_failed(report_id, error, attempts, max_attempts):
+    """Falha de um job sem passar por _generate_report (worker parou na última tentativa)."""
+    report = Report.query.get(report_id)
+    if report:
+        _mark_report_failed(report, f"Falha na geração: {error}", attempts=attempts, max_attempts=max_attempts)
+
+
+def _mark_report_cancelled(report):
+    """Marca o relatório como interrompido pelo cancelamento do job."""
+    report.status = ReportStatus.FAILED
+    meta = report.report_metadata or {}
+    meta['error_message'] = 'Geração cancelada'
+    meta['cancelled_at'] = datetime.now(timezone.utc).isoformat()
+    report.report_metadata = meta
+    db.session.commit()
 
 
 def _generate_base_content(report, report_data):
@@ -1638,7 +1762,15 @@ def _generate_base_content(report, report_data):
 
 
 def _generate_ai_analysis(report, report_data):
-    """Gera análise de IA para o relatório."""
+    """
+    Gera análise de IA para o relatório.
+
+    Cada tipo solicitado vira uma tarefa independente; com AI_ANALYSIS_CONCURRENCY > 1
+    as tarefas rodam em paralelo (ReportAIService.run_analyses), com prazo por análise
+    (AI_ANALYSIS_TIMEOUT) e orçamento de tokens compartilhado (AI_REPORT_TOKEN_BUDGET),
+    de modo que o tempo total se aproxima da análise mais lenta. Análises que falham ou
+    estouram o prazo entram como resultado parcial sem interromper as demais.
+    """
     ai_analysis = {}
     
     def _normalize_ai_output(val, analysis_type):
@@ -1654,99 +1786,40 @@ def _generate_ai_analysis(report, report_data):
         }
     
     try:
+        # Metadados lidos aqui: as tarefas podem rodar em outras threads, fora desta sessão
+        meta = dict(report.report_metadata or {})
+        report_type_value = report.report_type.value
+        tasks = {}
         for analysis_type in report.ai_analysis_types:
-            if analysis_type == 'executive_summary':
-                val = ai_service.generate_executive_summary(
-                    report_data, report.report_type.value
-                )
-                ai_analysis['executive_summary'] = _normalize_ai_output(val, 'executive_summary')
-            elif analysis_type == 'technical_study':
-                # Estudo Técnico: enriquecer technical_details com notas FortiGate quando habilitado
-                try:
-                    enriched_report_data = dict(report_data or {})
-                    technical_details = dict(enriched_report_data.get('technical_analysis', {}))
-
-                    meta = report.report_metadata or {}
-                    fg_meta = meta.get('fortiguide', {})
-                    include_fg = bool(fg_meta.get('enabled'))
-                    versions = fg_meta.get('versions') or []
-
-                    if include_fg and versions:
-                        try:
-                            fg_service = FortinetReleaseNotesService()
-                            fg_notes = fg_service.get_fortigate_release_notes_multi_versions(versions=versions, limit=100)
-                            # Formatar notas em texto resumido para o prompt
-                            formatted = []
-                            items = fg_notes.get('items', fg_notes) if isinstance(fg_notes, dict) else fg_notes
-                            if isinstance(items, list):
-                                for it in items:
-                                    ver = it.get('version') or it.get('release') or 'N/A'
-                                    title = it.get('title') or it.get('summary') or it.get('description') or ''
-                                    date = it.get('date') or it.get('released_at') or ''
-                                    formatted.append(f"Versão {ver} ({date}): {title}")
-                            technical_details['FortiGate Release Notes'] = "\n".join(formatted) if formatted else 'Sem notas disponíveis.'
-                        except Exception as fg_err:
-                            logger.warning(f"Falha ao obter notas FortiGate: {fg_err}")
-
-                    enriched_report_data['technical_analysis'] = technical_details
-
-                    # Extrair configurações de ativos como base (se disponível)
-                    asset_configurations = enriched_report_data.get('assets', {}).get('asset_details', [])
-                    security_architecture = None
-
-                    val = ai_service.generate_technical_study(
-                        enriched_report_data, asset_configurations, security_architecture
-                    )
-                    ai_analysis['technical_study'] = _normalize_ai_output(val, 'technical_study')
-                except Exception as te_err:
-                    logger.error(f"Erro ao gerar estudo técnico: {te_err}")
-                    ai_analysis['technical_study'] = _normalize_ai_output(
-                        {'error': f'Falha ao gerar Estudo Técnico: {str(te_err)}'}, 'technical_study'
-                    )
-            elif analysis_type == 'business_impact':
-                # Obter atributos de ativos e mapeamentos CVE
-                asset_attributes = _get_asset_attributes(report_data.get('assets', {}))
-                cve_mappings = _get_cve_mappings(report_data.get('vulnerabilities', {}))
-                
-                val = ai_service.generate_business_impact_analysis(
-                    report_data, asset_attributes, cve_mappings
-                )
-                ai_analysis['business_impact'] = _normalize_ai_output(val, 'business_impact')
-            elif analysis_type == 'remediation_plan':
-                priority_vulns = _get_priority_vulnerabilities(report_data.get('vulnerabilities', {}))
-                
-                val = ai_service.generate_remediation_plan(
-                    report_data, priority_vulns
-                )
-                ai_analysis['remediation_plan'] = _normalize_ai_output(val, 'remediation_plan')
-            elif analysis_type == 'technical_analysis':
-                cve_details = _get_cve_details(report_data.get('vulnerabilities', {}))
-                
-                val = ai_service.generate_technical_analysis(
-                    report_data.get('vulnerabilities', {}), cve_details
-                )
-                ai_analysis['technical_analysis'] = _normalize_ai_output(val, 'technical_analysis')
-            elif analysis_type == 'cisa_kev_analysis':
-                # Nova análise específica para CISA KEV
-                cisa_kev_data = report_data.get('vulnerabilities', {}).get('cisa_kev_data', {})
-                val = ai_service.generate_cisa_kev_analysis(
-                    cisa_kev_data, report_data.get('vulnerabilities', {})
-                )
-                ai_analysis['cisa_kev_analysis'] = _normalize_ai_output(val, 'cisa_kev_analysis')
-            elif analysis_type == 'epss_analysis':
-                # Nova análise específica para EPSS
-                epss_data = report_data.get('vulnerabilities', {}).get('epss_data', {})
-                val = ai_service.generate_epss_analysis(
-                    epss_data, report_data.get('vulnerabilities', {})
-                )
-                ai_analysis['epss_analysis'] = _normalize_ai_output(val, 'epss_analysis')
-            elif analysis_type == 'vendor_product_analysis':
-                # Nova análise específica para vendors/products
-                vendor_product_data = report_data.get('vulnerabilities', {}).get('vendor_product_data', {})
-                val = ai_service.generate_vendor_product_analysis(
-                    vendor_product_data, report_data.get('vulnerabilities', {})
-                )
-                ai_analysis['vendor_product_analysis'] = _normalize_ai_output(val, 'vendor_product_analysis')
+            if analysis_type in tasks:
+                continue
+            task = _build_ai_task(analysis_type, report_data, meta, report_type_value)
+            if task is not None:
+                tasks[analysis_type] = task
+
+        concurrency = int(current_app.config.get('AI_ANALYSIS_CONCURRENCY', 4) or 1)
+        token_budget = int(current_app.config.get('AI_REPORT_TOKEN_BUDGET', 0) or 0)
+        if tasks and (concurrency > 1 or token_budget):
+            timeout = float(current_app.config.get('AI_ANALYSIS_TIMEOUT', 120) or 0) or None
+            results = ai_service.run_analyses(
+                tasks,
+                max_workers=concurrency,
+                timeout=timeout,
+                token_budget=token_budget or None,
+                on_timeout=lambda name: {
+                    'type': name,
+                    'markdown': f'_Análise não concluída no prazo de {int(timeout or 0)}s._',
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'timed_out': True,
+                },
+                on_error=lambda name, err: {'error': f'Falha ao gerar análise: {err}'},
+            )
+            for analysis_type, val in results.items():
+                if val is not None:
+                    ai_analysis[analysis_type] = _normalize_ai_output(val, analysis_type)
+        else:
+            for analysis_type, task in tasks.items():
+                ai_analysis[analysis_type] = _normalize_ai_output(task(), analysis_type)
     
     except Exception as e:
         logger.error(f"Erro ao gerar análise de IA: {e}")
@@ -1755,6 +1828,80 @@ def _generate_ai_analysis(report, report_data):
     return ai_analysis
 
 
+def _build_ai_task(analysis_type, report_data, meta, report_type_value):
+    """Função sem argumentos que gera uma análise de IA (None para tipos desconhecidos)."""
+    vulnerabilities = report_data.get('vulnerabilities', {})
+    if analysis_type == 'executive_summary':
+        return lambda: ai_service.generate_executive_summary(report_data, report_type_value)
+    if analysis_type == 'technical_study':
+        return lambda: _generate_technical_study(report_data, meta)
+    if analysis_type == 'business_impact':
+        # Obter atributos de ativos e mapeamentos CVE
+        asset_attributes = _get_asset_attributes(report_data.get('assets', {}))
+        cve_mappings = _get_cve_mappings(vulnerabilities)
+        return lambda: ai_service.generate_business_impact_analysis(report_data, asset_attributes, cve_mappings)
+    if analysis_type == 'remediation_plan':
+        priority_vulns = _get_priority_vulnerabilities(vulnerabilities)
+        return lambda: ai_service.generate_remediation_plan(report_data, priority_vulns)
+    if analysis_type == 'technical_analysis':
+        cve_details = _get_cve_details(vulnerabilities)
+        return lambda: ai_service.generate_technical_analysis(vulnerabilities, cve_details)
+    if analysis_type == 'cisa_kev_analysis':
+        # Nova análise específica para CISA KEV
+        cisa_kev_data = vulnerabilities.get('cisa_kev_data', {})
+        return lambda: ai_service.generate_cisa_kev_analysis(cisa_kev_data, vulnerabilities)
+    if analysis_type == 'epss_analysis':
+        # Nova análise específica para EPSS
+        epss_data = vulnerabilities.get('epss_data', {})
+        return lambda: ai_service.generate_epss_analysis(epss_data, vulnerabilities)
+    if analysis_type == 'vendor_product_analysis':
+        # Nova análise específica para vendors/products
+        vendor_product_data = vulnerabilities.get('vendor_product_data', {})
+        return lambda: ai_service.generate_vendor_product_analysis(vendor_product_data, vulnerabilities)
+    return None
+
+
+def _generate_technical_study(report_data, meta):
+    """Estudo Técnico: enriquecer technical_details com notas FortiGate quando habilitado."""
+    try:
+        enriched_report_data = dict(report_data or {})
+        technical_details = dict(enriched_report_data.get('technical_analysis', {}))
+
+        fg_meta = meta.get('fortiguide', {})
+        include_fg = bool(fg_meta.get('enabled'))
+        versions = fg_meta.get('versions') or []
+
+        if include_fg and versions:
+            try:
+                fg_service = FortinetReleaseNotesService()
+                fg_notes = fg_service.get_fortigate_release_notes_multi_versions(versions=versions, limit=100)
+                # Formatar notas em texto resumido para o prompt
+                formatted = []
+                items = fg_notes.get('items', fg_notes) if isinstance(fg_notes, dict) else fg_notes
+                if isinstance(items, list):
+                    for it in items:
+                        ver = it.get('version') or it.get('release') or 'N/A'
+                        title = it.get('title') or it.get('summary') or it.get('description') or ''
+                        date = it.get('date') or it.get('released_at') or ''
+                        formatted.append(f"Versão {ver} ({date}): {title}")
+                technical_details['FortiGate Release Notes'] = "\n".join(formatted) if formatted else 'Sem notas disponíveis.'
+            except Exception as fg_err:
+                logger.warning(f"Falha ao obter notas FortiGate: {fg_err}")
+
+        enriched_report_data['technical_analysis'] = technical_details
+
+        # Extrair configurações de ativos como base (se disponível)
+        asset_configurations = enriched_report_data.get('assets', {}).get('asset_details', [])
+        security_architecture = None
+
+        return ai_service.generate_technical_study(
+            enriched_report_data, asset_configurations, security_architecture
+        )
+    except Exception as te_err:
+        logger.error(f"Erro ao gerar estudo técnico: {te_err}")
+        return {'error': f'Falha ao gerar Estudo Técnico: {str(te_err)}'}
+
+
 def _generate_chart_data(report, report_data):
     """Gera dados para gráficos do relatório."""
     chart_data = {}
@@ -2341,8 +2488,13 @@ def add_template():
 def get_cache_stats():
     """Obtém estatísticas do cache."""
     try:
-        stats = cache_service.get_cache_stats()
-        
+        stats = cache_service.get_cache_statistics()
+        try:
+            from app.utils.llm_response_cache import get_llm_cache
+            stats['llm_responses'] = get_llm_cache().stats()
+        except Exception as e:
+            logger.debug(f"Estatísticas do cache de LLM indisponíveis: {e}")
+
         return jsonify({
             'success': True,
             'stats': stats
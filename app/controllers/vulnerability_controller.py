@@ -846,6 +846,36 @@ def list_vulnerabilities_ui():
             vendor_filter_provided=True
         )
 
+# Mapear category_tag para o "part" da CPE (a=software/application, o=os, h=hardware)
+# Incluir sinônimos para maior compatibilidade com a UI/links
+_VENDOR_CATEGORY_PARTS = {
+    'software': 'a',
+    'application': 'a',
+    'os': 'o',
+    'operating_system': 'o',
+    'hardware': 'h'
+}
+
+
+@vuln_ui_bp.route('/vendors/ids', methods=['GET'])
+@login_required
+def vendor_selection_ids():
+    """IDs de todos os vendors da tela de seleção para os filtros atuais (seleção global)."""
+    q = request.args.get('q', '', type=str)
+    category_tag = (request.args.get('category_tag', '', type=str) or
+                    request.args.get('catalog_tag', '', type=str))
+    selected_part = _VENDOR_CATEGORY_PARTS.get(category_tag, '')
+    try:
+        from app.services.vendor_stats_service import VendorStatsService
+        stats_query = VendorStatsService(db.session).vendor_page_query(selected_part, q)
+        vendor_ids = [int(r[0]) for r in stats_query.with_entities(Vendor.id).all()]
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.warning("Falha ao listar IDs de vendors via vendor_cve_stats.", exc_info=e)
+        return jsonify({'error': 'Falha ao listar vendors'}), 500
+    return jsonify({'vendor_ids': vendor_ids, 'total': len(vendor_ids)})
+
+
 @vuln_ui_bp.route('/vendors', methods=['GET'])
 @login_required
 def vendor_selection_ui():
@@ -899,15 +929,7 @@ def vendor_selection_ui():
             except Exception as e:
                 current_app.logger.warning("Falha ao carregar preferências de vendors do usuário.", exc_info=e)
 
-        # Mapear category_tag para o "part" da CPE (a=software/application, o=os, h=hardware)
-        # Incluir sinônimos para maior compatibilidade com a UI/links
-        part_map = {
-            'software': 'a',
-            'application': 'a',
-            'os': 'o',
-            'operating_system': 'o',
-            'hardware': 'h'
-        }
+        part_map = _VENDOR_CATEGORY_PARTS
         # Verificar se a categoria é válida
         if category_tag and category_tag not in part_map:
             current_app.logger.warning(f"Categoria inválida: {category_tag}")
@@ -915,6 +937,43 @@ def vendor_selection_ui():
             
         selected_part = part_map.get(category_tag, '')
 
+        # Caminho principal: agregado materializado vendor_cve_stats (contagem, busca e
+        # paginação numa consulta indexada). Os fallbacks abaixo só rodam enquanto o
+        # agregado está vazio (sem associações ou reconstrução em segundo plano).
+        try:
+            from app.services.vendor_stats_service import VendorStatsService
+            stats_service = VendorStatsService(db.session)
+            if stats_service.ensure_populated():
+                stats_query = stats_service.vendor_page_query(selected_part, q)
+                pagination = paginate_query(stats_query, page=page, per_page=per_page, error_out=False)
+                vendors_items = [
+                    {
+                        'id': row.id,
+                        'name': row.name,
+                        'cve_count': int(row.cve_count or 0),
+                        'critical_count': int(row.critical_count or 0),
+                        'high_count': int(row.high_count or 0),
+                        'last_published': row.last_published,
+                    }
+                    for row in pagination.items
+                ]
+                return render_template(
+                    'vulnerabilities/vendor_selection.html',
+                    vendors=vendors_items,
+                    pagination=pagination,
+                    current_category=category_tag or '',
+                    current_severity=current_severity,
+                    selected_vendor_ids=selected_vendor_ids,
+                    # IDs para "Selecionar Todos (Global)" só são buscados no clique
+                    all_vendor_ids_url=url_for(
+                        'vulnerability_ui.vendor_selection_ids',
+                        q=q or None, category_tag=category_tag or None,
+                    )
+                )
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.warning("Falha ao consultar vendor_cve_stats; usando fallback.", exc_info=e)
+
         # Pré-computar o conjunto de CVE IDs por "part" para utilizar nos fallbacks via JSON
         # Isso evita apresentar aplicações quando o filtro for "operating_system" ou "hardware".
         cve_ids_by_part = None
@@ -1958,25 +2017,8 @@ def vulnerability_details_by_severity(severity: str):
             applied_vendor_filter = False
             if selected_vendor_ids:
                 try:
-                    from sqlalchemy import union
-                    from app.models.cve_product import CVEProduct
-                    from app.models.product import Product
-                    from app.models.cve_vendor import CVEVendor
-                    # CVEs associados diretamente a vendors selecionados (rotular coluna para união estável)
-                    cves_por_vendor = (
-                        vuln_service.session
-                        .query(CVEVendor.cve_id.label('cve_id'))
-                        .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                    )
-                    # CVEs associados a produtos cujo vendor pertence aos selecionados
-                    cves_por_produto_vendor = (
-                        vuln_service.session
-                        .query(CVEProduct.cve_id.label('cve_id'))
-                        .join(Product, Product.id == CVEProduct.product_id)
-                        .filter(Product.vendor_id.in_(selected_vendor_ids))
-                    )
-                    # União com subquery nomeada para evitar conflitos de rótulo
-                    cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery('cves_unificados')
+                    from app.services.vendor_scope_service import VendorScopeService
+                    cves_unificados_sq = VendorScopeService(vuln_service.session).cve_id_subquery(selected_vendor_ids).subquery()
                     query = query.filter(
                         Vulnerability.cve_id.in_(vuln_service.session.query(cves_unificados_sq.c.cve_id))
                     ).distinct()
@@ -2085,23 +2127,9 @@ def vulnerability_details_by_severity(severity: str):
             # Aplicar filtro de vendors se selecionados
             if selected_vendor_ids:
                 try:
-                    from sqlalchemy import union
-                    from app.models.cve_vendor import CVEVendor
-                    from app.models.cve_product import CVEProduct
-                    from app.models.product import Product
+                    from app.services.vendor_scope_service import VendorScopeService
                     
-                    cves_por_vendor = (
-                        vuln_service.session
-                        .query(CVEVendor.cve_id.label('cve_id'))
-                        .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_por_produto_vendor = (
-                        vuln_service.session
-                        .query(CVEProduct.cve_id.label('cve_id'))
-                        .join(Product, Product.id == CVEProduct.product_id)
-                        .filter(Product.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery('cves_unificados')
+                    cves_unificados_sq = VendorScopeService(vuln_service.session).cve_id_subquery(selected_vendor_ids).subquery()
                     all_vulns_query = all_vulns_query.filter(
                         Vulnerability.cve_id.in_(vuln_service.session.query(cves_unificados_sq.c.cve_id))
                     ).distinct()
@@ -2686,125 +2714,69 @@ def get_cve_history_data():
             'N/A': 'LOW'
         }
         
-        # Query para dados diários agrupados por severidade
         from sqlalchemy import func
-        
-        daily_data = db.session.query(
-            func.date(Vulnerability.published_date).label('date'),
-            Vulnerability.base_severity,
-            func.count(Vulnerability.cve_id).label('count')
-        ).filter(
-            Vulnerability.published_date >= start_date,
-            Vulnerability.published_date <= end_date
-        )
+        from app.services.daily_stats_service import DailyStatsService
+        from app.services.vendor_scope_service import VendorScopeService, parse_vendor_ids
 
-        # Aplicar filtro por vendors selecionados (querystring e/ou preferências do usuário)
+        # Vendors selecionados: querystring (lista repetida e/ou CSV) ou preferências do usuário
         try:
-            # Suporta vendor_ids como lista repetida e/ou CSV único na querystring
-            raw_vendor_ids_list = request.args.getlist('vendor_ids') or []
-            raw_vendor_ids_param = request.args.get('vendor_ids')
-            selected_vendor_ids: list[int] = []
-            # Extrair IDs de vendor das duas formas
-            if raw_vendor_ids_list:
-                for item in raw_vendor_ids_list:
-                    parts = str(item).split(',')
-                    for p in parts:
-                        try:
-                            n = int(p.strip())
-                            selected_vendor_ids.append(n)
-                        except Exception:
-                            continue
-            elif raw_vendor_ids_param:
-                for p in raw_vendor_ids_param.split(','):
-                    try:
-                        n = int(p.strip())
-                        selected_vendor_ids.append(n)
-                    except Exception:
-                        continue
+            selected_vendor_ids = VendorScopeService(db.session).selected_vendor_ids(
+                parse_vendor_ids(request.args.getlist('vendor_ids'))
+            )
+        except Exception:
+            # Não bloquear o gráfico se houver erro ao resolver vendors
+            selected_vendor_ids = []
 
-            # Fallback: preferências persistidas do usuário autenticado
-            if not selected_vendor_ids and is_user_authenticated():
-                key = f'user_vendor_preferences:{current_user.id}'
-                pref = db.session.query(SyncMetadata).filter_by(key=key).first()
-                if pref and pref.value:
-                    selected_vendor_ids = [int(x) for x in pref.value.split(',') if x.strip().isdigit()]
+        severity_filter = severity.upper() if severity and severity.upper() in valid_severities else None
 
-            # Aplicar filtro via união dos CVEs associados diretamente ao vendor e via produtos do vendor
+        # Linhas (data, severidade, contagem): agregado diário quando não há filtro de CVSS
+        if cvss_min is None and cvss_max is None:
+            daily = DailyStatsService(db.session).daily_counts(
+                start_date, end_date, vendor_ids=selected_vendor_ids, severity=severity_filter
+            )
+            daily_rows = [
+                (date_str, level, count)
+                for date_str, by_severity in daily.items()
+                for level, count in by_severity.items()
+            ]
+        else:
+            day_expr = func.date(Vulnerability.published_date)
+            daily_data = db.session.query(
+                day_expr,
+                Vulnerability.base_severity,
+                func.count(Vulnerability.cve_id)
+            ).filter(
+                Vulnerability.published_date >= start_date,
+                Vulnerability.published_date <= end_date
+            )
             if selected_vendor_ids:
-                try:
-                    from sqlalchemy import union
-                    from app.models.cve_vendor import CVEVendor
-                    from app.models.cve_product import CVEProduct
-                    from app.models.product import Product
-
-                    cves_por_vendor = (
-                        db.session
-                        .query(CVEVendor.cve_id.label('cve_id'))
-                        .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_por_produto_vendor = (
-                        db.session
-                        .query(CVEProduct.cve_id.label('cve_id'))
-                        .join(Product, Product.id == CVEProduct.product_id)
-                        .filter(Product.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery('cves_unificados')
-
-                    daily_data = (
-                        daily_data
-                        .filter(
-                            Vulnerability.cve_id.in_(
-                                db.session.query(cves_unificados_sq.c.cve_id)
-                            )
-                        )
-                        .distinct()
-                    )
-                except Exception:
-                    # Em caso de erro silencioso, não bloquear o gráfico
-                    pass
-        except Exception:
-            # Não bloquear o gráfico se houver erro ao aplicar filtros de vendor
-            pass
-
-        # Aplicar filtros
-        if severity and severity.upper() in valid_severities:
-            daily_data = daily_data.filter(Vulnerability.base_severity == severity.upper())
-        
-        if cvss_min is not None:
-            daily_data = daily_data.filter(Vulnerability.cvss_score >= cvss_min)
-        
-        if cvss_max is not None:
-            daily_data = daily_data.filter(Vulnerability.cvss_score <= cvss_max)
-        
-        daily_data = daily_data.group_by(
-            func.date(Vulnerability.published_date),
-            Vulnerability.base_severity
-        ).order_by(func.date(Vulnerability.published_date)).all()
+                daily_data = VendorScopeService(db.session).apply(daily_data, selected_vendor_ids)
+            if severity_filter:
+                daily_data = daily_data.filter(Vulnerability.base_severity == severity_filter)
+            if cvss_min is not None:
+                daily_data = daily_data.filter(Vulnerability.cvss_score >= cvss_min)
+            if cvss_max is not None:
+                daily_data = daily_data.filter(Vulnerability.cvss_score <= cvss_max)
+            daily_rows = daily_data.group_by(day_expr, Vulnerability.base_severity).all()
         
         # Organizar dados por data
         chart_data = {}
         severity_totals = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
         
-        for row in daily_data:
-            if row.date:
-                # Verificar se row.date é string ou datetime
-                if isinstance(row.date, str):
-                    date_str = row.date
-                else:
-                    date_str = row.date.strftime('%Y-%m-%d')
-                
-                # Normaliza severidade para chaves do gráfico
-                raw_level = row.base_severity or 'LOW'
-                severity_level = severity_map.get(raw_level, 'LOW')
-                count = row.count
-                
-                if date_str not in chart_data:
-                    chart_data[date_str] = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
-                
-                if severity_level in chart_data[date_str]:
-                    chart_data[date_str][severity_level] = count
-                    if severity_level in severity_totals:
-                        severity_totals[severity_level] += count
+        for row_date, raw_level, count in daily_rows:
+            if not row_date:
+                continue
+            # func.date() pode retornar string (SQLite) ou date (PostgreSQL)
+            date_str = row_date if isinstance(row_date, str) else row_date.strftime('%Y-%m-%d')
+            
+            # Normaliza severidade para chaves do gráfico
+            severity_level = severity_map.get(raw_level or 'LOW', 'LOW')
+            
+            if date_str not in chart_data:
+                chart_data[date_str] = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
+            
+            chart_data[date_str][severity_level] += count
+            severity_totals[severity_level] += count
         
         # Preencher datas faltantes com zeros
         current_date = start_date.date()
@@ -2890,15 +2862,23 @@ def api_vulns_by_asset(asset_id: int):
 
 @vuln_api_legacy_bp.route('/export', methods=['GET'])
 def export_vulnerabilities_csv():
-    """Exporta vulnerabilidades em CSV.
+    """Exporta vulnerabilidades em CSV ou NDJSON, em streaming.
 
     Parâmetros:
     - severity: nível de severidade (critical, high, medium, low, all)
     - period: período (week, month, all)
+    - format: csv (padrão) ou ndjson
+    - compress: gzip para forçar Content-Encoding gzip, none para desativar;
+      por padrão comprime quando o cliente envia Accept-Encoding: gzip
+
+    As linhas são lidas por cursor (yield_per) apenas com as colunas exportadas
+    e escritas por um gerador, com memória constante mesmo com period=all.
     """
     try:
-        import csv
-        from io import StringIO
+        from flask import stream_with_context
+        from app.utils.vulnerability_export import (
+            gzip_stream, iter_export_rows, logged_stream, stream_csv, stream_ndjson,
+        )
 
         severity_param = (request.args.get('severity', 'all') or 'all').upper()
         period_param = (request.args.get('period', 'week') or 'week').lower()
@@ -2960,25 +2940,12 @@ def export_vulnerabilities_csv():
             # Aplicar filtro via união de CVEs por vendor e por produto de vendor
             if selected_vendor_ids:
                 try:
-                    from sqlalchemy import union
-                    from app.models.cve_vendor import CVEVendor
-                    from app.models.cve_product import CVEProduct
-                    from app.models.product import Product
-                    cves_por_vendor = (
-                        vuln_service.session
-                        .query(CVEVendor.cve_id.label('cve_id'))
-                        .filter(CVEVendor.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_por_produto_vendor = (
-                        vuln_service.session
-                        .query(CVEProduct.cve_id.label('cve_id'))
-                        .join(Product, Product.id == CVEProduct.product_id)
-                        .filter(Product.vendor_id.in_(selected_vendor_ids))
-                    )
-                    cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery('cves_unificados')
+                    from app.services.vendor_scope_service import VendorScopeService
+                    cves_unificados_sq = VendorScopeService(vuln_service.session).cve_id_subquery(selected_vendor_ids).subquery()
+                    # IN (subquery) não duplica linhas; dispensa DISTINCT sobre colunas JSON
                     query = query.filter(
                         Vulnerability.cve_id.in_(vuln_service.session.query(cves_unificados_sq.c.cve_id))
-                    ).distinct()
+                    )
                 except Exception:
                     # Em caso de falha silenciosa, segue sem filtro para não quebrar export
                     pass
@@ -2987,61 +2954,38 @@ def export_vulnerabilities_csv():
             pass
         query = query.order_by(Vulnerability.published_date.desc())
 
-        vulns = query.all()
-
-        # Preparar CSV
-        csv_buffer = StringIO()
-        writer = csv.writer(csv_buffer)
-        writer.writerow([
-            'CVE ID', 'Severidade', 'CVSS', 'Publicado em', 'Vendor', 'Produto', 'Patch Disponível', 'Assigner'
-        ])
-
-        def normalize_first(items, key_name='name'):
-            if not items:
-                return ''
-            first = items[0]
-            if isinstance(first, str):
-                return first
-            if isinstance(first, dict):
-                return str(first.get(key_name, ''))
-            # Tentativa de atributo .name
-            return str(getattr(first, key_name, '') or '')
+        export_format = (request.args.get('format', 'csv') or 'csv').lower()
+        if export_format not in ('csv', 'ndjson'):
+            export_format = 'csv'
+        compress_param = (request.args.get('compress') or '').lower()
+        if compress_param in ('none', '0', 'false'):
+            use_gzip = False
+        elif compress_param == 'gzip':
+            use_gzip = True
+        else:
+            use_gzip = 'gzip' in (request.headers.get('Accept-Encoding') or '').lower()
 
-        for v in vulns:
-            vendor = ''
-            product = ''
-            try:
-                vendor = normalize_first(getattr(v, 'nvd_vendors_data', None))
-            except Exception:
-                vendor = ''
-            try:
-                product = normalize_first(getattr(v, 'nvd_products_data', None))
-            except Exception:
-                product = ''
-
-            writer.writerow([
-                v.cve_id,
-                v.base_severity or '',
-                v.cvss_score if v.cvss_score is not None else '',
-                v.published_date.strftime('%Y-%m-%d') if v.published_date else '',
-                vendor,
-                product,
-                'Sim' if getattr(v, 'patch_available', False) else 'Não',
-                getattr(v, 'assigner', '') or ''
-            ])
-
-        csv_data = csv_buffer.getvalue()
-        csv_buffer.close()
+        batch_size = int(current_app.config.get('EXPORT_STREAM_BATCH_SIZE', 1000) or 1000)
+        rows = iter_export_rows(query, batch_size=batch_size)
+        chunks = stream_csv(rows) if export_format == 'csv' else stream_ndjson(rows)
+        if use_gzip:
+            chunks = gzip_stream(chunks)
 
         filename = f"vulnerabilities_{(severity_filter or 'ALL').lower()}_{datetime.now().strftime('%Y-%m-%d')}" \
-                   + (f"_{period_param}" if period_param in ['week','month'] else '') + ".csv"
+                   + (f"_{period_param}" if period_param in ['week','month'] else '') + f".{export_format}"
+        headers = {
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no',
+        }
+        if use_gzip:
+            headers['Content-Encoding'] = 'gzip'
+            headers['Vary'] = 'Accept-Encoding'
 
         return Response(
-            csv_data,
-            mimetype='text/csv; charset=utf-8',
-            headers={
-                'Content-Disposition': f'attachment; filename="{filename}"'
-            }
+            stream_with_context(logged_stream(chunks, 'Exportação de vulnerabilidades')),
+            mimetype='text/csv; charset=utf-8' if export_format == 'csv' else 'application/x-ndjson; charset=utf-8',
+            headers=headers,
         )
     except Exception as e:
         logger.error(f"Erro ao exportar CSV de vulnerabilidades: {e}", exc_info=True)
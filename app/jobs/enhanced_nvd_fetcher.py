@@ -17,7 +17,8 @@ except Exception:
     _HAS_PARALLEL = False
     _ParallelNVDService = None
 from app.services.vulnerability_service import VulnerabilityService
-from app.services.redis_cache_service import RedisCacheService
+from app.services.redis_cache_service import get_cache_service
+from app.utils.sync_progress import sync_progress
 from sqlalchemy import func
 
 
@@ -37,21 +38,17 @@ class EnhancedNVDFetcher:
         self.enable_cache = enable_cache
         self.enable_monitoring = enable_monitoring
         self.batch_size = batch_size
-        cfg = {
-            "REDIS_CACHE_ENABLED": app.config.get("REDIS_CACHE_ENABLED", False),
-            "REDIS_URL": app.config.get("REDIS_URL", "redis://localhost:6379/0"),
-            "REDIS_HOST": app.config.get("REDIS_HOST", "localhost"),
-            "REDIS_PORT": app.config.get("REDIS_PORT", 6379),
-            "REDIS_DB": app.config.get("REDIS_DB", 0),
-            "REDIS_PASSWORD": app.config.get("REDIS_PASSWORD"),
-            "CACHE_KEY_PREFIX": app.config.get("CACHE_KEY_PREFIX", "nvd_cache:"),
-        }
-        self.cache = RedisCacheService(cfg)
+        self.cache = get_cache_service(app)
+        # Processos de sync dedicados também publicam o progresso no tópico Redis
+        sync_progress.configure(app)
 
     def _cache_set(self, key: str, value: Any) -> None:
+        self._cache_set_many({key: value})
+
+    def _cache_set_many(self, values: Dict[str, Any]) -> None:
         try:
-            if getattr(self.cache, "enabled", False) and getattr(self.cache, "redis_client", None):
-                self.cache.set(key, value, ttl=300, namespace="sync_status")
+            if values and self.cache.available:
+                self.cache.set_many(values, ttl=300, namespace="sync_status")
         except Exception:
             pass
 
@@ -73,16 +70,18 @@ class EnhancedNVDFetcher:
                     db.session.rollback()
                 except Exception:
                     pass
-        for k in (
-            "nvd_sync_progress_current",
-            "nvd_sync_progress_total",
-            "nvd_sync_progress_status",
-            "nvd_sync_progress_last_cve",
-            "nvd_sync_progress_saving",
-            "nvd_sync_progress_saving_start",
-        ):
-            if k in updates:
-                self._cache_set(k, updates[k])
+        self._cache_set_many({
+            k: updates[k]
+            for k in (
+                "nvd_sync_progress_current",
+                "nvd_sync_progress_total",
+                "nvd_sync_progress_status",
+                "nvd_sync_progress_last_cve",
+                "nvd_sync_progress_saving",
+                "nvd_sync_progress_saving_start",
+            )
+            if k in updates
+        })
 
     async def sync_nvd(
         self,
@@ -102,6 +101,8 @@ class EnhancedNVDFetcher:
                 "DB_BATCH_SIZE": self.app.config.get("DB_BATCH_SIZE", 1000),
                 "FULL_SYNC_DEFAULT_PUB_START_DAYS": 120,
                 "NVD_MAX_WINDOW_DAYS": 120,
+                "NVD_PIPELINE_DEPTH": self.app.config.get("NVD_PIPELINE_DEPTH", 1),
+                "NVD_PIPELINE_QUEUE_SIZE": self.app.config.get("NVD_PIPELINE_QUEUE_SIZE", 2),
             }
             if use_parallel and _HAS_PARALLEL and _ParallelNVDService is not None:
                 service = _ParallelNVDService(config=config, max_concurrent_requests=self.max_workers)
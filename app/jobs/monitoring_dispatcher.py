@@ -1,18 +1,30 @@
 # project/jobs/monitoring_dispatcher.py (Assumindo que está na pasta 'jobs' dentro de 'project')
 
 import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, union
 from sqlalchemy.orm import joinedload, Session # Importar Session para type hinting
 from sqlalchemy.exc import SQLAlchemyError # Importar exceção de DB
-from flask import Flask # Importar Flask para type hinting, se necessário para contexto
 # Importação CORRETA da instância db do pacote extensions
 from app.extensions import db
 # Importações CORRETAS dos modelos (Assumindo que estão em project/models)
 from app.models.monitoring_rule import MonitoringRule # Corrigido
-from app.models.vulnerability import Vulnerability # Corrigido
+from app.models.monitoring_rule_cursor import MonitoringRuleCursor
+from app.models.vulnerability import Vulnerability, ingestion_time # Corrigido
 from app.models.vendor import Vendor # Corrigido (assumindo este modelo existe e está relacionado a Vulnerability)
 
 logger = logging.getLogger(__name__)
 
+# Posição (written_at, cve_id) em `vulnerabilities`; ordem total usada como cursor.
+# written_at é o momento da gravação local (não o lastModified do NVD), então CVEs
+# gravadas depois de uma avaliação sempre ficam à frente do cursor.
+Position = Tuple[datetime, str]
+
 # TODO: Mover a lógica de envio de e-mail para um serviço separado (ex: project/services/email_service.py)
 class EmailService:
      @staticmethod
@@ -23,55 +35,318 @@ class EmailService:
          pass
 
 
+def _as_list(value: Any) -> List[Any]:
+    if value is None or value == '':
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [v for v in value if v not in (None, '')]
+    return [v.strip() for v in str(value).split(',') if v.strip()]
+
+
+@dataclass
+class CompiledRule:
+    """Regra pré-compilada para avaliação em memória sobre o delta de CVEs."""
+    rule: MonitoringRule
+    cursor: Position
+    severities: FrozenSet[str] = frozenset()
+    min_cvss: Optional[float] = None
+    vendor_ids: FrozenSet[int] = frozenset()
+    pattern: Optional[re.Pattern] = None
+
+    @classmethod
+    def from_rule(cls, rule: MonitoringRule, cursor: Position, vendor_ids_by_name: Dict[str, int]) -> 'CompiledRule':
+        """Lê `conditions` (JSON): query/keywords, severities, min_cvss, vendor_ids e vendors (nomes)."""
+        conditions = rule.conditions if isinstance(rule.conditions, dict) else {}
+        terms = _as_list(conditions.get('query') or conditions.get('keywords'))
+        if len(terms) == 1 and isinstance(terms[0], str):
+            terms = terms[0].split()
+        severities = _as_list(conditions.get('severities') or conditions.get('severity'))
+        vendor_ids = {int(v) for v in _as_list(conditions.get('vendor_ids') or conditions.get('vendor_id'))
+                      if str(v).isdigit()}
+        for name in _as_list(conditions.get('vendors')):
+            vendor_id = vendor_ids_by_name.get(str(name).strip().lower())
+            if vendor_id is not None:
+                vendor_ids.add(vendor_id)
+        min_cvss = conditions.get('min_cvss')
+        pattern = None
+        if terms:
+            # Todos os termos devem ocorrer (substring, sem diferenciar maiúsculas), como o antigo ILIKE
+            pattern = re.compile(''.join(f'(?=.*?{re.escape(str(t))})' for t in terms), re.IGNORECASE | re.DOTALL)
+        return cls(
+            rule=rule,
+            cursor=cursor,
+            severities=frozenset(str(s).upper() for s in severities),
+            min_cvss=float(min_cvss) if min_cvss not in (None, '') else None,
+            vendor_ids=frozenset(vendor_ids),
+            pattern=pattern,
+        )
+
+    @property
+    def needs_vendors(self) -> bool:
+        return bool(self.vendor_ids)
+
+    def matches(self, row, vendor_ids: FrozenSet[int]) -> bool:
+        if (row.written_at, row.cve_id) <= self.cursor:
+            return False
+        if self.severities and str(row.base_severity or '').upper() not in self.severities:
+            return False
+        if self.min_cvss is not None and (row.cvss_score or 0.0) < self.min_cvss:
+            return False
+        if self.vendor_ids and not (self.vendor_ids & vendor_ids):
+            return False
+        if self.pattern is not None and not self.pattern.match(f"{row.cve_id} {row.description or ''}"):
+            return False
+        return True
+
+
+@dataclass
+class RuleMatches:
+    compiled: CompiledRule
+    vulnerabilities: List[Any] = field(default_factory=list)
+    total: int = 0
+
+
 class MonitoringDispatcher:
     """
     Dispatcher responsável por encontrar vulnerabilidades correspondentes a regras
     de monitoramento ativas e despachar alertas.
+
+    A avaliação é incremental: cada regra guarda um cursor (written_at, cve_id) em
+    `monitoring_rule_cursors`; a cada execução apenas as CVEs gravadas após o menor
+    cursor são lidas (em páginas por keyset) e avaliadas contra todas as regras
+    pré-compiladas numa única passada. Os alertas são agrupados por usuário.
+
+    CVEs gravadas há menos de `settle_seconds` ficam para a próxima execução: um
+    lote ainda não confirmado pode ter written_at anterior ao de linhas já visíveis.
     """
 
     # Reduzir dependência da sessão no __init__. A sessão pode ser passada para os métodos.
     # Ou, se usar um padrão de repositório/serviço, o dispatcher interage com estes.
-    def __init__(self, email_service: EmailService = None): # Pode injetar serviços necessários
+    def __init__(self, email_service: EmailService = None, batch_size: int = 500, max_listed: int = 10,
+                 settle_seconds: Optional[float] = None): # Pode injetar serviços necessários
         self.email_service = email_service or EmailService()
-        # self.db_session = db_session # Remover acoplamento direto, usar db.session no método
+        self.batch_size = batch_size
+        self.max_listed = max_listed
+        self.settle_seconds = settle_seconds
+
+    def _settled_until(self) -> datetime:
+        """Maior written_at avaliado nesta execução (agora - MONITORING_SETTLE_SECONDS)."""
+        settle = self.settle_seconds
+        if settle is None:
+            try:
+                from flask import current_app
+                settle = float(current_app.config.get('MONITORING_SETTLE_SECONDS', 300.0))
+            except Exception:
+                settle = 300.0
+        return ingestion_time() - timedelta(seconds=max(0.0, settle))
+
+    # ------------------------------------------------------------------
+    # Cursores
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _high_water(db_session: Session) -> Position:
+        """Posição da última CVE gravada (ponto de partida para regras novas)."""
+        row = (
+            db_session.query(Vulnerability.written_at, Vulnerability.cve_id)
+            .filter(Vulnerability.written_at.isnot(None))
+            .order_by(Vulnerability.written_at.desc(), Vulnerability.cve_id.desc())
+            .first()
+        )
+        return (row[0], row[1]) if row else (datetime.min, '')
+
+    def _load_cursors(self, db_session: Session, rules: List[MonitoringRule]) -> Dict[int, Position]:
+        """Cursores das regras; regras sem cursor começam na marca d'água atual (sem alertar o histórico)."""
+        existing = {
+            c.rule_id: c
+            for c in db_session.query(MonitoringRuleCursor)
+            .filter(MonitoringRuleCursor.rule_id.in_([r.id for r in rules]))
+        }
+        positions: Dict[int, Position] = {}
+        high_water = None
+        for rule in rules:
+            cursor = existing.get(rule.id)
+            if cursor is None:
+                high_water = high_water or self._high_water(db_session)
+                db_session.add(MonitoringRuleCursor(rule_id=rule.id, written_at=high_water[0], cve_id=high_water[1]))
+                positions[rule.id] = high_water
+            else:
+                positions[rule.id] = (cursor.written_at, cursor.cve_id or '')
+        db_session.flush()
+        return positions
+
+    def _advance_cursors(self, db_session: Session, rule_ids: Iterable[int], position: Position, notified: bool) -> None:
+        values: Dict[str, Any] = {'written_at': position[0], 'cve_id': position[1], 'updated_at': datetime.now(timezone.utc)}
+        if notified:
+            values['last_notified_at'] = datetime.now(timezone.utc)
+        ids = list(rule_ids)
+        if not ids:
+            return
+        db_session.query(MonitoringRuleCursor).filter(
+            MonitoringRuleCursor.rule_id.in_(ids),
+            or_(
+                MonitoringRuleCursor.written_at < position[0],
+                and_(MonitoringRuleCursor.written_at == position[0], MonitoringRuleCursor.cve_id < position[1]),
+            ),
+        ).update(values, synchronize_session=False)
+
+    # ------------------------------------------------------------------
+    # Delta de CVEs
+    # ------------------------------------------------------------------
+    def _iter_delta(self, db_session: Session, since: Position, until: datetime) -> Iterator[List[Any]]:
+        """Páginas de CVEs com (written_at, cve_id) > since e written_at <= until, em ordem crescente."""
+        position = since
+        while True:
+            rows = (
+                db_session.query(
+                    Vulnerability.cve_id,
+                    Vulnerability.description,
+                    Vulnerability.base_severity,
+                    Vulnerability.cvss_score,
+                    Vulnerability.published_date,
+                    Vulnerability.last_update,
+                    Vulnerability.written_at,
+                )
+                .filter(Vulnerability.written_at <= until)
+                .filter(or_(
+                    Vulnerability.written_at > position[0],
+                    and_(Vulnerability.written_at == position[0], Vulnerability.cve_id > position[1]),
+                ))
+                .order_by(Vulnerability.written_at.asc(), Vulnerability.cve_id.asc())
+                .limit(self.batch_size)
+                .all()
+            )
+            if not rows:
+                return
+            yield rows
+            position = (rows[-1].written_at, rows[-1].cve_id)
+            if len(rows) < self.batch_size:
+                return
 
-    def dispatch_alerts(self, db_session: Session) -> int: # Passar sessão explicitamente
+    @staticmethod
+    def _vendor_ids_for(db_session: Session, cve_ids: List[str]) -> Dict[str, FrozenSet[int]]:
+        """Vendors de cada CVE (diretos e via produtos), numa consulta por página."""
+        from app.models.cve_product import CVEProduct
+        from app.models.cve_vendor import CVEVendor
+        from app.models.product import Product
+
+        pairs = union(
+            select(CVEVendor.cve_id, CVEVendor.vendor_id).where(CVEVendor.cve_id.in_(cve_ids)),
+            select(CVEProduct.cve_id, Product.vendor_id)
+            .join(Product, Product.id == CVEProduct.product_id)
+            .where(CVEProduct.cve_id.in_(cve_ids)),
+        )
+        grouped: Dict[str, set] = defaultdict(set)
+        for cve_id, vendor_id in db_session.execute(pairs):
+            if vendor_id is not None:
+                grouped[cve_id].add(vendor_id)
+        return {cve_id: frozenset(ids) for cve_id, ids in grouped.items()}
+
+    def compile_rules(self, db_session: Session, rules: List[MonitoringRule], cursors: Dict[int, Position]) -> List[CompiledRule]:
+        names = {
+            str(n).strip().lower()
+            for rule in rules if isinstance(rule.conditions, dict)
+            for n in _as_list(rule.conditions.get('vendors'))
+        }
+        vendor_ids_by_name: Dict[str, int] = {}
+        if names:
+            for vendor_id, name in db_session.query(Vendor.id, func.lower(Vendor.name)).filter(func.lower(Vendor.name).in_(names)):
+                vendor_ids_by_name[name] = vendor_id
+        compiled = []
+        for rule in rules:
+            try:
+                compiled.append(CompiledRule.from_rule(rule, cursors[rule.id], vendor_ids_by_name))
+            except Exception as e:
+                logger.warning(f"Ignoring monitoring rule {rule.id}: invalid conditions ({e}).")
+        return compiled
+
+    def evaluate(self, db_session: Session, compiled: List[CompiledRule]) -> Tuple[Dict[int, RuleMatches], Optional[Position]]:
+        """Avalia todas as regras sobre o delta desde o menor cursor.
+
+        Returns:
+            (correspondências por rule_id, última posição lida ou None se não houve delta)
+        """
+        matches: Dict[int, RuleMatches] = {}
+        if not compiled:
+            return matches, None
+        since = min(c.cursor for c in compiled)
+        by_severity: Dict[str, List[CompiledRule]] = defaultdict(list)
+        any_severity: List[CompiledRule] = []
+        for c in compiled:
+            if c.severities:
+                for sev in c.severities:
+                    by_severity[sev].append(c)
+            else:
+                any_severity.append(c)
+        needs_vendors = any(c.needs_vendors for c in compiled)
+
+        last: Optional[Position] = None
+        for page in self._iter_delta(db_session, since, self._settled_until()):
+            vendors = self._vendor_ids_for(db_session, [r.cve_id for r in page]) if needs_vendors else {}
+            for row in page:
+                row_vendors = vendors.get(row.cve_id, frozenset())
+                for c in by_severity.get(str(row.base_severity or '').upper(), []) + any_severity:
+                    if c.matches(row, row_vendors):
+                        bucket = matches.setdefault(c.rule.id, RuleMatches(compiled=c))
+                        bucket.total += 1
+                        if len(bucket.vulnerabilities) < self.max_listed:
+                            bucket.vulnerabilities.append(row)
+            last = (page[-1].written_at, page[-1].cve_id)
+        return matches, last
+
+    # ------------------------------------------------------------------
+    # Despacho
+    # ------------------------------------------------------------------
+    def dispatch_alerts(self, db_session: Session, rule_ids: Optional[List[int]] = None) -> int: # Passar sessão explicitamente
         """
-        Busca regras de monitoramento ativas, encontra vulnerabilidades correspondentes
-        e despacha alertas.
+        Avalia as regras ativas sobre as CVEs novas e envia um alerta por usuário.
 
-        Retorna o número total de alertas despachados.
+        Retorna o número total de alertas (e-mails) despachados.
         """
         alerts_dispatched_count = 0
         logger.info("Starting monitoring alert dispatch.")
         try:
             # Buscar regras ativas do usuário, carregando o usuário junto
-            rules = db_session.query(MonitoringRule)\
+            query = db_session.query(MonitoringRule)\
                                .filter_by(is_active=True)\
-                               .options(joinedload(MonitoringRule.user))\
-                               .all()
+                               .options(joinedload(MonitoringRule.user))
+            if rule_ids:
+                query = query.filter(MonitoringRule.id.in_(rule_ids))
+            rules = query.all()
             logger.info(f"Found {len(rules)} active monitoring rules.")
+            if not rules:
+                return 0
+
+            cursors = self._load_cursors(db_session, rules)
+            compiled = self.compile_rules(db_session, rules, cursors)
+            matches, last = self.evaluate(db_session, compiled)
+            if last is None:
+                db_session.commit()
+                logger.info("No new vulnerabilities since last dispatch.")
+                return 0
+
+            by_user: Dict[int, List[RuleMatches]] = defaultdict(list)
+            for bucket in matches.values():
+                by_user[bucket.compiled.rule.user_id].append(bucket)
+
+            failed_users = set()
+            for user_id, buckets in by_user.items():
+                if self.send_user_alert(buckets):
+                    alerts_dispatched_count += 1
+                else:
+                    failed_users.add(user_id)
 
-            for rule in rules:
-                try:
-                    # Buscar vulnerabilidades para a regra atual
-                    vulnerabilities = self.fetch_vulnerabilities(db_session, rule) # Passar sessão
-                    if vulnerabilities:
-                        logger.info(f"Rule '{rule.name}' (user={rule.user.username}) found {len(vulnerabilities)} new vulnerabilities.")
-                        self.send_alert(rule, vulnerabilities) # Passar vulnerabilidades encontradas
-                        alerts_dispatched_count += 1
-                    else:
-                        logger.debug(f"Rule '{rule.name}' (user={rule.user.username}) found no new vulnerabilities.")
-                except SQLAlchemyError as db_err:
-                    logger.error(f"DB error processing rule {rule.id} (user={rule.user.username}).", exc_info=db_err)
-                    # Continuar para a próxima regra
-                except Exception as e:
-                    logger.error(f"Error processing rule {rule.id} (user={rule.user.username}).", exc_info=e)
-                    # Continuar para a próxima regra
+            # Regras de usuários cujo envio falhou mantêm o cursor para nova tentativa
+            notified = {rule_id for rule_id, b in matches.items() if b.compiled.rule.user_id not in failed_users}
+            silent = [c.rule.id for c in compiled if c.rule.id not in matches]
+            self._advance_cursors(db_session, notified, last, notified=True)
+            self._advance_cursors(db_session, silent, last, notified=False)
+            db_session.commit()
 
         except SQLAlchemyError as e:
-            logger.error("DB error fetching active monitoring rules.", exc_info=e)
+            db_session.rollback()
+            logger.error("DB error during monitoring dispatch.", exc_info=e)
         except Exception as e:
+            db_session.rollback()
             logger.error("An unexpected error occurred during dispatch_alerts.", exc_info=e)
 
 
@@ -80,100 +355,69 @@ class MonitoringDispatcher:
 
 
     # Passar sessão explicitamente para este método
-    def fetch_vulnerabilities(self, db_session: Session, rule: MonitoringRule) -> List[Vulnerability]: # Adicionado type hinting
+    def fetch_vulnerabilities(self, db_session: Session, rule: MonitoringRule) -> List[Any]: # Adicionado type hinting
         """
-        Busca vulnerabilidades do banco de dados que correspondem aos critérios de uma regra.
-        TODO: Implementar lógica para buscar APENAS vulnerabilidades NOVAS desde a última notificação para esta regra.
+        Pré-visualiza as vulnerabilidades novas (após o cursor) de uma regra, sem avançar o cursor.
         """
-        query = db_session.query(Vulnerability) # Usar a sessão passada
-
-        # Aplicar filtros da regra
-        if rule.vendor_id:
-            # Assumindo que Vulnerability tem uma relação 'vendors' ou pode ser unido a Vendor
-            # A lógica abaixo pode precisar de ajuste dependendo do seu modelo
-            # query = query.join(Vulnerability.vendors).filter(Vendor.id == rule.vendor_id) # Exemplo, verificar relação
-            # TODO: Se Vulnerability não tem relação direta com Vendor, pode precisar de uma tabela de associação
-            pass  # Temporariamente desabilitado
-
-        if rule.severity_filter:
-            query = query.filter(Vulnerability.base_severity == rule.severity_filter)
-
-        if rule.query:
-            # Usar ilike para busca case-insensitive
-            query = query.filter(Vulnerability.description.ilike(f"%{rule.query}%"))
-
-        # TODO: Adicionar filtro de data ou outro mecanismo para buscar apenas NOVAS vulnerabilidades
-        # Ex: query = query.filter(Vulnerability.published_date > rule.last_notified_date)
-        # Isso requer um campo last_notified_date no modelo MonitoringRule e lógica para atualizá-lo.
-
         try:
-            # Executar a query, ordenar e limitar
-            vulnerabilities = query.order_by(Vulnerability.published_date.desc()).limit(10).all()
-            return vulnerabilities
+            cursors = self._load_cursors(db_session, [rule])
+            compiled = self.compile_rules(db_session, [rule], cursors)
+            matches, _ = self.evaluate(db_session, compiled)
+            bucket = matches.get(rule.id)
+            return bucket.vulnerabilities if bucket else []
         except SQLAlchemyError as e:
             logger.error(f"DB error fetching vulnerabilities for rule {rule.id}.", exc_info=e)
             return [] # Retornar lista vazia em caso de erro
 
 
-    # Passar rule e vulnerabilities encontradas
-    def send_alert(self, rule: MonitoringRule, vulnerabilities: List[Vulnerability]) -> None: # Adicionado type hinting
+    def send_user_alert(self, buckets: List[RuleMatches]) -> bool:
         """
-        Prepara e envia um alerta (e-mail) para o usuário associado à regra.
-        TODO: Atualizar rule.last_notified_date após envio bem-sucedido.
+        Envia um único e-mail ao usuário com as correspondências de todas as suas regras.
         """
-        if not rule.user or not rule.user.email:
-            logger.warning(f"Rule {rule.id} has no associated user or email. Cannot send alert.")
-            return
+        user = buckets[0].compiled.rule.user
+        if not user or not user.email:
+            logger.warning(f"User of rules {[b.compiled.rule.id for b in buckets]} has no email. Cannot send alert.")
+            return False
 
-        user_email = rule.user.email
-        # Assunto e conteúdo do e-mail
-        subject = f"Alert: New vulnerabilities matching your rule ({rule.name or rule.query})" # Usar nome da regra se existir
-        # Criar um conteúdo mais detalhado ou link para a UI
-        content = "Recent vulnerabilities found for your monitoring rule:\n\n" + "\n".join(
-            f"- {v.cve_id}: {v.description[:150]}... Severity: {v.base_severity} (Published: {v.published_date.strftime('%Y-%m-%d')})" # Formatar data
-            for v in vulnerabilities
-        ) + "\n\nView all matching vulnerabilities on the platform." # TODO: Adicionar link real
+        total = sum(b.total for b in buckets)
+        subject = f"Alert: {total} new vulnerabilities matching your monitoring rules"
+        sections = []
+        for bucket in buckets:
+            rule = bucket.compiled.rule
+            lines = [
+                f"- {v.cve_id}: {(v.description or '')[:150]}... Severity: {v.base_severity} (Published: {v.published_date.strftime('%Y-%m-%d')})"
+                for v in bucket.vulnerabilities
+            ]
+            if bucket.total > len(bucket.vulnerabilities):
+                lines.append(f"... and {bucket.total - len(bucket.vulnerabilities)} more.")
+            sections.append(f"Rule '{rule.name}' ({bucket.total} new):\n" + "\n".join(lines))
+        content = "\n\n".join(sections) + "\n\nView all matching vulnerabilities on the platform." # TODO: Adicionar link real
 
         # Usar o serviço de e-mail injetado
         try:
-            self.email_service.send_email(user_email, subject, content)
-            logger.info(f"Alert sent successfully for rule {rule.id} to {user_email}.")
-            # TODO: Atualizar rule.last_notified_date e commitar a sessão
+            self.email_service.send_email(user.email, subject, content)
+            logger.info(f"Alert sent successfully to {user.email} ({len(buckets)} rules, {total} vulnerabilities).")
+            return True
         except Exception as e:
-            logger.error(f"Failed to send alert email for rule {rule.id} to {user_email}.", exc_info=e)
+            logger.error(f"Failed to send alert email to {user.email}.", exc_info=e)
+            return False
 
 
 # --- Lógica para execução como script standalone ---
 
 if __name__ == "__main__":
+    import argparse
     # Importar a fábrica de aplicação principal
-    from project.app import create_app # Corrigido importação
+    from app.app import create_app
 
-    # TODO: Adicionar argparse para lidar com flags como --full, --rule-id, etc.
-    # import argparse
-    # parser = argparse.ArgumentParser(description="Monitoring alert dispatcher job.")
-    # parser.add_argument('--rule-id', type=int, help='Dispatch alerts for a specific rule ID.')
-    # args = parser.parse_args()
+    parser = argparse.ArgumentParser(description="Monitoring alert dispatcher job.")
+    parser.add_argument('--config', type=str, default='development', help='Config name passed to create_app')
+    parser.add_argument('--rule-id', type=int, action='append', default=None, help='Dispatch alerts only for these rule IDs (repeatable).')
+    args = parser.parse_args()
 
     # Criar a aplicação Flask e rodar dentro do contexto
-    app = create_app() # Usar a fábrica principal
+    app = create_app(args.config) # Usar a fábrica principal
     with app.app_context():
-        # A sessão db.session já está disponível dentro do contexto do app
         dispatcher = MonitoringDispatcher() # Instanciar o dispatcher
-
-        # TODO: Adicionar lógica para despachar para regras específicas se um ID foi passado
-        # if args.rule_id:
-        #     rule = db.session.query(MonitoringRule).filter_by(id=args.rule_id).first()
-        #     if rule:
-        #          vulnerabilities = dispatcher.fetch_vulnerabilities(db.session, rule)
-        #          if vulnerabilities:
-        #              dispatcher.send_alert(rule, vulnerabilities)
-        #     else:
-        #          logger.warning(f"Rule with ID {args.rule_id} not found.")
-        # else:
-        # Despachar para todas as regras ativas
-        alerts_sent = dispatcher.dispatch_alerts(db.session) # Passar a sessão
+        alerts_sent = dispatcher.dispatch_alerts(db.session, rule_ids=args.rule_id) # Passar a sessão
         logger.info(f"Monitoring dispatch job finished. Sent {alerts_sent} alerts.")
-
-
-    # TODO: Considerar adicionar um código de saída (exit code) para indicar sucesso/falha
\ No newline at end of file
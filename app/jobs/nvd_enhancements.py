@@ -4,7 +4,40 @@ Melhorias para o NVDFetcher: mapeamento automático de CWEs e processamento melh
 """
 
 import re
-from typing import List, Dict, Set, Optional, Tuple
+from typing import Iterable, List, Dict, Set, Optional, Tuple
+
+
+class PatternSet:
+    """
+    Conjunto de regex rotuladas avaliado com uma única varredura do texto.
+
+    Uma alternação combinada dentro de lookahead (largura zero) localiza as posições
+    candidatas; só nelas cada padrão é testado ancorado (``match(text, pos)``). O
+    resultado é o mesmo de chamar ``search`` padrão a padrão, inclusive quando dois
+    padrões casam na mesma posição (ex.: "chrome" e "chromium").
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, str]], flags: int = re.IGNORECASE):
+        items = list(patterns)
+        self._compiled = [(re.compile(pattern, flags), label) for pattern, label in items]
+        self._any = re.compile('(?=' + '|'.join(f'(?:{pattern})' for pattern, _ in items) + ')', flags)
+
+    def search(self, text: str) -> bool:
+        """True se algum padrão ocorre no texto."""
+        return bool(text) and self._any.search(text) is not None
+
+    def labels(self, text: str) -> Set[str]:
+        """Rótulos de todos os padrões que ocorrem no texto."""
+        found: Set[str] = set()
+        if not text:
+            return found
+        for m in self._any.finditer(text):
+            pos = m.start()
+            for pattern, label in self._compiled:
+                if label not in found and pattern.match(text, pos):
+                    found.add(label)
+        return found
+
 
 class CWEAutoMapper:
     """
@@ -105,12 +138,10 @@ class CWEAutoMapper:
             ]
         }
         
-        # Compilar padrões regex para melhor performance
-        self.compiled_patterns = {}
-        for cwe_id, patterns in self.cwe_patterns.items():
-            self.compiled_patterns[cwe_id] = [
-                re.compile(pattern, re.IGNORECASE) for pattern in patterns
-            ]
+        # Todos os padrões numa única alternação (uma varredura por descrição)
+        self.pattern_set = PatternSet(
+            (pattern, cwe_id) for cwe_id, patterns in self.cwe_patterns.items() for pattern in patterns
+        )
     
     def map_cwe_from_description(self, description: str) -> List[str]:
         """
@@ -125,15 +156,7 @@ class CWEAutoMapper:
         if not description:
             return []
         
-        identified_cwes = set()
-        
-        for cwe_id, patterns in self.compiled_patterns.items():
-            for pattern in patterns:
-                if pattern.search(description):
-                    identified_cwes.add(cwe_id)
-                    break  # Uma correspondência por CWE é suficiente
-        
-        return list(identified_cwes)
+        return list(self.pattern_set.labels(description))
 
 class EnhancedReferenceProcessor:
     """
@@ -161,10 +184,9 @@ class EnhancedReferenceProcessor:
             r'bugfix'
         ]
         
-        # Compilar padrões
-        self.compiled_url_patterns = [
-            re.compile(pattern, re.IGNORECASE) for pattern in self.patch_url_patterns
-        ]
+        # Compilar padrões numa única alternação
+        self.compiled_url_pattern = re.compile('|'.join(self.patch_url_patterns), re.IGNORECASE)
+        self._patch_indicators_lower = [indicator.lower() for indicator in self.patch_indicators]
     
     def enhanced_patch_detection(self, reference: Dict) -> bool:
         """
@@ -183,13 +205,13 @@ class EnhancedReferenceProcessor:
         # Verificar tags
         if tags:
             for tag in tags:
-                if any(indicator.lower() in tag.lower() for indicator in self.patch_indicators):
+                tag_lower = tag.lower()
+                if any(indicator in tag_lower for indicator in self._patch_indicators_lower):
                     return True
         
         # Verificar URL
-        for pattern in self.compiled_url_patterns:
-            if pattern.search(url):
-                return True
+        if self.compiled_url_pattern.search(url):
+            return True
         
         # Verificar fonte
         if any(indicator in source for indicator in ['security', 'advisory', 'patch']):
@@ -0,0 +1,731 @@
+"""
+Extração dos dados de CVEs da NVD (CPU pura) e pool de processos para paralelizá-la.
+
+``CVEExtractor`` transforma o item ``cve`` da API no dicionário gravado pelo
+``VulnerabilityService`` (métricas CVSS, vendors/products via ``EnhancedCPEParser``,
+CWEs, referências e patches). Não depende de Flask nem do banco, para que possa
+rodar em processos filhos: ``ExtractionPool`` distribui mini-lotes de itens num
+``ProcessPoolExecutor`` cujos workers instanciam o extrator (e compilam as regex)
+uma única vez.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.jobs.nvd_enhancements import CWEAutoMapper, EnhancedReferenceProcessor, PatternSet
+from app.utils.severity_mapper import map_cvss_score_to_severity, get_primary_severity_from_metrics
+
+logger = logging.getLogger(__name__)
+
+_CPE_TOKEN_STRIP = re.compile(r'[^a-zA-Z0-9_-]')
+
+
+class EnhancedCPEParser:
+    """Parser aprimorado para extrair vendor/product de múltiplas fontes"""
+
+    _vendor_set: Optional[PatternSet] = None
+    _product_set: Optional[PatternSet] = None
+    _domain_set: Optional[PatternSet] = None
+
+    def __init__(self):
+        # Padrões conhecidos de vendors
+        self.vendor_patterns = {
+            r'\bmicrosoft\b': 'microsoft',
+            r'\bapple\b': 'apple',
+            r'\boracle\b': 'oracle',
+            r'\bgoogle\b': 'google',
+            r'\bdebian\b': 'debian',
+            r'\bubuntu\b': 'canonical',
+            r'\bredhat\b': 'redhat',
+            r'\brhel\b': 'redhat',
+            r'\bcentos\b': 'centos',
+            r'\bfedora\b': 'fedoraproject',
+            r'\bsuse\b': 'suse',
+            r'\bopensuse\b': 'opensuse',
+            r'\bcisco\b': 'cisco',
+            r'\bibm\b': 'ibm',
+            r'\bintel\b': 'intel',
+            r'\bamd\b': 'amd',
+            r'\bnvidia\b': 'nvidia',
+            r'\badobe\b': 'adobe',
+            r'\bmozilla\b': 'mozilla',
+            r'\bfirefox\b': 'mozilla',
+            r'\bchrome\b': 'google',
+            r'\bchromium\b': 'google',
+            r'\blinux\b': 'linux',
+            r'\bwindows\b': 'microsoft',
+            r'\bmacos\b': 'apple',
+            r'\bios\b': 'apple',
+            r'\bandroid\b': 'google',
+            r'\bjava\b': 'oracle',
+            r'\bopenjdk\b': 'openjdk',
+            r'\bphp\b': 'php',
+            r'\bpython\b': 'python',
+            r'\bnodejs\b': 'nodejs',
+            r'\bnode\.js\b': 'nodejs',
+            r'\bnpm\b': 'npmjs',
+            r'\byarn\b': 'yarnpkg',
+            r'\bdocker\b': 'docker',
+            r'\bkubernetes\b': 'kubernetes',
+            r'\bjenkins\b': 'jenkins',
+            r'\bgit\b': 'git-scm',
+            r'\bapache\b': 'apache',
+            r'\bnginx\b': 'nginx',
+            r'\bmysql\b': 'mysql',
+            r'\bpostgresql\b': 'postgresql',
+            r'\bmongodb\b': 'mongodb',
+            r'\bredis\b': 'redis',
+            r'\belasticsearch\b': 'elastic',
+            r'\bkibana\b': 'elastic',
+            r'\blogstash\b': 'elastic',
+            r'\bsplunk\b': 'splunk',
+            r'\bvmware\b': 'vmware',
+            r'\bcitrix\b': 'citrix',
+            r'\baws\b': 'amazon',
+            r'\bamazon\b': 'amazon',
+            r'\bazure\b': 'microsoft',
+            r'\bgcp\b': 'google',
+            r'\bwordpress\b': 'wordpress',
+            r'\bdrupal\b': 'drupal',
+            r'\bjoomla\b': 'joomla',
+            r'\bmagento\b': 'magento',
+            r'\bshopify\b': 'shopify',
+            r'\bsalesforce\b': 'salesforce',
+            r'\bslack\b': 'slack',
+            r'\bzoom\b': 'zoom',
+            r'\bteams\b': 'microsoft',
+            r'\bskype\b': 'microsoft',
+            r'\bwhatsapp\b': 'whatsapp',
+            r'\btelegram\b': 'telegram',
+            r'\bdiscord\b': 'discord'
+        }
+
+        # Padrões conhecidos de products
+        self.product_patterns = {
+            r'\bwindows\s+\d+': 'windows',
+            r'\bwindows\s+server': 'windows_server',
+            r'\boffice\s+\d+': 'office',
+            r'\bexchange\s+server': 'exchange_server',
+            r'\bsql\s+server': 'sql_server',
+            r'\bvisual\s+studio': 'visual_studio',
+            r'\b\.net\s+framework': 'dotnet_framework',
+            r'\biis': 'iis',
+            r'\bmacos': 'macos',
+            r'\bios': 'ios',
+            r'\bsafari': 'safari',
+            r'\bitunes': 'itunes',
+            r'\bxcode': 'xcode',
+            r'\bfirefox': 'firefox',
+            r'\bthunderbird': 'thunderbird',
+            r'\bchrome': 'chrome',
+            r'\bchromium': 'chromium',
+            r'\bandroid': 'android',
+            r'\bgmail': 'gmail',
+            r'\byoutube': 'youtube',
+            r'\bmaps': 'maps',
+            r'\bdrive': 'drive',
+            r'\blinux\s+kernel': 'linux_kernel',
+            r'\bdebian': 'debian',
+            r'\bubuntu': 'ubuntu',
+            r'\bcentos': 'centos',
+            r'\bfedora': 'fedora',
+            r'\brhel': 'rhel',
+            r'\bsuse': 'suse',
+            r'\bopensuse': 'opensuse',
+            r'\bapache\s+http\s+server': 'apache_httpd',
+            r'\bapache\s+tomcat': 'tomcat',
+            r'\bnginx': 'nginx',
+            r'\bmysql': 'mysql',
+            r'\bpostgresql': 'postgresql',
+            r'\bmongodb': 'mongodb',
+            r'\bredis': 'redis',
+            r'\belasticsearch': 'elasticsearch',
+            r'\bkibana': 'kibana',
+            r'\blogstash': 'logstash',
+            r'\bjenkins': 'jenkins',
+            r'\bdocker': 'docker',
+            r'\bkubernetes': 'kubernetes',
+            r'\bwordpress': 'wordpress',
+            r'\bdrupal': 'drupal',
+            r'\bjoomla': 'joomla',
+            r'\bmagento': 'magento',
+            r'\bphp': 'php',
+            r'\bpython': 'python',
+            r'\bnodejs': 'nodejs',
+            r'\bnode\.js': 'nodejs',
+            r'\bnpm': 'npm',
+            r'\byarn': 'yarn',
+            r'\bjava': 'java',
+            r'\bopenjdk': 'openjdk'
+        }
+
+        # Padrões de domínio das referências
+        self.domain_patterns = {
+            r'microsoft\.com': 'microsoft',
+            r'apple\.com': 'apple',
+            r'oracle\.com': 'oracle',
+            r'google\.com': 'google',
+            r'debian\.org': 'debian',
+            r'ubuntu\.com': 'canonical',
+            r'redhat\.com': 'redhat',
+            r'centos\.org': 'centos',
+            r'fedoraproject\.org': 'fedoraproject',
+            r'suse\.com': 'suse',
+            r'opensuse\.org': 'opensuse',
+            r'cisco\.com': 'cisco',
+            r'ibm\.com': 'ibm',
+            r'intel\.com': 'intel',
+            r'amd\.com': 'amd',
+            r'nvidia\.com': 'nvidia',
+            r'adobe\.com': 'adobe',
+            r'mozilla\.org': 'mozilla',
+            r'php\.net': 'php',
+            r'python\.org': 'python',
+            r'nodejs\.org': 'nodejs',
+            r'docker\.com': 'docker',
+            r'kubernetes\.io': 'kubernetes',
+            r'jenkins\.io': 'jenkins',
+            r'apache\.org': 'apache',
+            r'nginx\.org': 'nginx',
+            r'mysql\.com': 'mysql',
+            r'postgresql\.org': 'postgresql',
+            r'mongodb\.com': 'mongodb',
+            r'redis\.io': 'redis',
+            r'elastic\.co': 'elastic',
+            r'vmware\.com': 'vmware',
+            r'citrix\.com': 'citrix',
+            r'wordpress\.org': 'wordpress',
+            r'drupal\.org': 'drupal',
+            r'joomla\.org': 'joomla'
+        }
+
+        # Padrões compilados uma única vez por processo (compartilhados entre instâncias)
+        cls = type(self)
+        if cls._vendor_set is None:
+            cls._vendor_set = PatternSet(self.vendor_patterns.items())
+            cls._product_set = PatternSet(self.product_patterns.items())
+            cls._domain_set = PatternSet(self.domain_patterns.items(), flags=0)
+
+    def extract_from_cpe(self, configurations):
+        """Extrai vendors, products e informações de versão de configurações CPE"""
+        vendors = set()
+        products = set()
+        version_ranges = []
+
+        for config in configurations:
+            for node in config.get('nodes', []):
+                for cpe_match in node.get('cpeMatch', []):
+                    cpe_uri = cpe_match.get('criteria', '')
+                    vulnerable = cpe_match.get('vulnerable', False)
+
+                    if cpe_uri.startswith('cpe:2.3:'):
+                        parts = cpe_uri.split(':')
+                        if len(parts) >= 5:
+                            vendor = parts[3]
+                            product = parts[4]
+                            version = parts[5] if len(parts) > 5 else None
+
+                            if vendor and vendor != '*' and vendor != '-':
+                                vendor = _CPE_TOKEN_STRIP.sub('', vendor)
+                                if vendor:
+                                    vendors.add(vendor.lower())
+
+                            if product and product != '*' and product != '-':
+                                product = _CPE_TOKEN_STRIP.sub('', product)
+                                if product:
+                                    products.add(product.lower())
+
+                            # Extrair informações de versão
+                            version_info = {
+                                'cpe': cpe_uri,
+                                'vendor': vendor,
+                                'product': product,
+                                'version': version if version and version != '*' and version != '-' else None,
+                                'vulnerable': vulnerable,
+                                'version_start_including': cpe_match.get('versionStartIncluding'),
+                                'version_start_excluding': cpe_match.get('versionStartExcluding'),
+                                'version_end_including': cpe_match.get('versionEndIncluding'),
+                                'version_end_excluding': cpe_match.get('versionEndExcluding')
+                            }
+
+                            # Adicionar apenas se tiver informações de versão relevantes
+                            if (version_info['version']
+                                    or version_info['version_start_including']
+                                    or version_info['version_start_excluding']
+                                    or version_info['version_end_including']
+                                    or version_info['version_end_excluding']):
+                                version_ranges.append(version_info)
+
+        return list(vendors), list(products), version_ranges
+
+    def extract_from_description(self, description):
+        """Extrai vendors e products da descrição do CVE"""
+        if not description:
+            return [], []
+
+        description_lower = description.lower()
+
+        # Buscar vendors e products conhecidos (uma varredura por conjunto de padrões)
+        vendors = self._vendor_set.labels(description_lower)
+        products = self._product_set.labels(description_lower)
+
+        return list(vendors), list(products)
+
+    def extract_from_references(self, references):
+        """Extrai vendors e products das referências do CVE"""
+        vendors = set()
+        products = set()
+
+        for ref in references:
+            url = ref.get('url', '')
+            if not url:
+                continue
+
+            url_lower = url.lower()
+
+            # Extrair vendor do domínio
+            vendors.update(self._domain_set.labels(url_lower))
+
+        return list(vendors), list(products)
+
+    def extract_all(self, cve_data):
+        """Extrai vendors, products e informações de versão de todas as fontes disponíveis"""
+        all_vendors = set()
+        all_products = set()
+        all_version_ranges = []
+
+        # 1. Extrair de configurações CPE
+        configurations = cve_data.get('configurations', [])
+        cpe_vendors, cpe_products, version_ranges = self.extract_from_cpe(configurations)
+        all_vendors.update(cpe_vendors)
+        all_products.update(cpe_products)
+        all_version_ranges.extend(version_ranges)
+
+        # 2. Extrair da descrição
+        descriptions = cve_data.get('descriptions', [])
+        if descriptions:
+            description = descriptions[0].get('value', '')
+            desc_vendors, desc_products = self.extract_from_description(description)
+            all_vendors.update(desc_vendors)
+            all_products.update(desc_products)
+
+        # 3. Extrair das referências
+        references = cve_data.get('references', [])
+        ref_vendors, ref_products = self.extract_from_references(references)
+        all_vendors.update(ref_vendors)
+        all_products.update(ref_products)
+
+        return list(all_vendors), list(all_products), all_version_ranges
+
+
+class CVEExtractor:
+    """Converte itens ``cve`` da API NVD nos dicionários de persistência."""
+
+    def __init__(self):
+        self.enhanced_parser = EnhancedCPEParser()
+        self.cwe_auto_mapper = CWEAutoMapper()
+        self.enhanced_reference_processor = EnhancedReferenceProcessor()
+
+    def extract(self, cve_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Processa os dados brutos de um único CVE da API NVD e retorna o DTO
+        consumido por ``VulnerabilityService.save_vulnerabilities_batch``.
+        """
+        if not cve_data:
+            return None
+        # Exemplo de como extrair e mapear dados (ajuste conforme sua estrutura de modelo)
+        cve_id = cve_data.get('id')
+        if not cve_id:
+            logger.warning("Skipping CVE item with no 'id'.")
+            return None
+
+        # Extrair descrição em inglês
+        description = "No description available."
+        for desc in cve_data.get('descriptions', []):
+            if desc.get('lang') == 'en':
+                description = desc.get('value', description)
+                break
+
+        # Extrair datas (lidar com formato ISO 8601, pode ter timezone)
+        published_str = cve_data.get('published')
+        last_modified_str = cve_data.get('lastModified')
+
+        published_date = None
+        if published_str:
+            try:
+                # Ex: '2023-10-01T13:00:00.000-05:00' ou '2023-10-01T18:00:00Z'
+                published_date = datetime.fromisoformat(published_str.replace('Z', '+00:00'))
+            except ValueError:
+                logger.warning(f"Could not parse published date '{published_str}' for CVE {cve_id}.")
+
+        last_modified = None
+        if last_modified_str:
+            try:
+                last_modified = datetime.fromisoformat(last_modified_str.replace('Z', '+00:00'))
+            except ValueError:
+                logger.warning(f"Could not parse last modified date '{last_modified_str}' for CVE {cve_id}.")
+
+        # Extrair campos adicionais da API NVD 2.0
+        source_identifier = cve_data.get('sourceIdentifier')
+        vuln_status = cve_data.get('vulnStatus')
+        evaluator_comment = cve_data.get('evaluatorComment')
+        evaluator_solution = cve_data.get('evaluatorSolution')
+        evaluator_impact = cve_data.get('evaluatorImpact')
+
+        # Extrair campos CISA KEV (Known Exploited Vulnerabilities)
+        cisa_exploit_add = None
+        cisa_action_due = None
+        cisa_required_action = cve_data.get('cisaRequiredAction')
+        cisa_vulnerability_name = cve_data.get('cisaVulnerabilityName')
+
+        # Processar datas CISA se disponíveis
+        cisa_exploit_add_str = cve_data.get('cisaExploitAdd')
+        if cisa_exploit_add_str:
+            try:
+                cisa_exploit_add = datetime.fromisoformat(cisa_exploit_add_str.replace('Z', '+00:00'))
+            except ValueError:
+                logger.warning(f"Could not parse CISA exploit add date '{cisa_exploit_add_str}' for CVE {cve_id}.")
+
+        cisa_action_due_str = cve_data.get('cisaActionDue')
+        if cisa_action_due_str:
+            try:
+                cisa_action_due = datetime.fromisoformat(cisa_action_due_str.replace('Z', '+00:00'))
+            except ValueError:
+                logger.warning(f"Could not parse CISA action due date '{cisa_action_due_str}' for CVE {cve_id}.")
+
+        # Extrair métricas CVSS de todas as versões disponíveis
+        base_severity = 'N/A'
+        cvss_score = None
+        cvss_metrics = []
+
+        metrics = cve_data.get('metrics', {})
+        # Mapear chaves CVSS para versões
+        cvss_version_map = {
+            'cvssMetricV31': '3.1',
+            'cvssMetricV30': '3.0',
+            'cvssMetricV2': '2.0'
+        }
+
+        # Ordem de prioridade para score principal
+        priority_order = ['cvssMetricV31', 'cvssMetricV30', 'cvssMetricV2']
+
+        # Extrair todas as métricas CVSS disponíveis
+        for cvss_key, version in cvss_version_map.items():
+            metric_list = metrics.get(cvss_key, [])
+            if not isinstance(metric_list, list):
+                continue
+
+            for i, metric_item in enumerate(metric_list):
+                cvss_data = metric_item.get('cvssData', {})
+                if not cvss_data:
+                    continue
+
+                try:
+                    # Extrair score CVSS
+                    base_score = float(cvss_data.get('baseScore', 0.0))
+
+                    # Extrair severidade - com fallback para CVEs antigos
+                    severity_value = cvss_data.get('baseSeverity', '').upper()
+
+                    # Se não tem baseSeverity (CVEs antigos), mapear do score
+                    if not severity_value or severity_value in ['UNKNOWN', '']:
+                        severity_value = map_cvss_score_to_severity(base_score, version)
+
+                    # Validar severidade final
+                    if severity_value not in ['NONE', 'LOW', 'MEDIUM', 'HIGH', 'CRITICAL']:
+                        severity_value = 'N/A'
+
+                    metric_info = {
+                        'cvss_version': version,
+                        'base_score': base_score,
+                        'base_severity': severity_value,
+                        'base_vector': cvss_data.get('vectorString', ''),
+                        'is_primary': i == 0,  # Primeira métrica de cada versão é primária
+                        'exploitability_score': cvss_data.get('exploitabilityScore'),
+                        'impact_score': cvss_data.get('impactScore')
+                    }
+
+                    # Extrair componentes específicos por versão
+                    if version in ['3.0', '3.1']:
+                        # CVSS v3.x componentes
+                        metric_info.update({
+                            'attack_vector': cvss_data.get('attackVector'),
+                            'attack_complexity': cvss_data.get('attackComplexity'),
+                            'privileges_required': cvss_data.get('privilegesRequired'),
+                            'user_interaction': cvss_data.get('userInteraction'),
+                            'scope': cvss_data.get('scope'),
+                            'confidentiality_impact': cvss_data.get('confidentialityImpact'),
+                            'integrity_impact': cvss_data.get('integrityImpact'),
+                            'availability_impact': cvss_data.get('availabilityImpact')
+                        })
+                    elif version == '2.0':
+                        # CVSS v2.x componentes
+                        metric_info.update({
+                            'access_vector': cvss_data.get('accessVector'),
+                            'access_complexity': cvss_data.get('accessComplexity'),
+                            'authentication': cvss_data.get('authentication'),
+                            'confidentiality_impact': cvss_data.get('confidentialityImpact'),
+                            'integrity_impact': cvss_data.get('integrityImpact'),
+                            'availability_impact': cvss_data.get('availabilityImpact')
+                        })
+
+                    # Converter scores para float quando disponíveis
+                    for score_field in ['exploitability_score', 'impact_score']:
+                        if metric_info[score_field] is not None:
+                            try:
+                                metric_info[score_field] = float(metric_info[score_field])
+                            except (ValueError, TypeError):
+                                metric_info[score_field] = None
+
+                    cvss_metrics.append(metric_info)
+
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Error processing CVSS {version} data for CVE {cve_id}: {e}")
+                    continue
+
+        # Definir score e severidade principais usando a função utilitária
+        base_severity, cvss_score = get_primary_severity_from_metrics(cvss_metrics)
+
+        # Fallback para o método anterior se a função utilitária não encontrar nada
+        if base_severity == 'N/A' and cvss_score is None:
+            for priority_key in priority_order:
+                if priority_key in cvss_version_map:
+                    version = cvss_version_map[priority_key]
+                    primary_metrics = [m for m in cvss_metrics if m['cvss_version'] == version and m['is_primary']]
+                    if primary_metrics:
+                        primary_metric = primary_metrics[0]
+                        cvss_score = primary_metric['base_score']
+                        base_severity = primary_metric['base_severity']
+                        break
+
+        # Extrair dados de vendors, products e informações de versão usando o parser aprimorado
+        vendors_data, products_data, version_ranges_data = self.enhanced_parser.extract_all(cve_data)
+
+        # Extrair CWEs usando o método original e adicionar mapeamento automático
+        weaknesses_data = self._extract_weaknesses(cve_data.get('weaknesses', []))
+
+        # Aplicar mapeamento automático de CWEs baseado na descrição
+        auto_mapped_cwes = self.cwe_auto_mapper.map_cwe_from_description(description)
+
+        # Combinar CWEs explícitos com os mapeados automaticamente
+        all_cwes = set(weaknesses_data)  # CWEs explícitos
+        all_cwes.update(auto_mapped_cwes)  # Adicionar CWEs mapeados automaticamente
+        weaknesses_data = list(all_cwes)
+
+        # Processar referências com melhorias
+        references_data = []
+        patch_available = False
+        patch_references = []
+
+        references = cve_data.get('references', [])
+        for ref in references:
+            url = ref.get('url')
+            if url:
+                ref_tags = ref.get('tags', [])
+
+                # Validar referência usando o processador aprimorado
+                if self.enhanced_reference_processor.validate_reference(url):
+                    references_data.append({
+                        'url': url,
+                        'source': ref.get('source', ''),
+                        'tags': ref_tags
+                    })
+
+                    # Detectar patches usando o processador aprimorado
+                    ref_dict = {'url': url, 'tags': ref_tags}
+                    if self.enhanced_reference_processor.enhanced_patch_detection(ref_dict):
+                        patch_available = True
+                        patch_references.append({
+                            'url': url,
+                            'source': ref.get('source', ''),
+                            'tags': ref_tags
+                        })
+
+        # Log informativo sobre patches e CWEs detectados
+        if patch_available:
+            logger.debug(f"CVE {cve_id}: Patch detected from {len(patch_references)} reference(s)")
+        if auto_mapped_cwes:
+            logger.debug(f"CVE {cve_id}: Auto-mapped CWEs: {auto_mapped_cwes}")
+
+        # Em uma refatoração completa, isto retornaria um dicionário ou DTO
+        # que representa os dados prontos para serem passados para o serviço de persistência.
+        extracted_data = {
+             "cve_id": cve_id,
+             "description": description,
+             "published_date": published_date,
+             "last_update": last_modified,
+             "base_severity": base_severity,
+             "cvss_score": cvss_score if cvss_score is not None else 0.0,
+             "patch_available": patch_available,  # Agora baseado em dados reais da API
+             "cvss_metrics": cvss_metrics,  # Lista completa de métricas CVSS
+             "vendors": vendors_data,
+             "products": products_data,
+             "weaknesses": weaknesses_data,
+             "references": references_data,  # Adicionar referências
+             "version_ranges": version_ranges_data,  # Informações de versão extraídas das configurações CPE
+             "cpe_configurations": cve_data.get('configurations', []),  # Configurações CPE completas para referência
+
+             # Campos adicionais da API NVD 2.0
+             "source_identifier": source_identifier,
+             "vuln_status": vuln_status,
+             "evaluator_comment": evaluator_comment,
+             "evaluator_solution": evaluator_solution,
+             "evaluator_impact": evaluator_impact,
+
+             # Campos CISA KEV (Known Exploited Vulnerabilities)
+             "cisa_exploit_add": cisa_exploit_add,
+             "cisa_action_due": cisa_action_due,
+             "cisa_required_action": cisa_required_action,
+             "cisa_vulnerability_name": cisa_vulnerability_name
+        }
+        # NOVO: Retornar o dicionário de dados extraídos/mapeados
+        return extracted_data
+
+    @staticmethod
+    def _extract_weaknesses(weaknesses):
+        """Extrai CWE IDs das weaknesses com melhor cobertura."""
+        cwe_ids = set()
+
+        # Prioridade de idiomas (inglês primeiro, depois outros)
+        lang_priority = ['en', 'es', 'fr', 'de', 'pt', 'it']
+
+        for weakness in weaknesses:
+            descriptions = weakness.get('description', [])
+
+            # Tentar extrair CWE em ordem de prioridade de idioma
+            extracted = False
+            for lang in lang_priority:
+                if extracted:
+                    break
+
+                for desc in descriptions:
+                    if desc.get('lang') == lang:
+                        value = desc.get('value', '').strip()
+
+                        # Formato padrão CWE-XXX
+                        if value.startswith('CWE-') and len(value) > 4:
+                            # Validar que após CWE- há números
+                            cwe_number = value[4:]
+                            if cwe_number.isdigit():
+                                cwe_ids.add(value)
+                                extracted = True
+                                break
+
+            # Se não encontrou CWE válido, tentar em qualquer idioma
+            if not extracted:
+                for desc in descriptions:
+                    value = desc.get('value', '').strip()
+                    if value.startswith('CWE-') and len(value) > 4:
+                        cwe_number = value[4:]
+                        if cwe_number.isdigit():
+                            cwe_ids.add(value)
+                            break
+
+        return list(cwe_ids)
+
+    def extract_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Extrai os itens ``vulnerabilities`` (com a chave ``cve``) de um mini-lote, descartando os inválidos."""
+        results = []
+        for item in items:
+            try:
+                extracted = self.extract(item.get('cve'))
+            except Exception as e:
+                cve_id = (item.get('cve') or {}).get('id', 'unknown')
+                logger.warning(f"Failed to extract CVE {cve_id}: {e}")
+                continue
+            if extracted:
+                results.append(extracted)
+        return results
+
+
+# --- Pool de processos -------------------------------------------------------
+
+_worker_extractor: Optional[CVEExtractor] = None
+
+
+def _init_worker() -> None:
+    """Inicializador dos processos do pool: um extrator (regex compiladas) por worker."""
+    global _worker_extractor
+    _worker_extractor = CVEExtractor()
+
+
+def _extract_in_worker(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    extractor = _worker_extractor or CVEExtractor()
+    return extractor.extract_batch(items)
+
+
+def default_worker_count() -> int:
+    """Núcleos disponíveis menos um (o processo principal continua com rede e gravação)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+    return max(0, min(8, cpus - 1))
+
+
+class ExtractionPool:
+    """
+    Executa ``CVEExtractor.extract_batch`` num ``ProcessPoolExecutor``.
+
+    Com ``workers`` <= 0 (ou se o pool não puder ser criado) a extração roda numa
+    thread do processo atual, sem bloquear o event loop.
+
+    Args:
+        workers: Número de processos.
+        start_method: Método de início dos processos ('spawn' por padrão, seguro
+            com threads e conexões abertas no processo principal).
+    """
+
+    def __init__(self, workers: int, start_method: str = 'spawn'):
+        self.workers = max(0, int(workers))
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._local: Optional[CVEExtractor] = None
+
+    @property
+    def parallel(self) -> bool:
+        return self.workers > 0
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self._executor is None and self.workers > 0:
+            try:
+                context = multiprocessing.get_context(self.start_method)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=context, initializer=_init_worker,
+                )
+                logger.info(f"CVE extraction pool started with {self.workers} process(es) ({self.start_method}).")
+            except Exception as e:
+                logger.warning(f"Could not start CVE extraction pool ({e}); extracting in-process.")
+                self.workers = 0
+        return self._executor
+
+    def extract_local(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self._local is None:
+            self._local = CVEExtractor()
+        return self._local.extract_batch(items)
+
+    async def extract(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Extrai um mini-lote no pool (ou numa thread, sem pool)."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        if executor is None:
+            return await asyncio.to_thread(self.extract_local, items)
+        try:
+            return await loop.run_in_executor(executor, _extract_in_worker, items)
+        except Exception as e:
+            # BrokenProcessPool e afins: segue sem pool para não interromper a sincronização
+            logger.error(f"CVE extraction pool failed ({e}); falling back to in-process extraction.", exc_info=True)
+            self.shutdown()
+            self.workers = 0
+            return await asyncio.to_thread(self.extract_local, items)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -2,14 +2,14 @@
 import sys
 import os
 import time
-import pickle
 import json
 import asyncio
 import logging
 import argparse
-import re
+from collections import deque
+from itertools import islice
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional # Importar Optional explicitamente
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union # Importar Optional explicitamente
 from pathlib import Path # Importar Path explicitamente
 
 import aiohttp
@@ -34,9 +34,11 @@ from app.models.vulnerability import Vulnerability
 from app.models.cvss_metric import CVSSMetric
 # from models.api_call_log import ApiCallLog # Importar se o modelo for usado aqui
 # from services.vulnerability_service import VulnerabilityService # Importar após criar o serviço
-from app.jobs.nvd_enhancements import CWEAutoMapper, EnhancedReferenceProcessor
+from app.jobs.nvd_extraction import CVEExtractor, EnhancedCPEParser, ExtractionPool, default_worker_count  # noqa: F401 - EnhancedCPEParser reexportado
 from app.utils.rate_limiter import NVDRateLimiter
-from app.utils.severity_mapper import map_cvss_score_to_severity, get_primary_severity_from_metrics
+from app.utils.nvd_page_cache import DEFAULT_CACHE_DIR, get_page_cache
+from app.utils.nvd_page_stream import CHUNK_SIZE, JSONArrayStreamParser, NVDPage
+from app.utils.sync_progress import publish_progress
 
 logger = logging.getLogger(__name__)
 
@@ -50,301 +52,6 @@ logger = logging.getLogger(__name__)
 # RATE_LIMIT  = (2, 1)  # 2 requests per 1 sec (para a API Key Gratuita) # Obtido da config
 
 
-class EnhancedCPEParser:
-    """Parser aprimorado para extrair vendor/product de múltiplas fontes"""
-    
-    def __init__(self):
-        # Padrões conhecidos de vendors
-        self.vendor_patterns = {
-            r'\bmicrosoft\b': 'microsoft',
-            r'\bapple\b': 'apple',
-            r'\boracle\b': 'oracle',
-            r'\bgoogle\b': 'google',
-            r'\bdebian\b': 'debian',
-            r'\bubuntu\b': 'canonical',
-            r'\bredhat\b': 'redhat',
-            r'\brhel\b': 'redhat',
-            r'\bcentos\b': 'centos',
-            r'\bfedora\b': 'fedoraproject',
-            r'\bsuse\b': 'suse',
-            r'\bopensuse\b': 'opensuse',
-            r'\bcisco\b': 'cisco',
-            r'\bibm\b': 'ibm',
-            r'\bintel\b': 'intel',
-            r'\bamd\b': 'amd',
-            r'\bnvidia\b': 'nvidia',
-            r'\badobe\b': 'adobe',
-            r'\bmozilla\b': 'mozilla',
-            r'\bfirefox\b': 'mozilla',
-            r'\bchrome\b': 'google',
-            r'\bchromium\b': 'google',
-            r'\blinux\b': 'linux',
-            r'\bwindows\b': 'microsoft',
-            r'\bmacos\b': 'apple',
-            r'\bios\b': 'apple',
-            r'\bandroid\b': 'google',
-            r'\bjava\b': 'oracle',
-            r'\bopenjdk\b': 'openjdk',
-            r'\bphp\b': 'php',
-            r'\bpython\b': 'python',
-            r'\bnodejs\b': 'nodejs',
-            r'\bnode\.js\b': 'nodejs',
-            r'\bnpm\b': 'npmjs',
-            r'\byarn\b': 'yarnpkg',
-            r'\bdocker\b': 'docker',
-            r'\bkubernetes\b': 'kubernetes',
-            r'\bjenkins\b': 'jenkins',
-            r'\bgit\b': 'git-scm',
-            r'\bapache\b': 'apache',
-            r'\bnginx\b': 'nginx',
-            r'\bmysql\b': 'mysql',
-            r'\bpostgresql\b': 'postgresql',
-            r'\bmongodb\b': 'mongodb',
-            r'\bredis\b': 'redis',
-            r'\belasticsearch\b': 'elastic',
-            r'\bkibana\b': 'elastic',
-            r'\blogstash\b': 'elastic',
-            r'\bsplunk\b': 'splunk',
-            r'\bvmware\b': 'vmware',
-            r'\bcitrix\b': 'citrix',
-            r'\baws\b': 'amazon',
-            r'\bamazon\b': 'amazon',
-            r'\bazure\b': 'microsoft',
-            r'\bgcp\b': 'google',
-            r'\bwordpress\b': 'wordpress',
-            r'\bdrupal\b': 'drupal',
-            r'\bjoomla\b': 'joomla',
-            r'\bmagento\b': 'magento',
-            r'\bshopify\b': 'shopify',
-            r'\bsalesforce\b': 'salesforce',
-            r'\bslack\b': 'slack',
-            r'\bzoom\b': 'zoom',
-            r'\bteams\b': 'microsoft',
-            r'\bskype\b': 'microsoft',
-            r'\bwhatsapp\b': 'whatsapp',
-            r'\btelegram\b': 'telegram',
-            r'\bdiscord\b': 'discord'
-        }
-        
-        # Padrões conhecidos de products
-        self.product_patterns = {
-            r'\bwindows\s+\d+': 'windows',
-            r'\bwindows\s+server': 'windows_server',
-            r'\boffice\s+\d+': 'office',
-            r'\bexchange\s+server': 'exchange_server',
-            r'\bsql\s+server': 'sql_server',
-            r'\bvisual\s+studio': 'visual_studio',
-            r'\b\.net\s+framework': 'dotnet_framework',
-            r'\biis': 'iis',
-            r'\bmacos': 'macos',
-            r'\bios': 'ios',
-            r'\bsafari': 'safari',
-            r'\bitunes': 'itunes',
-            r'\bxcode': 'xcode',
-            r'\bfirefox': 'firefox',
-            r'\bthunderbird': 'thunderbird',
-            r'\bchrome': 'chrome',
-            r'\bchromium': 'chromium',
-            r'\bandroid': 'android',
-            r'\bgmail': 'gmail',
-            r'\byoutube': 'youtube',
-            r'\bmaps': 'maps',
-            r'\bdrive': 'drive',
-            r'\blinux\s+kernel': 'linux_kernel',
-            r'\bdebian': 'debian',
-            r'\bubuntu': 'ubuntu',
-            r'\bcentos': 'centos',
-            r'\bfedora': 'fedora',
-            r'\brhel': 'rhel',
-            r'\bsuse': 'suse',
-            r'\bopensuse': 'opensuse',
-            r'\bapache\s+http\s+server': 'apache_httpd',
-            r'\bapache\s+tomcat': 'tomcat',
-            r'\bnginx': 'nginx',
-            r'\bmysql': 'mysql',
-            r'\bpostgresql': 'postgresql',
-            r'\bmongodb': 'mongodb',
-            r'\bredis': 'redis',
-            r'\belasticsearch': 'elasticsearch',
-            r'\bkibana': 'kibana',
-            r'\blogstash': 'logstash',
-            r'\bjenkins': 'jenkins',
-            r'\bdocker': 'docker',
-            r'\bkubernetes': 'kubernetes',
-            r'\bwordpress': 'wordpress',
-            r'\bdrupal': 'drupal',
-            r'\bjoomla': 'joomla',
-            r'\bmagento': 'magento',
-            r'\bphp': 'php',
-            r'\bpython': 'python',
-            r'\bnodejs': 'nodejs',
-            r'\bnode\.js': 'nodejs',
-            r'\bnpm': 'npm',
-            r'\byarn': 'yarn',
-            r'\bjava': 'java',
-            r'\bopenjdk': 'openjdk'
-        }
-    
-    def extract_from_cpe(self, configurations):
-        """Extrai vendors, products e informações de versão de configurações CPE"""
-        vendors = set()
-        products = set()
-        version_ranges = []
-        
-        for config in configurations:
-            for node in config.get('nodes', []):
-                for cpe_match in node.get('cpeMatch', []):
-                    cpe_uri = cpe_match.get('criteria', '')
-                    vulnerable = cpe_match.get('vulnerable', False)
-                    
-                    if cpe_uri.startswith('cpe:2.3:'):
-                        parts = cpe_uri.split(':')
-                        if len(parts) >= 5:
-                            vendor = parts[3]
-                            product = parts[4]
-                            version = parts[5] if len(parts) > 5 else None
-                            
-                            if vendor and vendor != '*' and vendor != '-':
-                                vendor = re.sub(r'[^a-zA-Z0-9_-]', '', vendor)
-                                if vendor:
-                                    vendors.add(vendor.lower())
-                            
-                            if product and product != '*' and product != '-':
-                                product = re.sub(r'[^a-zA-Z0-9_-]', '', product)
-                                if product:
-                                    products.add(product.lower())
-                            
-                            # Extrair informações de versão
-                            version_info = {
-                                'cpe': cpe_uri,
-                                'vendor': vendor,
-                                'product': product,
-                                'version': version if version and version != '*' and version != '-' else None,
-                                'vulnerable': vulnerable,
-                                'version_start_including': cpe_match.get('versionStartIncluding'),
-                                'version_start_excluding': cpe_match.get('versionStartExcluding'),
-                                'version_end_including': cpe_match.get('versionEndIncluding'),
-                                'version_end_excluding': cpe_match.get('versionEndExcluding')
-                            }
-                            
-                            # Adicionar apenas se tiver informações de versão relevantes
-                            if (version_info['version'] or 
-                                version_info['version_start_including'] or 
-                                version_info['version_start_excluding'] or 
-                                version_info['version_end_including'] or 
-                                version_info['version_end_excluding']):
-                                version_ranges.append(version_info)
-        
-        return list(vendors), list(products), version_ranges
-    
-    def extract_from_description(self, description):
-        """Extrai vendors e products da descrição do CVE"""
-        vendors = set()
-        products = set()
-        
-        if not description:
-            return [], []
-        
-        description_lower = description.lower()
-        
-        # Buscar vendors conhecidos
-        for pattern, vendor in self.vendor_patterns.items():
-            if re.search(pattern, description_lower, re.IGNORECASE):
-                vendors.add(vendor)
-        
-        # Buscar products conhecidos
-        for pattern, product in self.product_patterns.items():
-            if re.search(pattern, description_lower, re.IGNORECASE):
-                products.add(product)
-        
-        return list(vendors), list(products)
-    
-    def extract_from_references(self, references):
-        """Extrai vendors e products das referências do CVE"""
-        vendors = set()
-        products = set()
-        
-        for ref in references:
-            url = ref.get('url', '')
-            if not url:
-                continue
-            
-            url_lower = url.lower()
-            
-            # Extrair vendor do domínio
-            domain_patterns = {
-                r'microsoft\.com': 'microsoft',
-                r'apple\.com': 'apple',
-                r'oracle\.com': 'oracle',
-                r'google\.com': 'google',
-                r'debian\.org': 'debian',
-                r'ubuntu\.com': 'canonical',
-                r'redhat\.com': 'redhat',
-                r'centos\.org': 'centos',
-                r'fedoraproject\.org': 'fedoraproject',
-                r'suse\.com': 'suse',
-                r'opensuse\.org': 'opensuse',
-                r'cisco\.com': 'cisco',
-                r'ibm\.com': 'ibm',
-                r'intel\.com': 'intel',
-                r'amd\.com': 'amd',
-                r'nvidia\.com': 'nvidia',
-                r'adobe\.com': 'adobe',
-                r'mozilla\.org': 'mozilla',
-                r'php\.net': 'php',
-                r'python\.org': 'python',
-                r'nodejs\.org': 'nodejs',
-                r'docker\.com': 'docker',
-                r'kubernetes\.io': 'kubernetes',
-                r'jenkins\.io': 'jenkins',
-                r'apache\.org': 'apache',
-                r'nginx\.org': 'nginx',
-                r'mysql\.com': 'mysql',
-                r'postgresql\.org': 'postgresql',
-                r'mongodb\.com': 'mongodb',
-                r'redis\.io': 'redis',
-                r'elastic\.co': 'elastic',
-                r'vmware\.com': 'vmware',
-                r'citrix\.com': 'citrix',
-                r'wordpress\.org': 'wordpress',
-                r'drupal\.org': 'drupal',
-                r'joomla\.org': 'joomla'
-            }
-            
-            for pattern, vendor in domain_patterns.items():
-                if re.search(pattern, url_lower):
-                    vendors.add(vendor)
-        
-        return list(vendors), list(products)
-    
-    def extract_all(self, cve_data):
-        """Extrai vendors, products e informações de versão de todas as fontes disponíveis"""
-        all_vendors = set()
-        all_products = set()
-        all_version_ranges = []
-        
-        # 1. Extrair de configurações CPE
-        configurations = cve_data.get('configurations', [])
-        cpe_vendors, cpe_products, version_ranges = self.extract_from_cpe(configurations)
-        all_vendors.update(cpe_vendors)
-        all_products.update(cpe_products)
-        all_version_ranges.extend(version_ranges)
-        
-        # 2. Extrair da descrição
-        descriptions = cve_data.get('descriptions', [])
-        if descriptions:
-            description = descriptions[0].get('value', '')
-            desc_vendors, desc_products = self.extract_from_description(description)
-            all_vendors.update(desc_vendors)
-            all_products.update(desc_products)
-        
-        # 3. Extrair das referências
-        references = cve_data.get('references', [])
-        ref_vendors, ref_products = self.extract_from_references(references)
-        all_vendors.update(ref_vendors)
-        all_products.update(ref_products)
-        
-        return list(all_vendors), list(all_products), all_version_ranges
 
 
 class NVDFetcher:
@@ -377,11 +84,25 @@ class NVDFetcher:
         except Exception:
             self.page_size = 2000
         self.max_retries = self.config.get("NVD_MAX_RETRIES", 5)
-        self.cache_dir = Path(self.config.get("NVD_CACHE_DIR", "cache"))
+        self.cache_dir = Path(self.config.get("NVD_CACHE_DIR") or DEFAULT_CACHE_DIR)
+        # Cache de páginas em disco (blobs gzip endereçados por conteúdo + índice SQLite)
+        self.page_cache = get_page_cache(self.config) if self.config.get("NVD_CACHE_ENABLED", True) else None
+        # Leitura incremental das respostas: os itens de `vulnerabilities` são lidos um a um do disco
+        self.stream_parse = bool(self.config.get("NVD_STREAM_PARSE", True))
         self.request_timeout = self.config.get("NVD_REQUEST_TIMEOUT", 30)
         self.user_agent = self.config.get("NVD_USER_AGENT", "Sec4all.co NVD Fetcher")
         # Janela máxima permitida pela NVD para consultas por lastModified (em dias)
         self.max_window_days = int(self.config.get("NVD_MAX_WINDOW_DAYS", 120))
+        # Pipeline de páginas: quantas páginas ficam em voo simultaneamente (1 = modo sequencial)
+        # e quantas páginas baixadas podem aguardar gravação antes de pausar os fetchers.
+        try:
+            self.pipeline_depth = max(1, int(self.config.get("NVD_PIPELINE_DEPTH", 1)))
+        except Exception:
+            self.pipeline_depth = 1
+        try:
+            self.pipeline_queue_size = max(1, int(self.config.get("NVD_PIPELINE_QUEUE_SIZE", 2)))
+        except Exception:
+            self.pipeline_queue_size = 2
 
         self.headers = {"User-Agent": self.user_agent}
         if self.api_key:
@@ -400,13 +121,24 @@ class NVDFetcher:
         self.rate_limit_requests, self.rate_limit_window = self.config.get("NVD_RATE_LIMIT", (2, 1))
         self.request_times: List[float] = [] # Lista para controle de rate limit (legado)
         
-        # Inicializar o parser aprimorado
-        self.enhanced_parser = EnhancedCPEParser()
-        
-        # Inicializar melhorias para CWE e referências
-        self.cwe_auto_mapper = CWEAutoMapper()
-        self.enhanced_reference_processor = EnhancedReferenceProcessor()
+        # Extração de CVEs (parser de CPE, CWEs e referências) e pool de processos para paralelizá-la
+        self.extractor = CVEExtractor()
+        self.enhanced_parser = self.extractor.enhanced_parser
+        self.cwe_auto_mapper = self.extractor.cwe_auto_mapper
+        self.enhanced_reference_processor = self.extractor.enhanced_reference_processor
+        workers = self.config.get("NVD_EXTRACT_WORKERS")
+        try:
+            workers = default_worker_count() if workers in (None, '', -1) else max(0, int(workers))
+        except (TypeError, ValueError):
+            workers = 0
+        self.extraction_pool = ExtractionPool(workers, self.config.get("NVD_EXTRACT_START_METHOD") or "spawn")
+        # Soma do totalResults das janelas iniciadas, publicada com o progresso de cada página
+        self._progress_total = 0
+
 
+    def close(self) -> None:
+        """Encerra o pool de processos de extração (recriado sob demanda se necessário)."""
+        self.extraction_pool.shutdown()
 
     async def validate_key(self) -> bool:
         """
@@ -449,41 +181,76 @@ class NVDFetcher:
         Returns:
             Dicionário com os dados da página da API, ou None em caso de falha.
         """
-        # --- Controle de rate limit avançado ---
-        await self.rate_limiter.acquire()
+        page = await self.fetch_page_stream(start_index, last_modified_start, last_modified_end, window_mode)
+        if page is None:
+            return None
+        try:
+            return await asyncio.to_thread(page.to_dict)
+        finally:
+            page.close()
 
-        # --- Cacheamento básico em arquivo ---
-        self.cache_dir.mkdir(exist_ok=True) # Usar self.cache_dir
-        # Garante que o nome do cache é único para buscas full vs modificadas
-        if last_modified_start:
-            safe_start = last_modified_start.replace(":", "").replace("+", "_")
-            safe_end = (last_modified_end or "now").replace(":", "").replace("+", "_") if last_modified_end else "now"
-            cache_key_suffix = f"{safe_start}_{safe_end}"
-        else:
-            cache_key_suffix = "full"
-        cache_file = self.cache_dir / f"page_{start_index}_{cache_key_suffix}.pkl"
-        json_file = self.cache_dir / f"page_{start_index}_{cache_key_suffix}.json"
+    def _cached_page(self, digest: str, header: Optional[Dict[str, Any]] = None) -> NVDPage:
+        cache = self.page_cache
+        return NVDPage(opener=lambda: cache.open_blob(digest), header=header)
 
-        if cache_file.exists():
-            logger.debug(f"Loading page {start_index} (modified since {last_modified_start}) from cache: {cache_file}")
-            try:
-                data = pickle.loads(cache_file.read_bytes())
-                # Opcional: adicionar validação básica dos dados cacheados
-                if isinstance(data, dict) and 'vulnerabilities' in data and 'totalResults' in data:
-                    # TODO: Adicionar validação mais robusta do formato dos dados cacheados
-                    logger.debug(f"Cache file {cache_file} loaded successfully.")
-                    return data
-                else:
-                     logger.warning(f"Cache file {cache_file} seems incomplete or corrupted. Deleting.")
-                     cache_file.unlink()
-            except (pickle.UnpicklingError, EOFError) as e:
-                 logger.warning(f"Error loading cache file {cache_file}: {e}. Deleting and refetching.", exc_info=True)
-                 cache_file.unlink(missing_ok=True)
-            except Exception as e:
-                 logger.error(f"Unexpected error processing cache file {cache_file}: {e}", exc_info=True)
-                 cache_file.unlink(missing_ok=True)
+    async def _read_body(self, resp, page_key) -> NVDPage:
+        """
+        Lê o corpo da resposta em pedaços, gravando os bytes como chegam (blob do cache
+        ou arquivo temporário) e interpretando apenas o cabeçalho da página.
+        """
+        if not self.stream_parse:
+            raw = await resp.read()
+            data = json.loads(raw)
+            if page_key is not None:
+                try:
+                    await asyncio.to_thread(
+                        self.page_cache.put, page_key, raw, resp.headers.get("ETag"), data.get("totalResults"),
+                    )
+                except Exception as cache_err:
+                    logger.warning(f"Failed to write page cache: {cache_err}", exc_info=True)
+            return NVDPage.from_dict(data)
 
-        # --- Monta a URL da API ---
+        import tempfile
+
+        parser = JSONArrayStreamParser(header_only=True)
+        writer = tmp = None
+        try:
+            if page_key is not None:
+                writer = self.page_cache.writer(page_key)
+            else:
+                tmp = tempfile.NamedTemporaryFile(prefix="nvd_page_", suffix=".json", delete=False)
+            sink = writer or tmp
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                sink.write(chunk)
+                if not (parser.in_array or parser.done):
+                    parser.feed(chunk)
+            if writer is not None:
+                digest = await asyncio.to_thread(
+                    writer.commit, resp.headers.get("ETag"), parser.header.get("totalResults"),
+                )
+                return self._cached_page(digest, parser.header)
+            tmp.close()
+            return NVDPage.from_file(tmp.name, parser.header, delete=True)
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            if tmp is not None:
+                tmp.close()
+                os.unlink(tmp.name)
+            raise
+
+    async def fetch_page_stream(self, start_index: int, last_modified_start: Optional[str], last_modified_end: Optional[str] = None, window_mode: str = "lastmod") -> Optional[NVDPage]:
+        """
+        Busca uma página da API NVD sem materializá-la em memória.
+
+        O corpo é gravado em disco à medida que chega e o retorno é um ``NVDPage``
+        cujos itens ``vulnerabilities`` são lidos um a um (ver ``_persist_page``).
+        Os parâmetros são os mesmos de ``fetch_page``.
+
+        Returns:
+            ``NVDPage`` (feche com ``close()``), ou None em caso de falha.
+        """
+        # --- Cache de páginas em disco ---
         effective_page_size = self.page_size
         try:
             if not self.api_key:
@@ -491,6 +258,23 @@ class NVDFetcher:
                     effective_page_size = 200
         except Exception:
             pass
+        page_key = cached = None
+        if self.page_cache is not None:
+            try:
+                page_key = self.page_cache.make_key(start_index, last_modified_start, last_modified_end, window_mode, effective_page_size)
+                cached = await asyncio.to_thread(self.page_cache.lookup, page_key)
+                if cached is not None and cached.fresh:
+                    self.page_cache.touch(page_key)
+                    logger.debug(f"Loaded page {start_index} from cache ({page_key.value}).")
+                    return self._cached_page(cached.digest)
+            except Exception as e:
+                logger.warning(f"NVD page cache lookup failed for page {start_index}: {e}", exc_info=True)
+                page_key = cached = None
+
+        # --- Controle de rate limit avançado (somente quando a rede é usada) ---
+        await self.rate_limiter.acquire()
+
+        # --- Monta a URL da API ---
         url = f"{self.api_base}?startIndex={start_index}&resultsPerPage={effective_page_size}"
 
         # Lógica CORRETA para busca incremental (CVEs modificados DESDE a última sincronização)
@@ -527,21 +311,24 @@ class NVDFetcher:
                 headers_with_key = {**self.headers}
                 if self.api_key:
                      headers_with_key["apiKey"] = self.api_key
+                # Entrada vencida com ETag: revalidar em vez de baixar a página novamente
+                if cached is not None and cached.etag:
+                    headers_with_key["If-None-Match"] = cached.etag
 
                 async with self.session.get(url, headers=headers_with_key, timeout=self.request_timeout) as resp: # Usar headers_with_key, self.request_timeout
                     logger.debug(f"API Response Status for page {start_index}: {resp.status}")
 
+                    if resp.status == 304 and cached is not None:
+                        self.page_cache.touch(page_key, revalidated=True)
+                        logger.debug(f"Page {start_index} not modified; served from cache.")
+                        return self._cached_page(cached.digest)
+
                     if resp.status == 200:
-                        data = await resp.json()
                         # Salvar cache somente se a requisição foi bem-sucedida
-                        try:
-                            cache_file.write_bytes(pickle.dumps(data))
-                            json_file.write_text(json.dumps(data, ensure_ascii=False))
-                            logger.debug(f"Successfully fetched and cached page {start_index}.")
-                        except Exception as cache_err:
-                            logger.warning(f"Failed to write cache files: {cache_err}", exc_info=True)
+                        page = await self._read_body(resp, page_key)
+                        logger.debug(f"Successfully fetched page {start_index} ({page.total_results} total results).")
                         # TODO: Log da chamada de API (ApiCallLog) aqui?
-                        return data
+                        return page
 
                     elif resp.status == 400: # Bad Request - geralmente erro na requisição
                          logger.error(f"API returned 400 Bad Request for page {start_index}. Check URL/params. Response: {await resp.text()}")
@@ -553,10 +340,7 @@ class NVDFetcher:
 
                     elif resp.status == 404: # Not Found
                          logger.warning(f"API returned 404 Not Found for page {start_index}. Treating as empty page to continue.")
-                         try:
-                             return {"vulnerabilities": [], "totalResults": 0}
-                         except Exception:
-                             return None
+                         return NVDPage.from_dict({"vulnerabilities": [], "totalResults": 0})
 
                     elif resp.status == 429: # Rate Limit Exceeded
                         # Usar o sistema avançado de rate limiting para tratar 429
@@ -621,299 +405,14 @@ class NVDFetcher:
     async def process_cve_data(self, cve_data: Dict[str, Any]) -> Optional[Dict[str, Any]]: # Alterar retorno para Dict ou DTO
         """
         Processa os dados brutos de um único CVE da API NVD e retorna um dicionário/DTO.
-        Esta lógica deveria estar em um SERVIÇO ou REPOSITÓRIO de Vulnerabilidades.
-        """
-        # Exemplo de como extrair e mapear dados (ajuste conforme sua estrutura de modelo)
-        cve_id = cve_data.get('id')
-        if not cve_id:
-            logger.warning("Skipping CVE item with no 'id'.")
-            return None
-
-        # Extrair descrição em inglês
-        description = "No description available."
-        for desc in cve_data.get('descriptions', []):
-            if desc.get('lang') == 'en':
-                 description = desc.get('value', description)
-                 break
-
-        # Extrair datas (lidar com formato ISO 8601, pode ter timezone)
-        published_str = cve_data.get('published')
-        last_modified_str = cve_data.get('lastModified')
 
-        published_date = None
-        if published_str:
-            try:
-                 # Ex: '2023-10-01T13:00:00.000-05:00' ou '2023-10-01T18:00:00Z'
-                 published_date = datetime.fromisoformat(published_str.replace('Z', '+00:00'))
-            except ValueError:
-                 logger.warning(f"Could not parse published date '{published_str}' for CVE {cve_id}.")
-
-        last_modified = None
-        if last_modified_str:
-            try:
-                 last_modified = datetime.fromisoformat(last_modified_str.replace('Z', '+00:00'))
-            except ValueError:
-                 logger.warning(f"Could not parse last modified date '{last_modified_str}' for CVE {cve_id}.")
-
-        # Extrair campos adicionais da API NVD 2.0
-        source_identifier = cve_data.get('sourceIdentifier')
-        vuln_status = cve_data.get('vulnStatus')
-        evaluator_comment = cve_data.get('evaluatorComment')
-        evaluator_solution = cve_data.get('evaluatorSolution')
-        evaluator_impact = cve_data.get('evaluatorImpact')
-        
-        # Extrair campos CISA KEV (Known Exploited Vulnerabilities)
-        cisa_exploit_add = None
-        cisa_action_due = None
-        cisa_required_action = cve_data.get('cisaRequiredAction')
-        cisa_vulnerability_name = cve_data.get('cisaVulnerabilityName')
-        
-        # Processar datas CISA se disponíveis
-        cisa_exploit_add_str = cve_data.get('cisaExploitAdd')
-        if cisa_exploit_add_str:
-            try:
-                cisa_exploit_add = datetime.fromisoformat(cisa_exploit_add_str.replace('Z', '+00:00'))
-            except ValueError:
-                logger.warning(f"Could not parse CISA exploit add date '{cisa_exploit_add_str}' for CVE {cve_id}.")
-        
-        cisa_action_due_str = cve_data.get('cisaActionDue')
-        if cisa_action_due_str:
-            try:
-                cisa_action_due = datetime.fromisoformat(cisa_action_due_str.replace('Z', '+00:00'))
-            except ValueError:
-                logger.warning(f"Could not parse CISA action due date '{cisa_action_due_str}' for CVE {cve_id}.")
-
-        # Extrair métricas CVSS de todas as versões disponíveis
-        base_severity = 'N/A'
-        cvss_score = None
-        cvss_metrics = []
-
-        metrics = cve_data.get('metrics', {})
-        # Mapear chaves CVSS para versões
-        cvss_version_map = {
-            'cvssMetricV31': '3.1',
-            'cvssMetricV30': '3.0', 
-            'cvssMetricV2': '2.0'
-        }
-        
-        # Ordem de prioridade para score principal
-        priority_order = ['cvssMetricV31', 'cvssMetricV30', 'cvssMetricV2']
-        
-        # Extrair todas as métricas CVSS disponíveis
-        for cvss_key, version in cvss_version_map.items():
-            metric_list = metrics.get(cvss_key, [])
-            if not isinstance(metric_list, list):
-                continue
-                
-            for i, metric_item in enumerate(metric_list):
-                cvss_data = metric_item.get('cvssData', {})
-                if not cvss_data:
-                    continue
-                    
-                try:
-                    # Extrair score CVSS
-                    base_score = float(cvss_data.get('baseScore', 0.0))
-                    
-                    # Extrair severidade - com fallback para CVEs antigos
-                    severity_value = cvss_data.get('baseSeverity', '').upper()
-                    
-                    # Se não tem baseSeverity (CVEs antigos), mapear do score
-                    if not severity_value or severity_value in ['UNKNOWN', '']:
-                        severity_value = map_cvss_score_to_severity(base_score, version)
-                    
-                    # Validar severidade final
-                    if severity_value not in ['NONE', 'LOW', 'MEDIUM', 'HIGH', 'CRITICAL']:
-                        severity_value = 'N/A'
-                    
-                    metric_info = {
-                        'cvss_version': version,
-                        'base_score': base_score,
-                        'base_severity': severity_value,
-                        'base_vector': cvss_data.get('vectorString', ''),
-                        'is_primary': i == 0,  # Primeira métrica de cada versão é primária
-                        'exploitability_score': cvss_data.get('exploitabilityScore'),
-                        'impact_score': cvss_data.get('impactScore')
-                    }
-                    
-                    # Extrair componentes específicos por versão
-                    if version in ['3.0', '3.1']:
-                        # CVSS v3.x componentes
-                        metric_info.update({
-                            'attack_vector': cvss_data.get('attackVector'),
-                            'attack_complexity': cvss_data.get('attackComplexity'),
-                            'privileges_required': cvss_data.get('privilegesRequired'),
-                            'user_interaction': cvss_data.get('userInteraction'),
-                            'scope': cvss_data.get('scope'),
-                            'confidentiality_impact': cvss_data.get('confidentialityImpact'),
-                            'integrity_impact': cvss_data.get('integrityImpact'),
-                            'availability_impact': cvss_data.get('availabilityImpact')
-                        })
-                    elif version == '2.0':
-                        # CVSS v2.x componentes
-                        metric_info.update({
-                            'access_vector': cvss_data.get('accessVector'),
-                            'access_complexity': cvss_data.get('accessComplexity'),
-                            'authentication': cvss_data.get('authentication'),
-                            'confidentiality_impact': cvss_data.get('confidentialityImpact'),
-                            'integrity_impact': cvss_data.get('integrityImpact'),
-                            'availability_impact': cvss_data.get('availabilityImpact')
-                        })
-                    
-                    # Converter scores para float quando disponíveis
-                    for score_field in ['exploitability_score', 'impact_score']:
-                        if metric_info[score_field] is not None:
-                            try:
-                                metric_info[score_field] = float(metric_info[score_field])
-                            except (ValueError, TypeError):
-                                metric_info[score_field] = None
-                    
-                    cvss_metrics.append(metric_info)
-                    
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Error processing CVSS {version} data for CVE {cve_id}: {e}")
-                    continue
-        
-        # Definir score e severidade principais usando a função utilitária
-        base_severity, cvss_score = get_primary_severity_from_metrics(cvss_metrics)
-        
-        # Fallback para o método anterior se a função utilitária não encontrar nada
-        if base_severity == 'N/A' and cvss_score is None:
-            for priority_key in priority_order:
-                if priority_key in cvss_version_map:
-                    version = cvss_version_map[priority_key]
-                    primary_metrics = [m for m in cvss_metrics if m['cvss_version'] == version and m['is_primary']]
-                    if primary_metrics:
-                        primary_metric = primary_metrics[0]
-                        cvss_score = primary_metric['base_score']
-                        base_severity = primary_metric['base_severity']
-                        break
-
-        # Extrair dados de vendors, products e informações de versão usando o parser aprimorado
-        vendors_data, products_data, version_ranges_data = self.enhanced_parser.extract_all(cve_data)
-        
-        # Extrair CWEs usando o método original e adicionar mapeamento automático
-        weaknesses_data = self._extract_weaknesses(cve_data.get('weaknesses', []))
-        
-        # Aplicar mapeamento automático de CWEs baseado na descrição
-        auto_mapped_cwes = self.cwe_auto_mapper.map_cwe_from_description(description)
-        
-        # Combinar CWEs explícitos com os mapeados automaticamente
-        all_cwes = set(weaknesses_data)  # CWEs explícitos
-        all_cwes.update(auto_mapped_cwes)  # Adicionar CWEs mapeados automaticamente
-        weaknesses_data = list(all_cwes)
-        
-        # Processar referências com melhorias
-        references_data = []
-        patch_available = False
-        patch_references = []
-        
-        references = cve_data.get('references', [])
-        for ref in references:
-            url = ref.get('url')
-            if url:
-                ref_tags = ref.get('tags', [])
-                
-                # Validar referência usando o processador aprimorado
-                if self.enhanced_reference_processor.validate_reference(url):
-                    references_data.append({
-                        'url': url,
-                        'source': ref.get('source', ''),
-                        'tags': ref_tags
-                    })
-                    
-                    # Detectar patches usando o processador aprimorado
-                    ref_dict = {'url': url, 'tags': ref_tags}
-                    if self.enhanced_reference_processor.enhanced_patch_detection(ref_dict):
-                        patch_available = True
-                        patch_references.append({
-                            'url': url,
-                            'source': ref.get('source', ''),
-                            'tags': ref_tags
-                        })
-
-        # Log informativo sobre patches e CWEs detectados
-        if patch_available:
-            logger.debug(f"CVE {cve_id}: Patch detected from {len(patch_references)} reference(s)")
-        if auto_mapped_cwes:
-            logger.debug(f"CVE {cve_id}: Auto-mapped CWEs: {auto_mapped_cwes}")
-        
-        # Em uma refatoração completa, isto retornaria um dicionário ou DTO
-        # que representa os dados prontos para serem passados para o serviço de persistência.
-        extracted_data = {
-             "cve_id": cve_id,
-             "description": description,
-             "published_date": published_date,
-             "last_update": last_modified,
-             "base_severity": base_severity,
-             "cvss_score": cvss_score if cvss_score is not None else 0.0,
-             "patch_available": patch_available,  # Agora baseado em dados reais da API
-             "cvss_metrics": cvss_metrics,  # Lista completa de métricas CVSS
-             "vendors": vendors_data,
-             "products": products_data,
-             "weaknesses": weaknesses_data,
-             "references": references_data,  # Adicionar referências
-             "version_ranges": version_ranges_data,  # Informações de versão extraídas das configurações CPE
-             "cpe_configurations": cve_data.get('configurations', []),  # Configurações CPE completas para referência
-             
-             # Campos adicionais da API NVD 2.0
-             "source_identifier": source_identifier,
-             "vuln_status": vuln_status,
-             "evaluator_comment": evaluator_comment,
-             "evaluator_solution": evaluator_solution,
-             "evaluator_impact": evaluator_impact,
-             
-             # Campos CISA KEV (Known Exploited Vulnerabilities)
-             "cisa_exploit_add": cisa_exploit_add,
-             "cisa_action_due": cisa_action_due,
-             "cisa_required_action": cisa_required_action,
-             "cisa_vulnerability_name": cisa_vulnerability_name
-        }
-        # NOVO: Retornar o dicionário de dados extraídos/mapeados
-        return extracted_data
+        A extração é CPU pura (ver ``CVEExtractor``); para páginas inteiras use
+        ``_extract_batch``, que distribui os mini-lotes no pool de processos.
+        """
+        return self.extractor.extract(cve_data)
 
     # Métodos de extração removidos - agora usando EnhancedCPEParser
 
-    def _extract_weaknesses(self, weaknesses):
-        """Extrai CWE IDs das weaknesses com melhor cobertura."""
-        cwe_ids = set()
-        
-        # Prioridade de idiomas (inglês primeiro, depois outros)
-        lang_priority = ['en', 'es', 'fr', 'de', 'pt', 'it']
-        
-        for weakness in weaknesses:
-            descriptions = weakness.get('description', [])
-            
-            # Tentar extrair CWE em ordem de prioridade de idioma
-            extracted = False
-            for lang in lang_priority:
-                if extracted:
-                    break
-                    
-                for desc in descriptions:
-                    if desc.get('lang') == lang:
-                        value = desc.get('value', '').strip()
-                        
-                        # Formato padrão CWE-XXX
-                        if value.startswith('CWE-') and len(value) > 4:
-                            # Validar que após CWE- há números
-                            cwe_number = value[4:]
-                            if cwe_number.isdigit():
-                                cwe_ids.add(value)
-                                extracted = True
-                                break
-            
-            # Se não encontrou CWE válido, tentar em qualquer idioma
-            if not extracted:
-                for desc in descriptions:
-                    value = desc.get('value', '').strip()
-                    if value.startswith('CWE-') and len(value) > 4:
-                        cwe_number = value[4:]
-                        if cwe_number.isdigit():
-                            cwe_ids.add(value)
-                            break
-        
-        return list(cwe_ids)
-    
     def _validate_cve_data(self, cve_data: Dict[str, Any]) -> bool:
         """
         Valida os dados de uma CVE antes da gravação no banco.
@@ -968,6 +467,319 @@ class NVDFetcher:
             terminal_feedback.error(f"❌ Erro na validação da CVE {cve_data.get('cve_id', 'unknown')}: {str(e)}")
             return False
 
+    def _effective_page_step(self) -> int:
+        """Retorna o passo de paginação efetivo (sem API key a NVD limita a 200 por página)."""
+        page_step = self.page_size
+        try:
+            if not self.api_key:
+                if page_step > 200:
+                    page_step = 200
+        except Exception:
+            pass
+        return page_step
+
+    @staticmethod
+    def _last_index_for(total_results: int, page_step: int) -> Optional[int]:
+        """Calcula o último startIndex válido de uma janela a partir do totalResults."""
+        try:
+            if total_results > 0:
+                return ((total_results - 1) // page_step) * page_step
+            return 0
+        except Exception:
+            return None
+
+    def _build_windows(self, full: bool, last_synced_time: Optional[datetime]) -> List[Dict[str, str]]:
+        """
+        Monta as janelas de consulta respeitando o limite de dias da NVD.
+
+        Incremental usa lastModStartDate/lastModEndDate a partir da última sincronização;
+        completa (ou sem sincronização anterior) percorre pubStartDate/pubEndDate desde 1999.
+        """
+        windows: List[Dict[str, str]] = []
+        if not full and last_synced_time:
+            # Converter para timezone UTC consciente
+            last_dt = last_synced_time if last_synced_time.tzinfo else last_synced_time.replace(tzinfo=timezone.utc)
+            last_dt = last_dt.astimezone(timezone.utc)
+            now_dt = datetime.now(timezone.utc)
+            # Construir janelas de até max_window_days
+            if (now_dt - last_dt).days > self.max_window_days:
+                logger.warning(
+                    f"Janela incremental de {(now_dt - last_dt).days} dias excede o limite de {self.max_window_days} dias. Aplicando chunking por janelas.")
+                cursor = last_dt
+                while cursor <= now_dt:
+                    window_end = min(cursor + timedelta(days=self.max_window_days), now_dt)
+                    windows.append({
+                        'start': cursor.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+                        'end': window_end.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+                    })
+                    # Avança 1 segundo para evitar reprocessar o mesmo registro no limite inclusivo
+                    cursor = window_end + timedelta(seconds=1)
+            else:
+                # Uma única janela dentro do limite
+                windows.append({
+                    'start': last_dt.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+                    'end': now_dt.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+                })
+
+        # Se não é incremental (full) ou não há last_sync, percorrer todo o histórico por data de publicação
+        if full or not windows:
+            windows = []
+            earliest = datetime(1999, 1, 1, tzinfo=timezone.utc)
+            now_dt = datetime.now(timezone.utc)
+            cursor = earliest
+            while cursor <= now_dt:
+                window_end = min(cursor + timedelta(days=self.max_window_days), now_dt)
+                windows.append({
+                    'start': cursor.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+                    'end': window_end.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+                    'mode': 'pub'
+                })
+                cursor = window_end + timedelta(seconds=1)
+        return windows
+
+    def _maybe_collect_garbage(self, page_number: int) -> None:
+        """Monitoramento de memória e garbage collection periódico a cada 5 páginas."""
+        if page_number % 5 != 0:
+            return
+        import gc
+        # Verificar status da memória e executar GC se necessário
+        gc_stats = memory_monitor.auto_manage_memory(f"após página {page_number}")
+        if gc_stats:
+            logger.info(
+                f"GC automático executado: {gc_stats['objects_collected']} objetos, {gc_stats['memory_freed_mb']:.1f}MB liberados")
+        else:
+            gc.collect()  # GC regular
+
+        memory_monitor.log_memory_status(f"página {page_number}")
+        logger.debug(f"Executed garbage collection after {page_number} pages")
+
+    async def _persist_page(
+        self,
+        vulnerabilities_data_raw: Union[NVDPage, Iterable[Dict[str, Any]]],
+        vulnerability_service: 'VulnerabilityService',
+        total_before: int = 0,
+        offload: bool = False,
+    ) -> int:
+        """
+        Extrai, valida e grava uma página de CVEs em mini-lotes.
+
+        Args:
+            vulnerabilities_data_raw: ``NVDPage`` (itens lidos um a um do disco) ou os
+                itens ``vulnerabilities`` já materializados.
+            vulnerability_service: Serviço de persistência.
+            total_before: Total acumulado antes desta página (apenas para feedback).
+            offload: Se True, executa a leitura dos itens e ``save_vulnerabilities_batch``
+                em thread para não bloquear o event loop (usado pelo modo pipeline).
+
+        Returns:
+            Número de CVEs gravadas pelo serviço nesta página.
+        """
+        MEMORY_BATCH_SIZE = 50  # Processar em lotes menores para evitar estouro de memória
+        page_processed = 0
+
+        if isinstance(vulnerabilities_data_raw, NVDPage):
+            items = vulnerabilities_data_raw.iter_vulnerabilities()
+        else:
+            items = iter(vulnerabilities_data_raw)
+
+        def next_batch() -> List[Dict[str, Any]]:
+            return list(islice(items, MEMORY_BATCH_SIZE))
+
+        async def read_batch() -> List[Dict[str, Any]]:
+            return await asyncio.to_thread(next_batch) if offload else next_batch()
+
+        # Com o pool de processos, até `in_flight` mini-lotes ficam em extração
+        # enquanto o mini-lote anterior é validado e gravado
+        in_flight = self.extraction_pool.workers if self.extraction_pool.parallel else 0
+        pending: deque = deque()
+        exhausted = False
+
+        # Processar vulnerabilidades em mini-lotes: apenas alguns mini-lotes ficam em memória por vez
+        batch_number = 0
+        try:
+            while True:
+                if in_flight:
+                    while not exhausted and len(pending) < in_flight:
+                        batch = await read_batch()
+                        if not batch:
+                            exhausted = True
+                            break
+                        pending.append(asyncio.ensure_future(self.extraction_pool.extract(batch)))
+                        del batch
+                    if not pending:
+                        break
+                    processed_data_list = await pending.popleft()
+                else:
+                    batch = await read_batch()
+                    if not batch:
+                        break
+                    # Extração (CPU pura) dos itens `cve` em DTOs para o serviço de persistência
+                    if offload:
+                        processed_data_list = await asyncio.to_thread(self.extractor.extract_batch, batch)
+                    else:
+                        processed_data_list = self.extractor.extract_batch(batch)
+                    del batch
+                batch_number += 1
+
+                # Salvar mini-lote imediatamente para liberar memória
+                if processed_data_list:
+                    try:
+                        # Validar dados antes de salvar
+                        valid_data = []
+                        for cve_dto in processed_data_list:
+                            if self._validate_cve_data(cve_dto):
+                                valid_data.append(cve_dto)
+                            else:
+                                terminal_feedback.warning(
+                                    f"⚠️ Dados inválidos para CVE {cve_dto.get('cve_id', 'unknown')}")
+
+                        if valid_data:
+                            # O serviço lida com a criação/atualização dos objetos ORM e o commit em lote.
+                            if offload:
+                                processed_count_batch = await asyncio.to_thread(
+                                    vulnerability_service.save_vulnerabilities_batch, valid_data
+                                )
+                            else:
+                                processed_count_batch = vulnerability_service.save_vulnerabilities_batch(valid_data)
+                            page_processed += processed_count_batch  # Acumula o total processado PELO SERVIÇO
+
+                            # Feedback de progresso
+                            terminal_feedback.info(
+                                f"📦 Mini-lote {batch_number} processado",
+                                {
+                                    "cves_processadas": processed_count_batch,
+                                    "total_acumulado": total_before + page_processed,
+                                    "memoria_mb": memory_monitor.get_memory_usage_mb()
+                                }
+                            )
+
+                            logger.debug(
+                                f"Processed mini-batch {batch_number} with {processed_count_batch} CVEs")
+                        else:
+                            terminal_feedback.warning(
+                                f"⚠️ Nenhum dado válido no mini-lote {batch_number}")
+
+                    except Exception as service_error:
+                        # Captura erros que ocorreram no serviço de persistência
+                        logger.error(f"Error saving vulnerability mini-batch: {service_error}", exc_info=True)
+                        terminal_feedback.error(f"❌ Erro ao salvar mini-lote: {str(service_error)}")
+                        logger.error("Stopping update due to service persistence error.")
+                        raise  # Re-raise para parar o processamento
+
+                # Limpar referências para liberar memória
+                del processed_data_list
+        finally:
+            for future in pending:
+                future.cancel()
+
+        return page_processed
+
+    def _report_progress(self, processed: int) -> None:
+        """Publica o progresso da página concluída no canal SSE (sem gravar em SyncMetadata)."""
+        publish_progress(current=processed, total=max(self._progress_total, processed))
+
+    async def _run_pipeline(
+        self,
+        windows: List[Dict[str, str]],
+        vulnerability_service: 'VulnerabilityService',
+    ) -> Tuple[int, bool]:
+        """
+        Executa a sincronização com ``pipeline_depth`` páginas em voo entre janelas.
+
+        Workers de fetch consomem uma fila de prioridade ``(janela, startIndex)``: a
+        primeira página de cada janela revela o ``totalResults`` e enfileira as demais,
+        que têm prioridade sobre janelas posteriores. As páginas baixadas passam por uma
+        fila limitada (``pipeline_queue_size``) até o consumidor, que extrai e grava
+        enquanto os workers continuam buscando. Todas as requisições continuam passando
+        pelo ``NVDRateLimiter`` compartilhado dentro de ``fetch_page``.
+
+        Returns:
+            Tupla ``(total_processado, sucesso)``.
+        """
+        page_step = self._effective_page_step()
+        work_q: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        pages_q: asyncio.Queue = asyncio.Queue(maxsize=self.pipeline_queue_size)
+        failed_pages: List[Tuple[int, int]] = []
+        done_sentinel = object()
+
+        for idx in range(len(windows)):
+            work_q.put_nowait((idx, 0))
+
+        terminal_feedback.info(
+            f"🚀 Pipeline NVD: {len(windows)} janela(s), {self.pipeline_depth} página(s) em voo",
+            {"windows_total": len(windows), "in_flight": self.pipeline_depth, "queue_size": self.pipeline_queue_size}
+        )
+
+        async def fetch_worker() -> None:
+            while True:
+                win_idx, start_index = await work_q.get()
+                try:
+                    win = windows[win_idx]
+                    win_mode = str(win.get('mode') or 'lastmod').lower()
+                    try:
+                        page = await self.fetch_page_stream(start_index, win['start'], win['end'], win_mode)
+                    except Exception as fetch_err:
+                        logger.error(f"Unexpected error fetching page {start_index} of window {win_idx + 1}: {fetch_err}", exc_info=True)
+                        page = None
+                    if page is None:
+                        logger.error(f"Failed to fetch page {start_index} of window {win_idx + 1}/{len(windows)}.")
+                        failed_pages.append((win_idx, start_index))
+                        continue
+                    if start_index == 0:
+                        # A primeira página define quantas páginas restam nesta janela
+                        total_results = page.total_results
+                        self._progress_total += total_results or 0
+                        last_index = self._last_index_for(total_results, page_step) or 0
+                        logger.info(
+                            f"Window {win_idx + 1}/{len(windows)}: {total_results} results expected "
+                            f"({last_index // page_step + 1} page(s)).")
+                        for next_index in range(page_step, last_index + 1, page_step):
+                            work_q.put_nowait((win_idx, next_index))
+                    # Na fila ficam apenas referências às páginas em disco, não os itens
+                    await pages_q.put((win_idx, start_index, page))
+                finally:
+                    work_q.task_done()
+
+        async def close_when_drained() -> None:
+            await work_q.join()
+            await pages_q.put(done_sentinel)
+
+        workers = [asyncio.create_task(fetch_worker()) for _ in range(self.pipeline_depth)]
+        closer = asyncio.create_task(close_when_drained())
+        total_processed = 0
+        pages_done = 0
+        try:
+            while True:
+                item = await pages_q.get()
+                if item is done_sentinel:
+                    break
+                win_idx, start_index, page = item
+                del item
+                try:
+                    total_processed += await self._persist_page(
+                        page, vulnerability_service, total_processed, offload=True
+                    )
+                finally:
+                    page.close()
+                pages_done += 1
+                logger.info(
+                    f"Completed page {start_index} of window {win_idx + 1}/{len(windows)}. "
+                    f"Total processed: {total_processed}")
+                self._report_progress(total_processed)
+                self._maybe_collect_garbage(pages_done)
+        finally:
+            for task in workers + [closer]:
+                task.cancel()
+            await asyncio.gather(*workers, closer, return_exceptions=True)
+            while not pages_q.empty():
+                item = pages_q.get_nowait()
+                if item is not done_sentinel:
+                    item[2].close()
+
+        if failed_pages:
+            logger.warning(f"Pipeline finished with {len(failed_pages)} page(s) that could not be fetched: {failed_pages[:10]}")
+        return total_processed, not failed_pages
+
     # TODO: Modificar o método update para receber uma instância do VulnerabilityService
     # e delegar a ele a lógica de persistência.
     async def update(self, vulnerability_service: 'VulnerabilityService', full: bool = False) -> int:
@@ -1024,7 +836,7 @@ class NVDFetcher:
         total_processed = 0 # Total de itens processados E SALVOS no DB
         start_index = 0
         total_results_expected = None # Para rastrear o total de resultados para a query
-
+        self._progress_total = 0 # Soma do totalResults das janelas já iniciadas (progresso via SSE)
 
         # Usar um try/finally para garantir o rollback ou commit da sessão NO SERVIÇO
         # A sessão é gerenciada pelo serviço. O fetcher não faz commit/rollback direto.
@@ -1043,223 +855,107 @@ class NVDFetcher:
                         self.rate_limiter = NVDRateLimiter.create_for_nvd(has_api_key=False)
             except Exception:
                 pass
-            # Preparar janelas de tempo quando incremental excede o limite da NVD
-            windows: List[Dict[str, str]] = []
-            if not full and last_synced_time:
-                # Converter para timezone UTC consciente
-                last_dt = last_synced_time if last_synced_time.tzinfo else last_synced_time.replace(tzinfo=timezone.utc)
-                last_dt = last_dt.astimezone(timezone.utc)
-                now_dt = datetime.now(timezone.utc)
-                # Construir janelas de até max_window_days
-                if (now_dt - last_dt).days > self.max_window_days:
-                    logger.warning(
-                        f"Janela incremental de {(now_dt - last_dt).days} dias excede o limite de {self.max_window_days} dias. Aplicando chunking por janelas.")
-                    cursor = last_dt
-                    while cursor <= now_dt:
-                        window_end = min(cursor + timedelta(days=self.max_window_days), now_dt)
-                        windows.append({
-                            'start': cursor.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
-                            'end': window_end.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
-                        })
-                        # Avança 1 segundo para evitar reprocessar o mesmo registro no limite inclusivo
-                        cursor = window_end + timedelta(seconds=1)
-                else:
-                    # Uma única janela dentro do limite
-                    windows.append({
-                        'start': last_dt.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
-                        'end': now_dt.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
-                    })
+            # Preparar janelas de tempo (incremental por lastMod ou completa por pubDate)
+            windows = self._build_windows(full, last_synced_time)
 
             # Indicador de sucesso global
             global_success = True
 
-            # Se não é incremental (full) ou não há last_sync, executar loop único
-            if full or not windows:
-                windows = []
-                earliest = datetime(1999, 1, 1, tzinfo=timezone.utc)
-                now_dt = datetime.now(timezone.utc)
-                cursor = earliest
-                while cursor <= now_dt:
-                    window_end = min(cursor + timedelta(days=self.max_window_days), now_dt)
-                    windows.append({
-                        'start': cursor.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
-                        'end': window_end.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
-                        'mode': 'pub'
-                    })
-                    cursor = window_end + timedelta(seconds=1)
-
-            # Processar cada janela separadamente com paginação própria
-            for idx, win in enumerate(windows):
-                start_index = 0
-                total_results_expected = None
-                win_start = win['start']
-                win_end = win['end']
-                win_mode = str(win.get('mode') or 'lastmod').lower()
-                if win_start and win_end:
-                    terminal_feedback.info(
-                        f"🗓️ Processando janela {idx+1}/{len(windows)}: {win_start} → {win_end}",
-                        {"window_index": idx+1, "windows_total": len(windows)}
-                    )
+            if self.pipeline_depth > 1:
+                # Modo pipeline: N páginas em voo entre janelas, sobrepondo rede, parsing e gravação
+                total_processed, global_success = await self._run_pipeline(windows, vulnerability_service)
+            else:
+                # Processar cada janela separadamente com paginação própria
+                for idx, win in enumerate(windows):
+                    start_index = 0
+                    total_results_expected = None
+                    win_start = win['start']
+                    win_end = win['end']
+                    win_mode = str(win.get('mode') or 'lastmod').lower()
+                    if win_start and win_end:
+                        terminal_feedback.info(
+                            f"🗓️ Processando janela {idx+1}/{len(windows)}: {win_start} → {win_end}",
+                            {"window_index": idx+1, "windows_total": len(windows)}
+                        )
 
-                # Determinar o passo de página efetivo considerando chave e modo
-                page_step = self.page_size
-                try:
-                    if not self.api_key:
-                        if page_step > 200:
-                            page_step = 200
-                except Exception:
-                    pass
-
-                # Calcular último índice válido com base no total esperado
-                # Será atualizado após a primeira resposta
-                last_index_for_window = None
-
-                while True:
-                    # Passar parâmetros de janela ao fetch_page
-                    data = await self.fetch_page(start_index, win_start, win_end, win_mode)
-
-                    if data is None:
-                        logger.error("Failed to fetch data from NVD API. Stopping update process.")
-                        # Não atualiza a data de sincronização em caso de falha fatal no fetch
-                        global_success = False
-                        break  # Sair do loop da janela atual
-
-                    vulnerabilities_data_raw = data.get('vulnerabilities', [])
-                    total_results_on_api = int(data.get('totalResults', 0) or 0)
-
-                    if total_results_expected is None:
-                        total_results_expected = total_results_on_api
-                        logger.info(f"Total results for this query range expected: {total_results_expected}")
-                        # Calcula último índice com base no passo de página
-                        try:
-                            if total_results_expected > 0:
-                                last_index_for_window = ((total_results_expected - 1) // page_step) * page_step
+                    # Determinar o passo de página efetivo considerando chave e modo
+                    page_step = self._effective_page_step()
+
+                    # Calcular último índice válido com base no total esperado
+                    # Será atualizado após a primeira resposta
+                    last_index_for_window = None
+
+                    while True:
+                        # Passar parâmetros de janela ao fetch_page
+                        page = await self.fetch_page_stream(start_index, win_start, win_end, win_mode)
+
+                        if page is None:
+                            logger.error("Failed to fetch data from NVD API. Stopping update process.")
+                            # Não atualiza a data de sincronização em caso de falha fatal no fetch
+                            global_success = False
+                            break  # Sair do loop da janela atual
+
+                        total_results_on_api = page.total_results
+
+                        if total_results_expected is None:
+                            total_results_expected = total_results_on_api
+                            self._progress_total += total_results_on_api or 0
+                            logger.info(f"Total results for this query range expected: {total_results_expected}")
+                            # Calcula último índice com base no passo de página
+                            last_index_for_window = self._last_index_for(total_results_expected, page_step)
+
+                        # Se não vierem vulnerabilidades nesta página, verificar fim da janela
+                        if not await asyncio.to_thread(page.has_vulnerabilities):
+                            page.close()
+                            # Se já atingimos ou passamos o último índice calculado, encerrar
+                            if (last_index_for_window is not None) and (start_index >= last_index_for_window):
+                                logger.info("Reached end of results for current window.")
+                                break
                             else:
-                                last_index_for_window = 0
-                        except Exception:
-                            last_index_for_window = None
+                                # Tentar avançar mesmo em caso de página vazia, evitando parada prematura
+                                logger.warning(
+                                    f"Page {start_index} returned no vulnerabilities, advancing to next index for robustness.")
+                                start_index += page_step
+                                # Pequena espera para evitar hammering em inconsistências
+                                try:
+                                    await asyncio.sleep(0.2)
+                                except Exception:
+                                    pass
+                                continue
 
-                    # Se não vierem vulnerabilidades nesta página, verificar fim da janela
-                    if not vulnerabilities_data_raw:
-                        # Se já atingimos ou passamos o último índice calculado, encerrar
-                        if (last_index_for_window is not None) and (start_index >= last_index_for_window):
-                            logger.info("Reached end of results for current window.")
-                            break
-                        else:
-                            # Tentar avançar mesmo em caso de página vazia, evitando parada prematura
-                            logger.warning(
-                                f"Page {start_index} returned no vulnerabilities, advancing to next index for robustness.")
-                            start_index += page_step
-                            # Pequena espera para evitar hammering em inconsistências
+                        try:
+                            total_processed += await self._persist_page(
+                                page, vulnerability_service, total_processed
+                            )
+                        finally:
+                            # Remove o arquivo temporário da página (quando o cache está desativado)
+                            page.close()
+
+                        logger.info(f"Completed page starting at index {start_index}. Total processed: {total_processed}")
+                        self._report_progress(total_processed)
+
+                        # Verificar se há mais páginas a buscar com base no totalResults esperado
+                        # Isso pode ser um pouco impreciso se o totalResults mudar durante a execução,
+                        # mas é uma boa heurística. A condição principal de saída é quando fetch_page
+                        # retorna uma lista vazia E index >= total_results_expected.
+                        # Avançar para o próximo índice
+                        start_index += page_step
+
+                        # Se já atingimos o último índice, a próxima iteração deve encerrar pela condição de vazio
+                        if (last_index_for_window is not None) and (start_index > last_index_for_window):
+                            # Pequena espera e deixa a próxima chamada retornar vazio para encerrar
                             try:
-                                await asyncio.sleep(0.2)
+                                await asyncio.sleep(0.1)
                             except Exception:
                                 pass
-                            continue
-
-                    # OTIMIZAÇÃO DE MEMÓRIA: Processar dados em lotes menores para reduzir uso de memória
-                    import gc  # Para garbage collection explícito
-
-                    MEMORY_BATCH_SIZE = 50  # Processar em lotes menores para evitar estouro de memória
-
-                    # Processar vulnerabilidades em mini-lotes para otimizar memória
-                    for i in range(0, len(vulnerabilities_data_raw), MEMORY_BATCH_SIZE):
-                        batch = vulnerabilities_data_raw[i:i + MEMORY_BATCH_SIZE]
-
-                        # Processar lote atual
-                        processed_data_list = []
-                        for item in batch:
-                            # process_cve_data AGORA retorna um dicionário/DTO, não um objeto ORM
-                            extracted_data = await self.process_cve_data(item.get('cve'))
-                            if extracted_data:  # Se a extração/mapeamento foi bem-sucedido
-                                processed_data_list.append(extracted_data)
-
-                        # Salvar mini-lote imediatamente para liberar memória
-                        if processed_data_list:
-                            try:
-                                # Validar dados antes de salvar
-                                valid_data = []
-                                for data in processed_data_list:
-                                    if self._validate_cve_data(data):
-                                        valid_data.append(data)
-                                    else:
-                                        terminal_feedback.warning(
-                                            f"⚠️ Dados inválidos para CVE {data.get('cve_id', 'unknown')}")
-
-                                if valid_data:
-                                    # O serviço lida com a criação/atualização dos objetos ORM e o commit em lote.
-                                    processed_count_batch = vulnerability_service.save_vulnerabilities_batch(valid_data)
-                                    total_processed += processed_count_batch  # Acumula o total processado PELO SERVIÇO
-
-                                    # Feedback de progresso
-                                    terminal_feedback.info(
-                                        f"📦 Mini-lote {i//MEMORY_BATCH_SIZE + 1} processado",
-                                        {
-                                            "cves_processadas": processed_count_batch,
-                                            "total_acumulado": total_processed,
-                                            "memoria_mb": memory_monitor.get_memory_usage_mb()
-                                        }
-                                    )
-
-                                    logger.debug(
-                                        f"Processed mini-batch {i//MEMORY_BATCH_SIZE + 1} with {processed_count_batch} CVEs")
-                                else:
-                                    terminal_feedback.warning(
-                                        f"⚠️ Nenhum dado válido no mini-lote {i//MEMORY_BATCH_SIZE + 1}")
-
-                            except Exception as service_error:
-                                # Captura erros que ocorreram no serviço de persistência
-                                logger.error(f"Error saving vulnerability mini-batch: {service_error}", exc_info=True)
-                                terminal_feedback.error(f"❌ Erro ao salvar mini-lote: {str(service_error)}")
-                                logger.error("Stopping update due to service persistence error.")
-                                raise  # Re-raise para parar o processamento
-
-                        # Limpar referências para liberar memória
-                        del processed_data_list
-                        del batch
 
-                        # Garbage collection periódico para mini-lotes
-                        if i % (MEMORY_BATCH_SIZE * 2) == 0:
-                            gc.collect()
+                        # OTIMIZAÇÃO DE MEMÓRIA: Monitoramento e garbage collection periódico entre páginas
+                        self._maybe_collect_garbage(start_index // self.page_size)
 
-                    # Limpar dados da página atual para liberar memória
-                    del vulnerabilities_data_raw
-
-                    logger.info(f"Completed page starting at index {start_index}. Total processed: {total_processed}")
-
-                    # Verificar se há mais páginas a buscar com base no totalResults esperado
-                    # Isso pode ser um pouco impreciso se o totalResults mudar durante a execução,
-                    # mas é uma boa heurística. A condição principal de saída é quando fetch_page
-                    # retorna uma lista vazia E index >= total_results_expected.
-                    # Avançar para o próximo índice
-                    start_index += page_step
-
-                    # Se já atingimos o último índice, a próxima iteração deve encerrar pela condição de vazio
-                    if (last_index_for_window is not None) and (start_index > last_index_for_window):
-                        # Pequena espera e deixa a próxima chamada retornar vazio para encerrar
-                        try:
-                            await asyncio.sleep(0.1)
-                        except Exception:
-                            pass
-
-                    # OTIMIZAÇÃO DE MEMÓRIA: Monitoramento e garbage collection periódico entre páginas
-                    page_number = start_index // self.page_size
-                    if page_number % 5 == 0:  # A cada 5 páginas
-                        # Verificar status da memória e executar GC se necessário
-                        gc_stats = memory_monitor.auto_manage_memory(f"após página {page_number}")
-                        if gc_stats:
-                            logger.info(
-                                f"GC automático executado: {gc_stats['objects_collected']} objetos, {gc_stats['memory_freed_mb']:.1f}MB liberados")
-                        else:
-                            gc.collect()  # GC regular
-
-                        memory_monitor.log_memory_status(f"página {page_number}")
-                        logger.debug(f"Executed garbage collection after {page_number} pages")
-
-                try:
-                    await asyncio.sleep(1)
-                except Exception:
-                    pass
+                    try:
+                        await asyncio.sleep(1)
+                    except Exception:
+                        pass
 
 
             # TODO: pbar.close() # Fechar barra de progresso
@@ -1284,6 +980,8 @@ class NVDFetcher:
              logger.error("An unexpected error occurred during the NVD update process.", exc_info=True)
              # TODO: A sessão do serviço já deve ter feito rollback em caso de erro
              # self.db_session.rollback() # Remover - sessão gerenciada pelo serviço
+        finally:
+            self.close()
 
 
         # MONITORAMENTO DE MEMÓRIA: Log final de estatísticas
@@ -1362,10 +1060,20 @@ if __name__ == '__main__':
             "NVD_PAGE_SIZE": getattr(app.config, 'NVD_PAGE_SIZE', 2000),
             "NVD_MAX_RETRIES": getattr(app.config, 'NVD_MAX_RETRIES', 5),
             "NVD_RATE_LIMIT": getattr(app.config, 'NVD_RATE_LIMIT', (2, 1)),
-            "NVD_CACHE_DIR": getattr(app.config, 'NVD_CACHE_DIR', "cache"),
+            "NVD_CACHE_DIR": app.config.get('NVD_CACHE_DIR'),
             "NVD_REQUEST_TIMEOUT": getattr(app.config, 'NVD_REQUEST_TIMEOUT', 30),
             "NVD_USER_AGENT": getattr(app.config, 'NVD_USER_AGENT', "Sec4all.co NVD Fetcher"), # Exemplo de outra config
             "NVD_MAX_WINDOW_DAYS": getattr(app.config, 'NVD_MAX_WINDOW_DAYS', 120),
+            "NVD_PIPELINE_DEPTH": app.config.get('NVD_PIPELINE_DEPTH', 1),
+            "NVD_PIPELINE_QUEUE_SIZE": app.config.get('NVD_PIPELINE_QUEUE_SIZE', 2),
+            "NVD_CACHE_ENABLED": app.config.get('NVD_CACHE_ENABLED', True),
+            "NVD_CACHE_MAX_MB": app.config.get('NVD_CACHE_MAX_MB', 2048),
+            "NVD_CACHE_TTL_HOURS": app.config.get('NVD_CACHE_TTL_HOURS', 168.0),
+            "NVD_CACHE_OPEN_TTL": app.config.get('NVD_CACHE_OPEN_TTL', 600.0),
+            "NVD_CACHE_REPLAY": app.config.get('NVD_CACHE_REPLAY', False),
+            "NVD_STREAM_PARSE": app.config.get('NVD_STREAM_PARSE', True),
+            "NVD_EXTRACT_WORKERS": app.config.get('NVD_EXTRACT_WORKERS', -1),
+            "NVD_EXTRACT_START_METHOD": app.config.get('NVD_EXTRACT_START_METHOD', 'spawn'),
         }
 
         # Validar configurações essenciais (ex: API_BASE)
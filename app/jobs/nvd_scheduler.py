@@ -133,10 +133,18 @@ class NVDScheduler:
             "NVD_API_BASE": getattr(self.app.config, 'NVD_API_BASE', "https://services.nvd.nist.gov/rest/json/cves/2.0"),
             "NVD_API_KEY": getattr(self.app.config, 'NVD_API_KEY', None),
             "NVD_RATE_LIMIT": getattr(self.app.config, 'NVD_RATE_LIMIT', (2, 1)),
-            "NVD_CACHE_DIR": getattr(self.app.config, 'NVD_CACHE_DIR', "cache"),
+            "NVD_CACHE_DIR": self.app.config.get('NVD_CACHE_DIR'),
             "NVD_REQUEST_TIMEOUT": getattr(self.app.config, 'NVD_REQUEST_TIMEOUT', 30),
             "NVD_USER_AGENT": getattr(self.app.config, 'NVD_USER_AGENT', "Sec4all.co NVD Fetcher"),
-            "NVD_MAX_WINDOW_DAYS": getattr(self.app.config, 'NVD_MAX_WINDOW_DAYS', 120)
+            "NVD_MAX_WINDOW_DAYS": getattr(self.app.config, 'NVD_MAX_WINDOW_DAYS', 120),
+            "NVD_CACHE_ENABLED": self.app.config.get('NVD_CACHE_ENABLED', True),
+            "NVD_CACHE_MAX_MB": self.app.config.get('NVD_CACHE_MAX_MB', 2048),
+            "NVD_CACHE_TTL_HOURS": self.app.config.get('NVD_CACHE_TTL_HOURS', 168.0),
+            "NVD_CACHE_OPEN_TTL": self.app.config.get('NVD_CACHE_OPEN_TTL', 600.0),
+            "NVD_CACHE_REPLAY": self.app.config.get('NVD_CACHE_REPLAY', False),
+            "NVD_STREAM_PARSE": self.app.config.get('NVD_STREAM_PARSE', True),
+            "NVD_EXTRACT_WORKERS": self.app.config.get('NVD_EXTRACT_WORKERS', -1),
+            "NVD_EXTRACT_START_METHOD": self.app.config.get('NVD_EXTRACT_START_METHOD', 'spawn')
         }
         
         # Validar configurações essenciais
@@ -18,9 +18,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from flask import Flask
 from app.extensions import db
 from app.models.sync_metadata import SyncMetadata
-from services.parallel_nvd_service import ParallelNVDService
-from services.redis_cache_service import RedisCacheService
-from services.vulnerability_service import VulnerabilityService
+from app.services.parallel_nvd_service import ParallelNVDService
+from app.services.redis_cache_service import RedisCacheService
+from app.services.vulnerability_service import VulnerabilityService
 from app.config.scheduler_config import SchedulerConfig
 
 logger = logging.getLogger(__name__)
@@ -37,18 +37,9 @@ _analytics_scheduler_started = False
 
 def _acquire_scheduler_lock(app: Flask, name: str) -> bool:
     try:
-        from app.services.redis_cache_service import RedisCacheService
-        cfg = {
-            'REDIS_CACHE_ENABLED': app.config.get('REDIS_CACHE_ENABLED', False),
-            'REDIS_URL': app.config.get('REDIS_URL', 'redis://localhost:6379/0'),
-            'REDIS_HOST': app.config.get('REDIS_HOST', 'localhost'),
-            'REDIS_PORT': app.config.get('REDIS_PORT', 6379),
-            'REDIS_DB': app.config.get('REDIS_DB', 0),
-            'REDIS_PASSWORD': app.config.get('REDIS_PASSWORD'),
-            'CACHE_KEY_PREFIX': app.config.get('CACHE_KEY_PREFIX', 'nvd_cache:')
-        }
-        rc = RedisCacheService(cfg)
-        if getattr(rc, 'enabled', False) and getattr(rc, 'redis_client', None):
+        from app.services.redis_cache_service import get_cache_service
+        rc = get_cache_service(app)
+        if rc.available:
             k = rc._generate_cache_key(f'scheduler:{name}:lock', 'scheduler')
             v = str(os.getpid()).encode('utf-8')
             return bool(rc.redis_client.set(k, v, nx=True, ex=600))
@@ -79,7 +70,7 @@ def create_app(env_name: Optional[str] = None, config_class=None) -> Flask:
             for k, default in [
                 ('NVD_API_BASE', "https://services.nvd.nist.gov/rest/json/cves/2.0"),
                 ('NVD_API_KEY', None),
-                ('NVD_CACHE_DIR', 'cache'),
+                ('NVD_CACHE_DIR', str(Path(app.instance_path) / 'cache' / 'nvd')),
                 ('NVD_USER_AGENT', 'Open-Monitor NVD Fetcher'),
                 ('NVD_RATE_LIMIT', (2, 1)),
             ]:
@@ -336,10 +327,18 @@ def create_app(env_name: Optional[str] = None, config_class=None) -> Flask:
 
         
 
+        from app.utils.bootstrap_state import bootstrap_state_cache, BootstrapSnapshot
+        bootstrap_state_cache.configure(app)
+        from app.utils.sync_progress import sync_progress
+        sync_progress.configure(app)
+
         @app.before_request
         def _first_user_guard():
             from flask import request as _req
             from flask_login import current_user
+            # Estado estável em cache (root configurado e primeira sync concluída): nada a verificar
+            if bootstrap_state_cache.get() is not None:
+                return None
             total_cnt = 0
             active_cnt = 0
             require_setup = True
@@ -392,6 +391,14 @@ def create_app(env_name: Optional[str] = None, config_class=None) -> Flask:
                 require_setup = True
                 first_sync_done = False
                 scheduled = False
+            bootstrap_state_cache.store(BootstrapSnapshot(
+                total_users=total_cnt,
+                active_users=active_cnt,
+                require_setup=bool(require_setup),
+                first_sync_done=first_sync_done,
+            ))
+            if first_sync_done and not require_setup:
+                return None
             p = getattr(_req, 'path', '')
             try:
                 from app.models.sync_metadata import SyncMetadata
@@ -642,6 +649,11 @@ def create_app(env_name: Optional[str] = None, config_class=None) -> Flask:
             setup_analytics_cache_scheduler(app)
         except Exception:
             pass
+        try:
+            from app.controllers.report_controller import start_report_job_workers
+            start_report_job_workers(app)
+        except Exception:
+            pass
         
         return app
     except Exception as e:
@@ -0,0 +1,74 @@
+"""Add CVE full-text search index
+
+Revision ID: 20261016_add_cve_search_index
+Revises: 20261016_add_vulnerability_daily_stats
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_add_cve_search_index'
+down_revision = '20261016_add_vulnerability_daily_stats'
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(inspector: sa.engine.reflection.Inspector, name: str) -> bool:
+    try:
+        return name in set(inspector.get_table_names())
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _table_exists(inspector, 'cve_search_documents'):
+        op.create_table(
+            'cve_search_documents',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('cve_id', sa.String(length=50), nullable=False),
+            sa.Column('document', sa.Text(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('(CURRENT_TIMESTAMP)')),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        try:
+            op.create_index(op.f('ix_cve_search_documents_cve_id'), 'cve_search_documents', ['cve_id'], unique=True)
+        except Exception:
+            pass
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_cve_search_documents_tsv ON cve_search_documents "
+            "USING gin (to_tsvector('simple'::regconfig, document))"
+        )
+    elif bind.dialect.name == 'sqlite':
+        try:
+            op.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS cve_search_fts "
+                "USING fts5(document, tokenize='unicode61 remove_diacritics 2')"
+            )
+        except Exception:
+            # SQLite sem FTS5: a busca usa LIKE
+            pass
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if bind.dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS cve_search_fts")
+
+    if _table_exists(inspector, 'cve_search_documents'):
+        if bind.dialect.name == 'postgresql':
+            op.execute("DROP INDEX IF EXISTS ix_cve_search_documents_tsv")
+        try:
+            op.drop_index(op.f('ix_cve_search_documents_cve_id'), table_name='cve_search_documents')
+        except Exception:
+            pass
+        op.drop_table('cve_search_documents')
@@ -0,0 +1,47 @@
+"""Add monitoring_rule_cursors high-water marks
+
+Revision ID: 20261016_add_monitoring_rule_cursors
+Revises: 20261016_add_cve_search_index
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_add_monitoring_rule_cursors'
+down_revision = '20261016_add_cve_search_index'
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(inspector: sa.engine.reflection.Inspector, name: str) -> bool:
+    try:
+        return name in set(inspector.get_table_names())
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _table_exists(inspector, 'monitoring_rule_cursors'):
+        op.create_table(
+            'monitoring_rule_cursors',
+            sa.Column('rule_id', sa.Integer(), sa.ForeignKey('monitoring_rules.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('last_update', sa.DateTime(), nullable=False),
+            sa.Column('cve_id', sa.String(length=50), nullable=False, server_default=''),
+            sa.Column('last_notified_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('(CURRENT_TIMESTAMP)')),
+            sa.PrimaryKeyConstraint('rule_id'),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if _table_exists(inspector, 'monitoring_rule_cursors'):
+        op.drop_table('monitoring_rule_cursors')
@@ -0,0 +1,60 @@
+"""Add report_jobs background generation queue
+
+Revision ID: 20261016_add_report_jobs
+Revises: 20261016_add_monitoring_rule_cursors
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_add_report_jobs'
+down_revision = '20261016_add_monitoring_rule_cursors'
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(inspector: sa.engine.reflection.Inspector, name: str) -> bool:
+    try:
+        return name in set(inspector.get_table_names())
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _table_exists(inspector, 'report_jobs'):
+        op.create_table(
+            'report_jobs',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('report_id', sa.Integer(), sa.ForeignKey('reports.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False, server_default='queued'),
+            sa.Column('priority', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+            sa.Column('run_after', sa.DateTime(), nullable=True),
+            sa.Column('cancel_requested', sa.Boolean(), nullable=False, server_default=sa.false()),
+            sa.Column('locked_by', sa.String(length=100), nullable=True),
+            sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('(CURRENT_TIMESTAMP)')),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_report_jobs_report_id', 'report_jobs', ['report_id'])
+        op.create_index('ix_report_jobs_status_priority', 'report_jobs', ['status', 'priority', 'created_at'])
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if _table_exists(inspector, 'report_jobs'):
+        op.drop_index('ix_report_jobs_status_priority', table_name='report_jobs')
+        op.drop_index('ix_report_jobs_report_id', table_name='report_jobs')
+        op.drop_table('report_jobs')
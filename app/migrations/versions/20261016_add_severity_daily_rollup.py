@@ -0,0 +1,66 @@
+"""Add severity_daily_rollup table and vulnerabilities.last_update index
+
+Revision ID: 20261016_add_severity_daily_rollup
+Revises: 20261016_add_vendor_scope_tables
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_add_severity_daily_rollup'
+down_revision = '20261016_add_vendor_scope_tables'
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(inspector: sa.engine.reflection.Inspector, name: str) -> bool:
+    try:
+        return name in set(inspector.get_table_names())
+    except Exception:
+        return False
+
+
+def _index_exists(inspector: sa.engine.reflection.Inspector, table: str, name: str) -> bool:
+    try:
+        return any(ix.get('name') == name for ix in inspector.get_indexes(table))
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _table_exists(inspector, 'severity_daily_rollup'):
+        op.create_table(
+            'severity_daily_rollup',
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('severity', sa.String(length=20), nullable=False),
+            sa.Column('cve_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('(CURRENT_TIMESTAMP)')),
+            sa.PrimaryKeyConstraint('day', 'severity', name='pk_severity_daily_rollup'),
+        )
+
+    # Contagens semanais filtram por published_date OU last_update
+    if _table_exists(inspector, 'vulnerabilities') and not _index_exists(inspector, 'vulnerabilities', 'ix_vulnerabilities_last_update'):
+        try:
+            op.create_index('ix_vulnerabilities_last_update', 'vulnerabilities', ['last_update'], unique=False)
+        except Exception:
+            pass
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if _index_exists(inspector, 'vulnerabilities', 'ix_vulnerabilities_last_update'):
+        try:
+            op.drop_index('ix_vulnerabilities_last_update', table_name='vulnerabilities')
+        except Exception:
+            pass
+
+    if _table_exists(inspector, 'severity_daily_rollup'):
+        op.drop_table('severity_daily_rollup')
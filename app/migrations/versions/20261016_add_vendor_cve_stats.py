@@ -0,0 +1,57 @@
+"""Add vendor_cve_stats aggregate table
+
+Revision ID: 20261016_add_vendor_cve_stats
+Revises: initial_schema_full_postgres
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_add_vendor_cve_stats'
+down_revision = 'initial_schema_full_postgres'
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(inspector: sa.engine.reflection.Inspector, name: str) -> bool:
+    try:
+        return name in set(inspector.get_table_names())
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _table_exists(inspector, 'vendor_cve_stats'):
+        op.create_table(
+            'vendor_cve_stats',
+            sa.Column('vendor_id', sa.Integer(), sa.ForeignKey('vendor.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('part', sa.String(length=1), nullable=False),
+            sa.Column('cve_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('critical_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('high_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('last_published', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('(CURRENT_TIMESTAMP)')),
+            sa.PrimaryKeyConstraint('vendor_id', 'part', name='pk_vendor_cve_stats'),
+        )
+        try:
+            op.create_index('ix_vendor_cve_stats_part_vendor', 'vendor_cve_stats', ['part', 'vendor_id'], unique=False)
+        except Exception:
+            pass
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if _table_exists(inspector, 'vendor_cve_stats'):
+        try:
+            op.drop_index('ix_vendor_cve_stats_part_vendor', table_name='vendor_cve_stats')
+        except Exception:
+            pass
+        op.drop_table('vendor_cve_stats')
@@ -0,0 +1,79 @@
+"""Add materialized vendor scope tables
+
+Revision ID: 20261016_add_vendor_scope_tables
+Revises: 20261016_add_vendor_cve_stats
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_add_vendor_scope_tables'
+down_revision = '20261016_add_vendor_cve_stats'
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(inspector: sa.engine.reflection.Inspector, name: str) -> bool:
+    try:
+        return name in set(inspector.get_table_names())
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _table_exists(inspector, 'vendor_scope_sets'):
+        op.create_table(
+            'vendor_scope_sets',
+            sa.Column('scope_key', sa.String(length=64), nullable=False),
+            sa.Column('generation', sa.Integer(), nullable=False),
+            sa.Column('vendor_ids', sa.Text(), nullable=False),
+            sa.Column('cve_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('(CURRENT_TIMESTAMP)')),
+            sa.PrimaryKeyConstraint('scope_key'),
+        )
+        try:
+            op.create_index(op.f('ix_vendor_scope_sets_generation'), 'vendor_scope_sets', ['generation'], unique=False)
+        except Exception:
+            pass
+        try:
+            op.create_index(op.f('ix_vendor_scope_sets_created_at'), 'vendor_scope_sets', ['created_at'], unique=False)
+        except Exception:
+            pass
+
+    if not _table_exists(inspector, 'vendor_scope_cves'):
+        op.create_table(
+            'vendor_scope_cves',
+            sa.Column('scope_key', sa.String(length=64), nullable=False),
+            sa.Column('cve_id', sa.String(length=50), nullable=False),
+            sa.PrimaryKeyConstraint('scope_key', 'cve_id', name='pk_vendor_scope_cves'),
+        )
+        try:
+            op.create_index('ix_vendor_scope_cves_cve', 'vendor_scope_cves', ['cve_id'], unique=False)
+        except Exception:
+            pass
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if _table_exists(inspector, 'vendor_scope_cves'):
+        try:
+            op.drop_index('ix_vendor_scope_cves_cve', table_name='vendor_scope_cves')
+        except Exception:
+            pass
+        op.drop_table('vendor_scope_cves')
+
+    if _table_exists(inspector, 'vendor_scope_sets'):
+        for name in ('ix_vendor_scope_sets_created_at', 'ix_vendor_scope_sets_generation'):
+            try:
+                op.drop_index(op.f(name), table_name='vendor_scope_sets')
+            except Exception:
+                pass
+        op.drop_table('vendor_scope_sets')
@@ -0,0 +1,61 @@
+"""Add vulnerability_daily_stats rollup table
+
+Revision ID: 20261016_add_vulnerability_daily_stats
+Revises: 20261016_add_severity_daily_rollup
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_add_vulnerability_daily_stats'
+down_revision = '20261016_add_severity_daily_rollup'
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(inspector: sa.engine.reflection.Inspector, name: str) -> bool:
+    try:
+        return name in set(inspector.get_table_names())
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _table_exists(inspector, 'vulnerability_daily_stats'):
+        op.create_table(
+            'vulnerability_daily_stats',
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('severity', sa.String(length=20), nullable=False),
+            sa.Column('vendor_id', sa.Integer(), sa.ForeignKey('vendor.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('part', sa.String(length=1), nullable=False),
+            sa.Column('cve_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('(CURRENT_TIMESTAMP)')),
+            sa.PrimaryKeyConstraint('day', 'severity', 'vendor_id', 'part', name='pk_vulnerability_daily_stats'),
+        )
+        try:
+            op.create_index(
+                'ix_vulnerability_daily_stats_vendor_part_day',
+                'vulnerability_daily_stats',
+                ['vendor_id', 'part', 'day'],
+                unique=False,
+            )
+        except Exception:
+            pass
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if _table_exists(inspector, 'vulnerability_daily_stats'):
+        try:
+            op.drop_index('ix_vulnerability_daily_stats_vendor_part_day', table_name='vulnerability_daily_stats')
+        except Exception:
+            pass
+        op.drop_table('vulnerability_daily_stats')
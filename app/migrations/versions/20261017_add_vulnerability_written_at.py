@@ -0,0 +1,60 @@
+"""Add vulnerabilities.written_at ingestion marker for monitoring cursors
+
+Revision ID: 20261017_add_vulnerability_written_at
+Revises: 20261017_backfill_cve_search_index
+Create Date: 2026-10-17
+
+O cursor do monitoramento passa de (last_update, cve_id) para (written_at, cve_id):
+last_update é o lastModified do NVD, não o momento da gravação, e lotes gravados
+em paralelo/fora de ordem podiam ficar atrás de um cursor já avançado. As linhas
+existentes recebem written_at = last_update, de modo que os cursores atuais
+(renomeados para written_at) continuam apontando para a mesma posição.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017_add_vulnerability_written_at'
+down_revision = '20261017_backfill_cve_search_index'
+branch_labels = None
+depends_on = None
+
+
+def _columns(inspector: sa.engine.reflection.Inspector, table: str) -> set:
+    try:
+        return {c['name'] for c in inspector.get_columns(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    vuln_columns = _columns(inspector, 'vulnerabilities')
+    if vuln_columns and 'written_at' not in vuln_columns:
+        op.add_column('vulnerabilities', sa.Column('written_at', sa.DateTime(), nullable=True))
+        op.execute("UPDATE vulnerabilities SET written_at = last_update")
+        op.create_index('ix_vulnerabilities_written_at', 'vulnerabilities', ['written_at'])
+
+    cursor_columns = _columns(inspector, 'monitoring_rule_cursors')
+    if 'last_update' in cursor_columns and 'written_at' not in cursor_columns:
+        with op.batch_alter_table('monitoring_rule_cursors') as batch_op:
+            batch_op.alter_column('last_update', new_column_name='written_at',
+                                  existing_type=sa.DateTime(), existing_nullable=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    cursor_columns = _columns(inspector, 'monitoring_rule_cursors')
+    if 'written_at' in cursor_columns and 'last_update' not in cursor_columns:
+        with op.batch_alter_table('monitoring_rule_cursors') as batch_op:
+            batch_op.alter_column('written_at', new_column_name='last_update',
+                                  existing_type=sa.DateTime(), existing_nullable=False)
+
+    if 'written_at' in _columns(inspector, 'vulnerabilities'):
+        op.drop_index('ix_vulnerabilities_written_at', table_name='vulnerabilities')
+        op.drop_column('vulnerabilities', 'written_at')
@@ -0,0 +1,53 @@
+"""Backfill CVE full-text search index for existing vulnerabilities
+
+Revision ID: 20261017_backfill_cve_search_index
+Revises: 20261017_rebuild_vulnerability_daily_stats
+Create Date: 2026-10-17
+
+A busca só usa o índice quando há um documento para cada CVE; bancos existentes
+recebem aqui os documentos das CVEs gravadas antes de 20261016_add_cve_search_index
+(em bancos grandes esta etapa leva alguns minutos).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017_backfill_cve_search_index'
+down_revision = '20261017_rebuild_vulnerability_daily_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    try:
+        existing = set(inspector.get_table_names())
+    except Exception:
+        return
+    if 'cve_search_documents' not in existing or 'vulnerabilities' not in existing:
+        return
+
+    if bind.dialect.name == 'postgresql':
+        backend = 'postgresql'
+    elif bind.dialect.name == 'sqlite' and 'cve_search_fts' in existing:
+        backend = 'fts5'
+    else:
+        return
+
+    from sqlalchemy.orm import Session
+    from app.services.search_service import CVESearchService
+
+    # SAVEPOINT na conexão da migração: o commit da sessão não encerra a transação do Alembic
+    session = Session(bind=bind, join_transaction_mode='create_savepoint')
+    try:
+        CVESearchService(session, backend=backend).rebuild_all()
+        session.commit()
+    finally:
+        session.close()
+
+
+def downgrade():
+    # Somente dados: os documentos continuam válidos na revisão anterior
+    pass
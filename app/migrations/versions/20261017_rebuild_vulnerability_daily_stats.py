@@ -0,0 +1,62 @@
+"""Rebuild vulnerability_daily_stats with product-linked CVEs
+
+Revision ID: 20261017_rebuild_vulnerability_daily_stats
+Revises: 20261016_add_report_jobs
+Create Date: 2026-10-17
+
+As linhas por vendor passaram a incluir CVEs associadas via produtos do vendor
+(cve_products ⋈ product), o mesmo escopo do VendorScopeService; as linhas antigas
+só contavam cve_vendors e são recalculadas aqui.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017_rebuild_vulnerability_daily_stats'
+down_revision = '20261016_add_report_jobs'
+branch_labels = None
+depends_on = None
+
+
+_REQUIRED_TABLES = ('vulnerability_daily_stats', 'vulnerabilities', 'cve_vendors', 'cve_products', 'product', 'cve_parts')
+
+_VENDOR_PAIRS = (
+    "SELECT cve_id, vendor_id FROM cve_vendors "
+    "UNION "
+    "SELECT cp.cve_id, p.vendor_id FROM cve_products cp "
+    "JOIN product p ON p.id = cp.product_id WHERE p.vendor_id IS NOT NULL"
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    try:
+        existing = set(inspector.get_table_names())
+    except Exception:
+        return
+    if not all(name in existing for name in _REQUIRED_TABLES):
+        return
+
+    op.execute("DELETE FROM vulnerability_daily_stats")
+    op.execute(
+        "INSERT INTO vulnerability_daily_stats (day, severity, vendor_id, part, cve_count, updated_at) "
+        "SELECT date(v.published_date), v.base_severity, pairs.vendor_id, '*', count(*), CURRENT_TIMESTAMP "
+        f"FROM vulnerabilities v JOIN ({_VENDOR_PAIRS}) pairs ON pairs.cve_id = v.cve_id "
+        "WHERE v.published_date IS NOT NULL AND v.base_severity IS NOT NULL "
+        "GROUP BY date(v.published_date), v.base_severity, pairs.vendor_id"
+    )
+    op.execute(
+        "INSERT INTO vulnerability_daily_stats (day, severity, vendor_id, part, cve_count, updated_at) "
+        "SELECT date(v.published_date), v.base_severity, pairs.vendor_id, cp.part, count(DISTINCT v.cve_id), CURRENT_TIMESTAMP "
+        f"FROM vulnerabilities v JOIN ({_VENDOR_PAIRS}) pairs ON pairs.cve_id = v.cve_id "
+        "JOIN cve_parts cp ON cp.cve_id = v.cve_id "
+        "WHERE v.published_date IS NOT NULL AND v.base_severity IS NOT NULL "
+        "GROUP BY date(v.published_date), v.base_severity, pairs.vendor_id, cp.part"
+    )
+
+
+def downgrade():
+    # Somente dados: as linhas recalculadas continuam válidas na revisão anterior
+    pass
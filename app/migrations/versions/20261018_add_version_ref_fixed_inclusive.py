@@ -0,0 +1,70 @@
+"""Add version_ref.fixed_inclusive to keep versionEndIncluding bounds inclusive
+
+Revision ID: 20261018_add_version_ref_fixed_inclusive
+Revises: 20261017_add_vulnerability_written_at
+Create Date: 2026-10-18
+
+`fixed_version` guarda tanto versionEndIncluding quanto versionEndExcluding, e a
+correlação de ativos tratava o fim como exclusivo em ambos os casos. Linhas
+existentes são marcadas como inclusivas quando o rótulo de affected_products do
+mesmo (CVE, produto) termina em "<= fixed_version"; as demais ficam NULL
+(exclusivo, como antes) até a próxima gravação da CVE.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_version_ref_fixed_inclusive'
+down_revision = '20261017_add_vulnerability_written_at'
+branch_labels = None
+depends_on = None
+
+
+def _columns(inspector: sa.engine.reflection.Inspector, table: str) -> set:
+    try:
+        return {c['name'] for c in inspector.get_columns(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    columns = _columns(inspector, 'version_ref')
+    if not columns or 'fixed_inclusive' in columns:
+        return
+    op.add_column('version_ref', sa.Column('fixed_inclusive', sa.Boolean(), nullable=True))
+
+    if 'affected_versions' not in _columns(inspector, 'affected_products'):
+        return
+    version_ref = sa.table(
+        'version_ref',
+        sa.column('cve_id', sa.String), sa.column('product_id', sa.Integer),
+        sa.column('fixed_version', sa.String), sa.column('fixed_inclusive', sa.Boolean),
+    )
+    affected = sa.table(
+        'affected_products',
+        sa.column('vulnerability_id', sa.String), sa.column('product_id', sa.Integer),
+        sa.column('affected_versions', sa.String),
+    )
+    op.execute(
+        version_ref.update()
+        .where(version_ref.c.fixed_version.isnot(None))
+        .where(sa.exists().where(sa.and_(
+            affected.c.vulnerability_id == version_ref.c.cve_id,
+            affected.c.product_id == version_ref.c.product_id,
+            affected.c.affected_versions.like(sa.literal('%<= ') + version_ref.c.fixed_version),
+        )))
+        .values(fixed_inclusive=True)
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'fixed_inclusive' in _columns(inspector, 'version_ref'):
+        with op.batch_alter_table('version_ref') as batch_op:
+            batch_op.drop_column('fixed_inclusive')
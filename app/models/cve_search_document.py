@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, text
+from app.extensions import db
+
+
+class CVESearchDocument(db.Model):
+    """
+    Documento de busca textual de uma CVE.
+
+    `document` concatena cve_id, descrição, nomes de vendors/produtos, CWEs e
+    assigner. No PostgreSQL é indexado por GIN sobre `to_tsvector('simple', document)`;
+    no SQLite o texto é espelhado na tabela virtual FTS5 `cve_search_fts`
+    (rowid = id). Mantido incrementalmente pelo caminho de persistência da NVD.
+    """
+    __tablename__ = 'cve_search_documents'
+    __allow_unmapped__ = True
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cve_id = Column(String(50), nullable=False, unique=True, index=True)
+    document = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (
+        Index(
+            'ix_cve_search_documents_tsv',
+            text("to_tsvector('simple'::regconfig, document)"),
+            postgresql_using='gin',
+        ).ddl_if(dialect='postgresql'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<CVESearchDocument cve_id={self.cve_id}>"
@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from app.extensions import db
+
+
+class MonitoringRuleCursor(db.Model):
+    """
+    Marca d'água de avaliação de uma MonitoringRule.
+
+    Guarda a última posição (written_at, cve_id) de `vulnerabilities` já avaliada
+    para a regra; o dispatcher só considera CVEs gravadas depois dela.
+    """
+    __tablename__ = 'monitoring_rule_cursors'
+    __allow_unmapped__ = True
+
+    rule_id = Column(Integer, ForeignKey('monitoring_rules.id', ondelete='CASCADE'), primary_key=True)
+    written_at = Column(DateTime, nullable=False)
+    cve_id = Column(String(50), nullable=False, default='')
+    last_notified_at = Column(DateTime, nullable=True)
+    updated_at = Column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<MonitoringRuleCursor rule={self.rule_id} at={self.written_at} cve_id={self.cve_id}>"
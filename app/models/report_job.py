@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index
+from app.extensions import db
+
+
+class ReportJob(db.Model):
+    """
+    Job de geração de relatório na fila persistente (ver ReportJobService).
+
+    Estados: queued -> running -> succeeded | failed | cancelled. Falhas com
+    tentativas restantes voltam para queued com `run_after` no futuro (backoff).
+    Maior `priority` é executado primeiro; empates seguem a ordem de criação.
+    """
+    __tablename__ = 'report_jobs'
+    __allow_unmapped__ = True
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    report_id = Column(Integer, ForeignKey('reports.id', ondelete='CASCADE'), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default='queued')
+    priority = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    locked_by = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+    # Datas em UTC sem fuso, comparadas diretamente no SQL (run_after, heartbeat)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), nullable=False)
+
+    __table_args__ = (
+        Index('ix_report_jobs_status_priority', 'status', 'priority', 'created_at'),
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'status': self.status,
+            'priority': self.priority,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'cancel_requested': bool(self.cancel_requested),
+            'run_after': self.run_after.isoformat() if self.run_after else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'error': self.error,
+        }
+
+    def __repr__(self) -> str:
+        return f"<ReportJob id={self.id} report={self.report_id} status={self.status}>"
@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, Date, DateTime, PrimaryKeyConstraint
+from app.extensions import db
+
+
+class SeverityDailyRollup(db.Model):
+    """
+    Contagem diária de CVEs por severidade (dia de publicação).
+
+    Uma linha por (day, severity). Mantido pelo caminho de persistência da NVD para
+    que os totais do dashboard sem escopo de vendor sejam uma soma sobre poucas
+    linhas, em vez de COUNTs sobre `vulnerabilities`.
+    """
+    __tablename__ = 'severity_daily_rollup'
+    __allow_unmapped__ = True
+
+    day = Column(Date, nullable=False)
+    severity = Column(String(20), nullable=False)
+    cve_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('day', 'severity', name='pk_severity_daily_rollup'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SeverityDailyRollup day={self.day} severity={self.severity} cve_count={self.cve_count}>"
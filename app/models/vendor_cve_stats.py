@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, PrimaryKeyConstraint, Index
+from app.extensions import db
+
+
+class VendorCVEStats(db.Model):
+    """
+    Agregado materializado de CVEs por vendor e "part" da CPE.
+
+    Uma linha por (vendor_id, part), onde part é 'a', 'o', 'h' ou '*' (todas as CVEs
+    do vendor). Mantido pelo caminho de persistência da NVD para que a seleção de
+    vendors não precise varrer `vulnerabilities` nem decodificar JSON.
+    """
+    __tablename__ = 'vendor_cve_stats'
+    __allow_unmapped__ = True
+
+    ALL_PARTS = '*'
+
+    vendor_id = Column(Integer, ForeignKey('vendor.id', ondelete='CASCADE'), nullable=False)
+    part = Column(String(1), nullable=False, doc="CPE part: 'a', 'o', 'h' ou '*' para o total do vendor")
+    cve_count = Column(Integer, nullable=False, default=0)
+    critical_count = Column(Integer, nullable=False, default=0)
+    high_count = Column(Integer, nullable=False, default=0)
+    last_published = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('vendor_id', 'part', name='pk_vendor_cve_stats'),
+        Index('ix_vendor_cve_stats_part_vendor', 'part', 'vendor_id'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<VendorCVEStats vendor_id={self.vendor_id} part={self.part} cve_count={self.cve_count}>"
@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, PrimaryKeyConstraint, Index
+from app.extensions import db
+
+
+class VendorScopeSet(db.Model):
+    """
+    Conjunto de CVEs materializado para uma seleção de vendors.
+
+    `scope_key` combina a geração de sincronização (SyncMetadata
+    'vendor_scope_generation') com o hash da lista ordenada de vendor IDs; quando
+    associações CVE↔vendor/produto mudam, a geração avança e os conjuntos antigos
+    deixam de ser usados.
+    """
+    __tablename__ = 'vendor_scope_sets'
+    __allow_unmapped__ = True
+
+    scope_key = Column(String(64), primary_key=True)
+    generation = Column(Integer, nullable=False, index=True)
+    vendor_ids = Column(Text, nullable=False, doc="Vendor IDs ordenados, separados por vírgula")
+    cve_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<VendorScopeSet key={self.scope_key} cves={self.cve_count}>"
+
+
+class VendorScopeCVE(db.Model):
+    """Membros (CVE IDs) de um VendorScopeSet."""
+    __tablename__ = 'vendor_scope_cves'
+    __allow_unmapped__ = True
+
+    scope_key = Column(String(64), nullable=False)
+    cve_id = Column(String(50), nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('scope_key', 'cve_id', name='pk_vendor_scope_cves'),
+        Index('ix_vendor_scope_cves_cve', 'cve_id'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<VendorScopeCVE key={self.scope_key} cve_id={self.cve_id}>"
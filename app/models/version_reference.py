@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 from app.extensions.db import db
 
@@ -25,6 +25,8 @@ class VersionReference(db.Model):
     # Version information
     affected_version = Column(String(100), nullable=False)
     fixed_version = Column(String(100), nullable=True)
+    # True quando fixed_version veio de versionEndIncluding (ainda afetada); NULL em linhas antigas
+    fixed_inclusive = Column(Boolean, nullable=True)
 
     # Relationships
     vulnerability = relationship(
@@ -2,7 +2,7 @@
 
 import re
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, Dict, Any
 
 from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, JSON
@@ -13,6 +13,12 @@ from app.models.enums import severity_levels
 
 logger = logging.getLogger(__name__)
 
+
+def ingestion_time() -> datetime:
+    """Instante (UTC, sem tzinfo) gravado em `Vulnerability.written_at`."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Vulnerability(db.Model):
     __tablename__ = 'vulnerabilities'
     __table_args__ = (
@@ -23,8 +29,10 @@ class Vulnerability(db.Model):
     cve_id          = Column(String(50), primary_key=True, nullable=False, index=True)
     description     = Column(Text, nullable=False)
     published_date  = Column(DateTime, nullable=False, index=True)
-    last_update     = Column(DateTime, nullable=False)
+    last_update     = Column(DateTime, nullable=False, index=True)
     last_modified   = synonym('last_update')
+    # Momento em que a CVE foi gravada ou teve last_update alterado localmente (cursor do monitoramento)
+    written_at      = Column(DateTime, nullable=True, index=True, default=ingestion_time)
     base_severity   = Column(severity_levels, nullable=False, index=True)
     cvss_score      = Column(Float, nullable=False, index=True)
     patch_available = Column(Boolean, default=False, nullable=False, index=True)
@@ -76,6 +84,8 @@ class Vulnerability(db.Model):
     def validate_dates(self, key: str, value: datetime) -> datetime:
         if self.published_date and value < self.published_date:
             raise ValueError("last_update deve ser >= published_date")
+        if value != self.last_update:
+            self.written_at = ingestion_time()
         return value
 
     def to_dict(self) -> Dict[str, Any]:
@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, PrimaryKeyConstraint, Index
+from app.extensions import db
+
+
+class VulnerabilityDailyStats(db.Model):
+    """
+    Contagem diária de CVEs por severidade, vendor e "part" da CPE.
+
+    Uma linha por (day, severity, vendor_id, part), onde day é o dia de publicação e
+    part é 'a', 'o', 'h' ou '*' (todas as CVEs do vendor). Uma CVE pertence ao vendor
+    por associação direta (cve_vendors) ou por produto do vendor (cve_products), como
+    no VendorScopeService. Somar linhas de vendors diferentes conta duas vezes CVEs
+    compartilhadas; totais sem vendor vêm de `severity_daily_rollup`.
+    """
+    __tablename__ = 'vulnerability_daily_stats'
+    __allow_unmapped__ = True
+
+    ALL_PARTS = '*'
+
+    day = Column(Date, nullable=False)
+    severity = Column(String(20), nullable=False)
+    vendor_id = Column(Integer, ForeignKey('vendor.id', ondelete='CASCADE'), nullable=False)
+    part = Column(String(1), nullable=False, doc="CPE part: 'a', 'o', 'h' ou '*' para o total do vendor")
+    cve_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('day', 'severity', 'vendor_id', 'part', name='pk_vulnerability_daily_stats'),
+        Index('ix_vulnerability_daily_stats_vendor_part_day', 'vendor_id', 'part', 'day'),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<VulnerabilityDailyStats day={self.day} severity={self.severity} "
+            f"vendor_id={self.vendor_id} part={self.part} cve_count={self.cve_count}>"
+        )
@@ -0,0 +1,27 @@
+import argparse
+
+from app.app import create_app
+from app.extensions.db import db
+from app.services.daily_stats_service import DailyStatsService
+
+
+def backfill(config_name: str = 'development', days=None):
+    app = create_app(config_name)
+    with app.app_context():
+        service = DailyStatsService(db.session)
+        if days:
+            refreshed = service.refresh_days(days)
+            db.session.commit()
+            print(f"Dias recalculados: {refreshed}")
+        else:
+            rows = service.rebuild_all()
+            db.session.commit()
+            print(f"Agregados diários reconstruídos ({rows} linhas em severity_daily_rollup)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild severity_daily_rollup and vulnerability_daily_stats from vulnerabilities')
+    parser.add_argument('--config', type=str, default='development', help='Config name passed to create_app')
+    parser.add_argument('--day', type=str, action='append', default=None, help='Only refresh these days, YYYY-MM-DD (repeatable)')
+    args = parser.parse_args()
+    backfill(config_name=args.config, days=args.day)
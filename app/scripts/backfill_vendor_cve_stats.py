@@ -0,0 +1,27 @@
+import argparse
+
+from app.app import create_app
+from app.extensions.db import db
+from app.services.vendor_stats_service import VendorStatsService
+
+
+def backfill(config_name: str = 'development', vendor_ids=None):
+    app = create_app(config_name)
+    with app.app_context():
+        service = VendorStatsService(db.session)
+        if vendor_ids:
+            refreshed = service.refresh_for_vendors(vendor_ids)
+            db.session.commit()
+            print(f"Vendors recalculados: {refreshed}")
+        else:
+            rows = service.rebuild_all()
+            db.session.commit()
+            print(f"Linhas em vendor_cve_stats: {rows}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild vendor_cve_stats from cve_vendors/cve_products/cve_parts')
+    parser.add_argument('--config', type=str, default='development', help='Config name passed to create_app')
+    parser.add_argument('--vendor-id', type=int, action='append', default=None, help='Only refresh these vendor IDs (repeatable)')
+    args = parser.parse_args()
+    backfill(config_name=args.config, vendor_ids=args.vendor_id)
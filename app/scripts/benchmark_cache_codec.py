@@ -0,0 +1,144 @@
+import argparse
+import gzip
+import json
+import pickle
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.utils import cache_codec
+from app.utils.cache_codec import CacheCodec
+
+
+def legacy_encode(data: Any, threshold: int = 1024) -> bytes:
+    """Serialização anterior do RedisCacheService (json.dumps, depois pickle+gzip se grande)."""
+    serialized = json.dumps(data, default=str, ensure_ascii=False).encode('utf-8')
+    if len(serialized) > threshold:
+        return b'GZIP_PICKLE:' + gzip.compress(pickle.dumps(data))
+    return b'JSON:' + serialized
+
+
+def build_codecs(threshold: int) -> Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    codecs = {'legacy json/pickle+gzip': (lambda v: legacy_encode(v, threshold), CacheCodec.decode_legacy)}
+    variants = [('json', 'zlib'), ('orjson', 'none'), ('orjson', 'zlib'), ('orjson', 'lz4'), ('orjson', 'zstd')]
+    for fmt, compressor in variants:
+        if fmt == 'orjson' and cache_codec.orjson is None:
+            continue
+        if compressor in ('lz4', 'zstd') and cache_codec.COMPRESSORS[cache_codec._COMPRESSOR_NAMES[compressor]][0] is None:
+            continue
+        codec = CacheCodec(compression_threshold=threshold, compressor=compressor, fmt=fmt)
+        codecs[f"v1 {fmt}+{compressor}"] = (codec.encode, codec.decode)
+    try:
+        import msgpack
+
+        def mp_encode(v):
+            return msgpack.packb(v, default=str, use_bin_type=True)
+
+        codecs['msgpack (ref.)'] = (mp_encode, lambda b: msgpack.unpackb(b, raw=False, strict_map_key=False))
+    except ImportError:
+        pass
+    return codecs
+
+
+def synthetic_payloads(cves: int = 500) -> Dict[str, Any]:
+    """Payloads no formato dos endpoints de analytics e do conteúdo de relatórios."""
+    rnd = random.Random(42)
+    severities = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW']
+    overview = {
+        'total_cves': 251234, 'critical_cves': 18234, 'high_cves': 70123, 'medium_cves': 120345, 'low_cves': 42532,
+        'patched_cves': 180234, 'unpatched_cves': 71000, 'active_threats': 1200, 'avg_cvss_score': 6.71,
+        'avg_exploit_score': 2.93, 'patch_coverage': 71.7, 'vendor_count': 23012, 'product_count': 98231, 'cwe_count': 812,
+        'severity_distribution': {'critical': 18234, 'high': 70123, 'medium': 120345, 'low': 42532},
+    }
+    now = datetime(2026, 1, 1)
+    items = [{
+        'cve_id': f'CVE-2025-{i:05d}',
+        'description': ' '.join(rnd.choice(['buffer', 'overflow', 'remote', 'attacker', 'crafted', 'request', 'allows',
+                                             'execute', 'arbitrary', 'code', 'via', 'the', 'component']) for _ in range(40)),
+        'base_severity': rnd.choice(severities),
+        'cvss_score': round(rnd.uniform(1, 10), 1),
+        'published_date': (now - timedelta(days=rnd.randint(0, 900))).isoformat(),
+        'vendors': [f'vendor{rnd.randint(1, 300)}' for _ in range(rnd.randint(1, 3))],
+        'products': [f'product{rnd.randint(1, 900)}' for _ in range(rnd.randint(1, 4))],
+        'patch_available': rnd.random() > 0.4,
+    } for i in range(cves)]
+    return {
+        'overview (sintético)': overview,
+        'latest_cves page (sintético)': {'data': items[:50], 'pagination': {'page': 1, 'per_page': 50, 'total': cves}},
+        'report content (sintético)': {'summary': overview, 'vulnerabilities': items,
+                                       'charts': {'timeline': [[d, rnd.randint(0, 300)] for d in range(365)]}},
+    }
+
+
+def real_payloads(limit: int) -> Dict[str, Any]:
+    """Conteúdo de relatórios do banco e entradas de analytics em cache no Redis, quando disponíveis."""
+    from app.main_startup import create_app
+    from app.extensions import db
+    from app.models.report import Report
+    from app.services.redis_cache_service import get_cache_service
+
+    payloads: Dict[str, Any] = {}
+    app = create_app()
+    with app.app_context():
+        for report in db.session.query(Report).order_by(Report.id.desc()).limit(limit):
+            payloads[f'report #{report.id}'] = {
+                'content': report.content, 'charts_data': report.charts_data, 'ai_analysis': report.ai_analysis,
+            }
+        cache = get_cache_service(app, CACHE_KEY_PREFIX=app.config.get('CACHE_KEY_PREFIX', 'analytics_cache:'))
+        if cache.available:
+            pattern = cache._generate_cache_key('*', 'analytics')
+            for i, key in enumerate(cache.redis_client.scan_iter(match=pattern, count=200)):
+                if i >= limit or key.endswith((b':metadata', b':access_count')):
+                    continue
+                raw = cache.redis_client.get(key)
+                if raw:
+                    payloads[key.decode('utf-8', 'replace')] = cache._deserialize_data(raw)
+    return payloads
+
+
+def bench(fn: Callable, arg: Any, min_time: float) -> float:
+    """Tempo médio por chamada (µs), repetindo até `min_time` segundos."""
+    runs, start = 0, time.perf_counter()
+    while True:
+        fn(arg)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cache codecs on analytics/report payloads')
+    parser.add_argument('--payload', action='append', default=[], help='Arquivo JSON com um payload (repetível)')
+    parser.add_argument('--real', action='store_true', help='Usar relatórios do banco e entradas de analytics do Redis')
+    parser.add_argument('--limit', type=int, default=5, help='Máximo de payloads reais por fonte')
+    parser.add_argument('--threshold', type=int, default=1024, help='CACHE_COMPRESSION_THRESHOLD')
+    parser.add_argument('--min-time', type=float, default=0.3, help='Tempo mínimo por medição (s)')
+    args = parser.parse_args()
+
+    payloads: Dict[str, Any] = {}
+    for path in args.payload:
+        with open(path, 'rb') as fh:
+            payloads[path] = json.load(fh)
+    if args.real:
+        payloads.update(real_payloads(args.limit))
+    if not payloads:
+        payloads = synthetic_payloads()
+
+    codecs = build_codecs(args.threshold)
+    print(f"{'payload':34} {'codec':26} {'bytes':>10} {'encode µs':>11} {'decode µs':>11}")
+    for name, payload in payloads.items():
+        for codec_name, (encode, decode) in codecs.items():
+            blob = encode(payload)
+            rows: List[str] = [
+                f"{name[:34]:34} {codec_name:26} {len(blob):>10}",
+                f"{bench(encode, payload, args.min_time):>11.1f}",
+                f"{bench(decode, blob, args.min_time):>11.1f}",
+            ]
+            print(' '.join(rows))
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import argparse
+
+from app.app import create_app
+from app.extensions.db import db
+from app.services.search_service import CVESearchService
+
+
+def rebuild(config_name: str = 'development', cve_ids=None):
+    app = create_app(config_name)
+    with app.app_context():
+        service = CVESearchService(db.session)
+        if not service.backend():
+            print("Índice de busca indisponível (tabela cve_search_documents ausente ou dialeto sem suporte)")
+            return
+        if cve_ids:
+            written = service.index_cves(cve_ids)
+        else:
+            written = service.rebuild_all()
+        db.session.commit()
+        print(f"Documentos indexados: {written} (backend={service.backend()})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild the CVE full-text search index from vulnerabilities')
+    parser.add_argument('--config', type=str, default='development', help='Config name passed to create_app')
+    parser.add_argument('--cve', type=str, action='append', default=None, help='Only reindex these CVE IDs (repeatable)')
+    args = parser.parse_args()
+    rebuild(config_name=args.config, cve_ids=args.cve)
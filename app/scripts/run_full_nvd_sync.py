@@ -21,10 +21,20 @@ def build_nvd_config(app):
         "NVD_PAGE_SIZE": getattr(app.config, 'NVD_PAGE_SIZE', 2000),
         "NVD_MAX_RETRIES": getattr(app.config, 'NVD_MAX_RETRIES', 5),
         "NVD_RATE_LIMIT": getattr(app.config, 'NVD_RATE_LIMIT', (2, 1)),
-        "NVD_CACHE_DIR": getattr(app.config, 'NVD_CACHE_DIR', "cache"),
+        "NVD_CACHE_DIR": app.config.get('NVD_CACHE_DIR'),
         "NVD_REQUEST_TIMEOUT": getattr(app.config, 'NVD_REQUEST_TIMEOUT', 30),
         "NVD_USER_AGENT": getattr(app.config, 'NVD_USER_AGENT', "Sec4all.co NVD Fetcher"),
         "NVD_MAX_WINDOW_DAYS": getattr(app.config, 'NVD_MAX_WINDOW_DAYS', 120),
+        "NVD_PIPELINE_DEPTH": app.config.get('NVD_PIPELINE_DEPTH', 1),
+        "NVD_PIPELINE_QUEUE_SIZE": app.config.get('NVD_PIPELINE_QUEUE_SIZE', 2),
+        "NVD_CACHE_ENABLED": app.config.get('NVD_CACHE_ENABLED', True),
+        "NVD_CACHE_MAX_MB": app.config.get('NVD_CACHE_MAX_MB', 2048),
+        "NVD_CACHE_TTL_HOURS": app.config.get('NVD_CACHE_TTL_HOURS', 168.0),
+        "NVD_CACHE_OPEN_TTL": app.config.get('NVD_CACHE_OPEN_TTL', 600.0),
+        "NVD_CACHE_REPLAY": app.config.get('NVD_CACHE_REPLAY', False),
+        "NVD_STREAM_PARSE": app.config.get('NVD_STREAM_PARSE', True),
+        "NVD_EXTRACT_WORKERS": app.config.get('NVD_EXTRACT_WORKERS', -1),
+        "NVD_EXTRACT_START_METHOD": app.config.get('NVD_EXTRACT_START_METHOD', 'spawn'),
     }
 
 
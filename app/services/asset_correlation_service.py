@@ -0,0 +1,172 @@
+"""
+Correlação ativo ↔ CVE por produto e intervalo de versões.
+
+Para um ativo, os intervalos de versões afetadas de todos os seus produtos são
+carregados numa única consulta (version_ref ∪ affected_products), convertidos em
+chaves comparáveis (ver app.utils.version_utils) e organizados num índice de
+intervalos por produto. Cada versão instalada é então avaliada contra o índice do
+seu produto, sem consultas por CVE nem regex.
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.utils.version_utils import IntervalIndex, parse_range_expression, version_key
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProductCorrelation:
+    """Intervalos e CVEs candidatas de um produto."""
+    index: IntervalIndex = field(default_factory=IntervalIndex)
+    # CVEs com texto de versão não interpretável: comparação por substring
+    unparsed: Dict[str, List[str]] = field(default_factory=lambda: defaultdict(list))
+    # CVEs ligadas ao produto (CVEProduct/version_ref) e CVEs com alguma informação de versão
+    linked: Set[str] = field(default_factory=set)
+    versioned: Set[str] = field(default_factory=set)
+
+
+class AssetCorrelationService:
+    """Correlaciona ativos a vulnerabilidades pelos produtos vinculados (AssetProduct)."""
+
+    def __init__(self, session: Session, chunk_size: int = 900):
+        self.session = session
+        self.chunk_size = chunk_size
+
+    def _load_products(self, product_ids: List[int]) -> Dict[int, ProductCorrelation]:
+        """Carrega vínculos e intervalos de todos os produtos numa consulta."""
+        from app.models.affected_product import AffectedProduct
+        from app.models.cve_product import CVEProduct
+        from app.models.version_reference import VersionReference
+
+        products: Dict[int, ProductCorrelation] = {pid: ProductCorrelation() for pid in product_ids}
+        for i in range(0, len(product_ids), self.chunk_size):
+            chunk = product_ids[i:i + self.chunk_size]
+            rows = self.session.execute(union_all(
+                select(
+                    VersionReference.cve_id, VersionReference.product_id,
+                    VersionReference.affected_version, VersionReference.fixed_version,
+                    VersionReference.fixed_inclusive,
+                ).where(VersionReference.product_id.in_(chunk)),
+                select(
+                    AffectedProduct.vulnerability_id, AffectedProduct.product_id,
+                    AffectedProduct.affected_versions, literal(None), literal(None),
+                ).where(AffectedProduct.product_id.in_(chunk)),
+                select(
+                    CVEProduct.cve_id, CVEProduct.product_id, literal(None), literal(None), literal(None),
+                ).where(CVEProduct.product_id.in_(chunk)),
+            )).all()
+            for cve_id, product_id, expression, fixed_version, fixed_inclusive in rows:
+                product = products.get(product_id)
+                if product is None or not cve_id:
+                    continue
+                product.linked.add(cve_id)
+                if not expression:
+                    continue
+                product.versioned.add(cve_id)
+                interval = parse_range_expression(expression, fixed_version, bool(fixed_inclusive))
+                if interval is None:
+                    product.unparsed[cve_id].append(expression.strip().lower())
+                else:
+                    product.index.add(interval, cve_id)
+        for product in products.values():
+            product.index.build()
+        return products
+
+    @staticmethod
+    def _matching_cves(product: ProductCorrelation, installed_versions: List[str]) -> Set[str]:
+        """CVEs do produto afetando alguma das versões instaladas (sem versão: todas as vinculadas)."""
+        if not installed_versions:
+            return set(product.linked)
+        # CVEs sem nenhuma informação de versão não podem ser descartadas
+        matched = product.linked - product.versioned
+        keys = [k for k in (version_key(v) for v in installed_versions) if k is not None]
+        if len(keys) < len(installed_versions):
+            # Versão instalada não interpretável: sem como descartar
+            return set(product.linked)
+        matched.update(product.index.stab_many(keys))
+        lowered = [v.lower() for v in installed_versions]
+        for cve_id, expressions in product.unparsed.items():
+            if cve_id not in matched and any(e in v for e in expressions for v in lowered):
+                matched.add(cve_id)
+        return matched
+
+    def _correlate(self, asset_id: int) -> Dict[Tuple[str, int], List[Tuple[str, str]]]:
+        """{(cve_id, product_id): [(modelo, SO), ...]} das correspondências por versão."""
+        from app.models.asset_product import AssetProduct
+
+        asset_products = (
+            self.session.query(
+                AssetProduct.product_id,
+                AssetProduct.installed_version,
+                AssetProduct.model_name,
+                AssetProduct.operating_system,
+            )
+            .filter(AssetProduct.asset_id == asset_id, AssetProduct.product_id.isnot(None))
+            .all()
+        )
+        if not asset_products:
+            return {}
+
+        metas: Dict[int, List[Tuple[str, str, str]]] = defaultdict(list)
+        for product_id, installed, model, os_name in asset_products:
+            metas[product_id].append((
+                (installed or '').strip(),
+                (model or '').strip().lower(),
+                (os_name or '').strip().lower(),
+            ))
+        products = self._load_products(sorted(metas))
+
+        matches: Dict[Tuple[str, int], List[Tuple[str, str]]] = defaultdict(list)
+        for product_id, entries in metas.items():
+            product = products[product_id]
+            for installed, model, os_name in entries:
+                for cve_id in self._matching_cves(product, [installed] if installed else []):
+                    matches[(cve_id, product_id)].append((model, os_name))
+        return matches
+
+    def correlate_asset(self, asset_id: int) -> Dict[str, Set[int]]:
+        """CVEs correlacionadas ao ativo por versão e os produtos que as justificam.
+
+        Returns:
+            {cve_id: {product_id, ...}}
+        """
+        result: Dict[str, Set[int]] = defaultdict(set)
+        for cve_id, product_id in self._correlate(asset_id):
+            result[cve_id].add(product_id)
+        return dict(result)
+
+    def get_vulnerabilities_by_asset(self, asset_id: int) -> list:
+        """Vulnerabilidades correlacionadas ao ativo, aplicando filtros de modelo/SO na descrição."""
+        from app.models.vulnerability import Vulnerability
+
+        matches = self._correlate(asset_id)
+        if not matches:
+            return []
+        filters: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        for (cve_id, _), entries in matches.items():
+            filters[cve_id].extend(entries)
+
+        cve_ids = sorted(filters)
+        vulns = []
+        for i in range(0, len(cve_ids), self.chunk_size):
+            vulns.extend(
+                self.session.query(Vulnerability)
+                .filter(Vulnerability.cve_id.in_(cve_ids[i:i + self.chunk_size]))
+                .all()
+            )
+
+        def meta_ok(v) -> bool:
+            desc = (v.description or '').lower()
+            return any(
+                (not model or model in desc) and (not os_name or os_name in desc)
+                for model, os_name in filters[v.cve_id]
+            )
+
+        return [v for v in vulns if meta_ok(v)]
@@ -0,0 +1,311 @@
+"""
+Sincronização em lote de vínculos ativo ↔ vulnerabilidade para toda a frota.
+
+Substitui o laço por ativo de `VulnerabilityService.sync_all_assets`:
+
+- vínculos por vendor: um único INSERT ... SELECT (assets ⋈ cve_vendors) com
+  WHERE NOT EXISTS em asset_vulnerabilities;
+- vínculos por produto: ativos agrupados por (produto, versão instalada, modelo, SO);
+  as CVEs candidatas são resolvidas uma vez por grupo (AssetCorrelationService) e
+  inseridas com INSERT ... SELECT ... WHERE NOT EXISTS.
+
+No modo incremental, apenas CVEs tocadas desde a última execução (written_at acima da
+marca d'água, ou associações vendor/produto criadas depois dela) são consideradas para
+a frota; ativos criados/alterados desde então são sincronizados por completo. A marca
+d'água é o momento da gravação local, não o lastModified do NVD, e fica
+`settle_seconds` atrás do início da execução: lotes gravados em paralelo ou fora de
+ordem ainda não confirmados são relidos na execução seguinte. Sem CVEs tocadas nem
+ativos alterados, nada é feito e o estado não avança.
+"""
+
+import json
+import logging
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, exists, func, insert, literal, or_, select, union
+from sqlalchemy.orm import Session
+
+from app.models.asset import Asset
+from app.models.asset_product import AssetProduct
+from app.models.asset_vulnerability import AssetVulnerability
+from app.models.cve_product import CVEProduct
+from app.models.cve_vendor import CVEVendor
+from app.models.sync_metadata import SyncMetadata
+from app.models.vulnerability import Vulnerability, ingestion_time
+
+logger = logging.getLogger(__name__)
+
+FLEET_SYNC_STATE_KEY = 'asset_fleet_sync_state'
+
+
+@dataclass
+class FleetSyncStats:
+    """Resumo de uma execução da sincronização da frota."""
+    incremental: bool = False
+    skipped: bool = False
+    assets: int = 0
+    changed_assets: int = 0
+    delta_cves: Optional[int] = None
+    vendor_links: int = 0
+    product_groups: int = 0
+    product_links: int = 0
+    duration_s: float = 0.0
+
+    @property
+    def created(self) -> int:
+        return self.vendor_links + self.product_links
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data['created'] = self.created
+        return data
+
+
+class AssetSyncService:
+    """Cria vínculos AssetVulnerability para todos os ativos com operações em conjunto."""
+
+    def __init__(self, session: Session, chunk_size: int = 900, settle_seconds: Optional[float] = None):
+        self.session = session
+        self.chunk_size = chunk_size
+        self.settle_seconds = settle_seconds
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+    def _load_state(self) -> Optional[Dict]:
+        value = self.session.query(SyncMetadata.value).filter_by(key=FLEET_SYNC_STATE_KEY).scalar()
+        try:
+            state = json.loads(value) if value else None
+            return state if isinstance(state, dict) else None
+        except Exception:
+            return None
+
+    def _save_state(self, high_water: datetime, started_at: datetime) -> None:
+        from app.utils.sync_metadata_orm import upsert_sync_metadata
+
+        value = json.dumps({
+            'written_at': high_water.isoformat(),
+            'synced_at': started_at.isoformat(),
+        }, separators=(',', ':'))
+        upsert_sync_metadata(self.session, FLEET_SYNC_STATE_KEY, value, status='completed', sync_type='asset_sync')
+
+    def _settled_until(self) -> datetime:
+        """Marca d'água desta execução: agora - ASSET_SYNC_SETTLE_SECONDS."""
+        settle = self.settle_seconds
+        if settle is None:
+            try:
+                from flask import current_app
+                settle = float(current_app.config.get('ASSET_SYNC_SETTLE_SECONDS', 300.0))
+            except Exception:
+                settle = 300.0
+        return ingestion_time() - timedelta(seconds=max(0.0, settle))
+
+    # ------------------------------------------------------------------
+    # Inserção em conjunto
+    # ------------------------------------------------------------------
+    def _insert_missing(self, pairs) -> int:
+        """INSERT ... SELECT dos pares (asset_id, cve_id) ainda não vinculados."""
+        av = AssetVulnerability.__table__
+        sq = pairs.distinct().subquery('link_pairs')
+        now = datetime.now(timezone.utc)
+        stmt = insert(av).from_select(
+            ['asset_id', 'vulnerability_id', 'status', 'created_at', 'updated_at'],
+            select(sq.c.asset_id, sq.c.cve_id, literal('OPEN'), literal(now), literal(now)).where(
+                ~exists().where(and_(av.c.asset_id == sq.c.asset_id, av.c.vulnerability_id == sq.c.cve_id))
+            ),
+        )
+        result = self.session.execute(stmt)
+        return max(result.rowcount or 0, 0)
+
+    def _delta_cves(self, since: datetime):
+        """SELECT de CVEs gravadas ou associadas após a marca d'água."""
+        return union(
+            select(CVEVendor.cve_id.label('cve_id')).where(CVEVendor.created_at > since),
+            select(CVEProduct.cve_id.label('cve_id')).where(CVEProduct.created_at > since),
+            select(Vulnerability.cve_id.label('cve_id')).where(Vulnerability.written_at > since),
+        ).subquery('delta_cves')
+
+    def _sync_vendor_links(self, asset_filter, delta=None, changed_ids: Optional[List[int]] = None) -> int:
+        """Vínculos por vendor do ativo, resolvidos por junção com cve_vendors."""
+        pairs = (
+            select(Asset.id.label('asset_id'), CVEVendor.cve_id.label('cve_id'))
+            .join(CVEVendor, CVEVendor.vendor_id == Asset.vendor_id)
+            .where(Asset.vendor_id.isnot(None), *asset_filter)
+        )
+        if delta is None:
+            return self._insert_missing(pairs)
+        scope = [CVEVendor.cve_id.in_(select(delta.c.cve_id))]
+        if changed_ids:
+            scope.append(Asset.id.in_(changed_ids))
+        return self._insert_missing(pairs.where(or_(*scope)))
+
+    def _backfill_vendor_associations(self, asset_filter) -> None:
+        """Vendors de ativos sem nenhuma CVEVendor: backfill via JSON uma vez por vendor (não por ativo)."""
+        from app.models.vendor import Vendor
+        from app.services.vulnerability_service import VulnerabilityService
+
+        rows = (
+            self.session.query(Vendor.name)
+            .join(Asset, Asset.vendor_id == Vendor.id)
+            .filter(*asset_filter)
+            .filter(~exists().where(CVEVendor.vendor_id == Vendor.id))
+            .distinct()
+            .all()
+        )
+        if not rows:
+            return
+        service = VulnerabilityService(self.session)
+        for (name,) in rows:
+            try:
+                service.ensure_vendor_associations_for_vendor(name)
+            except Exception as e:
+                logger.debug(f"Backfill de associações para vendor {name} falhou: {e}")
+
+    def _product_groups(self, asset_filter) -> Dict[Tuple[int, str, str, str], List[int]]:
+        groups: Dict[Tuple[int, str, str, str], List[int]] = defaultdict(list)
+        rows = (
+            self.session.query(
+                AssetProduct.asset_id,
+                AssetProduct.product_id,
+                AssetProduct.installed_version,
+                AssetProduct.model_name,
+                AssetProduct.operating_system,
+            )
+            .join(Asset, Asset.id == AssetProduct.asset_id)
+            .filter(AssetProduct.product_id.isnot(None), *asset_filter)
+            .all()
+        )
+        for asset_id, product_id, installed, model, os_name in rows:
+            key = (
+                product_id,
+                (installed or '').strip(),
+                (model or '').strip().lower(),
+                (os_name or '').strip().lower(),
+            )
+            groups[key].append(asset_id)
+        return groups
+
+    def _descriptions(self, cve_ids: Set[str]) -> Dict[str, str]:
+        ids = sorted(cve_ids)
+        result = {}
+        for i in range(0, len(ids), self.chunk_size):
+            for cve_id, description in (
+                self.session.query(Vulnerability.cve_id, Vulnerability.description)
+                .filter(Vulnerability.cve_id.in_(ids[i:i + self.chunk_size]))
+            ):
+                result[cve_id] = (description or '').lower()
+        return result
+
+    def _sync_product_links(
+        self,
+        asset_filter,
+        delta_ids: Optional[Set[str]] = None,
+        changed_ids: Optional[Set[int]] = None,
+    ) -> Tuple[int, int]:
+        """Vínculos por produto/versão, resolvidos uma vez por grupo de ativos equivalentes."""
+        from app.services.asset_correlation_service import AssetCorrelationService
+
+        groups = self._product_groups(asset_filter)
+        if not groups:
+            return 0, 0
+        correlation = AssetCorrelationService(self.session, chunk_size=self.chunk_size)
+        products = correlation._load_products(sorted({key[0] for key in groups}))
+
+        matched_by_group: Dict[Tuple[int, str, str, str], Set[str]] = {}
+        need_description: Set[str] = set()
+        for key, asset_ids in groups.items():
+            product_id, installed, model, os_name = key
+            matched = correlation._matching_cves(products[product_id], [installed] if installed else [])
+            if delta_ids is not None and not (changed_ids and changed_ids.intersection(asset_ids)):
+                matched &= delta_ids
+            if matched and (model or os_name):
+                need_description |= matched
+            matched_by_group[key] = matched
+
+        descriptions = self._descriptions(need_description) if need_description else {}
+        created = 0
+        for key, matched in matched_by_group.items():
+            _, _, model, os_name = key
+            if model or os_name:
+                matched = {
+                    c for c in matched
+                    if (not model or model in descriptions.get(c, ''))
+                    and (not os_name or os_name in descriptions.get(c, ''))
+                }
+            if not matched:
+                continue
+            cve_list = sorted(matched)
+            asset_ids = groups[key]
+            for i in range(0, len(cve_list), self.chunk_size):
+                pairs = (
+                    select(Asset.id.label('asset_id'), Vulnerability.cve_id.label('cve_id'))
+                    .join(Vulnerability, Vulnerability.cve_id.in_(cve_list[i:i + self.chunk_size]))
+                    .where(Asset.id.in_(asset_ids))
+                )
+                created += self._insert_missing(pairs)
+        return len(groups), created
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+    def sync_fleet(self, only_active: bool = True, incremental: bool = True) -> FleetSyncStats:
+        """Sincroniza vínculos de todos os ativos e faz commit.
+
+        Args:
+            only_active: Considera apenas ativos com status 'active'
+            incremental: Usa o delta desde a última execução (sem estado anterior, roda completo)
+
+        Returns:
+            FleetSyncStats
+        """
+        import time
+
+        t0 = time.time()
+        started_at = ingestion_time()
+        high_water = self._settled_until()
+        asset_filter = [Asset.status == 'active'] if only_active else []
+        state = self._load_state() if incremental else None
+        stats = FleetSyncStats(incremental=state is not None)
+        stats.assets = self.session.query(func.count(Asset.id)).filter(*asset_filter).scalar() or 0
+
+        try:
+            if state is None:
+                self._backfill_vendor_associations(asset_filter)
+                stats.vendor_links = self._sync_vendor_links(asset_filter)
+                stats.product_groups, stats.product_links = self._sync_product_links(asset_filter)
+            else:
+                synced_at = datetime.fromisoformat(state['synced_at'])
+                # Estado anterior ao written_at: o início da última execução é o limite mais próximo
+                since = datetime.fromisoformat(state['written_at']) if state.get('written_at') else synced_at
+                changed_ids = {
+                    row[0] for row in self.session.query(Asset.id).filter(
+                        *asset_filter,
+                        or_(Asset.created_at > synced_at, Asset.updated_at > synced_at),
+                    )
+                }
+                stats.changed_assets = len(changed_ids)
+                delta = self._delta_cves(since)
+                delta_ids = {row[0] for row in self.session.execute(select(delta.c.cve_id))}
+                stats.delta_cves = len(delta_ids)
+                if not delta_ids and not changed_ids:
+                    # Nada a fazer: a marca d'água não avança
+                    stats.skipped = True
+                else:
+                    stats.vendor_links = self._sync_vendor_links(asset_filter, delta, sorted(changed_ids))
+                    stats.product_groups, stats.product_links = self._sync_product_links(
+                        asset_filter, delta_ids, changed_ids,
+                    )
+
+            if not stats.skipped:
+                self._save_state(high_water, started_at)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        stats.duration_s = round(time.time() - t0, 3)
+        logger.info(f"Sincronização da frota concluída: {stats.to_dict()}")
+        return stats
@@ -12,7 +12,7 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 from contextlib import contextmanager
 
-from sqlalchemy import text, Index, func
+from sqlalchemy import text, Index, func, case
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.dialects.postgresql import insert as pg_insert
@@ -20,7 +20,7 @@ from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app.extensions import db
-from app.models.vulnerability import Vulnerability
+from app.models.vulnerability import Vulnerability, ingestion_time
 from app.models.cvss_metric import CVSSMetric
 from app.models.sync_metadata import SyncMetadata
 
@@ -403,24 +403,43 @@ class BulkDatabaseService:
         return stats
     
     def _native_upsert_vulnerabilities(self, batch_data: List[Dict[str, Any]], 
-                                     session: Session) -> BulkOperationStats:
-        """Executa upsert usando recursos nativos do banco."""
+                                     session: Session,
+                                     update_columns: Optional[List[str]] = None,
+                                     only_newer: bool = True) -> BulkOperationStats:
+        """Executa upsert usando recursos nativos do banco.
+
+        Args:
+            batch_data: Linhas da tabela 'vulnerabilities' (mesmas chaves em todas)
+            session: Sessão do banco
+            update_columns: Colunas sobrescritas em conflito (padrão: descrição, datas e score)
+            only_newer: No PostgreSQL, só atualiza quando last_update recebido é mais recente
+
+        written_at vem do default da coluna nas inserções e, nas atualizações, só
+        muda quando last_update muda (re-sincronizar uma CVE inalterada não a
+        devolve ao delta do monitoramento).
+        """
         stats = BulkOperationStats()
         stats.total_records = len(batch_data)
+        if update_columns is None:
+            update_columns = ['description', 'last_update', 'cvss_score', 'base_severity']
+        table = Vulnerability.__table__
+        track_written = 'last_update' in update_columns and 'written_at' not in update_columns
+        written_now = ingestion_time()
         
         try:
             if self.db_dialect == 'postgresql':
                 # PostgreSQL com ON CONFLICT
                 stmt = pg_insert(Vulnerability.__table__).values(batch_data)
+                set_ = {col: stmt.excluded[col] for col in update_columns}
+                if track_written:
+                    set_['written_at'] = case(
+                        (table.c.last_update.is_distinct_from(stmt.excluded.last_update), written_now),
+                        else_=table.c.written_at,
+                    )
                 stmt = stmt.on_conflict_do_update(
                     index_elements=['cve_id'],
-                    set_={
-                        'description': stmt.excluded.description,
-                        'last_update': stmt.excluded.last_update,
-                        'cvss_score': stmt.excluded.cvss_score,
-                        'base_severity': stmt.excluded.base_severity
-                    },
-                    where=Vulnerability.__table__.c.last_update < stmt.excluded.last_update
+                    set_=set_,
+                    where=(Vulnerability.__table__.c.last_update < stmt.excluded.last_update) if only_newer else None
                 )
                 
                 if self.dialect_config['supports_returning']:
@@ -434,12 +453,16 @@ class BulkDatabaseService:
             elif self.db_dialect == 'mysql':
                 # MySQL com ON DUPLICATE KEY UPDATE
                 stmt = mysql_insert(Vulnerability.__table__).values(batch_data)
-                stmt = stmt.on_duplicate_key_update(
-                    description=stmt.inserted.description,
-                    last_update=stmt.inserted.last_update,
-                    cvss_score=stmt.inserted.cvss_score,
-                    base_severity=stmt.inserted.base_severity
-                )
+                # Lista ordenada: o MySQL aplica as atribuições em sequência, e written_at
+                # precisa comparar com o last_update anterior
+                assignments = []
+                if track_written:
+                    assignments.append(('written_at', case(
+                        (table.c.last_update.is_distinct_from(stmt.inserted.last_update), written_now),
+                        else_=table.c.written_at,
+                    )))
+                assignments.extend((col, stmt.inserted[col]) for col in update_columns)
+                stmt = stmt.on_duplicate_key_update(assignments)
                 
                 result = session.execute(stmt)
                 stats.inserted_records = result.rowcount
@@ -447,14 +470,15 @@ class BulkDatabaseService:
             elif self.db_dialect == 'sqlite':
                 # SQLite com ON CONFLICT
                 stmt = sqlite_insert(Vulnerability.__table__).values(batch_data)
+                set_ = {col: stmt.excluded[col] for col in update_columns}
+                if track_written:
+                    set_['written_at'] = case(
+                        (table.c.last_update.is_distinct_from(stmt.excluded.last_update), written_now),
+                        else_=table.c.written_at,
+                    )
                 stmt = stmt.on_conflict_do_update(
                     index_elements=['cve_id'],
-                    set_={
-                        'description': stmt.excluded.description,
-                        'last_update': stmt.excluded.last_update,
-                        'cvss_score': stmt.excluded.cvss_score,
-                        'base_severity': stmt.excluded.base_severity
-                    }
+                    set_=set_
                 )
                 
                 session.execute(stmt)
@@ -11,10 +11,6 @@ from flask import current_app
 from openai import OpenAI
 import requests
 from dotenv import load_dotenv, dotenv_values
-try:
-    import tiktoken  # opcional para contagem precisa de tokens
-except Exception:
-    tiktoken = None
 
 from app.models.chat_session import ChatSession
 from app.models.chat_message import ChatMessage, MessageType
@@ -103,20 +99,9 @@ class ChatService:
             self.demo_mode = True
 
     def _estimate_tokens_text(self, text: str) -> int:
-        """Estima tokens para um texto usando tiktoken se disponível."""
-        if not text:
-            return 0
-        try:
-            if tiktoken:
-                try:
-                    enc = tiktoken.encoding_for_model(self.model)
-                except Exception:
-                    enc = tiktoken.get_encoding('cl100k_base')
-                return len(enc.encode(text))
-        except Exception:
-            pass
-        # Fallback simples: aproximar por palavras * 1.3
-        return int(len(text.split()) * 1.3)
+        """Estima tokens para um texto usando tiktoken se disponível (encoder carregado uma vez por modelo)."""
+        from app.utils.prompt_builder import count_tokens
+        return count_tokens(text, self.model)
 
     def _estimate_tokens_messages(self, messages: List[Dict[str, str]]) -> int:
         """Estima tokens para uma lista de mensagens."""
@@ -0,0 +1,314 @@
+"""
+Manutenção e consulta dos agregados diários de CVEs.
+
+- `severity_daily_rollup`: por dia de publicação e severidade (totais exatos sem vendor);
+- `vulnerability_daily_stats`: por dia, severidade, vendor e "part" da CPE, com o
+  mesmo escopo de vendor do VendorScopeService (CVEVendor ∪ CVEProduct ⋈ Product).
+
+Ambos são recalculados no banco (INSERT ... SELECT) apenas para os dias tocados por
+cada lote gravado, e podem ser reconstruídos por completo via `rebuild_all`
+(ver scripts/backfill_daily_stats.py).
+"""
+
+import logging
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, delete, exists, func, insert, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.cve_part import CVEPart
+from app.models.severity_daily_rollup import SeverityDailyRollup
+from app.models.vulnerability import Vulnerability
+from app.models.vulnerability_daily_stats import VulnerabilityDailyStats
+from app.services.vendor_scope_service import VendorScopeService, parse_vendor_ids
+
+logger = logging.getLogger(__name__)
+
+
+def severity_count_dict(rows) -> Dict[str, int]:
+    """Converte linhas (severity, count) no formato {'critical', 'high', 'medium', 'total'} do dashboard."""
+    counts = {'critical': 0, 'high': 0, 'medium': 0, 'total': 0}
+    for severity, count in rows:
+        count = int(count or 0)
+        key = str(severity or '').lower()
+        if key in counts:
+            counts[key] += count
+        counts['total'] += count
+    return counts
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value)[:10]).date()
+    except Exception:
+        return None
+
+
+class DailyStatsService:
+    """Mantém e consulta os agregados diários de CVEs."""
+
+    # Verificação por processo: bancos ainda sem a migração seguem pelas consultas diretas
+    _tables_ready: Optional[bool] = None
+    _populated: bool = False
+    # Reconstrução inicial disparada em segundo plano (uma por processo)
+    _rebuild_started = False
+    _rebuild_lock = threading.Lock()
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def tables_ready(self) -> bool:
+        if DailyStatsService._tables_ready is None:
+            try:
+                from sqlalchemy import inspect
+                insp = inspect(self.session.get_bind())
+                DailyStatsService._tables_ready = (
+                    insp.has_table(SeverityDailyRollup.__tablename__)
+                    and insp.has_table(VulnerabilityDailyStats.__tablename__)
+                )
+            except Exception:
+                return False
+        return DailyStatsService._tables_ready
+
+    def days_for_cves(self, cve_ids: Iterable[str], chunk_size: int = 900) -> set:
+        """Dias de publicação atualmente gravados para as CVEs informadas."""
+        ids = [c for c in cve_ids if c]
+        days = set()
+        for i in range(0, len(ids), chunk_size):
+            rows = (
+                self.session.query(Vulnerability.published_date)
+                .filter(Vulnerability.cve_id.in_(ids[i:i + chunk_size]))
+                .all()
+            )
+            days.update(d for d in (_as_date(r[0]) for r in rows) if d)
+        return days
+
+    @staticmethod
+    def _day_filter(days: List[date]):
+        # Intervalos [dia, dia+1) preservam o uso do índice em published_date
+        return or_(*[
+            and_(
+                Vulnerability.published_date >= datetime.combine(d, datetime.min.time()),
+                Vulnerability.published_date < datetime.combine(d + timedelta(days=1), datetime.min.time()),
+            )
+            for d in days
+        ])
+
+    @staticmethod
+    def _vendor_pairs(day_cond=None):
+        """Pares distintos (cve_id, vendor_id): associação direta ou via produtos do vendor.
+
+        Mesmo critério do VendorScopeService, para que a série de um único vendor
+        (agregado) coincida com a de vários vendors (consulta direta). Com `day_cond`,
+        os dois ramos da UNION ficam restritos às CVEs publicadas nos dias tocados.
+        """
+        cve_ids = None
+        if day_cond is not None:
+            cve_ids = select(Vulnerability.cve_id).where(day_cond)
+        return VendorScopeService.pairs_select(cve_ids=cve_ids)
+
+    def _aggregate_selects(self, days: Optional[List[date]] = None):
+        """SELECTs que produzem as linhas de cada agregado, na ordem (tabela, select)."""
+        now = literal(datetime.now(timezone.utc))
+        day_expr = func.date(Vulnerability.published_date)
+        day_cond = self._day_filter(days) if days is not None else None
+        pairs = self._vendor_pairs(day_cond)
+
+        severity_q = (
+            select(day_expr, Vulnerability.base_severity, func.count(), now)
+            .group_by(day_expr, Vulnerability.base_severity)
+        )
+        vendor_total_q = (
+            select(day_expr, Vulnerability.base_severity, pairs.c.vendor_id,
+                   literal(VulnerabilityDailyStats.ALL_PARTS), func.count(), now)
+            .join(pairs, pairs.c.cve_id == Vulnerability.cve_id)
+            .group_by(day_expr, Vulnerability.base_severity, pairs.c.vendor_id)
+        )
+        vendor_part_q = (
+            select(day_expr, Vulnerability.base_severity, pairs.c.vendor_id,
+                   CVEPart.part, func.count(func.distinct(Vulnerability.cve_id)), now)
+            .join(pairs, pairs.c.cve_id == Vulnerability.cve_id)
+            .join(CVEPart, CVEPart.cve_id == Vulnerability.cve_id)
+            .group_by(day_expr, Vulnerability.base_severity, pairs.c.vendor_id, CVEPart.part)
+        )
+        if day_cond is not None:
+            severity_q = severity_q.where(day_cond)
+            vendor_total_q = vendor_total_q.where(day_cond)
+            vendor_part_q = vendor_part_q.where(day_cond)
+
+        sev = SeverityDailyRollup.__table__
+        vds = VulnerabilityDailyStats.__table__
+        sev_cols = [sev.c.day, sev.c.severity, sev.c.cve_count, sev.c.updated_at]
+        vds_cols = [vds.c.day, vds.c.severity, vds.c.vendor_id, vds.c.part, vds.c.cve_count, vds.c.updated_at]
+        return [
+            (sev, sev_cols, severity_q),
+            (vds, vds_cols, vendor_total_q),
+            (vds, vds_cols, vendor_part_q),
+        ]
+
+    def refresh_days(self, days: Iterable, chunk_size: int = 200) -> int:
+        """Recalcula os agregados somente para os dias informados (não faz commit).
+
+        Returns:
+            Quantidade de dias recalculados
+        """
+        normalized = sorted({d for d in (_as_date(v) for v in days) if d})
+        if not normalized:
+            return 0
+        for i in range(0, len(normalized), chunk_size):
+            chunk = normalized[i:i + chunk_size]
+            for table in (SeverityDailyRollup.__table__, VulnerabilityDailyStats.__table__):
+                self.session.execute(delete(table).where(table.c.day.in_(chunk)))
+            for table, columns, select_q in self._aggregate_selects(chunk):
+                self.session.execute(insert(table).from_select(columns, select_q))
+        return len(normalized)
+
+    def rebuild_all(self) -> int:
+        """Reconstrói os agregados diários a partir de `vulnerabilities` (não faz commit).
+
+        Returns:
+            Quantidade de linhas em severity_daily_rollup
+        """
+        for table in (SeverityDailyRollup.__table__, VulnerabilityDailyStats.__table__):
+            self.session.execute(delete(table))
+        for table, columns, select_q in self._aggregate_selects():
+            self.session.execute(insert(table).from_select(columns, select_q))
+        return self.session.query(func.count()).select_from(SeverityDailyRollup).scalar() or 0
+
+    def ensure_populated(self) -> bool:
+        """Indica se os agregados podem ser consultados.
+
+        Não reconstrói durante o request: com CVEs e agregados vazios, dispara
+        `rebuild_all` uma vez em segundo plano (`schedule_rebuild`) e retorna False
+        para que o chamador use as consultas diretas até a reconstrução terminar.
+
+        Returns:
+            True quando os agregados possuem linhas e podem ser usados para consultas
+        """
+        if DailyStatsService._populated:
+            return True
+        if not self.tables_ready():
+            return False
+        if self.session.query(exists().where(SeverityDailyRollup.cve_count.isnot(None))).scalar():
+            DailyStatsService._populated = True
+            return True
+        if self.session.query(exists().where(Vulnerability.cve_id.isnot(None))).scalar():
+            self.schedule_rebuild()
+        return False
+
+    def schedule_rebuild(self) -> bool:
+        """Executa `rebuild_all` numa thread em segundo plano, no máximo uma vez por processo.
+
+        Returns:
+            True quando a reconstrução foi disparada agora
+        """
+        with DailyStatsService._rebuild_lock:
+            if DailyStatsService._rebuild_started:
+                return False
+            try:
+                from flask import current_app
+                app = current_app._get_current_object()
+            except RuntimeError:
+                return False
+            DailyStatsService._rebuild_started = True
+        threading.Thread(
+            target=self._rebuild_in_background, args=(app,), name='daily-stats-rebuild', daemon=True,
+        ).start()
+        return True
+
+    @staticmethod
+    def _rebuild_in_background(app) -> None:
+        from app.extensions import db
+
+        with app.app_context():
+            try:
+                rows = DailyStatsService(db.session).rebuild_all()
+                db.session.commit()
+                logger.info(f"Agregados diários reconstruídos: {rows} linhas em severity_daily_rollup")
+                DailyStatsService._populated = rows > 0
+            except Exception as e:
+                db.session.rollback()
+                # Permite nova tentativa numa próxima consulta
+                DailyStatsService._rebuild_started = False
+                logger.warning(f"Falha ao reconstruir agregados diários: {e}")
+
+    def severity_totals(self, since: Optional[date] = None) -> Optional[Dict[str, int]]:
+        """Totais por severidade a partir do agregado; None quando o agregado não está disponível."""
+        if not self.ensure_populated():
+            return None
+        query = self.session.query(
+            SeverityDailyRollup.severity,
+            func.sum(SeverityDailyRollup.cve_count),
+        ).group_by(SeverityDailyRollup.severity)
+        if since is not None:
+            query = query.filter(SeverityDailyRollup.day >= since)
+        return severity_count_dict(query.all())
+
+    def daily_counts(
+        self,
+        start: date,
+        end: date,
+        vendor_ids: Optional[Iterable[int]] = None,
+        part: Optional[str] = None,
+        severity: Optional[str] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """Contagens por dia de publicação e severidade no intervalo [start, end].
+
+        Usa os agregados quando a resposta é exata a partir deles (sem vendor, ou um
+        único vendor); com vários vendors, agrega direto no banco sobre o escopo
+        materializado (cada CVE conta uma vez).
+
+        Returns:
+            {'YYYY-MM-DD': {'CRITICAL': n, 'HIGH': n, ...}}
+        """
+        vendors = parse_vendor_ids(list(vendor_ids or []))
+        start, end = _as_date(start), _as_date(end)
+        rows = None
+        if (len(vendors) == 1 or (not vendors and not part)) and self.ensure_populated():
+            if vendors:
+                model = VulnerabilityDailyStats
+                query = self.session.query(model.day, model.severity, model.cve_count).filter(
+                    model.vendor_id == vendors[0],
+                    model.part == (part or VulnerabilityDailyStats.ALL_PARTS),
+                )
+            else:
+                model = SeverityDailyRollup
+                query = self.session.query(model.day, model.severity, model.cve_count)
+            query = query.filter(model.day >= start, model.day <= end)
+            if severity:
+                query = query.filter(model.severity == severity.upper())
+            rows = query.all()
+
+        if rows is None:
+            day_expr = func.date(Vulnerability.published_date)
+            query = self.session.query(day_expr, Vulnerability.base_severity, func.count(Vulnerability.cve_id)).filter(
+                Vulnerability.published_date >= datetime.combine(start, datetime.min.time()),
+                Vulnerability.published_date < datetime.combine(end + timedelta(days=1), datetime.min.time()),
+            )
+            if vendors:
+                query = VendorScopeService(self.session).apply(query, vendors)
+            if part:
+                query = query.filter(exists().where(
+                    (CVEPart.cve_id == Vulnerability.cve_id) & (CVEPart.part == part)
+                ))
+            if severity:
+                query = query.filter(Vulnerability.base_severity == severity.upper())
+            rows = query.group_by(day_expr, Vulnerability.base_severity).all()
+
+        result: Dict[str, Dict[str, int]] = {}
+        for day_value, sev, count in rows:
+            day_key = _as_date(day_value)
+            if day_key is None:
+                continue
+            bucket = result.setdefault(day_key.isoformat(), {})
+            key = sev or 'N/A'
+            bucket[key] = bucket.get(key, 0) + int(count or 0)
+        return result
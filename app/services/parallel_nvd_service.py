@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Serviço de sincronização NVD paralela por janelas de data.
+Divide o intervalo pub/lastMod em janelas, distribui as janelas entre workers
+concorrentes e grava checkpoints por janela para retomar sincronizações interrompidas.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+from sqlalchemy import select
+
+from app.models.sync_metadata import SyncMetadata
+from app.utils.sync_metadata_orm import upsert_sync_metadata
+
+logger = logging.getLogger(__name__)
+
+# Prefixo das chaves de checkpoint por janela em SyncMetadata
+CHECKPOINT_KEY_PREFIX = 'nvd_window_ckpt:'
+
+
+@dataclass
+class ParallelSyncMetrics:
+    """Métricas de uma execução de sincronização paralela"""
+    total_windows: int = 0
+    completed_windows: int = 0
+    resumed_windows: int = 0
+    skipped_windows: int = 0
+    failed_windows: int = 0
+    total_pages: int = 0
+    failed_pages: int = 0
+    total_cves_processed: int = 0
+    total_cves_saved: int = 0
+    start_time: float = 0
+    end_time: float = 0
+    failed_window_starts: List[str] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        end = self.end_time or time.time()
+        if not self.start_time:
+            return 0.0
+        return end - self.start_time
+
+    @property
+    def success_rate(self) -> float:
+        if self.total_cves_processed == 0:
+            return 100.0 if self.failed_windows == 0 else 0.0
+        return (self.total_cves_saved / self.total_cves_processed) * 100
+
+    @property
+    def cves_per_second(self) -> float:
+        if self.duration == 0:
+            return 0.0
+        return self.total_cves_saved / self.duration
+
+
+class ParallelNVDService:
+    """
+    Sincroniza CVEs da NVD distribuindo janelas de data entre workers concorrentes.
+
+    Características:
+    - Janelas de até ``NVD_MAX_WINDOW_DAYS`` (pubDate na completa, lastMod na incremental)
+    - Até ``MAX_CONCURRENT_REQUESTS`` janelas em processamento simultâneo
+    - Rate limiting compartilhado (um único ``NVDRateLimiter`` para todos os workers)
+    - Gravação serializada na sessão do ``VulnerabilityService``, fora do event loop
+    - Checkpoint por janela em ``SyncMetadata`` para retomar uma sincronização interrompida
+    """
+
+    def __init__(self, config: Dict[str, Any], max_concurrent_requests: Optional[int] = None):
+        """
+        Inicializa o serviço.
+
+        Args:
+            config: Configurações NVD no formato aceito pelo ``NVDFetcher``.
+            max_concurrent_requests: Janelas processadas em paralelo. Quando omitido usa
+                ``MAX_CONCURRENT_REQUESTS`` da configuração (padrão 5).
+        """
+        self.config = dict(config or {})
+        if max_concurrent_requests is None:
+            max_concurrent_requests = self.config.get('MAX_CONCURRENT_REQUESTS', 5)
+        try:
+            self.max_concurrent_requests = max(1, int(max_concurrent_requests))
+        except Exception:
+            self.max_concurrent_requests = 5
+        self.metrics = ParallelSyncMetrics()
+        self._persist_lock: Optional[asyncio.Lock] = None
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _checkpoint_key(window: Dict[str, str]) -> str:
+        mode = str(window.get('mode') or 'lastmod').lower()
+        return f"{CHECKPOINT_KEY_PREFIX}{mode}:{window['start']}"
+
+    @staticmethod
+    def _parse_checkpoint(value: Optional[str]) -> Tuple[Optional[str], int]:
+        """Checkpoint é gravado como '<fim_da_janela>|<próximo_startIndex>'."""
+        if not value or '|' not in value:
+            return None, 0
+        end, _, next_index = value.rpartition('|')
+        try:
+            return end, int(next_index)
+        except ValueError:
+            return end, 0
+
+    def _load_checkpoints(self, session) -> Dict[str, SyncMetadata]:
+        try:
+            rows = session.execute(
+                select(SyncMetadata).where(SyncMetadata.key.like(f"{CHECKPOINT_KEY_PREFIX}%"))
+            ).scalars().all()
+            return {row.key: row for row in rows}
+        except Exception as e:
+            logger.warning(f"Não foi possível carregar checkpoints de janelas: {e}")
+            return {}
+
+    def _save_checkpoint(self, session, window: Dict[str, str], next_index: int, completed: bool) -> None:
+        try:
+            upsert_sync_metadata(
+                session,
+                self._checkpoint_key(window),
+                value=f"{window['end']}|{next_index}",
+                status='completed' if completed else 'in_progress',
+                sync_type=str(window.get('mode') or 'lastmod').lower(),
+            )
+            session.commit()
+        except Exception as e:
+            logger.warning(f"Falha ao gravar checkpoint da janela {window['start']}: {e}")
+            try:
+                session.rollback()
+            except Exception:
+                pass
+
+    def _clear_checkpoints(self, session) -> None:
+        try:
+            session.query(SyncMetadata).filter(
+                SyncMetadata.key.like(f"{CHECKPOINT_KEY_PREFIX}%")
+            ).delete(synchronize_session=False)
+            session.commit()
+        except Exception as e:
+            logger.warning(f"Falha ao limpar checkpoints de janelas: {e}")
+            try:
+                session.rollback()
+            except Exception:
+                pass
+
+    def _resume_index(self, window: Dict[str, str], checkpoints: Dict[str, SyncMetadata]) -> Optional[int]:
+        """
+        Retorna o startIndex de retomada da janela, 0 para processá-la do início,
+        ou None quando a janela já foi concluída.
+
+        Só retoma quando o fim gravado coincide com o fim atual: janelas fechadas têm
+        limites determinísticos, enquanto a janela aberta (até "agora") é sempre refeita.
+        """
+        row = checkpoints.get(self._checkpoint_key(window))
+        if row is None:
+            return 0
+        end, next_index = self._parse_checkpoint(row.value)
+        if end != window['end']:
+            return 0
+        if row.status == 'completed':
+            return None
+        return next_index
+
+    # ------------------------------------------------------------------
+    # Sincronização
+    # ------------------------------------------------------------------
+    async def _sync_window(
+        self,
+        fetcher,
+        window: Dict[str, str],
+        window_number: int,
+        start_index: int,
+        vulnerability_service,
+    ) -> bool:
+        """Pagina uma janela inteira, gravando cada página e avançando o checkpoint."""
+        page_step = fetcher._effective_page_step()
+        win_mode = str(window.get('mode') or 'lastmod').lower()
+        last_index: Optional[int] = None
+        session = vulnerability_service.session
+
+        while last_index is None or start_index <= last_index:
+            page = await fetcher.fetch_page_stream(start_index, window['start'], window['end'], win_mode)
+            if page is None:
+                self.metrics.failed_pages += 1
+                logger.error(
+                    f"Janela {window_number}/{self.metrics.total_windows} interrompida no índice {start_index}.")
+                return False
+
+            if last_index is None:
+                total_results = page.total_results
+                last_index = fetcher._last_index_for(total_results, page_step) or 0
+                logger.info(
+                    f"Janela {window_number}/{self.metrics.total_windows} ({window['start']} → {window['end']}): "
+                    f"{total_results} resultados")
+
+            self.metrics.total_pages += 1
+            next_index = start_index + page_step
+            is_last = next_index > last_index
+
+            # A sessão do serviço é única: gravações são serializadas, mas executadas
+            # fora do event loop para que os demais workers continuem buscando páginas.
+            # Os itens da página são lidos do disco em mini-lotes durante a gravação.
+            try:
+                async with self._persist_lock:
+                    self.metrics.total_cves_saved += await fetcher._persist_page(
+                        page, vulnerability_service,
+                        self.metrics.total_cves_saved, offload=True,
+                    )
+                    self.metrics.total_cves_processed += page.items_read
+                    await asyncio.to_thread(self._save_checkpoint, session, window, next_index, is_last)
+            finally:
+                page.close()
+            start_index = next_index
+        return True
+
+    async def parallel_sync(self, full_sync: bool = False, vulnerability_service=None) -> ParallelSyncMetrics:
+        """
+        Executa a sincronização paralela.
+
+        Args:
+            full_sync: Se True, percorre todo o histórico por data de publicação;
+                caso contrário, sincroniza por lastMod desde a última sincronização.
+            vulnerability_service: ``VulnerabilityService`` usado para persistência.
+
+        Returns:
+            ``ParallelSyncMetrics`` com ``total_cves_saved`` e demais contadores.
+        """
+        if vulnerability_service is None:
+            raise ValueError("vulnerability_service é obrigatório para parallel_sync")
+
+        from app.jobs.nvd_fetcher import NVDFetcher
+
+        self.metrics = ParallelSyncMetrics(start_time=time.time())
+        self._persist_lock = asyncio.Lock()
+        session = vulnerability_service.session
+
+        last_synced_time = None
+        if not full_sync:
+            try:
+                last_synced_time = vulnerability_service.get_last_sync_time()
+            except Exception as e:
+                logger.warning(f"Não foi possível obter a última sincronização: {e}")
+
+        timeout = aiohttp.ClientTimeout(total=None)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrent_requests)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as http_session:
+            fetcher = NVDFetcher(http_session, self.config)
+            if fetcher.api_key and not await fetcher.validate_key():
+                logger.warning("API key NVD inválida; prosseguindo com limites públicos.")
+                fetcher.api_key = None
+                fetcher.headers.pop('apiKey', None)
+                from app.utils.rate_limiter import NVDRateLimiter
+                fetcher.rate_limiter = NVDRateLimiter.create_for_nvd(has_api_key=False)
+
+            windows = fetcher._build_windows(full_sync, last_synced_time)
+            self.metrics.total_windows = len(windows)
+            checkpoints = self._load_checkpoints(session)
+
+            work_q: asyncio.Queue = asyncio.Queue()
+            for number, window in enumerate(windows, start=1):
+                resume_at = self._resume_index(window, checkpoints)
+                if resume_at is None:
+                    self.metrics.skipped_windows += 1
+                    continue
+                if resume_at > 0:
+                    self.metrics.resumed_windows += 1
+                work_q.put_nowait((number, window, resume_at))
+
+            logger.info(
+                f"Sincronização paralela ({'completa' if full_sync else 'incremental'}): "
+                f"{len(windows)} janela(s), {self.metrics.skipped_windows} já concluída(s), "
+                f"{self.metrics.resumed_windows} retomada(s), {self.max_concurrent_requests} worker(s)")
+
+            async def worker() -> None:
+                while True:
+                    try:
+                        number, window, resume_at = work_q.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        ok = await self._sync_window(fetcher, window, number, resume_at, vulnerability_service)
+                    except Exception as e:
+                        logger.error(f"Erro na janela {window['start']}: {e}", exc_info=True)
+                        ok = False
+                    if ok:
+                        self.metrics.completed_windows += 1
+                    else:
+                        self.metrics.failed_windows += 1
+                        self.metrics.failed_window_starts.append(window['start'])
+
+            try:
+                await asyncio.gather(*(worker() for _ in range(self.max_concurrent_requests)))
+            finally:
+                fetcher.close()
+
+        if self.metrics.failed_windows == 0:
+            # Sincronização concluída: avança a data de última sync e descarta checkpoints
+            try:
+                vulnerability_service.update_last_sync_time(datetime.now(timezone.utc))
+            except Exception as e:
+                logger.error(f"Falha ao atualizar a data da última sincronização: {e}")
+            self._clear_checkpoints(session)
+        else:
+            logger.warning(
+                f"{self.metrics.failed_windows} janela(s) falharam; checkpoints mantidos para retomada: "
+                f"{self.metrics.failed_window_starts[:10]}")
+
+        self.metrics.end_time = time.time()
+        logger.info(
+            f"Sincronização paralela finalizada: {self.metrics.total_cves_saved} CVEs gravadas em "
+            f"{self.metrics.duration:.1f}s ({self.metrics.cves_per_second:.1f} CVEs/s)")
+        return self.metrics
+
+    def get_performance_report(self) -> Dict[str, Any]:
+        """Resumo da última execução para logs e scripts."""
+        m = self.metrics
+        return {
+            'max_concurrent_requests': self.max_concurrent_requests,
+            'total_windows': m.total_windows,
+            'completed_windows': m.completed_windows,
+            'resumed_windows': m.resumed_windows,
+            'skipped_windows': m.skipped_windows,
+            'failed_windows': m.failed_windows,
+            'total_pages': m.total_pages,
+            'failed_pages': m.failed_pages,
+            'total_cves_processed': m.total_cves_processed,
+            'total_cves_saved': m.total_cves_saved,
+            'duration_seconds': round(m.duration, 2),
+            'cves_per_second': round(m.cves_per_second, 2),
+            'success_rate': round(m.success_rate, 1),
+        }
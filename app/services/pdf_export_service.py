@@ -1,27 +1,149 @@
 """
 Serviço para exportação de relatórios em PDF
 Suporta múltiplas bibliotecas: WeasyPrint, ReportLab, e fallback para HTML
+
+As engines gravam o PDF direto em disco (opcionalmente em um pool de processos,
+PDF_RENDER_WORKERS) e o resultado fica em cache por hash do conteúdo do
+relatório; ver app/utils/pdf_render.py.
 """
 
 import os
-import io
 import base64
+import hashlib
+import json
 import logging
+import shutil
+from contextlib import nullcontext
 from datetime import datetime
 from typing import Optional, Dict, Any, List, Union
 from pathlib import Path
 
 from flask import current_app, render_template, url_for
-from jinja2 import Template
+from jinja2 import Template, TemplateError
+
+from app.utils.pdf_render import (
+    ENGINES,
+    PDFOutputCache,
+    clear_engine_failure,
+    engine_blocked,
+    mark_engine_failed,
+    render_pdfkit,
+    render_reportlab,
+    render_weasyprint,
+    run_render,
+)
 
 logger = logging.getLogger(__name__)
 
+# CSS otimizado para PDF (WeasyPrint); a versão entra na chave do cache de PDFs
+PDF_CSS = """
+        @page {
+            size: A4;
+            margin: 2cm;
+            @top-center {
+                content: "Open Monitor - Relatório de Segurança";
+                font-size: 10pt;
+                color: #666;
+            }
+            @bottom-center {
+                content: "Página " counter(page) " de " counter(pages);
+                font-size: 10pt;
+                color: #666;
+            }
+        }
+        
+        body {
+            font-family: 'Helvetica', 'Arial', sans-serif;
+            font-size: 11pt;
+            line-height: 1.4;
+            color: #333;
+        }
+        
+        h1, h2, h3, h4, h5, h6 {
+            color: #2c3e50;
+            page-break-after: avoid;
+        }
+        
+        h1 { font-size: 24pt; margin-bottom: 20pt; }
+        h2 { font-size: 18pt; margin-bottom: 15pt; }
+        h3 { font-size: 14pt; margin-bottom: 12pt; }
+        
+        .page-break {
+            page-break-before: always;
+        }
+        
+        .no-break {
+            page-break-inside: avoid;
+        }
+        
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            margin-bottom: 15pt;
+            page-break-inside: avoid;
+        }
+        
+        th, td {
+            border: 1pt solid #ddd;
+            padding: 8pt;
+            text-align: left;
+        }
+        
+        th {
+            background-color: #f8f9fa;
+            font-weight: bold;
+        }
+        
+        .severity-critical { color: #dc3545; font-weight: bold; }
+        .severity-high { color: #fd7e14; font-weight: bold; }
+        .severity-medium { color: #ffc107; font-weight: bold; }
+        .severity-low { color: #28a745; font-weight: bold; }
+        
+        .chart-placeholder {
+            width: 100%;
+            height: 300pt;
+            border: 1pt solid #ddd;
+            background-color: #f8f9fa;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            margin: 15pt 0;
+        }
+        
+        .executive-summary {
+            background-color: #f8f9fa;
+            padding: 15pt;
+            border-left: 4pt solid #007bff;
+            margin-bottom: 20pt;
+        }
+        
+        .vulnerability-item {
+            border: 1pt solid #ddd;
+            margin-bottom: 15pt;
+            padding: 10pt;
+            page-break-inside: avoid;
+        }
+        
+        .code-block {
+            background-color: #f8f9fa;
+            border: 1pt solid #e9ecef;
+            padding: 10pt;
+            font-family: 'Courier New', monospace;
+            font-size: 9pt;
+            margin: 10pt 0;
+            page-break-inside: avoid;
+        }
+        """
+PDF_CSS_VERSION = hashlib.sha256(PDF_CSS.encode('utf-8')).hexdigest()[:16]
+
+
 class PDFExportService:
     """Serviço para exportação de relatórios em PDF"""
     
     def __init__(self):
         self.pdf_engine = self._detect_pdf_engine()
         self.temp_dir = None
+        self._output_cache: Optional[PDFOutputCache] = None
 
     def export_to_pdf(self, report, template_name: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> str:
         """Wrapper compatível com controller: retorna somente o caminho do arquivo."""
@@ -296,11 +418,52 @@ class PDFExportService:
     
     def _export_to_pdf(self, report_data: Dict[str, Any], 
                       template_name: str, options: Dict[str, Any]) -> Dict[str, Any]:
-        """Exporta para PDF usando engine com fallback em cascata."""
-        from flask import current_app
-        import os
+        """Exporta para PDF usando engine com fallback em cascata.
+
+        Antes de renderizar, procura no cache de saída um PDF do mesmo conteúdo
+        (ver `_report_content_key`). Engines que falharam recentemente são puladas
+        até PDF_ENGINE_RETRY_SECONDS (as indisponíveis, até reiniciar o processo).
+        """
+        report = report_data['report']
+        retry_seconds = float(current_app.config.get('PDF_ENGINE_RETRY_SECONDS', 300) or 0)
+        cache = self._get_output_cache()
+        key = self._report_content_key(report_data, template_name, options) if cache else None
+        html_cache: Dict[str, str] = {}
+
+        with (cache.lock(key) if key else nullcontext()):
+            for engine in self._engine_order():
+                if key:
+                    cached_path = cache.lookup(key, engine)
+                    if cached_path is not None:
+                        logger.info(f"PDF do relatório {report.id} reaproveitado do cache ({engine})")
+                        return self._pdf_result(report, cached_path, engine, cached=True)
+                if engine_blocked(engine):
+                    logger.debug(f"Engine {engine} pulada: falha recente")
+                    continue
+                target = cache.path_for(key, engine) if key else self._new_export_path(report, 'pdf')
+                try:
+                    logger.info(f"Tentando exportar PDF com engine: {engine}")
+                    if engine == 'weasyprint':
+                        self._export_with_weasyprint(report_data, template_name, options, target, html_cache)
+                    elif engine == 'reportlab':
+                        self._export_with_reportlab(report_data, template_name, options, target)
+                    elif engine == 'pdfkit':
+                        self._export_with_pdfkit(report_data, template_name, options, target, html_cache)
+                except Exception as e:
+                    logger.error(f"Falha ao exportar com {engine}: {e}")
+                    if not isinstance(e, TemplateError):
+                        mark_engine_failed(engine, e, retry_seconds)
+                    continue
+                clear_engine_failure(engine)
+                if key:
+                    cache.evict()
+                return self._pdf_result(report, Path(target), engine)
+
+        logger.warning("Todas as engines de PDF falharam. Usando fallback HTML.")
+        return self._export_to_html(report_data, template_name, options)
 
-        # Ordem preferida: configuração -> engines restantes
+    def _engine_order(self) -> List[str]:
+        """Engine preferida (configuração/ambiente) seguida das demais."""
         preferred = None
         try:
             preferred = current_app.config.get('PDF_ENGINE')
@@ -310,199 +473,172 @@ class PDFExportService:
             preferred = os.getenv('PDF_ENGINE', self.pdf_engine)
 
         engines = []
-        if preferred in ('weasyprint', 'reportlab', 'pdfkit'):
+        if preferred in ENGINES:
             engines.append(preferred)
-        for e in ('weasyprint', 'reportlab', 'pdfkit'):
+        for e in ENGINES:
             if e not in engines:
                 engines.append(e)
+        return engines
+
+    def _render(self, func, *args) -> int:
+        """Executa uma engine no pool de processos (PDF_RENDER_WORKERS > 0) ou inline."""
+        cfg = current_app.config
+        workers = max(0, int(cfg.get('PDF_RENDER_WORKERS', 0) or 0))
+        timeout = float(cfg.get('PDF_RENDER_TIMEOUT', 120) or 0) or None
+        return run_render(func, *args, workers=workers, timeout=timeout)
 
-        last_error = None
-        for engine in engines:
+    def _get_output_cache(self) -> Optional[PDFOutputCache]:
+        """Cache de PDFs por conteúdo sob TEMP_DIR (None com PDF_CACHE_MAX_MB = 0)."""
+        if self._output_cache is None:
+            max_mb = int(current_app.config.get('PDF_CACHE_MAX_MB', 512) or 0)
+            if max_mb <= 0:
+                return None
             try:
-                logger.info(f"Tentando exportar PDF com engine: {engine}")
-                if engine == 'weasyprint':
-                    return self._export_with_weasyprint(report_data, template_name, options)
-                elif engine == 'reportlab':
-                    return self._export_with_reportlab(report_data, template_name, options)
-                elif engine == 'pdfkit':
-                    return self._export_with_pdfkit(report_data, template_name, options)
+                self._ensure_temp_dir()
+                cache_dir = self.temp_dir / current_app.config.get('PDF_CACHE_DIR', 'pdf_cache')
+                self._output_cache = PDFOutputCache(cache_dir, max_mb * 1024 * 1024)
             except Exception as e:
-                logger.error(f"Falha ao exportar com {engine}: {e}")
-                last_error = e
-                continue
+                logger.warning(f"Cache de PDFs indisponível: {e}")
+                return None
+        return self._output_cache
 
-        logger.warning("Todas as engines de PDF falharam. Usando fallback HTML.")
-        return self._export_to_html(report_data, template_name, options)
-    
-    def _export_with_weasyprint(self, report_data: Dict[str, Any], 
-                               template_name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    def _report_content_key(self, report_data: Dict[str, Any], template_name: str,
+                            options: Dict[str, Any]) -> Optional[str]:
+        """Hash de tudo que altera o PDF: conteúdo do relatório, template, CSS, opções e empresa.
+
+        Campos atualizados pela própria exportação (arquivo, updated_at, resultado
+        do auto-export) ficam de fora para não invalidar o cache a cada download.
+        A data de exportação entra só pelo dia: o PDF servido do cache mostra a
+        hora da primeira exportação daquele dia.
+        """
+        try:
+            payload = report_data['report'].to_dict()
+            for field in ('file_path', 'file_size', 'export_format', 'updated_at'):
+                payload.pop(field, None)
+            metadata = dict(payload.get('metadata') or {})
+            metadata.pop('auto_export_result', None)
+            payload['metadata'] = metadata
+            export_date = report_data.get('export_date')
+            export_day = export_date.date().isoformat() if isinstance(export_date, datetime) else ''
+
+            template_mtime = ''
+            try:
+                template = current_app.jinja_env.get_template(template_name)
+                if template.filename:
+                    template_mtime = os.path.getmtime(template.filename)
+            except Exception:
+                pass
+
+            return PDFOutputCache.make_key(
+                json.dumps(payload, sort_keys=True, default=str),
+                template_name,
+                template_mtime,
+                json.dumps(options or {}, sort_keys=True, default=str),
+                json.dumps(report_data.get('company_info') or {}, sort_keys=True, default=str),
+                report_data.get('export_metadata', {}).get('version', ''),
+                PDF_CSS_VERSION,
+                export_day,
+            )
+        except Exception as e:
+            logger.debug(f"Relatório sem chave de cache de PDF: {e}")
+            return None
+
+    def _new_export_path(self, report, extension: str) -> Path:
+        self._ensure_temp_dir()
+        filename = f"report_{report.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        return self.temp_dir / filename
+
+    def persist_export(self, report, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Copia para fora do cache de PDFs um arquivo cujo caminho será guardado.
+
+        Arquivos do cache podem ser removidos por `PDFOutputCache.evict()` a
+        qualquer momento; quem persiste o caminho (ex.: auto-export nos metadados
+        do relatório) deve usar a cópia devolvida aqui.
+        """
+        filepath = result.get('filepath')
+        if not filepath or self._output_cache is None:
+            return result
+        source = Path(filepath)
+        if source.resolve().parent != self._output_cache.directory.resolve():
+            return result
+        target = self._new_export_path(report, source.suffix.lstrip('.') or 'pdf')
+        shutil.copyfile(source, target)
+        return {**result, 'filepath': str(target), 'size': target.stat().st_size}
+
+    def _pdf_result(self, report, filepath: Path, engine: str, cached: bool = False) -> Dict[str, Any]:
+        """Metadados do PDF gerado; o conteúdo fica em disco e é enviado por streaming (send_file)."""
+        return {
+            'success': True,
+            'filename': f"report_{report.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+            'filepath': str(filepath),
+            'size': filepath.stat().st_size,
+            'mime_type': 'application/pdf',
+            'engine': engine,
+            'cached': cached
+        }
+
+    def _render_html_once(self, report_data: Dict[str, Any], template_name: str,
+                          html_cache: Dict[str, str]) -> str:
+        """Renderiza o template uma vez por exportação (compartilhado entre WeasyPrint e pdfkit)."""
+        if 'html' not in html_cache:
+            html_cache['html'] = render_template(template_name, **report_data)
+        return html_cache['html']
+
+    def _export_with_weasyprint(self, report_data: Dict[str, Any], template_name: str,
+                               options: Dict[str, Any], target: Path,
+                               html_cache: Optional[Dict[str, str]] = None) -> int:
         """Exporta usando WeasyPrint"""
         try:
-            import weasyprint
-            from weasyprint import HTML, CSS
-            
-            # Renderizar HTML
-            html_content = render_template(template_name, **report_data)
-            
-            # CSS customizado para PDF
-            css_content = self._get_pdf_css()
-            
-            # Configurações do WeasyPrint
+            html_content = self._render_html_once(report_data, template_name, {} if html_cache is None else html_cache)
             base_url = current_app.config.get('BASE_URL', 'http://localhost:4443')
-            
-            # Gerar PDF
-            html_doc = HTML(string=html_content, base_url=base_url)
-            css_doc = CSS(string=css_content)
-            
-            pdf_buffer = io.BytesIO()
-            html_doc.write_pdf(pdf_buffer, stylesheets=[css_doc])
-            pdf_content = pdf_buffer.getvalue()
-            
-            # Salvar arquivo temporário
-            self._ensure_temp_dir()
-            filename = f"report_{report_data['report'].id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            filepath = self.temp_dir / filename
-            
-            with open(filepath, 'wb') as f:
-                f.write(pdf_content)
-            
-            return {
-                'success': True,
-                'filename': filename,
-                'filepath': str(filepath),
-                'content': pdf_content,
-                'size': len(pdf_content),
-                'mime_type': 'application/pdf'
-            }
-            
+            return self._render(render_weasyprint, html_content, self._get_pdf_css(), base_url, str(target))
         except Exception as e:
             logger.error(f"Erro no WeasyPrint: {str(e)}")
             raise
-    
-    def _export_with_reportlab(self, report_data: Dict[str, Any], 
-                              template_name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+
+    def _export_with_reportlab(self, report_data: Dict[str, Any], template_name: str,
+                              options: Dict[str, Any], target: Path) -> int:
         """Exporta usando ReportLab"""
         try:
-            from reportlab.lib.pagesizes import letter, A4
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.lib import colors
-            
-            # Buffer para o PDF
-            pdf_buffer = io.BytesIO()
-            
-            # Configurar documento
-            page_size = A4 if options.get('page_size') == 'A4' else letter
-            doc = SimpleDocTemplate(pdf_buffer, pagesize=page_size,
-                                  rightMargin=72, leftMargin=72,
-                                  topMargin=72, bottomMargin=18)
-            
-            # Estilos
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                spaceAfter=30,
-                textColor=colors.HexColor('#2c3e50')
-            )
-            
-            # Construir conteúdo
-            story = []
-            report = report_data['report']
-            
-            # Título
-            story.append(Paragraph(report.title, title_style))
-            story.append(Spacer(1, 12))
-            
-            # Informações básicas
-            basic_info = [
+            return self._render(render_reportlab, self._reportlab_document(report_data, options), str(target))
+        except Exception as e:
+            logger.error(f"Erro no ReportLab: {str(e)}")
+            raise
+
+    def _reportlab_document(self, report_data: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+        """Dados simples (serializáveis para o pool de processos) do PDF resumido do ReportLab."""
+        report = report_data['report']
+        document = {
+            'page_size': options.get('page_size'),
+            'title': report.title,
+            'basic_info': [
                 ['Tipo:', report.report_type.value.replace('_', ' ').title()],
                 ['Data de Criação:', report.created_at.strftime('%d/%m/%Y %H:%M')],
                 ['Escopo:', report.scope.value.replace('_', ' ').title()],
                 ['Status:', report.status.value.title()]
+            ],
+            'vuln_table': None
+        }
+
+        stats = report_data['summary_stats']
+        if stats['total_vulnerabilities'] > 0:
+            document['vuln_table'] = [
+                ['Severidade', 'Quantidade'],
+                ['Críticas', str(stats['critical_count'])],
+                ['Altas', str(stats['high_count'])],
+                ['Médias', str(stats['medium_count'])],
+                ['Baixas', str(stats['low_count'])],
+                ['Total', str(stats['total_vulnerabilities'])]
             ]
-            
-            basic_table = Table(basic_info, colWidths=[2*inch, 4*inch])
-            basic_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(basic_table)
-            story.append(Spacer(1, 20))
-            
-            # Estatísticas
-            stats = report_data['summary_stats']
-            if stats['total_vulnerabilities'] > 0:
-                story.append(Paragraph("Resumo de Vulnerabilidades", styles['Heading2']))
-                
-                vuln_data = [
-                    ['Severidade', 'Quantidade'],
-                    ['Críticas', str(stats['critical_count'])],
-                    ['Altas', str(stats['high_count'])],
-                    ['Médias', str(stats['medium_count'])],
-                    ['Baixas', str(stats['low_count'])],
-                    ['Total', str(stats['total_vulnerabilities'])]
-                ]
-                
-                vuln_table = Table(vuln_data, colWidths=[3*inch, 2*inch])
-                vuln_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                
-                story.append(vuln_table)
-            
-            # Gerar PDF
-            doc.build(story)
-            pdf_content = pdf_buffer.getvalue()
-            
-            # Salvar arquivo
-            self._ensure_temp_dir()
-            filename = f"report_{report.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            filepath = self.temp_dir / filename
-            
-            with open(filepath, 'wb') as f:
-                f.write(pdf_content)
-            
-            return {
-                'success': True,
-                'filename': filename,
-                'filepath': str(filepath),
-                'content': pdf_content,
-                'size': len(pdf_content),
-                'mime_type': 'application/pdf'
-            }
-            
-        except Exception as e:
-            logger.error(f"Erro no ReportLab: {str(e)}")
-            raise
-    
-    def _export_with_pdfkit(self, report_data: Dict[str, Any], 
-                           template_name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        return document
+
+    def _export_with_pdfkit(self, report_data: Dict[str, Any], template_name: str,
+                           options: Dict[str, Any], target: Path,
+                           html_cache: Optional[Dict[str, str]] = None) -> int:
         """Exporta usando pdfkit (wkhtmltopdf)"""
         try:
-            import pdfkit
-            from flask import current_app
-            import os
-            
-            # Renderizar HTML
-            html_content = render_template(template_name, **report_data)
-            
+            html_content = self._render_html_once(report_data, template_name, {} if html_cache is None else html_cache)
+
             # Opções do wkhtmltopdf
             pdf_options = {
                 'page-size': options.get('page_size', 'A4'),
@@ -522,39 +658,10 @@ class PDFExportService:
                 wkhtml_path = None
             if not wkhtml_path:
                 wkhtml_path = os.getenv('WKHTMLTOPDF_PATH')
-            configuration = None
             if wkhtml_path:
-                try:
-                    configuration = pdfkit.configuration(wkhtmltopdf=wkhtml_path)
-                    logger.info(f"Usando wkhtmltopdf em: {wkhtml_path}")
-                except Exception as e:
-                    logger.warning(f"Configuração wkhtmltopdf inválida ({wkhtml_path}): {e}")
-            
-            # Gerar PDF
-            pdf_content = pdfkit.from_string(
-                html_content,
-                False,
-                options=pdf_options,
-                configuration=configuration if configuration else None
-            )
-            
-            # Salvar arquivo
-            self._ensure_temp_dir()
-            filename = f"report_{report_data['report'].id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            filepath = self.temp_dir / filename
-            
-            with open(filepath, 'wb') as f:
-                f.write(pdf_content)
-            
-            return {
-                'success': True,
-                'filename': filename,
-                'filepath': str(filepath),
-                'content': pdf_content,
-                'size': len(pdf_content),
-                'mime_type': 'application/pdf'
-            }
-            
+                logger.info(f"Usando wkhtmltopdf em: {wkhtml_path}")
+
+            return self._render(render_pdfkit, html_content, pdf_options, wkhtml_path, str(target))
         except Exception as e:
             logger.error(f"Erro no pdfkit: {str(e)}")
             raise
@@ -667,104 +774,7 @@ class PDFExportService:
     
     def _get_pdf_css(self) -> str:
         """Retorna CSS otimizado para PDF"""
-        return """
-        @page {
-            size: A4;
-            margin: 2cm;
-            @top-center {
-                content: "Open Monitor - Relatório de Segurança";
-                font-size: 10pt;
-                color: #666;
-            }
-            @bottom-center {
-                content: "Página " counter(page) " de " counter(pages);
-                font-size: 10pt;
-                color: #666;
-            }
-        }
-        
-        body {
-            font-family: 'Helvetica', 'Arial', sans-serif;
-            font-size: 11pt;
-            line-height: 1.4;
-            color: #333;
-        }
-        
-        h1, h2, h3, h4, h5, h6 {
-            color: #2c3e50;
-            page-break-after: avoid;
-        }
-        
-        h1 { font-size: 24pt; margin-bottom: 20pt; }
-        h2 { font-size: 18pt; margin-bottom: 15pt; }
-        h3 { font-size: 14pt; margin-bottom: 12pt; }
-        
-        .page-break {
-            page-break-before: always;
-        }
-        
-        .no-break {
-            page-break-inside: avoid;
-        }
-        
-        table {
-            width: 100%;
-            border-collapse: collapse;
-            margin-bottom: 15pt;
-            page-break-inside: avoid;
-        }
-        
-        th, td {
-            border: 1pt solid #ddd;
-            padding: 8pt;
-            text-align: left;
-        }
-        
-        th {
-            background-color: #f8f9fa;
-            font-weight: bold;
-        }
-        
-        .severity-critical { color: #dc3545; font-weight: bold; }
-        .severity-high { color: #fd7e14; font-weight: bold; }
-        .severity-medium { color: #ffc107; font-weight: bold; }
-        .severity-low { color: #28a745; font-weight: bold; }
-        
-        .chart-placeholder {
-            width: 100%;
-            height: 300pt;
-            border: 1pt solid #ddd;
-            background-color: #f8f9fa;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            margin: 15pt 0;
-        }
-        
-        .executive-summary {
-            background-color: #f8f9fa;
-            padding: 15pt;
-            border-left: 4pt solid #007bff;
-            margin-bottom: 20pt;
-        }
-        
-        .vulnerability-item {
-            border: 1pt solid #ddd;
-            margin-bottom: 15pt;
-            padding: 10pt;
-            page-break-inside: avoid;
-        }
-        
-        .code-block {
-            background-color: #f8f9fa;
-            border: 1pt solid #e9ecef;
-            padding: 10pt;
-            font-family: 'Courier New', monospace;
-            font-size: 9pt;
-            margin: 10pt 0;
-            page-break-inside: avoid;
-        }
-        """
+        return PDF_CSS
     
     def _generate_cvss_chart_data(self, report) -> Dict[str, Any]:
         """Gera dados para gráfico de distribuição CVSS"""
@@ -6,7 +6,7 @@ Implementa cache inteligente com TTL dinâmico e invalidação automática.
 
 import json
 import logging
-import pickle
+import threading
 import time
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Union, Callable
@@ -24,8 +24,15 @@ except ImportError:
     RedisError = Exception
     RedisConnectionError = Exception
 
+from app.utils.cache_codec import CacheCodec
+
 logger = logging.getLogger(__name__)
 
+# Pools de conexão e estado de disponibilidade por destino (url ou host/porta/db)
+_POOLS: Dict[tuple, Any] = {}
+_AVAILABILITY: Dict[tuple, List] = {}
+_POOLS_LOCK = threading.Lock()
+
 @dataclass
 class CacheStats:
     """Estatísticas do cache"""
@@ -50,11 +57,11 @@ class RedisCacheService:
     
     Características:
     - Cache inteligente com TTL dinâmico
-    - Serialização otimizada (JSON/Pickle)
+    - Serialização em uma passada (orjson/JSON, pickle como último recurso)
     - Invalidação automática baseada em padrões
     - Estatísticas de performance
     - Fallback gracioso quando Redis não disponível
-    - Compressão automática para objetos grandes
+    - Compressão (zstd/lz4/zlib) com nível adaptado ao tamanho
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -82,99 +89,109 @@ class RedisCacheService:
         # Configurações de serialização
         self.use_compression = config.get('CACHE_USE_COMPRESSION', True)
         self.compression_threshold = config.get('CACHE_COMPRESSION_THRESHOLD', 1024)  # bytes
+        self.codec = CacheCodec(
+            compression_threshold=self.compression_threshold,
+            use_compression=self.use_compression,
+            compressor=config.get('CACHE_COMPRESSOR', 'auto'),
+            fmt=config.get('CACHE_FORMAT', 'auto'),
+        )
         
-        # Cliente Redis
+        # Cliente Redis (pool de conexões compartilhado por processo)
         self.redis_client = None
+        self._availability = None
+        self.availability_ttl = config.get('REDIS_AVAILABILITY_TTL', 30)
         self.stats = CacheStats()
         
         # Inicializar conexão
         self._initialize_redis()
     
+    def _pool_key(self) -> tuple:
+        if self.redis_url:
+            return ('url', self.redis_url)
+        return ('host', self.redis_host, self.redis_port, self.redis_db, self.redis_password)
+
     def _initialize_redis(self):
-        """Inicializa a conexão com Redis."""
+        """Obtém um cliente sobre o pool de conexões compartilhado (sem abrir conexão aqui)."""
         if not self.enabled:
-            logger.warning("Cache Redis desabilitado ou redis-py não disponível")
+            logger.debug("Cache Redis desabilitado ou redis-py não disponível")
             return
         
         try:
-            if self.redis_url:
-                self.redis_client = redis.from_url(
-                    self.redis_url,
-                    decode_responses=False,  # Manter bytes para pickle
-                    socket_connect_timeout=5,
-                    socket_timeout=5,
-                    retry_on_timeout=True
-                )
-            else:
-                self.redis_client = redis.Redis(
-                    host=self.redis_host,
-                    port=self.redis_port,
-                    db=self.redis_db,
-                    password=self.redis_password,
-                    decode_responses=False,
-                    socket_connect_timeout=5,
-                    socket_timeout=5,
-                    retry_on_timeout=True
-                )
-            
-            # Testar conexão
-            self.redis_client.ping()
-            logger.info(f"Cache Redis conectado: {self.redis_url or f'{self.redis_host}:{self.redis_port}'}")
-            
+            key = self._pool_key()
+            with _POOLS_LOCK:
+                pool = _POOLS.get(key)
+                if pool is None:
+                    options = dict(
+                        decode_responses=False,  # Valores binários (ver cache_codec)
+                        socket_connect_timeout=self.config.get('REDIS_CONNECT_TIMEOUT', 2),
+                        socket_timeout=self.config.get('REDIS_SOCKET_TIMEOUT', 5),
+                        retry_on_timeout=True,
+                        max_connections=self.config.get('REDIS_MAX_CONNECTIONS', 50),
+                    )
+                    if self.redis_url:
+                        pool = redis.ConnectionPool.from_url(self.redis_url, **options)
+                    else:
+                        pool = redis.ConnectionPool(
+                            host=self.redis_host,
+                            port=self.redis_port,
+                            db=self.redis_db,
+                            password=self.redis_password,
+                            **options
+                        )
+                    _POOLS[key] = pool
+                    _AVAILABILITY[key] = [None, 0.0]
+            self.redis_client = redis.Redis(connection_pool=pool)
+            self._availability = _AVAILABILITY[key]
         except Exception as e:
-            logger.error(f"Erro ao conectar Redis: {e}")
+            logger.error(f"Erro ao configurar Redis: {e}")
             self.enabled = False
             self.redis_client = None
+
+    @property
+    def available(self) -> bool:
+        """Redis habilitado e respondendo.
+
+        O resultado do PING é compartilhado por todas as instâncias do mesmo pool e só é
+        refeito após `REDIS_AVAILABILITY_TTL` segundos; erros em operações marcam o
+        servidor como indisponível até a próxima verificação.
+        """
+        if not self.enabled or self.redis_client is None:
+            return False
+        state = self._availability
+        now = time.monotonic()
+        if state[0] is None or now >= state[1]:
+            previous = state[0]
+            try:
+                state[0] = bool(self.redis_client.ping())
+                if state[0] and not previous:
+                    logger.info(f"Cache Redis conectado: {self.redis_url or f'{self.redis_host}:{self.redis_port}'}")
+            except Exception as e:
+                if previous is not False:
+                    logger.warning(f"Cache Redis indisponível: {e}")
+                state[0] = False
+            state[1] = now + self.availability_ttl
+        return state[0]
+
+    def _mark_unavailable(self) -> None:
+        if self._availability is not None:
+            self._availability[0] = False
+            self._availability[1] = time.monotonic() + self.availability_ttl
+
+    def _ready(self) -> bool:
+        return self.enabled and self.redis_client is not None and self.available
     
     def _generate_cache_key(self, key: str, namespace: str = 'default') -> str:
         """Gera chave de cache com namespace e prefix."""
         return f"{self.key_prefix}{namespace}:{key}"
     
     def _serialize_data(self, data: Any) -> bytes:
-        """Serializa dados para armazenamento."""
-        try:
-            # Tentar JSON primeiro (mais rápido e legível)
-            json_data = json.dumps(data, default=str, ensure_ascii=False)
-            serialized = json_data.encode('utf-8')
-            
-            # Se muito grande, usar pickle com compressão
-            if len(serialized) > self.compression_threshold and self.use_compression:
-                import gzip
-                pickled = pickle.dumps(data)
-                compressed = gzip.compress(pickled)
-                return b'GZIP_PICKLE:' + compressed
-            
-            return b'JSON:' + serialized
-            
-        except (TypeError, ValueError):
-            # Fallback para pickle
-            pickled = pickle.dumps(data)
-            if len(pickled) > self.compression_threshold and self.use_compression:
-                import gzip
-                compressed = gzip.compress(pickled)
-                return b'GZIP_PICKLE:' + compressed
-            return b'PICKLE:' + pickled
+        """Serializa dados para armazenamento (ver app.utils.cache_codec)."""
+        return self.codec.encode(data)
     
     def _deserialize_data(self, data: bytes) -> Any:
-        """Deserializa dados do cache."""
+        """Deserializa dados do cache (formato atual ou legado)."""
         try:
-            if data.startswith(b'JSON:'):
-                json_str = data[5:].decode('utf-8')
-                return json.loads(json_str)
-            
-            elif data.startswith(b'PICKLE:'):
-                return pickle.loads(data[7:])
-            
-            elif data.startswith(b'GZIP_PICKLE:'):
-                import gzip
-                compressed_data = data[12:]
-                decompressed = gzip.decompress(compressed_data)
-                return pickle.loads(decompressed)
-            
-            else:
-                # Tentar deserializar como JSON legacy
-                return json.loads(data.decode('utf-8'))
-                
+            return self.codec.decode(data)
         except Exception as e:
             logger.error(f"Erro ao deserializar dados do cache: {e}")
             raise
@@ -197,7 +214,7 @@ class RedisCacheService:
     
     def get(self, key: str, namespace: str = 'default') -> Optional[Any]:
         """Recupera valor do cache."""
-        if not self.enabled or not self.redis_client:
+        if not self._ready():
             return None
         
         cache_key = self._generate_cache_key(key, namespace)
@@ -211,16 +228,20 @@ class RedisCacheService:
             result = self._deserialize_data(data)
             self.stats.hits += 1
             
-            # Atualizar estatísticas de acesso
+            # Atualizar estatísticas de acesso (uma ida ao servidor)
             access_key = f"{cache_key}:access_count"
-            self.redis_client.incr(access_key)
-            self.redis_client.expire(access_key, self.max_ttl)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.incr(access_key)
+            pipe.expire(access_key, self.max_ttl)
+            pipe.execute()
             
             return result
             
         except (RedisError, RedisConnectionError) as e:
             logger.error(f"Erro Redis ao recuperar {cache_key}: {e}")
             self.stats.errors += 1
+            if isinstance(e, RedisConnectionError):
+                self._mark_unavailable()
             return None
         except Exception as e:
             logger.error(f"Erro ao recuperar do cache {cache_key}: {e}")
@@ -230,7 +251,7 @@ class RedisCacheService:
     def set(self, key: str, value: Any, ttl: Optional[int] = None, 
            namespace: str = 'default') -> bool:
         """Armazena valor no cache."""
-        if not self.enabled or not self.redis_client:
+        if not self._ready():
             return False
         
         cache_key = self._generate_cache_key(key, namespace)
@@ -270,15 +291,78 @@ class RedisCacheService:
         except (RedisError, RedisConnectionError) as e:
             logger.error(f"Erro Redis ao armazenar {cache_key}: {e}")
             self.stats.errors += 1
+            if isinstance(e, RedisConnectionError):
+                self._mark_unavailable()
             return False
         except Exception as e:
             logger.error(f"Erro ao armazenar no cache {cache_key}: {e}")
             self.stats.errors += 1
             return False
     
+    def get_many(self, keys: List[str], namespace: str = 'default') -> Dict[str, Any]:
+        """Recupera várias chaves com um único MGET.
+
+        Chaves ausentes ou ilegíveis não aparecem no resultado. Não atualiza os
+        contadores de acesso (usados apenas pelo TTL dinâmico de `set`).
+        """
+        if not keys or not self._ready():
+            return {}
+        cache_keys = [self._generate_cache_key(k, namespace) for k in keys]
+        try:
+            values = self.redis_client.mget(cache_keys)
+        except (RedisError, RedisConnectionError) as e:
+            logger.error(f"Erro Redis ao recuperar {len(keys)} chaves ({namespace}): {e}")
+            self.stats.errors += 1
+            if isinstance(e, RedisConnectionError):
+                self._mark_unavailable()
+            return {}
+        result = {}
+        for key, data in zip(keys, values):
+            if data is None:
+                self.stats.misses += 1
+                continue
+            try:
+                result[key] = self._deserialize_data(data)
+                self.stats.hits += 1
+            except Exception:
+                self.stats.errors += 1
+        return result
+
+    def set_many(self, mapping: Dict[str, Any], ttl: Optional[int] = None,
+                 namespace: str = 'default') -> bool:
+        """Armazena vários valores num único pipeline (TTL padrão quando não informado)."""
+        if not mapping or not self._ready():
+            return False
+        ttl = int(ttl or self.default_ttl)
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            now = time.time()
+            for key, value in mapping.items():
+                cache_key = self._generate_cache_key(key, namespace)
+                serialized_data = self._serialize_data(value)
+                pipe.setex(cache_key, ttl, serialized_data)
+                pipe.setex(
+                    f"{cache_key}:metadata",
+                    ttl,
+                    json.dumps({'size': len(serialized_data), 'created_at': now, 'ttl': ttl})
+                )
+            pipe.execute()
+            self.stats.sets += len(mapping)
+            return True
+        except (RedisError, RedisConnectionError) as e:
+            logger.error(f"Erro Redis ao armazenar {len(mapping)} chaves ({namespace}): {e}")
+            self.stats.errors += 1
+            if isinstance(e, RedisConnectionError):
+                self._mark_unavailable()
+            return False
+        except Exception as e:
+            logger.error(f"Erro ao armazenar chaves no cache ({namespace}): {e}")
+            self.stats.errors += 1
+            return False
+    
     def delete(self, key: str, namespace: str = 'default') -> bool:
         """Remove valor do cache."""
-        if not self.enabled or not self.redis_client:
+        if not self._ready():
             return False
         
         cache_key = self._generate_cache_key(key, namespace)
@@ -308,7 +392,7 @@ class RedisCacheService:
         return False
 
     async def get_cached_vulnerabilities(self, key: str, return_count_only: bool = False):
-        if not self.enabled or not self.redis_client:
+        if not self._ready():
             return None
         payload = self.get(key, namespace='nvd_sync')
         if payload is None:
@@ -324,7 +408,7 @@ class RedisCacheService:
         return payload
 
     async def cache_vulnerabilities(self, key: str, vulnerabilities, ttl: int = 3600):
-        if not self.enabled or not self.redis_client:
+        if not self._ready():
             return False
         try:
             if isinstance(vulnerabilities, dict) and 'count' in vulnerabilities:
@@ -341,6 +425,7 @@ class RedisCacheService:
     def get_stats(self) -> Dict[str, Any]:
         return {
             'enabled': self.enabled,
+            'available': bool(self._availability and self._availability[0]),
             'hits': self.stats.hits,
             'misses': self.stats.misses,
             'sets': self.stats.sets,
@@ -351,7 +436,7 @@ class RedisCacheService:
     
     def delete_pattern(self, pattern: str, namespace: str = 'default') -> int:
         """Remove múltiplas chaves baseado em padrão."""
-        if not self.enabled or not self.redis_client:
+        if not self._ready():
             return 0
         
         cache_pattern = self._generate_cache_key(pattern, namespace)
@@ -375,7 +460,7 @@ class RedisCacheService:
     
     def exists(self, key: str, namespace: str = 'default') -> bool:
         """Verifica se chave existe no cache."""
-        if not self.enabled or not self.redis_client:
+        if not self._ready():
             return False
         
         cache_key = self._generate_cache_key(key, namespace)
@@ -389,7 +474,7 @@ class RedisCacheService:
     
     def get_ttl(self, key: str, namespace: str = 'default') -> int:
         """Retorna TTL restante da chave."""
-        if not self.enabled or not self.redis_client:
+        if not self._ready():
             return -1
         
         cache_key = self._generate_cache_key(key, namespace)
@@ -403,7 +488,7 @@ class RedisCacheService:
     def extend_ttl(self, key: str, additional_seconds: int, 
                   namespace: str = 'default') -> bool:
         """Estende TTL de uma chave."""
-        if not self.enabled or not self.redis_client:
+        if not self._ready():
             return False
         
         cache_key = self._generate_cache_key(key, namespace)
@@ -420,7 +505,7 @@ class RedisCacheService:
     
     def get_cache_info(self, namespace: str = 'default') -> Dict[str, Any]:
         """Retorna informações sobre o cache."""
-        if not self.enabled or not self.redis_client:
+        if not self._ready():
             return {'enabled': False, 'error': 'Redis não disponível'}
         
         try:
@@ -470,7 +555,7 @@ class RedisCacheService:
     
     def clear_all(self) -> bool:
         """Limpa todo o cache (CUIDADO!)."""
-        if not self.enabled or not self.redis_client:
+        if not self._ready():
             return False
         
         try:
@@ -485,6 +570,40 @@ class RedisCacheService:
             logger.error(f"Erro ao limpar cache: {e}")
             return False
 
+def get_cache_service(app=None, **overrides) -> RedisCacheService:
+    """Instância de RedisCacheService compartilhada pela aplicação.
+
+    As configurações vêm de `app.config` (ou `current_app`); `overrides` substitui
+    chaves específicas (ex.: CACHE_KEY_PREFIX, CACHE_DEFAULT_TTL). Uma instância é
+    criada por combinação de overrides e guardada em `app.extensions`; todas usam o
+    mesmo pool de conexões.
+    """
+    if app is None:
+        from flask import current_app
+        app = current_app._get_current_object()
+    registry = app.extensions.setdefault('redis_cache', {})
+    key = tuple(sorted(overrides.items()))
+    service = registry.get(key)
+    if service is None:
+        config = {
+            'REDIS_CACHE_ENABLED': app.config.get('REDIS_CACHE_ENABLED', False),
+            'REDIS_URL': app.config.get('REDIS_URL', 'redis://localhost:6379/0'),
+            'REDIS_HOST': app.config.get('REDIS_HOST', 'localhost'),
+            'REDIS_PORT': app.config.get('REDIS_PORT', 6379),
+            'REDIS_DB': app.config.get('REDIS_DB', 0),
+            'REDIS_PASSWORD': app.config.get('REDIS_PASSWORD'),
+            'CACHE_KEY_PREFIX': app.config.get('CACHE_KEY_PREFIX', 'nvd_cache:'),
+            'CACHE_MAX_TTL': app.config.get('CACHE_MAX_TTL', 86400),
+            'CACHE_USE_COMPRESSION': app.config.get('CACHE_USE_COMPRESSION', True),
+            'CACHE_COMPRESSION_THRESHOLD': app.config.get('CACHE_COMPRESSION_THRESHOLD', 1024),
+            'REDIS_AVAILABILITY_TTL': app.config.get('REDIS_AVAILABILITY_TTL', 30),
+            'CACHE_COMPRESSOR': app.config.get('CACHE_COMPRESSOR', 'auto'),
+            'CACHE_FORMAT': app.config.get('CACHE_FORMAT', 'auto'),
+        }
+        config.update(overrides)
+        service = registry.setdefault(key, RedisCacheService(config))
+    return service
+
 def cache_result(ttl: Optional[int] = None, namespace: str = 'default', 
                 key_func: Optional[Callable] = None):
     """
@@ -7,20 +7,64 @@ Responsável por gerar resumos executivos, análises de impacto de negócio (BIA
 
 import logging
 import time
-import json
-import hashlib
+import threading
 import uuid
-from typing import Dict, List, Any, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Any, Optional
 from datetime import datetime
 from flask import current_app
 from openai import OpenAI
-try:
-    import tiktoken
-except Exception:
-    tiktoken = None
 
 logger = logging.getLogger(__name__)
 
+# Semáforos por provedor: limitam chamadas simultâneas ao LLM no processo (todas as gerações)
+_PROVIDER_SEMAPHORES: Dict[str, threading.BoundedSemaphore] = {}
+_PROVIDER_LOCK = threading.Lock()
+
+
+def _provider_semaphore(provider: str, limit: int) -> threading.BoundedSemaphore:
+    with _PROVIDER_LOCK:
+        sem = _PROVIDER_SEMAPHORES.get(provider)
+        if sem is None:
+            sem = threading.BoundedSemaphore(max(1, int(limit)))
+            _PROVIDER_SEMAPHORES[provider] = sem
+        return sem
+
+
+class TokenBudgetExceeded(RuntimeError):
+    """A chamada ultrapassaria o orçamento de tokens compartilhado das análises do relatório."""
+
+
+class TokenBudget:
+    """Orçamento de tokens compartilhado entre as análises de um relatório.
+
+    Cada chamada reserva a estimativa do prompt + max_tokens antes de ir ao provedor
+    e, ao terminar, ajusta a reserva pelo consumo real informado em `usage`.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = int(limit)
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> bool:
+        with self._lock:
+            if self.used + tokens > self.limit:
+                return False
+            self.used += tokens
+            return True
+
+    def settle(self, reserved: int, actual: Optional[int]) -> None:
+        if actual is None:
+            return
+        with self._lock:
+            self.used += int(actual) - int(reserved)
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            return max(0, self.limit - self.used)
+
 
 class ReportAIService:
     """Service para geração de conteúdo inteligente para relatórios."""
@@ -36,16 +80,23 @@ class ReportAIService:
         self.timeout = 30
         self.max_retries = 2
         self.backoff_base = 1.5
-        # Melhorias: limite de contexto, cache simples
+        # Melhorias: limite de contexto, cache de respostas compartilhado (ver llm_response_cache)
         self.context_limit = 4096
         self._cache_enabled = True
-        self._cache: Dict[str, Any] = {}
+        # Chamadas simultâneas ao provedor (por processo) e orçamento da geração corrente (por thread)
+        self.max_concurrency = 4
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
     
     def _initialize_openai(self):
         """Inicializa o cliente OpenAI dentro do contexto da aplicação."""
         if self._initialized:
             return
-            
+        with self._init_lock:
+            if not self._initialized:
+                self._initialize_openai_locked()
+
+    def _initialize_openai_locked(self):
         try:
             self.api_key = current_app.config.get('OPENAI_API_KEY')
             self.model = current_app.config.get('OPENAI_MODEL', 'gpt-3.5-turbo')
@@ -55,6 +106,7 @@ class ReportAIService:
             self.max_retries = current_app.config.get('OPENAI_MAX_RETRIES', 2)
             self.backoff_base = current_app.config.get('OPENAI_RETRY_BACKOFF', 1.5)
             self.completion_param = (current_app.config.get('LLM_COMPLETION_TOKENS_PARAM') or '').lower()
+            self.max_concurrency = int(current_app.config.get('OPENAI_MAX_CONCURRENCY', 4) or 4)
             
             if not self.api_key:
                 logger.warning("OPENAI_API_KEY não configurada - modo demo ativo")
@@ -72,54 +124,74 @@ class ReportAIService:
             self._initialized = True
 
     def _estimate_tokens_text(self, text: str) -> int:
-        if not text:
-            return 0
-        try:
-            if tiktoken:
-                try:
-                    enc = tiktoken.encoding_for_model(self.model)
-                except Exception:
-                    enc = tiktoken.get_encoding('cl100k_base')
-                return len(enc.encode(text))
-        except Exception:
-            pass
-        return int(len(text.split()) * 1.3)
+        from app.utils.prompt_builder import count_tokens
+        return count_tokens(text, self.model)
 
     def _safe_truncate_text(self, text: str, max_tokens_allowed: int) -> str:
         """Trunca texto de forma segura baseada em estimativa de tokens."""
         if not text:
             return text
         try:
-            est = self._estimate_tokens_text(text)
-            if est <= max_tokens_allowed:
-                return text
-            ratio = max(0.3, float(max_tokens_allowed) / max(1, est))
-            cut_len = int(len(text) * ratio)
-            if cut_len <= 0:
-                cut_len = min(512, len(text))
-            head = text[: int(cut_len * 0.6)]
-            tail = text[-int(cut_len * 0.4):]
-            return head + "\n\n...\n\n" + tail
+            from app.utils.prompt_builder import truncate_to_tokens
+            return truncate_to_tokens(text, max_tokens_allowed, self.model)
         except Exception:
             return text[: max(1, int(len(text) * 0.7))]
 
-    def _make_cache_key(self, analysis_type: str, payload: Dict[str, Any]) -> str:
-        try:
-            serialized = json.dumps(payload or {}, sort_keys=True, ensure_ascii=False, default=str)
-        except Exception:
-            serialized = str(payload)
-        base = f"{analysis_type}|{self.model}|{hashlib.sha256(serialized.encode('utf-8')).hexdigest()}"
-        return base
+    def _prompt_token_budget(self, system_prompt: str) -> int:
+        """Tokens disponíveis para o prompt do usuário: contexto - resposta - prompt do sistema - folga."""
+        available = self.context_limit - int(self.max_tokens or 1000) - 256
+        return max(512, available - self._estimate_tokens_text(system_prompt))
+
+    def _prompt_builder(self, token_budget: Optional[int] = None):
+        from app.utils.prompt_builder import PromptBuilder
+        return PromptBuilder(self.model, token_budget)
+
+    @staticmethod
+    def _omitted_rows_note(omitted: int) -> str:
+        return f"- ... (+{omitted} itens omitidos por limite de contexto)"
+
+    def _make_cache_key(self, analysis_type: str, messages: List[Dict[str, Any]]) -> str:
+        from app.utils.llm_response_cache import LLMResponseCache
+        return LLMResponseCache.make_key(analysis_type, self.model, messages)
+
+    def _response_cache(self):
+        from app.utils.llm_response_cache import get_llm_cache
+        return get_llm_cache()
+
+    @staticmethod
+    def _usage_to_dict(usage: Any) -> Optional[Dict[str, Any]]:
+        if usage is None or isinstance(usage, dict):
+            return usage
+        for attr in ('model_dump', 'dict'):
+            fn = getattr(usage, attr, None)
+            if callable(fn):
+                try:
+                    return fn()
+                except Exception:
+                    continue
+        return {k: getattr(usage, k, None) for k in ('prompt_tokens', 'completion_tokens', 'total_tokens')}
 
-    def _cache_get(self, key: str) -> Optional[Any]:
-        if not self._cache_enabled:
-            return None
-        return self._cache.get(key)
+    def _cached_completion(self, analysis_type: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Resposta do cache compartilhado ou nova chamada ao modelo (apenas respostas reais são armazenadas)."""
+        def _compute() -> Dict[str, Any]:
+            response = self._chat_completion_with_retries(messages, meta={'analysis_type': analysis_type})
+            content_md = response.choices[0].message.content
+            return self._build_common_response(
+                analysis_type, content_md, usage=self._usage_to_dict(getattr(response, 'usage', None))
+            )
 
-    def _cache_set(self, key: str, value: Any) -> None:
         if not self._cache_enabled:
-            return
-        self._cache[key] = value
+            return _compute()
+        try:
+            cache = self._response_cache()
+        except Exception as e:
+            logger.debug(f"Cache de LLM indisponível: {e}")
+            return _compute()
+        return cache.get_or_compute(
+            self._make_cache_key(analysis_type, messages),
+            _compute,
+            cacheable=lambda r: bool(r and r.get('markdown')),
+        )
 
     def _build_common_response(self, analysis_type: str, markdown: str, request_id: Optional[str] = None, usage: Optional[Dict[str, Any]] = None, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         now = datetime.utcnow().isoformat()
@@ -140,6 +212,15 @@ class ReportAIService:
         attempt = 0
         last_err = None
         request_id = f"ai_{(meta or {}).get('analysis_type', 'unknown')}_{int(time.time()*1000)}_{uuid.uuid4().hex[:8]}"
+        budget: Optional[TokenBudget] = getattr(self._local, 'budget', None)
+        reserved = 0
+        if budget is not None:
+            reserved = sum(self._estimate_tokens_text(str(m.get('content') or '')) for m in messages) + int(self.max_tokens or 0)
+            if not budget.reserve(reserved):
+                raise TokenBudgetExceeded(
+                    f"Orçamento de tokens esgotado ({budget.remaining} restantes, {reserved} necessários)"
+                )
+        semaphore = _provider_semaphore('openai', self.max_concurrency)
         start_ts = time.time()
         while attempt < max(1, int(self.max_retries)):
             try:
@@ -174,8 +255,14 @@ class ReportAIService:
                         kwargs["max_completion_tokens"] = self.max_tokens
                     else:
                         kwargs["max_tokens"] = self.max_tokens
-                resp = self.client.chat.completions.create(**kwargs)
+                deadline = getattr(self._local, 'deadline', None)
+                if deadline:
+                    kwargs["timeout"] = max(1.0, deadline - time.monotonic())
+                with semaphore:
+                    resp = self.client.chat.completions.create(**kwargs)
                 latency = (time.time() - start_ts)
+                if budget is not None:
+                    budget.settle(reserved, getattr(getattr(resp, 'usage', None), 'total_tokens', None))
                 try:
                     usage = getattr(resp, 'usage', None)
                     logger.info(f"OpenAI sucesso [{request_id}] type={(meta or {}).get('analysis_type')} latency={latency:.2f}s usage={usage}")
@@ -188,13 +275,95 @@ class ReportAIService:
                 if attempt >= int(self.max_retries):
                     break
                 sleep_secs = (self.backoff_base ** attempt)
+                deadline = getattr(self._local, 'deadline', None)
+                if deadline and time.monotonic() + sleep_secs >= deadline:
+                    break
                 logger.warning(f"OpenAI falhou [{request_id}] (tentativa {attempt}/{self.max_retries}) type={(meta or {}).get('analysis_type')}: {e}. Retentando em {sleep_secs:.2f}s...")
                 import time as _time
                 _time.sleep(sleep_secs)
         latency = (time.time() - start_ts)
+        if budget is not None:
+            budget.settle(reserved, 0)
         logger.error(f"OpenAI erro final [{request_id}] type={(meta or {}).get('analysis_type')} latency={latency:.2f}s: {last_err}")
         raise last_err if last_err else RuntimeError("Falha desconhecida ao chamar OpenAI para relatório")
     
+    def run_analyses(self,
+                     tasks: Dict[str, Callable[[], Any]],
+                     max_workers: int = 4,
+                     timeout: Optional[float] = None,
+                     token_budget: Optional[int] = None,
+                     on_timeout: Optional[Callable[[str], Any]] = None,
+                     on_error: Optional[Callable[[str, Exception], Any]] = None) -> Dict[str, Any]:
+        """
+        Executa as análises de um relatório em paralelo (fan-out) e devolve os resultados por nome.
+
+        Args:
+            tasks: Nome da análise -> função sem argumentos que a gera
+            max_workers: Análises simultâneas deste relatório (o limite por provedor continua valendo)
+            timeout: Prazo (s) de cada análise a partir do seu início; ao expirar, usa `on_timeout`
+                e segue com as demais (resultado parcial)
+            token_budget: Tokens compartilhados entre todas as análises (None/0 = sem limite)
+            on_timeout: Resultado usado para uma análise que excedeu o prazo
+            on_error: Resultado usado para uma análise que levantou exceção
+
+        Returns:
+            Resultados na mesma ordem de `tasks`.
+        """
+        self._initialize_openai()
+        budget = TokenBudget(token_budget) if token_budget else None
+        app = current_app._get_current_object()
+        started: Dict[str, float] = {}
+
+        def _wrap(name: str, fn: Callable[[], Any]) -> Callable[[], Any]:
+            def _run():
+                started[name] = time.monotonic()
+                with app.app_context():
+                    self._local.budget = budget
+                    # O prazo da análise também limita a requisição HTTP, liberando a thread
+                    self._local.deadline = (started[name] + timeout) if timeout else None
+                    try:
+                        return fn()
+                    finally:
+                        self._local.budget = None
+                        self._local.deadline = None
+            return _run
+
+        results: Dict[str, Any] = {}
+        # Mais threads que o limite do provedor só esperariam no semáforo consumindo o prazo
+        workers = max(1, min(int(max_workers or 1), len(tasks), int(self.max_concurrency or 1)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-ai')
+        try:
+            futures = {executor.submit(_wrap(name, fn)): name for name, fn in tasks.items()}
+            pending = set(futures)
+            while pending:
+                wait_for = 1.0
+                if timeout:
+                    deadlines = [started[futures[f]] + timeout for f in pending if futures[f] in started]
+                    if deadlines:
+                        wait_for = min(wait_for, max(0.0, min(deadlines) - time.monotonic()))
+                done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = futures[fut]
+                    try:
+                        results[name] = fut.result()
+                    except Exception as e:
+                        logger.error(f"Análise de IA '{name}' falhou: {e}")
+                        results[name] = on_error(name, e) if on_error else None
+                if timeout:
+                    now = time.monotonic()
+                    expired = {f for f in pending if futures[f] in started and now - started[futures[f]] >= timeout}
+                    for fut in expired:
+                        name = futures[fut]
+                        logger.warning(f"Análise de IA '{name}' excedeu {timeout:.0f}s; seguindo com resultado parcial")
+                        results[name] = on_timeout(name) if on_timeout else None
+                    pending -= expired
+        finally:
+            # Chamadas já em andamento terminam em segundo plano; as não iniciadas são descartadas
+            executor.shutdown(wait=False, cancel_futures=True)
+        if budget is not None:
+            logger.info(f"Análises de IA: {budget.used}/{budget.limit} tokens do orçamento usados")
+        return {name: results.get(name) for name in tasks}
+
     def generate_executive_summary(self, 
                                  report_data: Dict[str, Any],
                                  report_type: str,
@@ -228,47 +397,19 @@ class ReportAIService:
             epss_stats = report_data.get('vulnerabilities', {}).get('epss_stats', {})
             vendor_product_data = report_data.get('vulnerabilities', {}).get('vendor_product_data', {})
             
-            # Construir prompt
+            # Construir prompt dentro do orçamento de contexto
+            sys_prompt = self._get_executive_system_prompt()
             prompt = self._build_executive_summary_prompt(
                 asset_count, vuln_count, vuln_by_severity, risk_stats, 
-                report_type, organization_context, cisa_kev_data, epss_stats, vendor_product_data
+                report_type, organization_context, cisa_kev_data, epss_stats, vendor_product_data,
+                token_budget=self._prompt_token_budget(sys_prompt)
             )
-            # Validar/truncar se necessário
-            try:
-                sys_prompt = self._get_executive_system_prompt()
-                est_total = self._estimate_tokens_text(sys_prompt) + self._estimate_tokens_text(prompt)
-                if est_total > (self.context_limit - int(self.max_tokens or 1000) - 256):
-                    prompt = self._safe_truncate_text(prompt, max(512, self.context_limit - int(self.max_tokens or 1000) - 256))
-            except Exception:
-                pass
-
-            # Cache
-            cache_key = self._make_cache_key('executive_summary', {
-                'asset_count': asset_count,
-                'vuln_count': vuln_count,
-                'vuln_by_severity': vuln_by_severity,
-                'risk_stats': risk_stats,
-                'report_type': report_type,
-                'organization_context': organization_context,
-            })
-            cached = self._cache_get(cache_key)
-            if cached:
-                return cached
-            
-            # Fazer requisição à OpenAI
-            response = self._chat_completion_with_retries([
-                {"role": "system", "content": self._get_executive_system_prompt()},
+
+            # Cache compartilhado, endereçado pelo prompt efetivamente enviado
+            return self._cached_completion('executive_summary', [
+                {"role": "system", "content": sys_prompt},
                 {"role": "user", "content": prompt}
-            ], meta={'analysis_type': 'executive_summary'})
-            content_md = response.choices[0].message.content
-            usage = None
-            try:
-                usage = getattr(response, 'usage', None)
-            except Exception:
-                usage = None
-            result = self._build_common_response('executive_summary', content_md, usage=usage)
-            self._cache_set(cache_key, result)
-            return result
+            ])
             
         except Exception as e:
             logger.error(f"Erro ao gerar resumo executivo: {e}")
@@ -305,18 +446,20 @@ class ReportAIService:
             epss_stats = report_data.get('vulnerabilities', {}).get('epss_stats', {})
             vendor_product_data = report_data.get('vulnerabilities', {}).get('vendor_product_data', {})
             
-            # Construir prompt
+            # Construir prompt dentro do orçamento de contexto
+            sys_prompt = self._get_bia_system_prompt()
             prompt = self._build_bia_prompt(
                 critical_assets, high_severity_vulns, critical_vulns, 
-                asset_attributes, cve_mappings, cisa_kev_data=cisa_kev_data, epss_stats=epss_stats, vendor_product_data=vendor_product_data)
+                asset_attributes, cve_mappings, cisa_kev_data=cisa_kev_data, epss_stats=epss_stats, vendor_product_data=vendor_product_data,
+                token_budget=self._prompt_token_budget(sys_prompt))
             
-            # Fazer requisição à OpenAI
-            response = self._chat_completion_with_retries([
-                {"role": "system", "content": self._get_bia_system_prompt()},
+            # Fazer requisição à OpenAI (ou reaproveitar resposta em cache)
+            result = self._cached_completion('business_impact_analysis', [
+                {"role": "system", "content": sys_prompt},
                 {"role": "user", "content": prompt}
             ])
             
-            return response.choices[0].message.content
+            return result['markdown']
             
         except Exception as e:
             logger.error(f"Erro ao gerar análise BIA: {e}")
@@ -348,19 +491,20 @@ class ReportAIService:
             critical_count = len([v for v in priority_vulnerabilities if v.get('severity') == 'CRITICAL'])
             high_count = len([v for v in priority_vulnerabilities if v.get('severity') == 'HIGH'])
             
-            # Construir prompt
+            # Construir prompt dentro do orçamento de contexto
+            sys_prompt = self._get_remediation_system_prompt()
             prompt = self._build_remediation_prompt(
                 priority_vulnerabilities, total_vulns, critical_count, 
-                high_count, available_resources
+                high_count, available_resources, token_budget=self._prompt_token_budget(sys_prompt)
             )
             
-            # Fazer requisição à OpenAI
-            response = self._chat_completion_with_retries([
-                {"role": "system", "content": self._get_remediation_system_prompt()},
+            # Fazer requisição à OpenAI (ou reaproveitar resposta em cache)
+            result = self._cached_completion('remediation_plan', [
+                {"role": "system", "content": sys_prompt},
                 {"role": "user", "content": prompt}
             ])
             
-            return response.choices[0].message.content
+            return result['markdown']
             
         except Exception as e:
             logger.error(f"Erro ao gerar plano de remediação: {e}")
@@ -393,39 +537,18 @@ class ReportAIService:
             vuln_data = report_data.get('vulnerabilities', {})
             technical_details = report_data.get('technical_analysis', {})
             
-            # Construir prompt
+            # Construir prompt dentro do orçamento de contexto
+            sys_prompt = self._get_technical_study_system_prompt()
             prompt = self._build_technical_study_prompt(
-                asset_configurations, vuln_data, technical_details, security_architecture
+                asset_configurations, vuln_data, technical_details, security_architecture,
+                token_budget=self._prompt_token_budget(sys_prompt)
             )
-            # Validar/truncar
-            try:
-                sys_prompt = self._get_technical_study_system_prompt()
-                est_total = self._estimate_tokens_text(sys_prompt) + self._estimate_tokens_text(prompt)
-                if est_total > (self.context_limit - int(self.max_tokens or 1000) - 256):
-                    prompt = self._safe_truncate_text(prompt, max(512, self.context_limit - int(self.max_tokens or 1000) - 256))
-            except Exception:
-                pass
-
-            # Cache
-            cache_key = self._make_cache_key('technical_study', {
-                'asset_config_count': len(asset_configurations),
-                'vulnerability_summary': self._format_vulnerability_summary(vuln_data),
-                'has_security_architecture': bool(security_architecture),
-            })
-            cached = self._cache_get(cache_key)
-            if cached:
-                return cached
-
-            response = self._chat_completion_with_retries([
-                {"role": "system", "content": self._get_technical_study_system_prompt()},
-                {"role": "user", "content": prompt}
-            ], meta={'analysis_type': 'technical_study'})
 
-            content_md = response.choices[0].message.content
-            usage = getattr(response, 'usage', None)
-            result = self._build_common_response('technical_study', content_md, usage=usage)
-            self._cache_set(cache_key, result)
-            return result
+            # Cache compartilhado, endereçado pelo prompt efetivamente enviado
+            return self._cached_completion('technical_study', [
+                {"role": "system", "content": sys_prompt},
+                {"role": "user", "content": prompt}
+            ])
             
         except Exception as e:
             logger.error(f"Erro ao gerar estudo técnico: {e}")
@@ -443,34 +566,15 @@ class ReportAIService:
                 return self._build_common_response('cisa_kev_analysis', demo_md, extra={'demo_mode': True})
             
             # Construir prompt específico para CISA KEV
-            prompt = self._build_cisa_kev_prompt(cisa_kev_data, vulnerability_data)
-            # Validar/truncar
-            try:
-                sys_prompt = self._get_cisa_kev_system_prompt()
-                est_total = self._estimate_tokens_text(sys_prompt) + self._estimate_tokens_text(prompt)
-                if est_total > (self.context_limit - int(self.max_tokens or 1000) - 256):
-                    prompt = self._safe_truncate_text(prompt, max(512, self.context_limit - int(self.max_tokens or 1000) - 256))
-            except Exception:
-                pass
-
-            # Cache
-            cache_key = self._make_cache_key('cisa_kev_analysis', {
-                'cisa_kev_data': cisa_kev_data,
-                'vulnerability_summary': self._format_vulnerability_summary(vulnerability_data),
-            })
-            cached = self._cache_get(cache_key)
-            if cached:
-                return cached
-            
-            response = self._chat_completion_with_retries([
-                {"role": "system", "content": self._get_cisa_kev_system_prompt()},
+            sys_prompt = self._get_cisa_kev_system_prompt()
+            prompt = self._build_cisa_kev_prompt(cisa_kev_data, vulnerability_data,
+                                                 token_budget=self._prompt_token_budget(sys_prompt))
+
+            # Cache compartilhado, endereçado pelo prompt efetivamente enviado
+            return self._cached_completion('cisa_kev_analysis', [
+                {"role": "system", "content": sys_prompt},
                 {"role": "user", "content": prompt}
-            ], meta={'analysis_type': 'cisa_kev_analysis'})
-            content_md = response.choices[0].message.content
-            usage = getattr(response, 'usage', None)
-            result = self._build_common_response('cisa_kev_analysis', content_md, usage=usage)
-            self._cache_set(cache_key, result)
-            return result
+            ])
             
         except Exception as e:
             logger.error(f"Erro ao gerar análise CISA KEV: {str(e)}")
@@ -488,34 +592,15 @@ class ReportAIService:
                 return self._build_common_response('epss_analysis', demo_md, extra={'demo_mode': True})
             
             # Construir prompt específico para EPSS
-            prompt = self._build_epss_prompt(epss_data, vulnerability_data)
-            # Validar/truncar
-            try:
-                sys_prompt = self._get_epss_system_prompt()
-                est_total = self._estimate_tokens_text(sys_prompt) + self._estimate_tokens_text(prompt)
-                if est_total > (self.context_limit - int(self.max_tokens or 1000) - 256):
-                    prompt = self._safe_truncate_text(prompt, max(512, self.context_limit - int(self.max_tokens or 1000) - 256))
-            except Exception:
-                pass
-
-            # Cache
-            cache_key = self._make_cache_key('epss_analysis', {
-                'epss_data': epss_data,
-                'vulnerability_summary': self._format_vulnerability_summary(vulnerability_data),
-            })
-            cached = self._cache_get(cache_key)
-            if cached:
-                return cached
-
-            response = self._chat_completion_with_retries([
-                {"role": "system", "content": self._get_epss_system_prompt()},
+            sys_prompt = self._get_epss_system_prompt()
+            prompt = self._build_epss_prompt(epss_data, vulnerability_data,
+                                             token_budget=self._prompt_token_budget(sys_prompt))
+
+            # Cache compartilhado, endereçado pelo prompt efetivamente enviado
+            return self._cached_completion('epss_analysis', [
+                {"role": "system", "content": sys_prompt},
                 {"role": "user", "content": prompt}
-            ], meta={'analysis_type': 'epss_analysis'})
-            content_md = response.choices[0].message.content
-            usage = getattr(response, 'usage', None)
-            result = self._build_common_response('epss_analysis', content_md, usage=usage)
-            self._cache_set(cache_key, result)
-            return result
+            ])
             
         except Exception as e:
             logger.error(f"Erro ao gerar análise EPSS: {str(e)}")
@@ -533,34 +618,15 @@ class ReportAIService:
                 return self._build_common_response('vendor_product_analysis', demo_md, extra={'demo_mode': True})
             
             # Construir prompt específico para vendor/product
-            prompt = self._build_vendor_product_prompt(vendor_product_data, vulnerability_data)
-            # Validar/truncar
-            try:
-                sys_prompt = self._get_vendor_product_system_prompt()
-                est_total = self._estimate_tokens_text(sys_prompt) + self._estimate_tokens_text(prompt)
-                if est_total > (self.context_limit - int(self.max_tokens or 1000) - 256):
-                    prompt = self._safe_truncate_text(prompt, max(512, self.context_limit - int(self.max_tokens or 1000) - 256))
-            except Exception:
-                pass
-
-            # Cache
-            cache_key = self._make_cache_key('vendor_product_analysis', {
-                'vendor_product_data': vendor_product_data,
-                'vulnerability_summary': self._format_vulnerability_summary(vulnerability_data),
-            })
-            cached = self._cache_get(cache_key)
-            if cached:
-                return cached
-
-            response = self._chat_completion_with_retries([
-                {"role": "system", "content": self._get_vendor_product_system_prompt()},
+            sys_prompt = self._get_vendor_product_system_prompt()
+            prompt = self._build_vendor_product_prompt(vendor_product_data, vulnerability_data,
+                                                       token_budget=self._prompt_token_budget(sys_prompt))
+
+            # Cache compartilhado, endereçado pelo prompt efetivamente enviado
+            return self._cached_completion('vendor_product_analysis', [
+                {"role": "system", "content": sys_prompt},
                 {"role": "user", "content": prompt}
-            ], meta={'analysis_type': 'vendor_product_analysis'})
-            content_md = response.choices[0].message.content
-            usage = getattr(response, 'usage', None)
-            result = self._build_common_response('vendor_product_analysis', content_md, usage=usage)
-            self._cache_set(cache_key, result)
-            return result
+            ])
             
         except Exception as e:
             logger.error(f"Erro ao gerar análise vendor/product: {str(e)}")
@@ -591,40 +657,18 @@ class ReportAIService:
             cvss_stats = vulnerability_data.get('cvss_statistics', {})
             cwe_distribution = vulnerability_data.get('cwe_distribution', {})
             
-            # Construir prompt
+            # Construir prompt dentro do orçamento de contexto
+            sys_prompt = self._get_technical_system_prompt()
             prompt = self._build_technical_analysis_prompt(
-                vulnerability_data, cve_details, cvss_stats, cwe_distribution
+                vulnerability_data, cve_details, cvss_stats, cwe_distribution,
+                token_budget=self._prompt_token_budget(sys_prompt)
             )
-            # Validar/truncar
-            try:
-                sys_prompt = self._get_technical_system_prompt()
-                est_total = self._estimate_tokens_text(sys_prompt) + self._estimate_tokens_text(prompt)
-                if est_total > (self.context_limit - int(self.max_tokens or 1000) - 256):
-                    prompt = self._safe_truncate_text(prompt, max(512, self.context_limit - int(self.max_tokens or 1000) - 256))
-            except Exception:
-                pass
-
-            # Cache
-            cache_key = self._make_cache_key('technical_analysis', {
-                'cvss_stats': cvss_stats,
-                'cwe_distribution': cwe_distribution,
-                'vulnerability_summary': self._format_vulnerability_summary(vulnerability_data),
-                'cve_details': cve_details,
-            })
-            cached = self._cache_get(cache_key)
-            if cached:
-                return cached
-
-            # Fazer requisição à OpenAI
-            response = self._chat_completion_with_retries([
-                {"role": "system", "content": self._get_technical_system_prompt()},
+
+            # Cache compartilhado, endereçado pelo prompt efetivamente enviado
+            return self._cached_completion('technical_analysis', [
+                {"role": "system", "content": sys_prompt},
                 {"role": "user", "content": prompt}
-            ], meta={'analysis_type': 'technical_analysis'})
-            content_md = response.choices[0].message.content
-            usage = getattr(response, 'usage', None)
-            result = self._build_common_response('technical_analysis', content_md, usage=usage)
-            self._cache_set(cache_key, result)
-            return result
+            ])
             
         except Exception as e:
             logger.error(f"Erro ao gerar análise técnica: {e}")
@@ -849,7 +893,8 @@ Use análise estatística e forneça insights estratégicos sobre gestão de ven
     
     def _build_executive_summary_prompt(self, asset_count, vuln_count, vuln_by_severity, 
                                       risk_stats, report_type, organization_context, 
-                                      cisa_kev_data=None, epss_stats=None, vendor_product_data=None):
+                                      cisa_kev_data=None, epss_stats=None, vendor_product_data=None,
+                                      token_budget: Optional[int] = None):
         """Constrói prompt para resumo executivo."""
         context = f"**Contexto Organizacional:** {organization_context}" if organization_context else ""
         
@@ -891,7 +936,7 @@ Use análise estatística e forneça insights estratégicos sobre gestão de ven
 - Necessidade de diversificação de fornecedores avaliada
 """
         
-        return f"""MISSÃO EXECUTIVA: Crie um resumo executivo que permita ao CEO/Board tomar decisões 
+        prompt = f"""MISSÃO EXECUTIVA: Crie um resumo executivo que permita ao CEO/Board tomar decisões 
         informadas sobre investimentos em cybersegurança e priorização de recursos.
 
 **DADOS DA AVALIAÇÃO DE SEGURANÇA:**
@@ -949,9 +994,11 @@ Use análise estatística e forneça insights estratégicos sobre gestão de ven
 - Foco em decisões e investimentos
 - Tom assertivo mas não alarmista
 - Considere dados de threat intelligence (CISA KEV, EPSS) para priorização"""
+        return self._prompt_builder(token_budget).add(prompt).build()
     
     def _build_bia_prompt(self, critical_assets, high_severity_vulns, critical_vulns, 
-                         asset_attributes, cve_mappings, cisa_kev_data=None, epss_stats=None, vendor_product_data=None):
+                         asset_attributes, cve_mappings, cisa_kev_data=None, epss_stats=None, vendor_product_data=None,
+                         token_budget: Optional[int] = None):
         """Constrói prompt para análise BIA."""
         
         # Dados enriquecidos para BIA
@@ -985,7 +1032,8 @@ Use análise estatística e forneça insights estratégicos sobre gestão de ven
 - Necessidade de avaliação de fornecedores alternativos
 """
         
-        return f"""Realize uma Business Impact Analysis (BIA) baseada nos seguintes dados:
+        b = self._prompt_builder(token_budget)
+        b.add(f"""Realize uma Business Impact Analysis (BIA) baseada nos seguintes dados:
 
 **Ativos Críticos Identificados:**
 {len(critical_assets)} ativos classificados como críticos
@@ -998,7 +1046,10 @@ Use análise estatística e forneça insights estratégicos sobre gestão de ven
 {vendor_risk_info}
 
 **Atributos dos Ativos:**
-{self._format_asset_attributes(asset_attributes[:10])}  # Limitar para não sobrecarregar
+""")
+        b.add_rows(asset_attributes, self._format_asset_attribute_row, limit=10,
+                   empty="Nenhum atributo de ativo disponível", overflow=self._omitted_rows_note)
+        b.add("""
 
 **ANÁLISE BIA REQUERIDA:**
 
@@ -1044,16 +1095,19 @@ Use análise estatística e forneça insights estratégicos sobre gestão de ven
 - Concentração de vulnerabilidades por vendor pode amplificar impacto
 - Considere cenários de exploração simultânea de múltiplas vulnerabilidades
 
-Forneça uma análise BIA estruturada em markdown com foco em impactos quantificáveis de negócio."""
+Forneça uma análise BIA estruturada em markdown com foco em impactos quantificáveis de negócio.""")
+        return b.build()
     
     def _build_remediation_prompt(self, priority_vulnerabilities, total_vulns, 
-                                critical_count, high_count, available_resources):
+                                critical_count, high_count, available_resources,
+                                token_budget: Optional[int] = None):
         """Constrói prompt para plano de remediação."""
         resources_info = ""
         if available_resources:
             resources_info = f"**Recursos Disponíveis:** {available_resources}"
         
-        return f"""Crie um plano de remediação para as seguintes vulnerabilidades:
+        b = self._prompt_builder(token_budget)
+        b.add(f"""Crie um plano de remediação para as seguintes vulnerabilidades:
 
 **Resumo das Vulnerabilidades:**
 - Total: {total_vulns}
@@ -1061,7 +1115,10 @@ Forneça uma análise BIA estruturada em markdown com foco em impactos quantific
 - Altas: {high_count}
 
 **Vulnerabilidades Prioritárias:**
-{self._format_priority_vulnerabilities(priority_vulnerabilities[:15])}
+""")
+        b.add_rows(priority_vulnerabilities, self._format_priority_vulnerability_row, limit=15,
+                   empty="Nenhuma vulnerabilidade prioritária", overflow=self._omitted_rows_note)
+        b.add(f"""
 
 {resources_info}
 
@@ -1074,21 +1131,30 @@ Forneça uma análise BIA estruturada em markdown com foco em impactos quantific
 6. Critérios de validação
 7. Plano de contingência
 
-Formate como um plano executável em markdown."""
+Formate como um plano executável em markdown.""")
+        return b.build()
     
     def _build_technical_analysis_prompt(self, vulnerability_data, cve_details, 
-                                       cvss_stats, cwe_distribution):
+                                       cvss_stats, cwe_distribution,
+                                       token_budget: Optional[int] = None):
         """Constrói prompt para análise técnica."""
-        return f"""Realize uma análise técnica detalhada baseada nos seguintes dados:
+        b = self._prompt_builder(token_budget)
+        b.add(f"""Realize uma análise técnica detalhada baseada nos seguintes dados:
 
 **Estatísticas CVSS:**
 {self._format_cvss_stats(cvss_stats)}
 
 **Distribuição de CWE (Top 10):**
-{self._format_cwe_distribution(cwe_distribution)}
+""")
+        b.add_rows(self._top_cwes(cwe_distribution), lambda item: self._format_count_row(item, 'ocorrências'),
+                   empty="Distribuição CWE não disponível")
+        b.add("""
 
 **Detalhes das CVEs:**
-{self._format_cve_details(cve_details[:10])}
+""")
+        b.add_rows(cve_details, self._format_cve_detail_row, limit=10,
+                   empty="Detalhes de CVE não disponíveis", overflow=self._omitted_rows_note)
+        b.add("""
 
 **Análise Técnica Requerida:**
 1. Análise de vetores de ataque predominantes
@@ -1098,10 +1164,12 @@ Formate como um plano executável em markdown."""
 5. Recomendações técnicas específicas
 6. Indicadores de comprometimento (IoCs)
 
-Forneça uma análise técnica abrangente em markdown."""
+Forneça uma análise técnica abrangente em markdown.""")
+        return b.build()
     
     def _build_technical_study_prompt(self, asset_configurations, vuln_data, 
-                                    technical_details, security_architecture):
+                                    technical_details, security_architecture,
+                                    token_budget: Optional[int] = None):
         """Constrói prompt para estudo técnico."""
         arch_info = ""
         if security_architecture:
@@ -1110,16 +1178,23 @@ Forneça uma análise técnica abrangente em markdown."""
 {self._format_security_architecture(security_architecture)}
 """
         
-        return f"""Realize um estudo técnico aprofundado baseado nos seguintes dados:
+        b = self._prompt_builder(token_budget)
+        b.add(f"""Realize um estudo técnico aprofundado baseado nos seguintes dados:
 
 **Configurações dos Ativos ({len(asset_configurations)} ativos):**
-{self._format_asset_configurations(asset_configurations[:10])}
+""")
+        b.add_rows(asset_configurations, self._format_asset_configuration_row, limit=10,
+                   empty="Nenhuma configuração de ativo disponível", overflow=self._omitted_rows_note)
+        b.add(f"""
 
 **Dados de Vulnerabilidades:**
 {self._format_vulnerability_summary(vuln_data)}
 
 **Detalhes Técnicos:**
-{self._format_technical_details(technical_details)}
+""")
+        b.add_rows(list((technical_details or {}).items()), self._format_key_value_row,
+                   empty="Detalhes técnicos não disponíveis", overflow=self._omitted_rows_note)
+        b.add(f"""
 {arch_info}
 
 **Estudo Técnico Deve Incluir:**
@@ -1148,19 +1223,24 @@ Forneça uma análise técnica abrangente em markdown."""
    - Scripts e comandos específicos
    - Cronograma técnico de implementação
 
-Forneça um estudo técnico abrangente e detalhado em markdown."""
+Forneça um estudo técnico abrangente e detalhado em markdown.""")
+        return b.build()
 
-    def _build_cisa_kev_prompt(self, cisa_kev_data, vulnerability_data):
+    def _build_cisa_kev_prompt(self, cisa_kev_data, vulnerability_data, token_budget: Optional[int] = None):
         """Constrói prompt para análise CISA KEV."""
         kev_vulns = cisa_kev_data.get('kev_vulnerabilities', [])
         kev_count = len(kev_vulns)
         
-        return f"""**Análise de Vulnerabilidades CISA KEV**
+        b = self._prompt_builder(token_budget)
+        b.add(f"""**Análise de Vulnerabilidades CISA KEV**
 
 **Vulnerabilidades KEV Identificadas:** {kev_count}
 
 **Vulnerabilidades KEV Críticas:**
-{self._format_kev_vulnerabilities(kev_vulns[:10])}
+""")
+        b.add_rows(kev_vulns, self._format_kev_vulnerability_row, limit=10,
+                   empty="Nenhuma vulnerabilidade KEV identificada", overflow=self._omitted_rows_note)
+        b.add(f"""
 
 **Dados de Vulnerabilidades Gerais:**
 {self._format_vulnerability_summary(vulnerability_data)}
@@ -1172,20 +1252,25 @@ Forneça um estudo técnico abrangente e detalhado em markdown."""
 4. **Recomendações de Mitigação** - Ações imediatas e de longo prazo
 5. **Timeline de Remediação** - Cronograma acelerado para KEV
 
-Forneça análise focada na urgência e criticidade das vulnerabilidades KEV."""
+Forneça análise focada na urgência e criticidade das vulnerabilidades KEV.""")
+        return b.build()
 
-    def _build_epss_prompt(self, epss_data, vulnerability_data):
+    def _build_epss_prompt(self, epss_data, vulnerability_data, token_budget: Optional[int] = None):
         """Constrói prompt para análise EPSS."""
         epss_stats = epss_data.get('epss_statistics', {})
         high_probability_vulns = epss_data.get('high_probability_vulnerabilities', [])
         
-        return f"""**Análise de Probabilidade de Exploração (EPSS)**
+        b = self._prompt_builder(token_budget)
+        b.add(f"""**Análise de Probabilidade de Exploração (EPSS)**
 
 **Estatísticas EPSS:**
 {self._format_epss_statistics(epss_stats)}
 
 **Vulnerabilidades com Alta Probabilidade de Exploração:**
-{self._format_epss_vulnerabilities(high_probability_vulns[:10])}
+""")
+        b.add_rows(high_probability_vulns, self._format_epss_vulnerability_row, limit=10,
+                   empty="Nenhuma vulnerabilidade com dados EPSS", overflow=self._omitted_rows_note)
+        b.add(f"""
 
 **Dados de Vulnerabilidades Gerais:**
 {self._format_vulnerability_summary(vulnerability_data)}
@@ -1197,9 +1282,10 @@ Forneça análise focada na urgência e criticidade das vulnerabilidades KEV."""
 4. **Recomendações de Priorização** - Estratégia baseada em dados quantitativos
 5. **Correlação de Riscos** - Relação entre probabilidade e impacto
 
-Forneça análise quantitativa focada em priorização baseada em dados."""
+Forneça análise quantitativa focada em priorização baseada em dados.""")
+        return b.build()
 
-    def _build_vendor_product_prompt(self, vendor_product_data, vulnerability_data):
+    def _build_vendor_product_prompt(self, vendor_product_data, vulnerability_data, token_budget: Optional[int] = None):
         """Constrói prompt para análise vendor/product."""
         vendor_stats = vendor_product_data.get('vendor_statistics', {})
         product_stats = vendor_product_data.get('product_statistics', {})
@@ -1220,7 +1306,8 @@ Forneça análise quantitativa focada em priorização baseada em dados."""
         except Exception:
             cwes_total = 0
         
-        return f"""**Análise de Vulnerabilidades por Vendor e Produto**
+        b = self._prompt_builder(token_budget)
+        b.add(f"""**Análise de Vulnerabilidades por Vendor e Produto**
 
 **Resumo de Totais:**
 - Vendors: {vendors_total}
@@ -1229,10 +1316,16 @@ Forneça análise quantitativa focada em priorização baseada em dados."""
 - CWEs: {cwes_total}
 
 **Estatísticas por Vendor:**
-{self._format_vendor_statistics(vendor_stats)}
+""")
+        b.add_rows(list((vendor_stats or {}).items()), self._format_stats_row,
+                   empty="Estatísticas de vendors não disponíveis", overflow=self._omitted_rows_note)
+        b.add("""
 
 **Estatísticas por Produto:**
-{self._format_product_statistics(product_stats)}
+""")
+        b.add_rows(list((product_stats or {}).items()), self._format_stats_row,
+                   empty="Estatísticas de produtos não disponíveis", overflow=self._omitted_rows_note)
+        b.add(f"""
 
 **Dados de Vulnerabilidades Gerais:**
 {self._format_vulnerability_summary(vulnerability_data)}
@@ -1244,7 +1337,8 @@ Forneça análise quantitativa focada em priorização baseada em dados."""
 4. **Estratégia de Diversificação** - Recomendações para redução de risco
 5. **Gestão de Patch Management** - Estratégias específicas por vendor/produto
 
-Forneça análise estratégica focada em gestão de vendors e produtos."""
+Forneça análise estratégica focada em gestão de vendors e produtos.""")
+        return b.build()
     
     # Métodos de formatação de dados
     
@@ -1272,43 +1366,40 @@ Forneça análise estratégica focada em gestão de vendors e produtos."""
         """Formata atributos de ativos para o prompt."""
         if not asset_attributes:
             return "Nenhum atributo de ativo disponível"
-        
-        formatted = []
-        for asset in asset_attributes:
-            name = asset.get('name', 'N/A')
-            criticality = asset.get('criticality', 'N/A')
-            type_info = asset.get('type', 'N/A')
-            rto = asset.get('rto_hours')
-            rpo = asset.get('rpo_hours')
-            uptime = asset.get('uptime_text')
-            cost = asset.get('operational_cost_per_hour')
-            metrics = []
-            if rto is not None:
-                metrics.append(f"RTO: {rto}h")
-            if rpo is not None:
-                metrics.append(f"RPO: {rpo}h")
-            if uptime:
-                metrics.append(f"Uptime: {uptime}")
-            if cost is not None:
-                metrics.append(f"Custo/h: ${cost:,.2f}")
-            metrics_str = f" | {'; '.join(metrics)}" if metrics else ""
-            formatted.append(f"- {name} (Criticidade: {criticality}, Tipo: {type_info}{metrics_str})")
-        
-        return "\n".join(formatted)
+        return "\n".join(self._format_asset_attribute_row(asset) for asset in asset_attributes)
+
+    def _format_asset_attribute_row(self, asset):
+        name = asset.get('name', 'N/A')
+        criticality = asset.get('criticality', 'N/A')
+        type_info = asset.get('type', 'N/A')
+        rto = asset.get('rto_hours')
+        rpo = asset.get('rpo_hours')
+        uptime = asset.get('uptime_text')
+        cost = asset.get('operational_cost_per_hour')
+        metrics = []
+        if rto is not None:
+            metrics.append(f"RTO: {rto}h")
+        if rpo is not None:
+            metrics.append(f"RPO: {rpo}h")
+        if uptime:
+            metrics.append(f"Uptime: {uptime}")
+        if cost is not None:
+            metrics.append(f"Custo/h: ${cost:,.2f}")
+        metrics_str = f" | {'; '.join(metrics)}" if metrics else ""
+        return f"- {name} (Criticidade: {criticality}, Tipo: {type_info}{metrics_str})"
     
     def _format_priority_vulnerabilities(self, vulnerabilities):
         """Formata vulnerabilidades prioritárias para o prompt."""
         if not vulnerabilities:
             return "Nenhuma vulnerabilidade prioritária"
         
-        formatted = []
-        for vuln in vulnerabilities:
-            cve_id = vuln.get('cve_id', 'N/A')
-            severity = vuln.get('severity', 'N/A')
-            cvss = vuln.get('cvss_score', 'N/A')
-            formatted.append(f"- {cve_id} (Severidade: {severity}, CVSS: {cvss})")
-        
-        return "\n".join(formatted)
+        return "\n".join(self._format_priority_vulnerability_row(vuln) for vuln in vulnerabilities)
+
+    def _format_priority_vulnerability_row(self, vuln):
+        cve_id = vuln.get('cve_id', 'N/A')
+        severity = vuln.get('severity', 'N/A')
+        cvss = vuln.get('cvss_score', 'N/A')
+        return f"- {cve_id} (Severidade: {severity}, CVSS: {cvss})"
     
     def _format_cvss_stats(self, cvss_stats):
         """Formata estatísticas CVSS para o prompt."""
@@ -1326,41 +1417,43 @@ Forneça análise estratégica focada em gestão de vendors e produtos."""
             return "Distribuição CWE não disponível"
         
         # Ordenar por frequência e pegar top 10
-        sorted_cwes = sorted(cwe_distribution.items(), key=lambda x: x[1], reverse=True)[:10]
-        
-        formatted = []
-        for cwe_id, count in sorted_cwes:
-            formatted.append(f"- {cwe_id}: {count} ocorrências")
-        
-        return "\n".join(formatted)
+        sorted_cwes = self._top_cwes(cwe_distribution)
+        return "\n".join(self._format_count_row(item, 'ocorrências') for item in sorted_cwes)
+
+    @staticmethod
+    def _top_cwes(cwe_distribution, limit: int = 10):
+        return sorted((cwe_distribution or {}).items(), key=lambda x: x[1], reverse=True)[:limit]
+
+    @staticmethod
+    def _format_count_row(item, unit: str) -> str:
+        key, count = item
+        return f"- {key}: {count} {unit}"
     
     def _format_cve_details(self, cve_details):
         """Formata detalhes das CVEs para o prompt."""
         if not cve_details:
             return "Detalhes de CVE não disponíveis"
         
-        formatted = []
-        for cve in cve_details:
-            cve_id = cve.get('cve_id', 'N/A')
-            description = cve.get('description', 'N/A')[:100] + "..."
-            formatted.append(f"- {cve_id}: {description}")
-        
-        return "\n".join(formatted)
+        return "\n".join(self._format_cve_detail_row(cve) for cve in cve_details)
+
+    def _format_cve_detail_row(self, cve):
+        cve_id = cve.get('cve_id', 'N/A')
+        description = cve.get('description', 'N/A')[:100] + "..."
+        return f"- {cve_id}: {description}"
     
     def _format_asset_configurations(self, asset_configurations):
         """Formata configurações de ativos para o prompt."""
         if not asset_configurations:
             return "Nenhuma configuração de ativo disponível"
         
-        formatted = []
-        for asset in asset_configurations:
-            name = asset.get('name', 'N/A')
-            os_info = asset.get('operating_system', 'N/A')
-            services = asset.get('services', [])
-            service_count = len(services) if services else 0
-            formatted.append(f"- {name} (OS: {os_info}, Serviços: {service_count})")
-        
-        return "\n".join(formatted)
+        return "\n".join(self._format_asset_configuration_row(asset) for asset in asset_configurations)
+
+    def _format_asset_configuration_row(self, asset):
+        name = asset.get('name', 'N/A')
+        os_info = asset.get('operating_system', 'N/A')
+        services = asset.get('services', [])
+        service_count = len(services) if services else 0
+        return f"- {name} (OS: {os_info}, Serviços: {service_count})"
     
     def _format_vulnerability_summary(self, vuln_data):
         """Formata resumo de vulnerabilidades para o prompt."""
@@ -1381,38 +1474,34 @@ Forneça análise estratégica focada em gestão de vendors e produtos."""
         if not technical_details:
             return "Detalhes técnicos não disponíveis"
         
-        formatted = []
-        for key, value in technical_details.items():
-            formatted.append(f"- {key}: {value}")
-        
-        return "\n".join(formatted)
+        return "\n".join(self._format_key_value_row(item) for item in technical_details.items())
+
+    @staticmethod
+    def _format_key_value_row(item) -> str:
+        key, value = item
+        return f"- {key}: {value}"
     
     def _format_security_architecture(self, security_architecture):
         """Formata informações de arquitetura de segurança para o prompt."""
         if not security_architecture:
             return "Informações de arquitetura não disponíveis"
         
-        formatted = []
-        for component, details in security_architecture.items():
-            formatted.append(f"- {component}: {details}")
-        
-        return "\n".join(formatted)
+        return "\n".join(self._format_key_value_row(item) for item in security_architecture.items())
 
     def _format_kev_vulnerabilities(self, kev_vulns):
         """Formata vulnerabilidades KEV para o prompt."""
         if not kev_vulns:
             return "Nenhuma vulnerabilidade KEV identificada"
         
-        formatted = []
-        for vuln in kev_vulns:
-            cve_id = vuln.get('cve_id', 'N/A')
-            vendor = vuln.get('vendor_project', 'N/A')
-            product = vuln.get('product', 'N/A')
-            date_added = vuln.get('date_added', 'N/A')
-            due_date = vuln.get('due_date', 'N/A')
-            formatted.append(f"- {cve_id} ({vendor} {product}) - Adicionado: {date_added}, Prazo: {due_date}")
-        
-        return "\n".join(formatted)
+        return "\n".join(self._format_kev_vulnerability_row(vuln) for vuln in kev_vulns)
+
+    def _format_kev_vulnerability_row(self, vuln):
+        cve_id = vuln.get('cve_id', 'N/A')
+        vendor = vuln.get('vendor_project', 'N/A')
+        product = vuln.get('product', 'N/A')
+        date_added = vuln.get('date_added', 'N/A')
+        due_date = vuln.get('due_date', 'N/A')
+        return f"- {cve_id} ({vendor} {product}) - Adicionado: {date_added}, Prazo: {due_date}"
 
     def _format_epss_statistics(self, epss_stats):
         """Formata estatísticas EPSS para o prompt."""
@@ -1435,40 +1524,34 @@ Forneça análise estratégica focada em gestão de vendors e produtos."""
         if not epss_vulns:
             return "Nenhuma vulnerabilidade com dados EPSS"
         
-        formatted = []
-        for vuln in epss_vulns:
-            cve_id = vuln.get('cve_id', 'N/A')
-            epss_score = vuln.get('epss_score', 0)
-            percentile = vuln.get('epss_percentile', 0)
-            formatted.append(f"- {cve_id}: Score {epss_score:.3f} (Percentil {percentile:.1f}%)")
-        
-        return "\n".join(formatted)
+        return "\n".join(self._format_epss_vulnerability_row(vuln) for vuln in epss_vulns)
+
+    def _format_epss_vulnerability_row(self, vuln):
+        cve_id = vuln.get('cve_id', 'N/A')
+        epss_score = vuln.get('epss_score', 0)
+        percentile = vuln.get('epss_percentile', 0)
+        return f"- {cve_id}: Score {epss_score:.3f} (Percentil {percentile:.1f}%)"
 
     def _format_vendor_statistics(self, vendor_stats):
         """Formata estatísticas de vendors para o prompt."""
         if not vendor_stats:
             return "Estatísticas de vendors não disponíveis"
         
-        formatted = []
-        for vendor, stats in vendor_stats.items():
-            vuln_count = stats.get('vulnerability_count', 0)
-            critical_count = stats.get('critical_count', 0)
-            formatted.append(f"- {vendor}: {vuln_count} vulnerabilidades ({critical_count} críticas)")
-        
-        return "\n".join(formatted)
+        return "\n".join(self._format_stats_row(item) for item in vendor_stats.items())
+
+    @staticmethod
+    def _format_stats_row(item) -> str:
+        name, stats = item
+        vuln_count = stats.get('vulnerability_count', 0)
+        critical_count = stats.get('critical_count', 0)
+        return f"- {name}: {vuln_count} vulnerabilidades ({critical_count} críticas)"
 
     def _format_product_statistics(self, product_stats):
         """Formata estatísticas de produtos para o prompt."""
         if not product_stats:
             return "Estatísticas de produtos não disponíveis"
         
-        formatted = []
-        for product, stats in product_stats.items():
-            vuln_count = stats.get('vulnerability_count', 0)
-            critical_count = stats.get('critical_count', 0)
-            formatted.append(f"- {product}: {vuln_count} vulnerabilidades ({critical_count} críticas)")
-        
-        return "\n".join(formatted)
+        return "\n".join(self._format_stats_row(item) for item in product_stats.items())
     
     # Métodos de demonstração (modo demo)
     
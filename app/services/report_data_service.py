@@ -1020,6 +1020,20 @@ class ReportDataService:
         try:
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days)
+
+            # Sem filtro de ativos: ler o agregado diário (severity_daily_rollup)
+            if not asset_ids:
+                try:
+                    from app.services.daily_stats_service import DailyStatsService
+                    trend_data = DailyStatsService(self.session).daily_counts(start_date, end_date)
+                    return {
+                        'trend_data': trend_data,
+                        'period_days': days,
+                        'start_date': start_date,
+                        'end_date': end_date
+                    }
+                except Exception as e:
+                    logger.debug(f"Agregado diário indisponível para tendências: {e}")
             
             # Vulnerabilidades por dia
             query = self.session.query(
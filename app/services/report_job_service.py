@@ -0,0 +1,416 @@
+"""
+Fila persistente de geração de relatórios (tabela ``report_jobs``) com pool de threads.
+
+A geração (compilação de dados, análises de IA, gráficos e composição) sai da
+thread do request: `enqueue` grava um job e as threads de trabalho de qualquer
+processo o reivindicam com um UPDATE condicional (``WHERE status = 'queued'``),
+portável entre SQLite e PostgreSQL, de modo que cada job roda uma única vez.
+
+- Prioridade: maior `priority` primeiro, depois ordem de criação.
+- Concorrência: REPORT_JOB_WORKERS threads por processo e, opcionalmente,
+  REPORT_JOB_MAX_RUNNING jobs em execução no total.
+- Retentativas: falhas voltam para a fila com backoff exponencial até
+  `max_attempts`; o runner recebe a tentativa atual e o total, e a última
+  tentativa (attempt >= max_attempts) é a final.
+- Cancelamento: jobs na fila são cancelados na hora; em execução recebem
+  `cancel_requested` e o runner interrompe no próximo `checkpoint()`.
+- Jobs sem heartbeat (processo encerrado) voltam para a fila após
+  REPORT_JOB_STALE_SECONDS; os que já esgotaram as tentativas são marcados
+  como 'failed' e passam por `failure_handler` (relatório FAILED + notificação),
+  como a última tentativa de um runner.
+- Cada reivindicação é identificada por (locked_by, attempts): `_finish` só
+  grava o resultado se o job ainda pertence àquela execução.
+
+Sem a tabela (migração pendente) `enqueue` devolve None e o chamador gera o
+relatório inline, como antes.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import Flask
+from sqlalchemy import func, or_, select, update
+
+from app.extensions import db
+from app.models.report_job import ReportJob
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 10
+
+_current = threading.local()
+
+
+class ReportJobCancelled(Exception):
+    """Levantada por `checkpoint()` quando o job em execução foi cancelado."""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def checkpoint() -> None:
+    """Ponto de interrupção entre etapas da geração; no-op fora de um job."""
+    cancel_event = getattr(_current, 'cancel_event', None)
+    if cancel_event is not None and cancel_event.is_set():
+        raise ReportJobCancelled()
+
+
+class ReportJobService:
+    """Fila de jobs de relatório e pool de threads que a consome.
+
+    Args:
+        app: Aplicação Flask (contexto das threads de trabalho)
+        runner: Função ``runner(report_id, attempt, max_attempts)`` que gera o relatório;
+            deve levantar exceção em caso de falha para que o job seja reprocessado
+        failure_handler: Função ``failure_handler(report_id, error, attempts, max_attempts)``
+            chamada para jobs que falham sem passar pelo runner (worker parou na última tentativa)
+    """
+
+    def __init__(self, app: Flask, runner: Callable[[int, int, int], None],
+                 failure_handler: Optional[Callable[[int, str, int, int], None]] = None):
+        self.app = app
+        self.runner = runner
+        self.failure_handler = failure_handler
+        cfg = app.config
+        self.workers = max(0, int(cfg.get('REPORT_JOB_WORKERS', 2) or 0))
+        self.max_running = max(0, int(cfg.get('REPORT_JOB_MAX_RUNNING', 0) or 0))
+        self.max_attempts = max(1, int(cfg.get('REPORT_JOB_MAX_ATTEMPTS', 3) or 1))
+        self.retry_seconds = float(cfg.get('REPORT_JOB_RETRY_SECONDS', 30) or 30)
+        self.stale_seconds = float(cfg.get('REPORT_JOB_STALE_SECONDS', 300) or 300)
+        self.poll_seconds = float(cfg.get('REPORT_JOB_POLL_SECONDS', 2) or 2)
+        self.heartbeat_seconds = min(15.0, self.stale_seconds / 4)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: list = []
+        self._lock = threading.Lock()
+        # job_id -> evento de cancelamento dos jobs em execução neste processo
+        self._running: Dict[int, threading.Event] = {}
+        self._tables_ready: Optional[bool] = None
+
+    # ------------------------------------------------------------------
+    # API usada pelos controllers
+    # ------------------------------------------------------------------
+    def tables_ready(self) -> bool:
+        if self._tables_ready is None:
+            try:
+                from sqlalchemy import inspect
+                self._tables_ready = inspect(db.engine).has_table(ReportJob.__tablename__)
+            except Exception:
+                return False
+        return self._tables_ready
+
+    def enqueue(self, report_id: int, priority: int = PRIORITY_NORMAL) -> Optional[int]:
+        """Enfileira a geração do relatório; reaproveita um job ativo do mesmo relatório.
+
+        Returns:
+            ID do job, ou None quando a fila não está disponível (gerar inline).
+        """
+        if not self.tables_ready():
+            return None
+        jobs = ReportJob.__table__
+        with db.engine.begin() as conn:
+            active = conn.execute(
+                select(jobs.c.id, jobs.c.status, jobs.c.priority)
+                .where(jobs.c.report_id == report_id, jobs.c.status.in_(ACTIVE_STATUSES))
+                .order_by(jobs.c.id.desc())
+                .limit(1)
+            ).first()
+            if active is not None:
+                if active.status == 'queued' and priority > active.priority:
+                    conn.execute(update(jobs).where(jobs.c.id == active.id).values(priority=priority))
+                job_id = active.id
+            else:
+                job_id = conn.execute(jobs.insert().values(
+                    report_id=report_id, status='queued', priority=priority, attempts=0,
+                    max_attempts=self.max_attempts, cancel_requested=False, created_at=_utcnow(),
+                )).inserted_primary_key[0]
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def cancel(self, report_id: int) -> Optional[str]:
+        """Cancela o job ativo do relatório.
+
+        Returns:
+            'cancelled' (estava na fila), 'cancelling' (em execução; para no próximo
+            checkpoint) ou None se não houver job ativo.
+        """
+        if not self.tables_ready():
+            return None
+        jobs = ReportJob.__table__
+        with db.engine.begin() as conn:
+            res = conn.execute(
+                update(jobs)
+                .where(jobs.c.report_id == report_id, jobs.c.status == 'queued')
+                .values(status='cancelled', finished_at=_utcnow())
+            )
+            if res.rowcount:
+                return 'cancelled'
+            res = conn.execute(
+                update(jobs)
+                .where(jobs.c.report_id == report_id, jobs.c.status == 'running')
+                .values(cancel_requested=True)
+            )
+            if not res.rowcount:
+                return None
+            running_ids = conn.execute(
+                select(jobs.c.id).where(jobs.c.report_id == report_id, jobs.c.status == 'running')
+            ).scalars().all()
+        # Jobs deste processo param já; os de outros processos no próximo heartbeat
+        with self._lock:
+            for job_id in running_ids:
+                if job_id in self._running:
+                    self._running[job_id].set()
+        return 'cancelling'
+
+    def latest_job(self, report_id: int) -> Optional[ReportJob]:
+        if not self.tables_ready():
+            return None
+        return (
+            db.session.query(ReportJob)
+            .filter(ReportJob.report_id == report_id)
+            .order_by(ReportJob.id.desc())
+            .first()
+        )
+
+    def queue_position(self, job: ReportJob) -> Optional[int]:
+        """Posição (1 = próximo) de um job na fila, ignorando o backoff de retentativas."""
+        if job is None or job.status != 'queued':
+            return None
+        ahead = db.session.query(func.count(ReportJob.id)).filter(
+            ReportJob.status == 'queued',
+            or_(
+                ReportJob.priority > job.priority,
+                (ReportJob.priority == job.priority) & (ReportJob.id < job.id),
+            ),
+        ).scalar()
+        return int(ahead or 0) + 1
+
+    # ------------------------------------------------------------------
+    # Pool de threads
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """Inicia as threads de trabalho e de manutenção (idempotente)."""
+        with self._lock:
+            if self._threads or self.workers <= 0:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker_loop, name=f'report-job-{i}', daemon=True)
+                t.start()
+                self._threads.append(t)
+            t = threading.Thread(target=self._maintenance_loop, name='report-job-maintenance', daemon=True)
+            t.start()
+            self._threads.append(t)
+        logger.info(f"Report job workers started: {self.workers} thread(s) in {self.worker_id}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def _worker_loop(self) -> None:
+        while not self._stop.is_set():
+            claimed = None
+            try:
+                with self.app.app_context():
+                    claimed = self._claim()
+                    if claimed is not None:
+                        self._run(*claimed)
+            except Exception as e:
+                logger.error(f"Report job worker error: {e}", exc_info=True)
+            if claimed is None:
+                self._wakeup.wait(self.poll_seconds)
+                self._wakeup.clear()
+
+    def _claim(self) -> Optional[Tuple[int, int, int, int]]:
+        jobs = ReportJob.__table__
+        now = _utcnow()
+        with db.engine.begin() as conn:
+            if self.max_running:
+                running = conn.execute(
+                    select(func.count()).select_from(jobs).where(jobs.c.status == 'running')
+                ).scalar()
+                if int(running or 0) >= self.max_running:
+                    return None
+            candidates = conn.execute(
+                select(jobs.c.id, jobs.c.report_id, jobs.c.attempts, jobs.c.max_attempts)
+                .where(jobs.c.status == 'queued', or_(jobs.c.run_after.is_(None), jobs.c.run_after <= now))
+                .order_by(jobs.c.priority.desc(), jobs.c.created_at, jobs.c.id)
+                .limit(5)
+            ).all()
+        for job_id, report_id, attempts, max_attempts in candidates:
+            with db.engine.begin() as conn:
+                res = conn.execute(
+                    update(jobs)
+                    .where(jobs.c.id == job_id, jobs.c.status == 'queued')
+                    .values(status='running', attempts=jobs.c.attempts + 1, locked_by=self.worker_id,
+                            started_at=now, heartbeat_at=now, error=None)
+                )
+            if res.rowcount == 1:
+                return job_id, report_id, attempts + 1, max_attempts
+        return None
+
+    def _request_context(self):
+        """Contexto de request para url_for(_external=True) nas notificações."""
+        base_url = self.app.config.get('BASE_URL') or None
+        return self.app.test_request_context('/', base_url=base_url)
+
+    def _run(self, job_id: int, report_id: int, attempt: int, max_attempts: int) -> None:
+        final_attempt = attempt >= max_attempts
+        cancel_event = threading.Event()
+        with self._lock:
+            self._running[job_id] = cancel_event
+        _current.cancel_event = cancel_event
+        started = time.monotonic()
+        logger.info(f"Report job {job_id}: generating report {report_id} (attempt {attempt}/{max_attempts})")
+        try:
+            with self._request_context():
+                try:
+                    self.runner(report_id, attempt, max_attempts)
+                finally:
+                    db.session.remove()
+        except ReportJobCancelled:
+            self._finish(job_id, attempt, 'cancelled')
+            logger.info(f"Report job {job_id}: cancelled")
+        except Exception as e:
+            if cancel_event.is_set():
+                self._finish(job_id, attempt, 'cancelled', error=str(e))
+            elif final_attempt:
+                if self._finish(job_id, attempt, 'failed', error=str(e)):
+                    logger.error(f"Report job {job_id}: failed after {attempt} attempt(s): {e}")
+            else:
+                delay = self.retry_seconds * (2 ** (attempt - 1))
+                run_after = _utcnow() + timedelta(seconds=delay)
+                if self._finish(job_id, attempt, 'queued', error=str(e), run_after=run_after):
+                    logger.warning(f"Report job {job_id}: attempt {attempt} failed ({e}); retrying in {delay:.0f}s")
+        else:
+            if self._finish(job_id, attempt, 'succeeded'):
+                logger.info(f"Report job {job_id}: report {report_id} generated in {time.monotonic() - started:.1f}s")
+        finally:
+            _current.cancel_event = None
+            with self._lock:
+                self._running.pop(job_id, None)
+
+    def _finish(self, job_id: int, attempt: int, status: str, error: Optional[str] = None,
+                run_after: Optional[datetime] = None) -> bool:
+        """Grava o resultado da tentativa; False se o job já não pertence a ela.
+
+        Um job sem heartbeat pode ter sido devolvido à fila e reivindicado por
+        outro worker (ou marcado como falho) enquanto esta tentativa rodava; nesse
+        caso o resultado desta execução é descartado.
+        """
+        jobs = ReportJob.__table__
+        values = {'status': status, 'error': (error or None) and error[:4000], 'locked_by': None}
+        if status == 'queued':
+            values['run_after'] = run_after
+        else:
+            values['finished_at'] = _utcnow()
+        with db.engine.begin() as conn:
+            res = conn.execute(
+                update(jobs)
+                .where(jobs.c.id == job_id, jobs.c.status == 'running',
+                       jobs.c.locked_by == self.worker_id, jobs.c.attempts == attempt)
+                .values(**values)
+            )
+        if res.rowcount != 1:
+            logger.warning(f"Report job {job_id}: attempt {attempt} no longer owns the job; '{status}' discarded")
+            return False
+        return True
+
+    # ------------------------------------------------------------------
+    # Heartbeat, cancelamento entre processos e jobs órfãos
+    # ------------------------------------------------------------------
+    def _maintenance_loop(self) -> None:
+        while not self._stop.wait(self.heartbeat_seconds):
+            try:
+                with self.app.app_context():
+                    self._heartbeat()
+                    self._requeue_stale()
+            except Exception as e:
+                logger.debug(f"Report job maintenance failed: {e}")
+
+    def _heartbeat(self) -> None:
+        with self._lock:
+            running = dict(self._running)
+        if not running:
+            return
+        jobs = ReportJob.__table__
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(jobs)
+                .where(jobs.c.id.in_(list(running)), jobs.c.status == 'running', jobs.c.locked_by == self.worker_id)
+                .values(heartbeat_at=_utcnow())
+            )
+            cancelled = conn.execute(
+                select(jobs.c.id).where(jobs.c.id.in_(list(running)), jobs.c.cancel_requested.is_(True))
+            ).scalars().all()
+        for job_id in cancelled:
+            running[job_id].set()
+
+    def _requeue_stale(self) -> int:
+        jobs = ReportJob.__table__
+        cutoff = _utcnow() - timedelta(seconds=self.stale_seconds)
+        stale = (jobs.c.status == 'running') & (jobs.c.heartbeat_at < cutoff)
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(jobs).where(stale, jobs.c.cancel_requested.is_(True))
+                .values(status='cancelled', finished_at=_utcnow(), locked_by=None)
+            )
+            exhausted = conn.execute(
+                select(jobs.c.id, jobs.c.report_id, jobs.c.attempts, jobs.c.max_attempts)
+                .where(stale, jobs.c.attempts >= jobs.c.max_attempts)
+            ).all()
+            requeued = conn.execute(
+                update(jobs).where(stale, jobs.c.attempts < jobs.c.max_attempts)
+                .values(status='queued', locked_by=None, run_after=None)
+            ).rowcount
+        failed = sum(1 for row in exhausted if self._fail_stale(*row, stale=stale))
+        if requeued or failed:
+            logger.warning(f"Report jobs without heartbeat: {requeued} requeued, {failed} failed")
+            self._wakeup.set()
+        return requeued
+
+    def _fail_stale(self, job_id: int, report_id: int, attempts: int, max_attempts: int, stale) -> bool:
+        """Marca como 'failed' um job órfão na última tentativa e aciona `failure_handler`."""
+        jobs = ReportJob.__table__
+        error = 'Worker stopped responding'
+        with db.engine.begin() as conn:
+            res = conn.execute(
+                update(jobs).where(jobs.c.id == job_id, stale)
+                .values(status='failed', error=error, finished_at=_utcnow(), locked_by=None)
+            )
+        if res.rowcount != 1:
+            return False
+        logger.error(f"Report job {job_id}: worker stopped responding on the last attempt; report {report_id} failed")
+        if self.failure_handler is not None:
+            try:
+                with self._request_context():
+                    try:
+                        self.failure_handler(report_id, error, attempts, max_attempts)
+                    finally:
+                        db.session.remove()
+            except Exception as e:
+                logger.warning(f"Report job {job_id}: failure handler error: {e}")
+        return True
+
+
+def get_report_job_service(app: Flask, runner: Callable[[int, int, int], None],
+                           failure_handler: Optional[Callable[[int, str, int, int], None]] = None) -> ReportJobService:
+    """Instância única por aplicação (em app.extensions)."""
+    service = app.extensions.get('report_jobs')
+    if service is None:
+        service = ReportJobService(app, runner, failure_handler)
+        app.extensions['report_jobs'] = service
+    return service
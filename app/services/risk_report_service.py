@@ -3,11 +3,12 @@ import re
 import logging
 import json
 import hashlib
+from contextlib import nullcontext
 from typing import Dict, Any, Optional
 from types import SimpleNamespace
 import requests
 from openai import OpenAI
-from flask import current_app
+from flask import current_app, has_app_context
 from sqlalchemy import text, inspect
 from app.extensions import db
 from app.models.vulnerability import Vulnerability
@@ -21,6 +22,9 @@ class RiskReportService:
     Baseado no código de exemplo fornecido, este serviço gera análises
     detalhadas de risco em formato Markdown para vulnerabilidades CVE.
     """
+
+    # Existência da coluna 'risks' (None = ainda não verificada neste processo)
+    _risks_column_ready: Optional[bool] = None
     
     def __init__(self):
         """
@@ -684,11 +688,110 @@ Quando a informação não estiver disponível, indique: **Não aplicável**.
         """
         return re.sub(r"```(?:markdown)?\s*([\s\S]*?)\s*```", r"\1", text)
     
+    def _risks_column_available(self) -> bool:
+        """Verifica (uma vez por processo) se a coluna 'risks' existe, criando-a se necessário."""
+        if RiskReportService._risks_column_ready is not None:
+            return RiskReportService._risks_column_ready
+        has_risks_col = False
+        try:
+            inspector = inspect(db.engine)
+            column_names = [col['name'] for col in inspector.get_columns('vulnerabilities')]
+            has_risks_col = 'risks' in column_names
+        except Exception as e:
+            logger.debug(f"Não foi possível inspecionar colunas: {e}")
+            return False
+
+        # Se não existir, tentar adicionar coluna 'risks' (compatível com SQLite/PostgreSQL)
+        if not has_risks_col:
+            try:
+                db.session.execute(text("ALTER TABLE vulnerabilities ADD COLUMN risks TEXT"))
+                db.session.commit()
+                logger.info("Coluna 'risks' adicionada à tabela vulnerabilities")
+                has_risks_col = True
+            except Exception as e:
+                logger.warning(f"Não foi possível adicionar coluna 'risks': {e}")
+                db.session.rollback()
+                return False
+        RiskReportService._risks_column_ready = has_risks_col
+        return has_risks_col
+
+    def _load_persisted_risks(self, cve_id: str) -> Optional[str]:
+        """Análise gravada na coluna 'risks' (descarta conteúdos de demonstração)."""
+        try:
+            row = db.session.execute(
+                text("SELECT risks FROM vulnerabilities WHERE cve_id = :cve"),
+                {"cve": cve_id}
+            ).fetchone()
+        except Exception as e:
+            logger.warning(f"Falha ao consultar coluna 'risks': {e}")
+            return None
+        if not row:
+            return None
+        existing_risks = row[0]
+        try:
+            demo_markers = [
+                'análise de demonstração',
+                'Nenhuma informação conhecida',
+                'Relatório de Análise de Risco -',
+            ]
+            low = (existing_risks or '').lower()
+            if any(m.lower() in low for m in demo_markers):
+                return None
+        except Exception:
+            pass
+        return existing_risks
+
+    def _persist_risks(self, cve_id: str, risks_md: str, signature: str) -> None:
+        try:
+            envelope = json.dumps({
+                "content_markdown": risks_md,
+                "provider": self.provider,
+                "model": self.model,
+                "max_tokens": self.max_tokens,
+                "temperature": self.temperature,
+                "generated_at": __import__('datetime').datetime.now().isoformat(),
+                "vuln_signature": signature,
+            }, ensure_ascii=False)
+            db.session.execute(
+                text("UPDATE vulnerabilities SET risks = :risks WHERE cve_id = :cve"),
+                {"risks": envelope, "cve": cve_id}
+            )
+            db.session.commit()
+            logger.info(f"Análise de risco salva para CVE {cve_id}")
+        except Exception as e:
+            logger.warning(f"Falha ao salvar análise de risco: {e}")
+            try:
+                db.session.rollback()
+            except Exception:
+                pass
+
+    def _generate_risk_markdown(self, vulnerability: Vulnerability, messages) -> str:
+        """Consulta o LLM; exceções sobem para que respostas de fallback não entrem no cache."""
+        if not self.client:
+            raise RuntimeError("Cliente LLM indisponível")
+        response = self._chat_completion_with_retries(messages)
+        resp_text = self._extract_text_from_response(response)
+        risks_md = self.sanitize_markdown_output(resp_text.strip())
+        if not risks_md:
+            raise RuntimeError("Resposta vazia do LLM")
+        try:
+            low = (risks_md or "").lower()
+            if not low.startswith("você é um analista sênior de risco cibernético"):
+                risks_md = self._append_missing_sections(vulnerability, risks_md)
+        except Exception:
+            pass
+        return risks_md
+
     def get_risk_analysis(self, cve_id: str) -> str:
         """
         Retorna a análise de risco para a CVE fornecida.
         Caso não exista no banco, retorna um aviso.
         Se a análise ainda não foi gerada, consulta a OpenAI.
+
+        A resposta é guardada no cache de LLM compartilhado (ver llm_response_cache),
+        endereçado pelo prompt: mudanças na CVE geram um prompt e uma chave novos. A
+        coluna 'risks' continua sendo gravada e, quando a assinatura da CVE confere,
+        é usada para preencher o cache sem nova chamada ao modelo.
         
         Args:
             cve_id: ID da CVE para análise
@@ -708,111 +811,48 @@ Quando a informação não estiver disponível, indique: **Não aplicável**.
                 logger.warning(f"CVE {cve_id} não encontrada no banco de dados")
                 return "CVE id não encontrada."
 
-            description = vulnerability.description or ""
-            base_severity = vulnerability.base_severity or "MEDIUM"
-            cvss_score = float(vulnerability.cvss_score or 0.0)
+            has_risks_col = self._risks_column_available()
+            signature = self._compute_vuln_signature(vulnerability)
+            prompt = self.build_markdown_prompt(vulnerability)
+            sys_msg = self.system_prompt or "Você é um analista de risco especializado em vulnerabilidades."
+            messages = [
+                {"role": "system", "content": sys_msg},
+                {"role": "user", "content": prompt}
+            ]
+            app = current_app._get_current_object()
+
+            def _compute() -> str:
+                # Revalidações em segundo plano rodam fora do contexto da requisição: a
+                # instância carregada no request pertence à sessão dele e é recarregada
+                # pelo cve_id na sessão do contexto novo
+                foreground = has_app_context()
+                with (nullcontext() if foreground else app.app_context()):
+                    current = vulnerability if foreground else VulnerabilityService(db.session).get_vulnerability_with_details(cve_id)
+                    if not current:
+                        raise LookupError(f"CVE {cve_id} não encontrada no banco de dados")
+                    if has_risks_col:
+                        cached_obj = self._parse_cached_risks(self._load_persisted_risks(cve_id))
+                        # Análise persistida com a mesma assinatura: reaproveita sem chamar o modelo
+                        if cached_obj and not self._should_refresh_cache(cached_obj, current):
+                            content = str(cached_obj.get('content_markdown') or '')
+                            if content.strip():
+                                return content
+                    logger.info(f"Gerando nova análise de risco para CVE {cve_id}")
+                    risks_md = self._generate_risk_markdown(current, messages)
+                    if has_risks_col:
+                        self._persist_risks(cve_id, risks_md, signature)
+                    return risks_md
 
-            # Verificar se a coluna 'risks' existe na tabela
-            has_risks_col = False
             try:
-                inspector = inspect(db.engine)
-                column_names = [col['name'] for col in inspector.get_columns('vulnerabilities')]
-                has_risks_col = 'risks' in column_names
-            except Exception as e:
-                logger.debug(f"Não foi possível inspecionar colunas: {e}")
-                has_risks_col = False
+                from app.utils.llm_response_cache import get_llm_cache
 
-            # Se não existir, tentar adicionar coluna 'risks' (compatível com SQLite/PostgreSQL)
-            if not has_risks_col:
-                try:
-                    db.session.execute(text("ALTER TABLE vulnerabilities ADD COLUMN risks TEXT"))
-                    db.session.commit()
-                    logger.info("Coluna 'risks' adicionada à tabela vulnerabilities")
-                    has_risks_col = True
-                except Exception as e:
-                    logger.warning(f"Não foi possível adicionar coluna 'risks': {e}")
-                    has_risks_col = False
-
-            # Buscar análise existente se coluna 'risks' estiver disponível
-            existing_risks = None
-            if has_risks_col:
-                try:
-                    row = db.session.execute(
-                        text("SELECT risks FROM vulnerabilities WHERE cve_id = :cve"),
-                        {"cve": cve_id}
-                    ).fetchone()
-                    if row:
-                        existing_risks = row[0]
-                        try:
-                            demo_markers = [
-                                'análise de demonstração',
-                                'Nenhuma informação conhecida',
-                                'Relatório de Análise de Risco -',
-                            ]
-                            low = (existing_risks or '').lower()
-                            if any(m.lower() in low for m in demo_markers):
-                                existing_risks = None
-                        except Exception:
-                            pass
-                except Exception as e:
-                    logger.warning(f"Falha ao consultar coluna 'risks': {e}")
-
-            cached_obj = self._parse_cached_risks(existing_risks)
-            # Se não houver análise ou a assinatura mudou, gerar nova
-            if (not existing_risks or not str(existing_risks).strip()) or self._should_refresh_cache(cached_obj, vulnerability):
-                logger.info(f"Gerando nova análise de risco para CVE {cve_id}")
-                prompt = self.build_markdown_prompt(vulnerability)
-                
-                if self.client:
-                    try:
-                        sys_msg = self.system_prompt or "Você é um analista de risco especializado em vulnerabilidades."
-                        response = self._chat_completion_with_retries([
-                            {"role": "system", "content": sys_msg},
-                            {"role": "user", "content": prompt}
-                        ])
-                        resp_text = self._extract_text_from_response(response)
-                        risks_md = self.sanitize_markdown_output(resp_text.strip())
-                        try:
-                            low = (risks_md or "").lower()
-                            if not low.startswith("você é um analista sênior de risco cibernético"):
-                                risks_md = self._append_missing_sections(vulnerability, risks_md)
-                        except Exception:
-                            pass
-                    except Exception as e:
-                        logger.error(f"Erro ao consultar OpenAI: {e}")
-                        # Fallback: exibir o prompt gerado em vez de mock de demonstração
-                        risks_md = prompt
-                else:
-                    # Sem cliente LLM: exibir o prompt gerado
-                    risks_md = prompt
-
-                # Persistir análise se coluna existir
-                if has_risks_col:
-                    try:
-                        envelope = json.dumps({
-                            "content_markdown": risks_md,
-                            "provider": self.provider,
-                            "model": self.model,
-                            "max_tokens": self.max_tokens,
-                            "temperature": self.temperature,
-                            "generated_at": __import__('datetime').datetime.now().isoformat(),
-                            "vuln_signature": self._compute_vuln_signature(vulnerability),
-                        }, ensure_ascii=False)
-                        db.session.execute(
-                            text("UPDATE vulnerabilities SET risks = :risks WHERE cve_id = :cve"),
-                            {"risks": envelope, "cve": cve_id}
-                        )
-                        db.session.commit()
-                        logger.info(f"Análise de risco salva para CVE {cve_id}")
-                    except Exception as e:
-                        logger.warning(f"Falha ao salvar análise de risco: {e}")
-
-                return risks_md
-
-            # Retornar análise existente
-            if cached_obj:
-                return str(cached_obj.get('content_markdown') or '')
-            return existing_risks
+                cache = get_llm_cache(app)
+                key = cache.make_key('risk_analysis', f"{self.provider}/{self.model}", messages)
+                return cache.get_or_compute(key, _compute)
+            except Exception as e:
+                logger.error(f"Erro ao consultar OpenAI: {e}")
+                # Fallback: exibir o prompt gerado em vez de mock de demonstração
+                return prompt
 
         except Exception as e:
             logger.error(f"Erro ao acessar banco de dados ou gerar análise: {e}")
@@ -0,0 +1,424 @@
+"""
+Busca textual de CVEs.
+
+Indexa cve_id, descrição, nomes de vendors/produtos, CWEs e assigner em
+`cve_search_documents`:
+
+- PostgreSQL: `to_tsvector('simple', document)` com índice GIN, ranking por ts_rank_cd;
+- SQLite: tabela virtual FTS5 `cve_search_fts` (rowid = id do documento), ranking por bm25.
+
+Os resultados são paginados por keyset sobre (score, cve_id) e acompanhados de
+facetas (severidade, vendor, ano) calculadas no banco sobre todo o conjunto
+encontrado. Bancos sem o índice (ou outros dialetos) caem para LIKE.
+
+O índice é atualizado por lote em `VulnerabilityService.save_vulnerabilities_batch`,
+preenchido para as CVEs existentes pela migração 20261017_backfill_cve_search_index
+e pode ser reconstruído via app/scripts/rebuild_search_index.py. Enquanto houver
+CVEs sem documento, as consultas usam LIKE.
+"""
+
+import base64
+import json
+import logging
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import column, delete, extract, func, insert, literal, literal_column, or_, select, table
+from sqlalchemy.orm import Session
+
+from app.models.cve_product import CVEProduct
+from app.models.cve_search_document import CVESearchDocument
+from app.models.cve_vendor import CVEVendor
+from app.models.product import Product
+from app.models.vendor import Vendor
+from app.models.vulnerability import Vulnerability
+from app.models.weakness import Weakness
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'cve_search_fts'
+_TOKEN_RE = re.compile(r'\w[\w.\-]*', re.UNICODE)
+_MAX_TERMS = 16
+
+
+@dataclass
+class SearchPage:
+    """Uma página de resultados da busca."""
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    total: int = 0
+    next_cursor: Optional[str] = None
+    facets: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    backend: str = 'like'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def encode_cursor(score: float, cve_id: str) -> str:
+    """Cursor opaco (base64 url-safe) com a chave de ordenação do último resultado."""
+    raw = json.dumps([score, cve_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, cve_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        return float(score), str(cve_id)
+    except Exception:
+        return None
+
+
+def fts5_match_expression(text: str) -> Optional[str]:
+    """Converte a entrada do usuário numa expressão MATCH segura do FTS5 (termos entre aspas, AND implícito)."""
+    tokens = _TOKEN_RE.findall(text or '')[:_MAX_TERMS]
+    if not tokens:
+        return None
+    return ' '.join('"%s"' % t.replace('"', '""') for t in tokens)
+
+
+class CVESearchService:
+    """Mantém o índice textual de CVEs e executa buscas ranqueadas sobre ele."""
+
+    # Detectado uma vez por processo: 'postgresql', 'fts5' ou '' (sem índice → LIKE)
+    _backend: Optional[str] = None
+    _populated: bool = False
+    # Enquanto o índice estiver incompleto, a cobertura é reavaliada no máximo a cada N segundos
+    _coverage_checked_at: Optional[float] = None
+    COVERAGE_RECHECK_SECONDS = 60.0
+
+    def __init__(self, session: Session, backend: Optional[str] = None):
+        self.session = session
+        # Backend explícito (ex.: migrações, que não podem abrir transações próprias na conexão)
+        self._forced_backend = backend
+        self._docs = CVESearchDocument.__table__
+        self._fts = table(FTS_TABLE, column('rowid'), column('document'))
+
+    # ------------------------------------------------------------------
+    # Backend
+    # ------------------------------------------------------------------
+    def backend(self) -> Optional[str]:
+        if self._forced_backend is not None:
+            return self._forced_backend or None
+        if CVESearchService._backend is None:
+            try:
+                from sqlalchemy import inspect
+                bind = self.session.get_bind()
+                detected = ''
+                if inspect(bind).has_table(CVESearchDocument.__tablename__):
+                    if bind.dialect.name == 'postgresql':
+                        detected = 'postgresql'
+                    elif bind.dialect.name == 'sqlite' and self._ensure_fts_table(bind):
+                        detected = 'fts5'
+                CVESearchService._backend = detected
+            except Exception:
+                return None
+        return CVESearchService._backend or None
+
+    @staticmethod
+    def _ensure_fts_table(bind) -> bool:
+        """Cria a tabela FTS5 (não gerenciada pelo metadata) quando ausente."""
+        from sqlalchemy import text
+        try:
+            with bind.begin() as conn:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                    "USING fts5(document, tokenize='unicode61 remove_diacritics 2')"
+                ))
+            return True
+        except Exception as e:
+            logger.warning(f"FTS5 indisponível no SQLite; busca usará LIKE: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Manutenção do índice
+    # ------------------------------------------------------------------
+    def build_documents(self, cve_ids: List[str]) -> List[Dict[str, Any]]:
+        """Monta as linhas de `cve_search_documents` para as CVEs informadas."""
+        if not cve_ids:
+            return []
+        terms: Dict[str, List[str]] = {}
+        base = {}
+        for cve_id, description, assigner in (
+            self.session.query(Vulnerability.cve_id, Vulnerability.description, Vulnerability.assigner)
+            .filter(Vulnerability.cve_id.in_(cve_ids))
+        ):
+            base[cve_id] = (description or '', assigner or '')
+            terms[cve_id] = []
+
+        def _collect(rows):
+            for cve_id, *names in rows:
+                bucket = terms.get(cve_id)
+                if bucket is not None:
+                    bucket.extend(n for n in names if n)
+
+        _collect(
+            self.session.query(CVEVendor.cve_id, Vendor.name)
+            .join(Vendor, Vendor.id == CVEVendor.vendor_id)
+            .filter(CVEVendor.cve_id.in_(cve_ids))
+        )
+        _collect(
+            self.session.query(CVEProduct.cve_id, Vendor.name, Product.name)
+            .join(Product, Product.id == CVEProduct.product_id)
+            .outerjoin(Vendor, Vendor.id == Product.vendor_id)
+            .filter(CVEProduct.cve_id.in_(cve_ids))
+        )
+        _collect(
+            self.session.query(Weakness.cve_id, Weakness.cwe_id)
+            .filter(Weakness.cve_id.in_(cve_ids))
+        )
+
+        now = datetime.now(timezone.utc)
+        rows = []
+        for cve_id, (description, assigner) in base.items():
+            parts = [cve_id, assigner] + list(dict.fromkeys(terms[cve_id])) + [description]
+            rows.append({
+                'cve_id': cve_id,
+                'document': ' '.join(p for p in parts if p),
+                'updated_at': now,
+            })
+        return rows
+
+    def index_cves(self, cve_ids: Iterable[str], chunk_size: int = 500) -> int:
+        """(Re)indexa as CVEs informadas (não faz commit).
+
+        Returns:
+            Quantidade de documentos gravados
+        """
+        backend = self.backend()
+        if not backend:
+            return 0
+        ids = list(dict.fromkeys(c for c in cve_ids if c))
+        docs = self._docs
+        written = 0
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i + chunk_size]
+            if backend == 'fts5':
+                self.session.execute(delete(self._fts).where(
+                    self._fts.c.rowid.in_(select(docs.c.id).where(docs.c.cve_id.in_(chunk)))
+                ))
+            self.session.execute(delete(docs).where(docs.c.cve_id.in_(chunk)))
+            rows = self.build_documents(chunk)
+            if not rows:
+                continue
+            self.session.execute(insert(docs), rows)
+            if backend == 'fts5':
+                self.session.execute(insert(self._fts).from_select(
+                    ['rowid', 'document'],
+                    select(docs.c.id, docs.c.document).where(docs.c.cve_id.in_(chunk)),
+                ))
+            written += len(rows)
+        return written
+
+    def rebuild_all(self, chunk_size: int = 1000) -> int:
+        """Reconstrói o índice a partir de `vulnerabilities` (não faz commit)."""
+        backend = self.backend()
+        if not backend:
+            return 0
+        if backend == 'fts5':
+            self.session.execute(delete(self._fts))
+        self.session.execute(delete(self._docs))
+        ids = [r[0] for r in self.session.query(Vulnerability.cve_id).order_by(Vulnerability.cve_id)]
+        return self.index_cves(ids, chunk_size=chunk_size)
+
+    def ensure_populated(self) -> bool:
+        """Indica se o índice cobre todas as CVEs e pode ser consultado.
+
+        Não reconstrói durante o request: com CVEs sem documento a busca usa LIKE
+        até o índice ser preenchido (migração ou app/scripts/rebuild_search_index.py).
+
+        Returns:
+            True quando há um documento para cada CVE
+        """
+        if CVESearchService._populated:
+            return True
+        if not self.backend():
+            return False
+        now = time.monotonic()
+        checked_at = CVESearchService._coverage_checked_at
+        if checked_at is not None and now - checked_at < self.COVERAGE_RECHECK_SECONDS:
+            return False
+        CVESearchService._coverage_checked_at = now
+        try:
+            total = self.session.query(func.count(Vulnerability.cve_id)).scalar() or 0
+            documents = self.session.query(func.count(CVESearchDocument.id)).scalar() or 0
+        except Exception as e:
+            logger.debug(f"Falha ao verificar cobertura do índice de busca: {e}")
+            return False
+        if total and documents >= total:
+            CVESearchService._populated = True
+            return True
+        if total:
+            logger.warning(
+                f"Índice de busca incompleto ({documents}/{total} CVEs); usando LIKE. "
+                "Execute app/scripts/rebuild_search_index.py para preenchê-lo."
+            )
+        return False
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+    def _match_select(self, text_query: str):
+        """SELECT (cve_id, score) das CVEs que casam com a consulta; score maior = mais relevante."""
+        backend = self.backend() if self.ensure_populated() else None
+        docs = self._docs
+        if backend == 'postgresql':
+            config = literal_column("'simple'::regconfig")
+            tsv = func.to_tsvector(config, docs.c.document)
+            tsq = func.websearch_to_tsquery(config, text_query)
+            return backend, select(
+                docs.c.cve_id.label('cve_id'),
+                func.ts_rank_cd(tsv, tsq).label('score'),
+            ).where(tsv.op('@@')(tsq))
+        if backend == 'fts5':
+            expression = fts5_match_expression(text_query)
+            if expression:
+                fts_ref = literal_column(FTS_TABLE)
+                return backend, select(
+                    docs.c.cve_id.label('cve_id'),
+                    (-func.bm25(fts_ref)).label('score'),
+                ).select_from(
+                    self._fts.join(docs, docs.c.id == self._fts.c.rowid)
+                ).where(fts_ref.op('MATCH')(expression))
+        like = f"%{text_query}%"
+        return 'like', select(
+            Vulnerability.cve_id.label('cve_id'),
+            literal(0.0).label('score'),
+        ).where(or_(Vulnerability.cve_id.ilike(like), Vulnerability.description.ilike(like)))
+
+    def cve_id_subquery(self, text_query: str):
+        """SELECT de CVE IDs que casam com a consulta (para filtros por semi-join)."""
+        _, match = self._match_select((text_query or '').strip())
+        match = match.subquery('search_match')
+        return select(match.c.cve_id)
+
+    def apply(self, query, text_query: Optional[str], column=None):
+        """Restringe `query` às CVEs que casam com `text_query`; sem texto, retorna a query inalterada."""
+        if not text_query or not text_query.strip():
+            return query
+        column = column if column is not None else Vulnerability.cve_id
+        return query.filter(column.in_(self.cve_id_subquery(text_query)))
+
+    def _filters(self, severity: Optional[str], vendor_id: Optional[int], year: Optional[int]) -> list:
+        conds = []
+        if severity:
+            conds.append(Vulnerability.base_severity == severity.upper())
+        if vendor_id:
+            from app.services.vendor_scope_service import VendorScopeService
+            conds.append(Vulnerability.cve_id.in_(VendorScopeService(self.session).cve_id_subquery([vendor_id])))
+        if year:
+            conds.append(Vulnerability.published_date >= datetime(int(year), 1, 1))
+            conds.append(Vulnerability.published_date < datetime(int(year) + 1, 1, 1))
+        return conds
+
+    def search(
+        self,
+        text_query: str,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        severity: Optional[str] = None,
+        vendor_id: Optional[int] = None,
+        year: Optional[int] = None,
+        with_facets: bool = True,
+        facet_limit: int = 10,
+    ) -> SearchPage:
+        """Busca ranqueada com paginação por keyset e facetas.
+
+        Args:
+            text_query: Texto livre (ex.: "apache http_server CWE-787")
+            cursor: `next_cursor` da página anterior
+            limit: Resultados por página
+            severity, vendor_id, year: Filtros opcionais
+            with_facets: Calcula total e facetas (dispensável ao paginar)
+
+        Returns:
+            SearchPage
+        """
+        text_query = (text_query or '').strip()
+        if not text_query:
+            return SearchPage()
+
+        backend, match = self._match_select(text_query)
+        match = match.subquery('search_match')
+        joined = match.join(Vulnerability, Vulnerability.cve_id == match.c.cve_id)
+        conds = self._filters(severity, vendor_id, year)
+        page = SearchPage(backend=backend)
+
+        query = select(
+            match.c.cve_id,
+            match.c.score,
+            Vulnerability.description,
+            Vulnerability.base_severity,
+            Vulnerability.cvss_score,
+            Vulnerability.published_date,
+        ).select_from(joined).where(*conds)
+        after = decode_cursor(cursor)
+        if after is not None:
+            score, last_id = after
+            query = query.where(or_(
+                match.c.score < score,
+                (match.c.score == score) & (match.c.cve_id < last_id),
+            ))
+        limit = max(1, int(limit))
+        rows = self.session.execute(
+            query.order_by(match.c.score.desc(), match.c.cve_id.desc()).limit(limit + 1)
+        ).all()
+
+        for row in rows[:limit]:
+            page.results.append({
+                'cve_id': row.cve_id,
+                'description': row.description,
+                'base_severity': row.base_severity,
+                'cvss_score': row.cvss_score,
+                'published_date': row.published_date.isoformat() if row.published_date else None,
+                'score': float(row.score or 0.0),
+            })
+        if len(rows) > limit:
+            last = page.results[-1]
+            page.next_cursor = encode_cursor(last['score'], last['cve_id'])
+
+        if with_facets:
+            page.total = self.session.execute(
+                select(func.count()).select_from(joined).where(*conds)
+            ).scalar() or 0
+            page.facets = self._facets(joined, conds, facet_limit)
+        return page
+
+    def _facets(self, joined, conds: list, facet_limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        count = func.count().label('count')
+        severity_rows = self.session.execute(
+            select(Vulnerability.base_severity, count)
+            .select_from(joined).where(*conds)
+            .group_by(Vulnerability.base_severity)
+            .order_by(count.desc())
+        ).all()
+        year_expr = extract('year', Vulnerability.published_date)
+        year_rows = self.session.execute(
+            select(year_expr, count)
+            .select_from(joined).where(*conds)
+            .group_by(year_expr)
+            .order_by(year_expr.desc())
+        ).all()
+        # Mesmo escopo do filtro por vendor (associação direta ∪ via produtos do vendor),
+        # com os dois ramos da UNION restritos às CVEs que casaram com a busca e os filtros
+        from app.services.vendor_scope_service import VendorScopeService
+        matched = select(Vulnerability.cve_id).select_from(joined).where(*conds)
+        pairs = VendorScopeService.pairs_select(cve_ids=matched)
+        vendor_rows = self.session.execute(
+            select(Vendor.id, Vendor.name, count)
+            .select_from(pairs)
+            .join(Vendor, Vendor.id == pairs.c.vendor_id)
+            .group_by(Vendor.id, Vendor.name)
+            .order_by(count.desc(), Vendor.name)
+            .limit(facet_limit)
+        ).all()
+        return {
+            'severity': [{'value': sev, 'count': int(n)} for sev, n in severity_rows],
+            'year': [{'value': int(y), 'count': int(n)} for y, n in year_rows if y is not None],
+            'vendor': [{'value': vid, 'label': name, 'count': int(n)} for vid, name, n in vendor_rows],
+        }
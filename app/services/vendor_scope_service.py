@@ -0,0 +1,226 @@
+"""
+Resolução unificada do escopo de vendors para consultas de dashboard/analytics.
+
+Antes, cada endpoint lia `user_vendor_preferences:{id}` e montava a UNION de
+`CVEVendor` e `CVEProduct ⋈ Product` a cada chamada. Aqui o conjunto de CVE IDs
+de uma seleção de vendors é materializado uma vez em `vendor_scope_cves`, sob uma
+chave derivada da geração de sincronização e do hash dos vendor IDs, e os
+endpoints filtram por semi-join indexado nessa tabela.
+
+A geração (`vendor_scope_generation` em SyncMetadata) avança sempre que o caminho
+de persistência altera associações CVE↔vendor/produto (`bump_scope_generation`).
+"""
+
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, literal, or_, select, union
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.cve_product import CVEProduct
+from app.models.cve_vendor import CVEVendor
+from app.models.product import Product
+from app.models.sync_metadata import SyncMetadata
+from app.models.vendor_scope import VendorScopeCVE, VendorScopeSet
+from app.models.vulnerability import Vulnerability
+
+logger = logging.getLogger(__name__)
+
+SCOPE_GENERATION_KEY = 'vendor_scope_generation'
+
+
+def parse_vendor_ids(*raw_values) -> List[int]:
+    """Normaliza vendor IDs vindos de listas repetidas e/ou CSV ("1,2,3") em lista ordenada sem duplicatas."""
+    ids = set()
+    for raw in raw_values:
+        if raw is None:
+            continue
+        items = raw if isinstance(raw, (list, tuple, set)) else [raw]
+        for item in items:
+            for part in str(item).split(','):
+                part = part.strip()
+                if part.isdigit():
+                    ids.add(int(part))
+    return sorted(ids)
+
+
+def bump_scope_generation(session: Session) -> None:
+    """Avança a geração de escopo; conjuntos materializados anteriores deixam de valer (não faz commit)."""
+    from app.utils.sync_metadata_orm import upsert_sync_metadata
+
+    try:
+        current = session.query(SyncMetadata.value).filter_by(key=SCOPE_GENERATION_KEY).scalar()
+        generation = int(current) if current and str(current).isdigit() else 0
+        upsert_sync_metadata(session, SCOPE_GENERATION_KEY, str(generation + 1), sync_type='vendor_scope')
+    except Exception as e:
+        logger.debug(f"Falha ao avançar geração de escopo de vendors: {e}")
+
+
+class VendorScopeService:
+    """Resolve e aplica o filtro de vendors selecionados sobre consultas de CVEs."""
+
+    # Verificação por processo: bancos ainda sem a migração usam a UNION direta
+    # (uma consulta com erro abortaria a transação corrente no PostgreSQL).
+    _tables_ready: Optional[bool] = None
+
+    def __init__(self, session: Session, max_sets: int = 64):
+        self.session = session
+        self.max_sets = max_sets
+
+    def selected_vendor_ids(self, vendor_ids: Optional[Iterable] = None, use_preferences: bool = True) -> List[int]:
+        """IDs explícitos quando informados; senão, preferências salvas do usuário autenticado."""
+        ids = parse_vendor_ids(list(vendor_ids or []))
+        if ids or not use_preferences:
+            return ids
+        try:
+            from flask_login import current_user
+            if current_user and current_user.is_authenticated:
+                key = f'user_vendor_preferences:{current_user.id}'
+                value = self.session.query(SyncMetadata.value).filter_by(key=key).scalar()
+                return parse_vendor_ids(value)
+        except Exception:
+            pass
+        return []
+
+    def _union_select(self, vendor_ids: List[int]):
+        """UNION de CVEs associadas diretamente ao vendor e via produtos do vendor."""
+        vendor_conds = [CVEVendor.vendor_id.in_(vendor_ids[i:i + 900]) for i in range(0, len(vendor_ids), 900)]
+        product_conds = [Product.vendor_id.in_(vendor_ids[i:i + 900]) for i in range(0, len(vendor_ids), 900)]
+        return union(
+            select(CVEVendor.cve_id.label('cve_id')).where(or_(*vendor_conds)),
+            select(CVEProduct.cve_id.label('cve_id'))
+            .join(Product, Product.id == CVEProduct.product_id)
+            .where(or_(*product_conds)),
+        ).subquery('vendor_scope_union')
+
+    @staticmethod
+    def pairs_select(vendor_ids: Optional[List[int]] = None, cve_ids=None):
+        """Pares distintos (cve_id, vendor_id) com o mesmo critério de `_union_select`.
+
+        Args:
+            vendor_ids: Restringe os dois ramos da UNION a esses vendors
+            cve_ids: Restringe os dois ramos a essas CVEs (lista ou SELECT de cve_id)
+        """
+        vendor_q = select(CVEVendor.cve_id.label('cve_id'), CVEVendor.vendor_id.label('vendor_id'))
+        product_q = (
+            select(CVEProduct.cve_id.label('cve_id'), Product.vendor_id.label('vendor_id'))
+            .join(Product, Product.id == CVEProduct.product_id)
+            .where(Product.vendor_id.isnot(None))
+        )
+        if vendor_ids is not None:
+            vendor_q = vendor_q.where(CVEVendor.vendor_id.in_(vendor_ids))
+            product_q = product_q.where(Product.vendor_id.in_(vendor_ids))
+        if cve_ids is not None:
+            vendor_q = vendor_q.where(CVEVendor.cve_id.in_(cve_ids))
+            product_q = product_q.where(CVEProduct.cve_id.in_(cve_ids))
+        return union(vendor_q, product_q).subquery('vendor_scope_pairs')
+
+    def _scope_tables_ready(self) -> bool:
+        if VendorScopeService._tables_ready is None:
+            try:
+                from sqlalchemy import inspect
+                insp = inspect(self.session.get_bind())
+                VendorScopeService._tables_ready = (
+                    insp.has_table(VendorScopeSet.__tablename__) and insp.has_table(VendorScopeCVE.__tablename__)
+                )
+            except Exception:
+                return False
+        return VendorScopeService._tables_ready
+
+    def _current_generation(self) -> int:
+        value = self.session.query(SyncMetadata.value).filter_by(key=SCOPE_GENERATION_KEY).scalar()
+        return int(value) if value and str(value).isdigit() else 0
+
+    @staticmethod
+    def _scope_key(generation: int, vendor_ids: List[int]) -> str:
+        digest = hashlib.sha1(','.join(str(v) for v in vendor_ids).encode('utf-8')).hexdigest()[:24]
+        return f"{generation}:{digest}"
+
+    def _materialize(self, scope_key: str, generation: int, vendor_ids: List[int]) -> bool:
+        """Grava o conjunto numa transação própria; True quando disponível (criado agora ou por outro worker)."""
+        engine = self.session.get_bind()
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(VendorScopeSet.__table__).values(
+                    scope_key=scope_key,
+                    generation=generation,
+                    vendor_ids=','.join(str(v) for v in vendor_ids),
+                    cve_count=0,
+                    created_at=datetime.now(timezone.utc),
+                ))
+                union_sq = self._union_select(vendor_ids)
+                conn.execute(
+                    insert(VendorScopeCVE.__table__).from_select(
+                        ['scope_key', 'cve_id'],
+                        select(literal(scope_key), union_sq.c.cve_id).where(union_sq.c.cve_id.isnot(None)),
+                    )
+                )
+                count = conn.execute(
+                    select(func.count()).select_from(VendorScopeCVE.__table__).where(VendorScopeCVE.scope_key == scope_key)
+                ).scalar() or 0
+                conn.execute(
+                    VendorScopeSet.__table__.update()
+                    .where(VendorScopeSet.scope_key == scope_key)
+                    .values(cve_count=count)
+                )
+                self._collect_garbage(conn, generation)
+            return True
+        except IntegrityError:
+            # Outro worker materializou a mesma chave
+            return True
+        except Exception as e:
+            logger.warning(f"Falha ao materializar escopo de vendors {scope_key}: {e}")
+            return False
+
+    def _collect_garbage(self, conn, generation: int) -> None:
+        """Remove conjuntos de gerações anteriores e mantém no máximo `max_sets` conjuntos."""
+        sets = VendorScopeSet.__table__
+        members = VendorScopeCVE.__table__
+        stale = select(sets.c.scope_key).where(sets.c.generation != generation)
+        overflow = (
+            select(sets.c.scope_key)
+            .where(sets.c.generation == generation)
+            .order_by(sets.c.created_at.desc())
+            .offset(self.max_sets)
+        )
+        stale_keys = [r[0] for r in conn.execute(stale).all()] + [r[0] for r in conn.execute(overflow).all()]
+        for i in range(0, len(stale_keys), 500):
+            chunk = stale_keys[i:i + 500]
+            conn.execute(delete(members).where(members.c.scope_key.in_(chunk)))
+            conn.execute(delete(sets).where(sets.c.scope_key.in_(chunk)))
+
+    def cve_id_subquery(self, vendor_ids: List[int]):
+        """SELECT de CVE IDs no escopo: conjunto materializado quando possível, senão a UNION direta."""
+        vendor_ids = parse_vendor_ids(list(vendor_ids or []))
+        if not self._scope_tables_ready():
+            return select(self._union_select(vendor_ids).c.cve_id)
+        try:
+            generation = self._current_generation()
+            scope_key = self._scope_key(generation, vendor_ids)
+            exists_row = self.session.query(VendorScopeSet.scope_key).filter_by(scope_key=scope_key).first()
+            if exists_row or self._materialize(scope_key, generation, vendor_ids):
+                return select(VendorScopeCVE.cve_id).where(VendorScopeCVE.scope_key == scope_key)
+        except Exception as e:
+            logger.debug(f"Escopo de vendors materializado indisponível: {e}")
+        return select(self._union_select(vendor_ids).c.cve_id)
+
+    def apply(self, query, vendor_ids: Optional[List[int]], column=None):
+        """Restringe `query` às CVEs do escopo; sem vendors selecionados, retorna a query inalterada."""
+        if not vendor_ids:
+            return query
+        column = column if column is not None else Vulnerability.cve_id
+        return query.filter(column.in_(self.cve_id_subquery(vendor_ids)))
+
+    def scope_size(self, vendor_ids: List[int]) -> Optional[int]:
+        """Quantidade de CVEs no escopo, quando materializado."""
+        vendor_ids = parse_vendor_ids(list(vendor_ids or []))
+        if not self._scope_tables_ready():
+            return None
+        try:
+            scope_key = self._scope_key(self._current_generation(), vendor_ids)
+            return self.session.query(VendorScopeSet.cve_count).filter_by(scope_key=scope_key).scalar()
+        except Exception:
+            return None
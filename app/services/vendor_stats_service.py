@@ -0,0 +1,191 @@
+"""
+Manutenção e consulta do agregado `vendor_cve_stats`.
+
+O agregado guarda, por vendor e "part" da CPE, a quantidade de CVEs (associadas
+ao vendor diretamente ou via produtos), contagens CRITICAL/HIGH e a data da
+publicação mais recente. É recalculado no banco (INSERT ... SELECT) apenas para
+os vendors tocados por cada lote gravado, e pode ser reconstruído por completo
+via `rebuild_all` (ver scripts/backfill_vendor_cve_stats.py).
+"""
+
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import case, delete, exists, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.models.cve_part import CVEPart
+from app.models.cve_product import CVEProduct
+from app.models.cve_vendor import CVEVendor
+from app.models.vendor import Vendor
+from app.models.vendor_cve_stats import VendorCVEStats
+from app.models.vulnerability import Vulnerability
+from app.services.vendor_scope_service import VendorScopeService
+
+logger = logging.getLogger(__name__)
+
+
+class VendorStatsService:
+    """Mantém e consulta o agregado de CVEs por vendor/part."""
+
+    # Reconstrução inicial disparada em segundo plano (uma por processo)
+    _rebuild_started = False
+    _rebuild_lock = threading.Lock()
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def _aggregate_selects(self, vendor_ids: Optional[list] = None):
+        """SELECTs que produzem as linhas do agregado (total '*' e por part).
+
+        Parte dos pares (cve_id, vendor_id) de `VendorScopeService.pairs_select`
+        (cve_vendors ∪ cve_products ⋈ products): o mesmo escopo usado pelos filtros
+        de vendor, contando cada CVE uma vez por vendor.
+        """
+        now = datetime.now(timezone.utc)
+        critical = func.sum(case((Vulnerability.base_severity == 'CRITICAL', 1), else_=0))
+        high = func.sum(case((Vulnerability.base_severity == 'HIGH', 1), else_=0))
+        pairs = VendorScopeService.pairs_select(vendor_ids)
+
+        total_q = (
+            select(
+                pairs.c.vendor_id,
+                literal(VendorCVEStats.ALL_PARTS),
+                func.count(),
+                critical,
+                high,
+                func.max(Vulnerability.published_date),
+                literal(now),
+            )
+            .select_from(pairs)
+            .join(Vulnerability, Vulnerability.cve_id == pairs.c.cve_id)
+            .group_by(pairs.c.vendor_id)
+        )
+        part_q = (
+            select(
+                pairs.c.vendor_id,
+                CVEPart.part,
+                func.count(),
+                critical,
+                high,
+                func.max(Vulnerability.published_date),
+                literal(now),
+            )
+            .select_from(pairs)
+            .join(Vulnerability, Vulnerability.cve_id == pairs.c.cve_id)
+            .join(CVEPart, CVEPart.cve_id == pairs.c.cve_id)
+            .group_by(pairs.c.vendor_id, CVEPart.part)
+        )
+        return total_q, part_q
+
+    def _insert_aggregate(self, vendor_ids: Optional[list] = None) -> None:
+        table = VendorCVEStats.__table__
+        target = [
+            table.c.vendor_id, table.c.part, table.c.cve_count, table.c.critical_count,
+            table.c.high_count, table.c.last_published, table.c.updated_at,
+        ]
+        for select_q in self._aggregate_selects(vendor_ids):
+            self.session.execute(insert(table).from_select(target, select_q))
+
+    def refresh_for_vendors(self, vendor_ids: Iterable[int], chunk_size: int = 500) -> int:
+        """Recalcula o agregado somente para os vendors informados (não faz commit).
+
+        Returns:
+            Quantidade de vendors recalculados
+        """
+        ids = sorted({int(v) for v in vendor_ids if v is not None})
+        if not ids:
+            return 0
+        table = VendorCVEStats.__table__
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i + chunk_size]
+            self.session.execute(delete(table).where(table.c.vendor_id.in_(chunk)))
+            self._insert_aggregate(chunk)
+        return len(ids)
+
+    def rebuild_all(self) -> int:
+        """Reconstrói o agregado inteiro a partir de cve_vendors/cve_products/cve_parts (não faz commit)."""
+        self.session.execute(delete(VendorCVEStats.__table__))
+        self._insert_aggregate()
+        return self.session.query(func.count()).select_from(VendorCVEStats).scalar() or 0
+
+    def ensure_populated(self) -> bool:
+        """Indica se o agregado pode ser consultado.
+
+        Não reconstrói durante o request: com associações e agregado vazio, dispara
+        `rebuild_all` uma vez em segundo plano (`schedule_rebuild`) e retorna False
+        para que o chamador use o fallback até a reconstrução terminar.
+
+        Returns:
+            True quando o agregado possui linhas e pode ser usado para consultas
+        """
+        if self.session.query(exists().where(VendorCVEStats.vendor_id.isnot(None))).scalar():
+            return True
+        has_links = (
+            self.session.query(exists().where(CVEVendor.vendor_id.isnot(None))).scalar()
+            or self.session.query(exists().where(CVEProduct.product_id.isnot(None))).scalar()
+        )
+        if has_links:
+            self.schedule_rebuild()
+        return False
+
+    def schedule_rebuild(self) -> bool:
+        """Executa `rebuild_all` numa thread em segundo plano, no máximo uma vez por processo.
+
+        Returns:
+            True quando a reconstrução foi disparada agora
+        """
+        with VendorStatsService._rebuild_lock:
+            if VendorStatsService._rebuild_started:
+                return False
+            try:
+                from flask import current_app
+                app = current_app._get_current_object()
+            except RuntimeError:
+                return False
+            VendorStatsService._rebuild_started = True
+        threading.Thread(
+            target=self._rebuild_in_background, args=(app,), name='vendor-cve-stats-rebuild', daemon=True,
+        ).start()
+        return True
+
+    @staticmethod
+    def _rebuild_in_background(app) -> None:
+        from app.extensions import db
+
+        with app.app_context():
+            try:
+                rows = VendorStatsService(db.session).rebuild_all()
+                db.session.commit()
+                logger.info(f"Agregado vendor_cve_stats reconstruído: {rows} linhas")
+            except Exception as e:
+                db.session.rollback()
+                # Permite nova tentativa numa próxima consulta
+                VendorStatsService._rebuild_started = False
+                logger.warning(f"Falha ao reconstruir vendor_cve_stats: {e}")
+
+    def vendor_page_query(self, part: str = '', q: str = ''):
+        """Query de vendors com contagens para a tela de seleção.
+
+        Sem part: lista todos os vendors (contagem 0 quando não há CVEs).
+        Com part: apenas vendors com CVEs daquele tipo.
+        """
+        stats_part = part or VendorCVEStats.ALL_PARTS
+        join_cond = (VendorCVEStats.vendor_id == Vendor.id) & (VendorCVEStats.part == stats_part)
+        query = self.session.query(
+            Vendor.id.label('id'),
+            Vendor.name.label('name'),
+            func.coalesce(VendorCVEStats.cve_count, 0).label('cve_count'),
+            func.coalesce(VendorCVEStats.critical_count, 0).label('critical_count'),
+            func.coalesce(VendorCVEStats.high_count, 0).label('high_count'),
+            VendorCVEStats.last_published.label('last_published'),
+        )
+        if part:
+            query = query.join(VendorCVEStats, join_cond)
+        else:
+            query = query.outerjoin(VendorCVEStats, join_cond)
+        if q:
+            query = query.filter(Vendor.name.ilike(f"%{q}%"))
+        return query.order_by(Vendor.name.asc())
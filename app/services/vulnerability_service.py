@@ -78,6 +78,64 @@ def _chunk_list(lst, size):
         return []
     return [lst[i:i+n] for i in range(0, len(lst), n)]
 
+
+# Chaves do payload do NVDFetcher que não são colunas de `vulnerabilities`
+_CHILD_PAYLOAD_KEYS = ('cvss_metrics', 'vendors', 'products', 'weaknesses', 'references', 'version_ranges', 'cpe_configurations')
+
+# Tags de referência que indicam correção disponível
+_PATCH_REFERENCE_TAGS = ('Patch', 'Vendor Advisory', 'Mitigation', 'Fix')
+
+
+def _cpe_parts_from_configurations(cpe_configurations) -> set:
+    """Retorna o conjunto de "parts" (a, o, h) presentes nas CPEs das configurações NVD 2.0."""
+    parts_found = set()
+    for config in cpe_configurations or []:
+        nodes = config.get('nodes', []) if isinstance(config, dict) else []
+        for node in nodes:
+            cpe_matches = node.get('cpeMatch', []) if isinstance(node, dict) else []
+            for cpe_match in cpe_matches:
+                cpe_uri = cpe_match.get('criteria', '') if isinstance(cpe_match, dict) else ''
+                if isinstance(cpe_uri, str) and cpe_uri.startswith('cpe:2.3:'):
+                    parts = cpe_uri.split(':')
+                    if len(parts) > 2 and parts[2] in ('a', 'o', 'h'):
+                        parts_found.add(parts[2])
+    return parts_found
+
+
+def _version_range_labels(version_range: Dict) -> Tuple[str, Optional[str], bool, Optional[str]]:
+    """Deriva (affected_version, fixed_version, fixed_inclusive, affected_versions) de um version range extraído da CPE."""
+    affected_version = version_range.get('version')
+    if not affected_version:
+        # Sem versão específica: usar os limites do intervalo
+        if version_range.get('version_start_including'):
+            affected_version = f">= {version_range['version_start_including']}"
+        elif version_range.get('version_start_excluding'):
+            affected_version = f"> {version_range['version_start_excluding']}"
+        elif version_range.get('version_end_including'):
+            affected_version = f"<= {version_range['version_end_including']}"
+        elif version_range.get('version_end_excluding'):
+            affected_version = f"< {version_range['version_end_excluding']}"
+        else:
+            affected_version = "*"  # Fallback para versão desconhecida
+
+    fixed_version = version_range.get('version_end_including') or version_range.get('version_end_excluding') or None
+    fixed_inclusive = bool(version_range.get('version_end_including'))
+
+    affected_versions_parts = []
+    if version_range.get('version'):
+        affected_versions_parts.append(f"v{version_range['version']}")
+    if version_range.get('version_start_including'):
+        affected_versions_parts.append(f">= {version_range['version_start_including']}")
+    elif version_range.get('version_start_excluding'):
+        affected_versions_parts.append(f"> {version_range['version_start_excluding']}")
+    if version_range.get('version_end_including'):
+        affected_versions_parts.append(f"<= {version_range['version_end_including']}")
+    elif version_range.get('version_end_excluding'):
+        affected_versions_parts.append(f"< {version_range['version_end_excluding']}")
+    affected_versions = ", ".join(affected_versions_parts) if affected_versions_parts else None
+
+    return affected_version, fixed_version, fixed_inclusive, affected_versions
+
 class VulnerabilityService:
     """Service for managing vulnerability-related operations."""
 
@@ -92,6 +150,22 @@ class VulnerabilityService:
 
 
 
+    def _vendor_scope(self):
+        try:
+            from app.services.vendor_scope_service import VendorScopeService
+            return VendorScopeService(self.session)
+        except Exception:
+            return None
+
+    def _apply_vendor_scope(self, query, vendor_ids: Optional[List[int]] = None):
+        """Filtra `query` pelos vendors informados ou pelas preferências do usuário autenticado."""
+        try:
+            scope = self._vendor_scope()
+            return scope.apply(query, scope.selected_vendor_ids(vendor_ids))
+        except Exception:
+            # Se falhar, segue sem filtro (mantém comportamento atual), mas evita crash
+            return query
+
     def get_recent_paginated(self, page: int, per_page: int, vendor_ids: Optional[List[int]] = None) -> Tuple[List[Vulnerability], int]:
         """
         Fetch a paginated list of recent vulnerabilities.
@@ -107,64 +181,8 @@ class VulnerabilityService:
             from sqlalchemy.orm import joinedload
             query = self.session.query(Vulnerability).options(joinedload(Vulnerability.references)).order_by(Vulnerability.published_date.desc())
             # Aplicar filtro por vendors selecionados explicitamente ou preferências do usuário
-            try:
-                from flask_login import current_user
-                from app.models.sync_metadata import SyncMetadata
-                from sqlalchemy import union
-                from app.models.cve_vendor import CVEVendor
-                from app.models.cve_product import CVEProduct
-                from app.models.product import Product
-                selected_vendor_ids: List[int] = []
-                if vendor_ids:
-                    selected_vendor_ids = [int(x) for x in vendor_ids if str(x).strip().isdigit()]
-                elif current_user.is_authenticated:
-                    key = f'user_vendor_preferences:{current_user.id}'
-                    pref = self.session.query(SyncMetadata).filter_by(key=key).first()
-                    if pref and pref.value:
-                        selected_vendor_ids = [int(x) for x in pref.value.split(',') if x.strip().isdigit()]
-                if selected_vendor_ids:
-                    try:
-                        chunks = _chunk_list(selected_vendor_ids, 900)
-                        subqs = []
-                        for ch in chunks:
-                            if not ch:
-                                continue
-                            subqs.append(
-                                self.session
-                                .query(CVEVendor.cve_id)
-                                .filter(CVEVendor.vendor_id.in_(ch))
-                            )
-                            subqs.append(
-                                self.session
-                                .query(CVEProduct.cve_id)
-                                .join(Product, Product.id == CVEProduct.product_id)
-                                .filter(Product.vendor_id.in_(ch))
-                            )
-                        if subqs:
-                            cves_unificados_sq = union(*subqs).subquery()
-                            query = query.filter(
-                                Vulnerability.cve_id.in_(self.session.query(cves_unificados_sq.c.cve_id))
-                            ).distinct()
-                    except Exception:
-                        # Fallback robusto: aplicar filtro via joins diretos
-                        chunks = _chunk_list(selected_vendor_ids, 900)
-                        conditions = []
-                        for ch in chunks:
-                            if not ch:
-                                continue
-                            conditions.append(CVEVendor.vendor_id.in_(ch))
-                            conditions.append(Product.vendor_id.in_(ch))
-                        query = (
-                            query
-                            .outerjoin(CVEVendor, CVEVendor.cve_id == Vulnerability.cve_id)
-                            .outerjoin(CVEProduct, CVEProduct.cve_id == Vulnerability.cve_id)
-                            .outerjoin(Product, Product.id == CVEProduct.product_id)
-                            .filter(or_(*conditions) if conditions else True)
-                            .distinct()
-                        )
-            except Exception:
-                # Se falhar, segue sem filtro (mantém comportamento atual), mas evita crash
-                pass
+            # (conjunto de CVEs do escopo materializado em vendor_scope_cves)
+            query = self._apply_vendor_scope(query, vendor_ids)
             total_count = query.count()
             offset = (page - 1) * per_page
             vulnerabilities = query.offset(offset).limit(per_page).all()
@@ -176,125 +194,27 @@ class VulnerabilityService:
         """
         Retrieve counts of vulnerabilities by severity and total.
 
+        Sem escopo de vendor, soma o agregado `severity_daily_rollup`; com escopo,
+        executa um único GROUP BY base_severity restrito ao conjunto de CVEs do escopo.
+
         Returns:
             Dictionary with counts for critical, high, medium, and total vulnerabilities.
         """
         try:
-            # Base query
-            base_query = self.session.query(Vulnerability)
-            # Aplicar filtro por vendors selecionados explicitamente ou preferências do usuário, se houver
-            try:
-                from flask_login import current_user
-                from app.models.sync_metadata import SyncMetadata
-                from sqlalchemy import union
-                from app.models.cve_vendor import CVEVendor
-                from app.models.cve_product import CVEProduct
-                from app.models.product import Product
-                selected_vendor_ids: List[int] = []
-                if vendor_ids:
-                    selected_vendor_ids = [int(x) for x in vendor_ids if str(x).strip().isdigit()]
-                elif current_user.is_authenticated:
-                    key = f'user_vendor_preferences:{current_user.id}'
-                    pref = self.session.query(SyncMetadata).filter_by(key=key).first()
-                    if pref and pref.value:
-                        selected_vendor_ids = [int(x) for x in pref.value.split(',') if x.strip().isdigit()]
-                if selected_vendor_ids:
-                    try:
-                        chunks = _chunk_list(selected_vendor_ids, 900)
-                        subqs = []
-                        for ch in chunks:
-                            if not ch:
-                                continue
-                            subqs.append(
-                                self.session
-                                .query(CVEVendor.cve_id)
-                                .filter(CVEVendor.vendor_id.in_(ch))
-                            )
-                            subqs.append(
-                                self.session
-                                .query(CVEProduct.cve_id)
-                                .join(Product, Product.id == CVEProduct.product_id)
-                                .filter(Product.vendor_id.in_(ch))
-                            )
-                        if subqs:
-                            cves_unificados_sq = union(*subqs).subquery()
-                            base_query = base_query.filter(
-                                Vulnerability.cve_id.in_(self.session.query(cves_unificados_sq.c.cve_id))
-                            ).distinct()
-                    except Exception:
-                        # Fallback robusto: aplicar filtro via joins diretos
-                        chunks = _chunk_list(selected_vendor_ids, 900)
-                        conditions = []
-                        for ch in chunks:
-                            if not ch:
-                                continue
-                            conditions.append(CVEVendor.vendor_id.in_(ch))
-                            conditions.append(Product.vendor_id.in_(ch))
-                        base_query = (
-                            base_query
-                            .outerjoin(CVEVendor, CVEVendor.cve_id == Vulnerability.cve_id)
-                            .outerjoin(CVEProduct, CVEProduct.cve_id == Vulnerability.cve_id)
-                            .outerjoin(Product, Product.id == CVEProduct.product_id)
-                            .filter(or_(*conditions) if conditions else True)
-                            .distinct()
-                        )
-            except Exception:
-                # Se falhar, segue sem filtro (mantém comportamento atual)
-                pass
-            counts = {
-                'critical': base_query.filter(Vulnerability.base_severity == 'CRITICAL').count(),
-                'high': base_query.filter(Vulnerability.base_severity == 'HIGH').count(),
-                'medium': base_query.filter(Vulnerability.base_severity == 'MEDIUM').count(),
-                'total': base_query.count()
-            }
-            # Fallback por JSON de vendors quando associações normalizadas não retornam dados
-            # Aqui computamos contagens globais (não semanais) respeitando o escopo de vendors via dados NVD diretos
-            if vendor_ids and counts.get('total', 0) == 0:
-                selected_vendor_names_lower = set()
+            from app.services.daily_stats_service import DailyStatsService, severity_count_dict
+            scope = self._vendor_scope()
+            selected_vendor_ids = scope.selected_vendor_ids(vendor_ids) if scope else []
+            if not selected_vendor_ids:
                 try:
-                    from app.models.vendor import Vendor
-                    vendors = (
-                        self.session.query(Vendor.id, Vendor.name)
-                        .filter(Vendor.id.in_(vendor_ids))
-                        .all()
-                    )
-                    for _vid, _vname in vendors:
-                        if _vname:
-                            selected_vendor_names_lower.add(str(_vname).strip().lower())
+                    totals = DailyStatsService(self.session).severity_totals()
+                    if totals is not None:
+                        return totals
                 except Exception:
-                    selected_vendor_names_lower = set()
-
-                # Busca todas as vulnerabilidades e filtra por vendors do JSON
-                all_candidates = self.session.query(Vulnerability).all()
-
-                crt = 0
-                hig = 0
-                med = 0
-                tot = 0
-                for v in all_candidates:
-                    try:
-                        # Utiliza helper existente para parsear JSON/strings
-                        vnames = [str(x).strip().lower() for x in _parse_list_field(v.nvd_vendors_data)]
-                        if not any(vn in selected_vendor_names_lower for vn in vnames):
-                            continue
-                        tot += 1
-                        sev = (v.base_severity or '').upper()
-                        if sev == 'CRITICAL':
-                            crt += 1
-                        elif sev == 'HIGH':
-                            hig += 1
-                        elif sev == 'MEDIUM':
-                            med += 1
-                    except Exception:
-                        continue
-
-                counts = {
-                    'critical': crt,
-                    'high': hig,
-                    'medium': med,
-                    'total': tot
-                }
-            return counts
+                    self.session.rollback()
+            query = self.session.query(Vulnerability.base_severity, func.count(Vulnerability.cve_id))
+            if selected_vendor_ids:
+                query = scope.apply(query, selected_vendor_ids)
+            return severity_count_dict(query.group_by(Vulnerability.base_severity).all())
         except Exception as e:
             raise RuntimeError(f"Error fetching dashboard counts: {e}")
 
@@ -391,136 +311,21 @@ class VulnerabilityService:
             Dictionary with weekly counts for critical, high, medium, and total vulnerabilities.
         """
         try:
+            from app.services.daily_stats_service import severity_count_dict
             # Calculate date 7 days ago
             week_ago = datetime.now() - timedelta(days=7)
             
-            # Base query for vulnerabilities from last week (include new and updated)
-            base_query = self.session.query(Vulnerability).filter(
+            # Vulnerabilidades da última semana (novas e atualizadas), agregadas por severidade
+            query = self.session.query(Vulnerability.base_severity, func.count(Vulnerability.cve_id)).filter(
                 or_(
                     Vulnerability.published_date >= week_ago,
                     Vulnerability.last_update >= week_ago
                 )
             )
-            # Aplicar filtro por vendors selecionados explicitamente ou preferências de usuário (via união de CVEs por vendor e por produto do vendor)
-            try:
-                from flask_login import current_user
-                from sqlalchemy import union
-                from app.models.sync_metadata import SyncMetadata
-                from app.models.cve_vendor import CVEVendor
-                from app.models.cve_product import CVEProduct
-                from app.models.product import Product
-                selected_vendor_ids: List[int] = []
-                if vendor_ids:
-                    selected_vendor_ids = [int(x) for x in vendor_ids if str(x).strip().isdigit()]
-                elif current_user.is_authenticated:
-                    key = f'user_vendor_preferences:{current_user.id}'
-                    pref = self.session.query(SyncMetadata).filter_by(key=key).first()
-                    if pref and pref.value:
-                        selected_vendor_ids = [int(x) for x in pref.value.split(',') if x.strip().isdigit()]
-                if selected_vendor_ids:
-                    try:
-                        chunks = _chunk_list(selected_vendor_ids, 900)
-                        subqs = []
-                        for ch in chunks:
-                            if not ch:
-                                continue
-                            subqs.append(
-                                self.session
-                                .query(CVEVendor.cve_id)
-                                .filter(CVEVendor.vendor_id.in_(ch))
-                            )
-                            subqs.append(
-                                self.session
-                                .query(CVEProduct.cve_id)
-                                .join(Product, Product.id == CVEProduct.product_id)
-                                .filter(Product.vendor_id.in_(ch))
-                            )
-                        if subqs:
-                            cves_unificados_sq = union(*subqs).subquery()
-                            base_query = base_query.filter(
-                                Vulnerability.cve_id.in_(self.session.query(cves_unificados_sq.c.cve_id))
-                            ).distinct()
-                    except Exception:
-                        # Fallback robusto: aplicar filtro via joins diretos
-                        chunks = _chunk_list(selected_vendor_ids, 900)
-                        conditions = []
-                        for ch in chunks:
-                            if not ch:
-                                continue
-                            conditions.append(CVEVendor.vendor_id.in_(ch))
-                            conditions.append(Product.vendor_id.in_(ch))
-                        base_query = (
-                            base_query
-                            .outerjoin(CVEVendor, CVEVendor.cve_id == Vulnerability.cve_id)
-                            .outerjoin(CVEProduct, CVEProduct.cve_id == Vulnerability.cve_id)
-                            .outerjoin(Product, Product.id == CVEProduct.product_id)
-                            .filter(or_(*conditions) if conditions else True)
-                            .distinct()
-                        )
-            except Exception:
-                # Se falhar, segue sem filtro
-                pass
-            
-            counts = {
-                'critical': base_query.filter(Vulnerability.base_severity == 'CRITICAL').count(),
-                'high': base_query.filter(Vulnerability.base_severity == 'HIGH').count(),
-                'medium': base_query.filter(Vulnerability.base_severity == 'MEDIUM').count(),
-                'total': base_query.count()
-            }
-            # Fallback por JSON de vendors quando associações normalizadas não retornam dados
-            # Recalcula contagens semanais respeitando vendors via dados brutos NVD (nvd_vendors_data)
-            if vendor_ids and counts.get('total', 0) == 0:
-                selected_vendor_names_lower = set()
-                try:
-                    from app.models.vendor import Vendor
-                    vendors = (
-                        self.session.query(Vendor.id, Vendor.name)
-                        .filter(Vendor.id.in_(vendor_ids))
-                        .all()
-                    )
-                    for _vid, _vname in vendors:
-                        if _vname:
-                            selected_vendor_names_lower.add(str(_vname).strip().lower())
-                except Exception:
-                    selected_vendor_names_lower = set()
-
-                def _matches_selected_vendor(v: Vulnerability) -> bool:
-                    try:
-                        vnames = [str(x).strip().lower() for x in _parse_list_field(v.nvd_vendors_data)]
-                        return any(vn in selected_vendor_names_lower for vn in vnames)
-                    except Exception:
-                        return False
-
-                weekly_candidates = (
-                    self.session.query(Vulnerability)
-                    .filter(
-                        or_(
-                            Vulnerability.published_date >= week_ago,
-                            Vulnerability.last_update >= week_ago
-                        )
-                    )
-                    .all()
-                )
-
-                critical = high = medium = total = 0
-                for v in weekly_candidates:
-                    if not _matches_selected_vendor(v):
-                        continue
-                    total += 1
-                    sev = getattr(v, 'base_severity', None)
-                    if sev == 'CRITICAL':
-                        critical += 1
-                    elif sev == 'HIGH':
-                        high += 1
-                    elif sev == 'MEDIUM':
-                        medium += 1
-                counts = {
-                    'critical': int(critical),
-                    'high': int(high),
-                    'medium': int(medium),
-                    'total': int(total)
-                }
-            return counts
+            # Aplicar filtro por vendors selecionados explicitamente ou preferências do usuário
+            # (conjunto de CVEs do escopo materializado em vendor_scope_cves)
+            query = self._apply_vendor_scope(query, vendor_ids)
+            return severity_count_dict(query.group_by(Vulnerability.base_severity).all())
         except Exception as e:
             raise RuntimeError(f"Error fetching weekly vulnerability counts: {e}")
 
@@ -572,16 +377,32 @@ class VulnerabilityService:
         except Exception as e:
             raise RuntimeError(f"Error fetching vulnerability analytics for {cve_id}: {e}")
 
-    def save_vulnerabilities_batch(self, vulnerabilities_data: List[Dict]) -> int:
+    def save_vulnerabilities_batch(self, vulnerabilities_data: List[Dict], bulk: Optional[bool] = None) -> int:
         """
         Save a batch of vulnerabilities to the database with detailed feedback.
         
         Args:
             vulnerabilities_data: List of dictionaries containing vulnerability data
+            bulk: Usa o caminho set-based (`_save_vulnerabilities_bulk`); None lê NVD_BULK_PERSIST
             
         Returns:
             Number of vulnerabilities successfully saved
         """
+        if bulk is None:
+            try:
+                from flask import current_app
+                bulk = bool(current_app.config.get('NVD_BULK_PERSIST', True))
+            except Exception:
+                bulk = True
+        if bulk and vulnerabilities_data:
+            try:
+                return self._save_vulnerabilities_bulk(vulnerabilities_data)
+            except Exception as bulk_err:
+                # Lote rejeitado como um todo: refazer CVE a CVE para isolar registros inválidos
+                self.session.rollback()
+                from app.utils.terminal_feedback import terminal_feedback
+                terminal_feedback.warning(f"⚠️ Gravação em lote falhou, usando caminho por CVE: {bulk_err}")
+
         try:
             from app.models.cvss_metric import CVSSMetric
             from app.utils.terminal_feedback import terminal_feedback
@@ -594,6 +415,10 @@ class VulnerabilityService:
             normalized_count = 0
             
             terminal_feedback.info(f"💾 Iniciando gravação de {len(vulnerabilities_data)} CVEs no banco de dados")
+            batch_cve_ids = [v.get('cve_id') for v in vulnerabilities_data if v.get('cve_id')]
+            touched_vendor_ids = self._vendor_ids_for_cves(batch_cve_ids)
+            touched_days = self._published_days_for_cves(batch_cve_ids)
+            scope_before = self._scope_associations(batch_cve_ids)
             
             for idx, vuln_data in enumerate(vulnerabilities_data):
                 cve_id = vuln_data.get('cve_id', f'unknown_{idx}')
@@ -714,6 +539,15 @@ class VulnerabilityService:
                     terminal_feedback.error(f"❌ Erro ao processar CVE {cve_id}: {str(cve_error)}")
                     continue
             
+            # Atualizar agregado vendor_cve_stats para vendors antigos e novos do lote
+            touched_vendor_ids.update(self._vendor_ids_for_cves(batch_cve_ids))
+            self._refresh_vendor_stats(touched_vendor_ids)
+            touched_days.update(self._published_days_for_cves(batch_cve_ids))
+            self._refresh_daily_stats(touched_days)
+            self._refresh_search_index(batch_cve_ids)
+            if self._scope_associations(batch_cve_ids) != scope_before:
+                self._invalidate_vendor_scopes()
+
             # Commit das alterações
             self.session.commit()
             
@@ -741,6 +575,449 @@ class VulnerabilityService:
             terminal_feedback.error(f"❌ Erro crítico ao salvar lote de vulnerabilidades: {str(e)}")
             raise RuntimeError(f"Error saving vulnerabilities batch: {e}")
 
+    def _save_vulnerabilities_bulk(self, vulnerabilities_data: List[Dict]) -> int:
+        """Grava um lote de CVEs com operações por conjunto em vez de consultas por CVE.
+
+        Etapas: pré-carrega CVEs, vendors e pares (vendor, produto) existentes com
+        consultas IN; grava as vulnerabilidades com upsert nativo; resolve vendors e
+        produtos faltantes com INSERT ... ON CONFLICT DO NOTHING; e substitui as
+        linhas filhas com um DELETE e um INSERT multi-linha por tabela. Tudo ocorre
+        numa única transação: qualquer falha levanta exceção e o chamador decide o fallback.
+
+        Returns:
+            Número de CVEs gravadas (novas + atualizadas)
+        """
+        from sqlalchemy import delete, insert
+        from app.models.cvss_metric import CVSSMetric
+        from app.models.cve_vendor import CVEVendor
+        from app.models.cve_product import CVEProduct
+        from app.models.cve_part import CVEPart
+        from app.models.weakness import Weakness
+        from app.models.references import Reference
+        from app.models.version_reference import VersionReference
+        from app.models.affected_product import AffectedProduct
+        from app.services.bulk_database_service import BulkDatabaseService
+        from app.utils.terminal_feedback import terminal_feedback
+        import re
+        import time
+
+        start_time = time.time()
+        bulk_db = getattr(self, '_bulk_db_service', None)
+        if bulk_db is None:
+            bulk_db = BulkDatabaseService()
+            self._bulk_db_service = bulk_db
+        dialect = bulk_db.db_dialect
+        # Limite de parâmetros por statement (SQLite antigo aceita 999)
+        param_budget = 900 if dialect == 'sqlite' else 30000
+
+        # Deduplicar por cve_id (última ocorrência vence, como no caminho por CVE)
+        by_cve: Dict[str, Dict] = {}
+        for vuln_data in vulnerabilities_data:
+            cve_id = vuln_data.get('cve_id')
+            if cve_id:
+                by_cve[cve_id] = vuln_data
+        if not by_cve:
+            return 0
+        cve_ids = list(by_cve.keys())
+
+        terminal_feedback.info(f"💾 Gravação em lote de {len(cve_ids)} CVEs no banco de dados")
+
+        # 1) Pré-carregar CVEs existentes para contabilizar novas x atualizadas
+        # (e dias de publicação já gravados, para recalcular o agregado diário)
+        existing_ids = set()
+        touched_days = set()
+        for chunk in _chunk_list(cve_ids, 900):
+            for cid, published in (
+                self.session.query(Vulnerability.cve_id, Vulnerability.published_date)
+                .filter(Vulnerability.cve_id.in_(chunk))
+                .all()
+            ):
+                existing_ids.add(cid)
+                touched_days.add(published)
+
+        # 2) Upsert nativo das vulnerabilidades, agrupando linhas pelo mesmo conjunto de colunas
+        columns = set(Vulnerability.__table__.c.keys())
+        groups: Dict[Tuple[str, ...], List[Dict]] = {}
+        for cve_id, vuln_data in by_cve.items():
+            row = {k: v for k, v in vuln_data.items() if k not in _CHILD_PAYLOAD_KEYS and k in columns}
+            if 'last_update' not in row and vuln_data.get('last_modified') is not None:
+                row['last_update'] = vuln_data['last_modified']
+            if vuln_data.get('vendors'):
+                row['nvd_vendors_data'] = vuln_data['vendors']
+            if vuln_data.get('products'):
+                row['nvd_products_data'] = vuln_data['products']
+            if vuln_data.get('cpe_configurations'):
+                row['nvd_cpe_configurations'] = vuln_data['cpe_configurations']
+            if vuln_data.get('version_ranges'):
+                row['nvd_version_ranges'] = vuln_data['version_ranges']
+            if row.get('cvss_score') is None:
+                row['cvss_score'] = 0.0
+            if row.get('patch_available') is None:
+                row['patch_available'] = False
+            groups.setdefault(tuple(sorted(row.keys())), []).append(row)
+
+        for keys, rows in groups.items():
+            update_columns = [k for k in keys if k != 'cve_id']
+            # +1: written_at vem do default da coluna em cada linha inserida
+            for chunk in _chunk_list(rows, max(1, param_budget // (len(keys) + 1))):
+                bulk_db._native_upsert_vulnerabilities(chunk, self.session, update_columns=update_columns, only_newer=False)
+
+        # 3) Resolver vendors e produtos (pré-carga + criação dos faltantes)
+        vendor_names = set()
+        product_names = set()
+        pair_names = set()
+        for vuln_data in by_cve.values():
+            vendor_names.update(v for v in (vuln_data.get('vendors') or []) if isinstance(v, str) and v)
+            product_names.update(p for p in (vuln_data.get('products') or []) if isinstance(p, str) and p)
+            for vr in vuln_data.get('version_ranges') or []:
+                if isinstance(vr, dict) and vr.get('vendor') and vr.get('product'):
+                    vendor_names.add(vr['vendor'])
+                    pair_names.add((vr['vendor'], vr['product']))
+        if product_names:
+            vendor_names.add('Unknown')  # Vendor padrão para produtos sem fabricante conhecido
+
+        vendor_ids = self._bulk_resolve_vendors(vendor_names, dialect)
+        pair_ids = self._bulk_resolve_products(
+            {(vendor_ids[v], p) for v, p in pair_names if v in vendor_ids}, dialect
+        )
+        product_ids = self._bulk_resolve_products_by_name(product_names, vendor_ids.get('Unknown'), dialect)
+
+        # 4) Montar linhas filhas por tabela (apenas para CVEs que trouxeram o campo)
+        cwe_pattern = re.compile(r'^CWE-\d+$')
+        metric_columns = [c for c in CVSSMetric.__table__.c.keys() if c not in ('id', 'created_at', 'updated_at')]
+        children: Dict[str, Tuple[object, List[str], List[Dict]]] = {
+            'vendors': (CVEVendor, [], []),
+            'products': (CVEProduct, [], []),
+            'parts': (CVEPart, [], []),
+            'metrics': (CVSSMetric, [], []),
+            'weaknesses': (Weakness, [], []),
+            'references': (Reference, [], []),
+            'versions': (VersionReference, [], []),
+        }
+        affected_rows: Dict[Tuple[str, int], Dict] = {}
+        normalized_count = 0
+
+        for cve_id, vuln_data in by_cve.items():
+            vendors = vuln_data.get('vendors') or []
+            if vendors:
+                _, ids, rows = children['vendors']
+                ids.append(cve_id)
+                for vid in {vendor_ids[v] for v in vendors if v in vendor_ids}:
+                    rows.append({'cve_id': cve_id, 'vendor_id': vid})
+                normalized_count += len(vendors)
+
+            products = vuln_data.get('products') or []
+            if products:
+                _, ids, rows = children['products']
+                ids.append(cve_id)
+                for pid in {product_ids[p] for p in products if p in product_ids}:
+                    rows.append({'cve_id': cve_id, 'product_id': pid})
+                normalized_count += len(products)
+
+            cpe_cfgs = vuln_data.get('cpe_configurations')
+            if cpe_cfgs:
+                _, ids, rows = children['parts']
+                ids.append(cve_id)
+                rows.extend({'cve_id': cve_id, 'part': part} for part in _cpe_parts_from_configurations(cpe_cfgs))
+
+            metrics = vuln_data.get('cvss_metrics') or []
+            if metrics:
+                _, ids, rows = children['metrics']
+                ids.append(cve_id)
+                for metric_data in metrics:
+                    row = {c: metric_data.get(c) for c in metric_columns}
+                    row['cve_id'] = cve_id
+                    row['is_primary'] = bool(metric_data.get('is_primary', True))
+                    row['base_severity'] = str(row.get('base_severity') or 'N/A').upper()
+                    rows.append(row)
+
+            weaknesses = vuln_data.get('weaknesses') or []
+            if weaknesses:
+                _, ids, rows = children['weaknesses']
+                ids.append(cve_id)
+                rows.extend(
+                    {'cve_id': cve_id, 'cwe_id': cwe}
+                    for cwe in dict.fromkeys(weaknesses)
+                    if isinstance(cwe, str) and len(cwe) <= 50 and cwe_pattern.match(cwe)
+                )
+
+            references = vuln_data.get('references') or []
+            if references:
+                _, ids, rows = children['references']
+                ids.append(cve_id)
+                for ref_data in references:
+                    url = ref_data.get('url') if isinstance(ref_data, dict) else None
+                    if not url:
+                        continue
+                    tags = ref_data.get('tags') or []
+                    rows.append({
+                        'cve_id': cve_id,
+                        'url': url,
+                        'source': ref_data.get('source'),
+                        'tags': ', '.join(tags) if tags else None,
+                        'is_patch': any(tag in tags for tag in _PATCH_REFERENCE_TAGS),
+                    })
+
+            version_ranges = vuln_data.get('version_ranges') or []
+            if version_ranges:
+                _, ids, rows = children['versions']
+                ids.append(cve_id)
+                for vr in version_ranges:
+                    if not isinstance(vr, dict):
+                        continue
+                    pid = pair_ids.get((vendor_ids.get(vr.get('vendor')), vr.get('product')))
+                    if not pid:
+                        continue
+                    affected_version, fixed_version, fixed_inclusive, affected_versions = _version_range_labels(vr)
+                    rows.append({
+                        'cve_id': cve_id,
+                        'product_id': pid,
+                        'affected_version': affected_version,
+                        'fixed_version': fixed_version,
+                        'fixed_inclusive': fixed_inclusive,
+                    })
+                    # Primeiro range de cada (CVE, produto) define affected_versions
+                    affected_rows.setdefault((cve_id, pid), {
+                        'vulnerability_id': cve_id,
+                        'product_id': pid,
+                        'affected_versions': affected_versions,
+                    })
+
+        # Vendors associados antes da substituição também precisam ter o agregado recalculado
+        touched_vendor_ids = self._vendor_ids_for_cves(cve_ids)
+        scope_before = self._scope_associations(cve_ids)
+
+        # 5) Substituir filhas: um DELETE e um INSERT multi-linha por tabela
+        for model, ids, rows in children.values():
+            table = model.__table__
+            for chunk in _chunk_list(ids, 900):
+                self.session.execute(delete(table).where(table.c.cve_id.in_(chunk)))
+            if rows:
+                self.session.execute(insert(table), rows)
+
+        affected_cves = children['versions'][1]
+        if affected_cves:
+            table = AffectedProduct.__table__
+            for chunk in _chunk_list(affected_cves, 900):
+                self.session.execute(delete(table).where(table.c.vulnerability_id.in_(chunk)))
+            if affected_rows:
+                self.session.execute(insert(table), list(affected_rows.values()))
+
+        touched_vendor_ids.update(self._vendor_ids_for_cves(cve_ids))
+        self._refresh_vendor_stats(touched_vendor_ids)
+        touched_days.update(v.get('published_date') for v in by_cve.values())
+        self._refresh_daily_stats(touched_days)
+        self._refresh_search_index(cve_ids)
+        if self._scope_associations(cve_ids) != scope_before:
+            self._invalidate_vendor_scopes()
+
+        self.session.commit()
+
+        updated_count = len(existing_ids)
+        saved_count = len(cve_ids) - updated_count
+        duration = time.time() - start_time
+        terminal_feedback.success(
+            "💾 Lote gravado com sucesso!",
+            {
+                "novas_cves": saved_count,
+                "cves_atualizadas": updated_count,
+                "total_processadas": len(cve_ids),
+                "normalizacoes_aplicadas": normalized_count,
+                "erros": 0,
+                "duracao": f"{duration:.2f}s",
+                "modo": "bulk",
+            }
+        )
+        return len(cve_ids)
+
+    def _vendor_ids_for_cves(self, cve_ids: List[str]) -> set:
+        """IDs de vendor associados às CVEs informadas, diretamente (cve_vendors) ou via produtos."""
+        from sqlalchemy import select
+        from app.services.vendor_scope_service import VendorScopeService
+
+        vendor_ids = set()
+        try:
+            for chunk in _chunk_list(list(cve_ids), 450):
+                pairs = VendorScopeService.pairs_select(cve_ids=chunk)
+                vendor_ids.update(row[0] for row in self.session.execute(select(pairs.c.vendor_id).distinct()))
+        except Exception:
+            pass
+        return vendor_ids
+
+    def _refresh_vendor_stats(self, vendor_ids) -> None:
+        """Recalcula `vendor_cve_stats` para os vendors tocados, isolado num savepoint.
+
+        Falhas não invalidam o lote: o agregado pode ser reconstruído depois pelo backfill.
+        """
+        if not vendor_ids:
+            return
+        try:
+            from app.services.vendor_stats_service import VendorStatsService
+            with self.session.begin_nested():
+                VendorStatsService(self.session).refresh_for_vendors(vendor_ids)
+        except Exception as stats_err:
+            from app.utils.terminal_feedback import terminal_feedback
+            terminal_feedback.warning(f"⚠️ Falha ao atualizar vendor_cve_stats: {stats_err}")
+
+    def _published_days_for_cves(self, cve_ids) -> set:
+        """Dias de publicação gravados para as CVEs (ver DailyStatsService.days_for_cves)."""
+        try:
+            from app.services.daily_stats_service import DailyStatsService
+            return DailyStatsService(self.session).days_for_cves(cve_ids)
+        except Exception:
+            return set()
+
+    def _refresh_daily_stats(self, days) -> None:
+        """Recalcula os agregados diários para os dias tocados, isolado num savepoint.
+
+        Falhas não invalidam o lote: o agregado pode ser reconstruído depois pelo backfill.
+        """
+        if not days:
+            return
+        try:
+            from app.services.daily_stats_service import DailyStatsService
+            service = DailyStatsService(self.session)
+            if not service.tables_ready():
+                return
+            with self.session.begin_nested():
+                service.refresh_days(days)
+        except Exception as stats_err:
+            from app.utils.terminal_feedback import terminal_feedback
+            terminal_feedback.warning(f"⚠️ Falha ao atualizar agregados diários: {stats_err}")
+
+    def _refresh_search_index(self, cve_ids) -> None:
+        """Reindexa as CVEs do lote na busca textual, isolado num savepoint (ver CVESearchService)."""
+        if not cve_ids:
+            return
+        try:
+            from app.services.search_service import CVESearchService
+            service = CVESearchService(self.session)
+            if not service.backend():
+                return
+            with self.session.begin_nested():
+                service.index_cves(cve_ids)
+        except Exception as search_err:
+            from app.utils.terminal_feedback import terminal_feedback
+            terminal_feedback.warning(f"⚠️ Falha ao atualizar índice de busca: {search_err}")
+
+    def _scope_associations(self, cve_ids) -> Optional[set]:
+        """Associações CVE↔vendor e CVE↔produto das CVEs (entrada dos escopos de vendor).
+
+        Comparadas antes e depois da gravação para só invalidar os escopos quando
+        mudam; None (falha na leitura) força a invalidação.
+        """
+        from app.models.cve_vendor import CVEVendor
+        from app.models.cve_product import CVEProduct
+
+        pairs = set()
+        try:
+            for chunk in _chunk_list(list(cve_ids), 900):
+                pairs.update(
+                    ('vendor', cve_id, vendor_id) for cve_id, vendor_id in
+                    self.session.query(CVEVendor.cve_id, CVEVendor.vendor_id).filter(CVEVendor.cve_id.in_(chunk)).all()
+                )
+                pairs.update(
+                    ('product', cve_id, product_id) for cve_id, product_id in
+                    self.session.query(CVEProduct.cve_id, CVEProduct.product_id).filter(CVEProduct.cve_id.in_(chunk)).all()
+                )
+        except Exception:
+            return None
+        return pairs
+
+    def _invalidate_vendor_scopes(self) -> None:
+        """Avança a geração dos escopos de vendor materializados, isolado num savepoint (ver VendorScopeService)."""
+        try:
+            from app.services.vendor_scope_service import bump_scope_generation
+            with self.session.begin_nested():
+                bump_scope_generation(self.session)
+        except Exception as scope_err:
+            from app.utils.terminal_feedback import terminal_feedback
+            terminal_feedback.warning(f"⚠️ Falha ao invalidar escopos de vendor: {scope_err}")
+
+    def _bulk_insert_ignore(self, table, rows: List[Dict], conflict_columns: List[str], dialect: str) -> None:
+        """INSERT multi-linha ignorando conflitos na chave única informada."""
+        if not rows:
+            return
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as pg_insert
+            stmt = pg_insert(table).on_conflict_do_nothing(index_elements=conflict_columns)
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+            stmt = sqlite_insert(table).on_conflict_do_nothing(index_elements=conflict_columns)
+        else:
+            from sqlalchemy import insert
+            stmt = insert(table).prefix_with('IGNORE') if dialect == 'mysql' else insert(table)
+        self.session.execute(stmt, rows)
+
+    def _bulk_resolve_vendors(self, names, dialect: str) -> Dict[str, int]:
+        """Mapeia nomes de vendor para IDs, criando em lote os que ainda não existem."""
+        from app.models.vendor import Vendor
+
+        names = sorted(n for n in names if n)
+        resolved: Dict[str, int] = {}
+        for chunk in _chunk_list(names, 900):
+            resolved.update({n: vid for vid, n in self.session.query(Vendor.id, Vendor.name).filter(Vendor.name.in_(chunk)).all()})
+        missing = [n for n in names if n not in resolved]
+        if missing:
+            self._bulk_insert_ignore(Vendor.__table__, [{'name': n} for n in missing], ['name'], dialect)
+            for chunk in _chunk_list(missing, 900):
+                resolved.update({n: vid for vid, n in self.session.query(Vendor.id, Vendor.name).filter(Vendor.name.in_(chunk)).all()})
+        return resolved
+
+    def _bulk_resolve_products(self, pairs, dialect: str) -> Dict[Tuple[int, str], int]:
+        """Mapeia pares (vendor_id, nome) para IDs de produto, criando em lote os faltantes."""
+        from app.models.product import Product
+
+        pairs = set(pairs)
+        if not pairs:
+            return {}
+
+        def _lookup(wanted) -> Dict[Tuple[int, str], int]:
+            found = {}
+            wanted_vendors = sorted({v for v, _ in wanted})
+            wanted_names = sorted({n for _, n in wanted})
+            for vchunk in _chunk_list(wanted_vendors, 400):
+                for nchunk in _chunk_list(wanted_names, 400):
+                    rows = self.session.query(Product.id, Product.vendor_id, Product.name).filter(
+                        Product.vendor_id.in_(vchunk), Product.name.in_(nchunk)
+                    ).all()
+                    for pid, vid, name in rows:
+                        if (vid, name) in wanted:
+                            found[(vid, name)] = pid
+            return found
+
+        resolved = _lookup(pairs)
+        missing = pairs - set(resolved)
+        if missing:
+            self._bulk_insert_ignore(
+                Product.__table__,
+                [{'vendor_id': v, 'name': n} for v, n in sorted(missing)],
+                ['vendor_id', 'name'],
+                dialect,
+            )
+            resolved.update(_lookup(missing))
+        return resolved
+
+    def _bulk_resolve_products_by_name(self, names, default_vendor_id: Optional[int], dialect: str) -> Dict[str, int]:
+        """Mapeia nomes de produto (sem vendor) para IDs, como `_process_products`.
+
+        Reusa qualquer produto existente com o mesmo nome; os demais são criados
+        sob o vendor padrão 'Unknown'.
+        """
+        from app.models.product import Product
+
+        names = sorted(n for n in names if n)
+        resolved: Dict[str, int] = {}
+        for chunk in _chunk_list(names, 900):
+            rows = self.session.query(Product.id, Product.name).filter(Product.name.in_(chunk)).order_by(Product.id).all()
+            for pid, name in rows:
+                resolved.setdefault(name, pid)
+        missing = [n for n in names if n not in resolved]
+        if missing and default_vendor_id:
+            created = self._bulk_resolve_products({(default_vendor_id, n) for n in missing}, dialect)
+            resolved.update({n: pid for (_, n), pid in created.items()})
+        return resolved
+
     def get_last_sync_time(self) -> Optional[datetime]:
         """
         Retorna o melhor timestamp conhecido da última sincronização.
@@ -829,30 +1106,9 @@ class VulnerabilityService:
             base_query = self.session.query(Vulnerability).filter(
                 Vulnerability.base_severity == severity.upper()
             )
-            # Vendor-scoped filtering when vendor_ids provided (via union of CVEVendor and Product.vendor_id)
-            try:
-                if vendor_ids:
-                    from sqlalchemy import union
-                    from app.models.cve_vendor import CVEVendor
-                    from app.models.cve_product import CVEProduct
-                    from app.models.product import Product
-                    cves_por_vendor = (
-                        self.session
-                        .query(CVEVendor.cve_id)
-                        .filter(CVEVendor.vendor_id.in_(vendor_ids))
-                    )
-                    cves_por_produto_vendor = (
-                        self.session
-                        .query(CVEProduct.cve_id)
-                        .join(Product, Product.id == CVEProduct.product_id)
-                        .filter(Product.vendor_id.in_(vendor_ids))
-                    )
-                    cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
-                    base_query = base_query.filter(
-                        Vulnerability.cve_id.in_(self.session.query(cves_unificados_sq.c.cve_id))
-                    ).distinct()
-            except Exception:
-                pass
+            # Vendor-scoped filtering when vendor_ids provided (materialized vendor scope)
+            if vendor_ids:
+                base_query = self._apply_vendor_scope(base_query, vendor_ids)
             
             # Weekly count
             weekly_count = base_query.filter(
@@ -1264,30 +1520,9 @@ class VulnerabilityService:
                 ),
                 Vulnerability.cvss_score.isnot(None)
             )
-            # Vendor-scoped filtering when vendor_ids provided (via union of CVEVendor and Product.vendor_id)
-            try:
-                if vendor_ids:
-                    from sqlalchemy import union
-                    from app.models.cve_vendor import CVEVendor
-                    from app.models.cve_product import CVEProduct
-                    from app.models.product import Product
-                    cves_por_vendor = (
-                        self.session
-                        .query(CVEVendor.cve_id)
-                        .filter(CVEVendor.vendor_id.in_(vendor_ids))
-                    )
-                    cves_por_produto_vendor = (
-                        self.session
-                        .query(CVEProduct.cve_id)
-                        .join(Product, Product.id == CVEProduct.product_id)
-                        .filter(Product.vendor_id.in_(vendor_ids))
-                    )
-                    cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
-                    query = query.filter(
-                        Vulnerability.cve_id.in_(self.session.query(cves_unificados_sq.c.cve_id))
-                    ).distinct()
-            except Exception:
-                pass
+            # Vendor-scoped filtering when vendor_ids provided (materialized vendor scope)
+            if vendor_ids:
+                query = self._apply_vendor_scope(query, vendor_ids)
 
             result_items = query.all()
 
@@ -1388,30 +1623,9 @@ class VulnerabilityService:
                 Vulnerability.base_severity == severity.upper(),
                 Vulnerability.cvss_score.isnot(None)
             )
-            # Vendor-scoped filtering when vendor_ids provided (via union of CVEVendor and Product.vendor_id)
-            try:
-                if vendor_ids:
-                    from sqlalchemy import union
-                    from app.models.cve_vendor import CVEVendor
-                    from app.models.cve_product import CVEProduct
-                    from app.models.product import Product
-                    cves_por_vendor = (
-                        self.session
-                        .query(CVEVendor.cve_id)
-                        .filter(CVEVendor.vendor_id.in_(vendor_ids))
-                    )
-                    cves_por_produto_vendor = (
-                        self.session
-                        .query(CVEProduct.cve_id)
-                        .join(Product, Product.id == CVEProduct.product_id)
-                        .filter(Product.vendor_id.in_(vendor_ids))
-                    )
-                    cves_unificados_sq = union(cves_por_vendor, cves_por_produto_vendor).subquery()
-                    query = query.filter(
-                        Vulnerability.cve_id.in_(self.session.query(cves_unificados_sq.c.cve_id))
-                    ).distinct()
-            except Exception:
-                pass
+            # Vendor-scoped filtering when vendor_ids provided (materialized vendor scope)
+            if vendor_ids:
+                query = self._apply_vendor_scope(query, vendor_ids)
 
             query = query.all()
 
@@ -1614,15 +1828,20 @@ class VulnerabilityService:
                 # Deduplicar mantendo ordem
                 cve_ids = list(dict.fromkeys(tmp_ids))
 
-            created = 0
+            created_ids = []
             for cve_id in cve_ids:
                 if cve_id in existing:
                     continue
                 self.session.add(CVEVendor(cve_id=cve_id, vendor_id=vendor.id))
-                created += 1
+                created_ids.append(cve_id)
+            created = len(created_ids)
 
             if created > 0:
                 self.session.flush()
+                self._refresh_vendor_stats([vendor.id])
+                self._refresh_daily_stats(self._published_days_for_cves(created_ids))
+                self._refresh_search_index(created_ids)
+                self._invalidate_vendor_scopes()
                 self.session.commit()
             return created
         except Exception as e:
@@ -1689,103 +1908,20 @@ class VulnerabilityService:
     def get_vulnerabilities_by_asset(self, asset_id: int):
         """Retorna vulnerabilidades correlacionadas a um ativo pelos produtos vinculados e metadados.
 
-        Estratégia:
+        Estratégia (ver AssetCorrelationService):
         - Seleciona produtos vinculados ao ativo via AssetProduct.
-        - Filtra vulnerabilidades associadas a esses produtos por CVEProduct.
-        - Correlaciona por VersionReference/AffectedProduct usando regex contra installed_version.
+        - Carrega numa consulta os vínculos CVEProduct e intervalos VersionReference/AffectedProduct desses produtos.
+        - Compara installed_version com os intervalos (limites inclusivos/exclusivos) por índice de intervalos.
         - Aplica filtros auxiliares por modelo e sistema operacional na descrição.
         """
-        from sqlalchemy import union
-        import re
         try:
-            from app.models.asset_product import AssetProduct
-            from app.models.cve_product import CVEProduct
-            from app.models.vulnerability import Vulnerability
-            from app.models.version_reference import VersionReference
-            from app.models.affected_product import AffectedProduct
-        except Exception:
-            return []
-
-        asset_products = (
-            self.session.query(AssetProduct)
-            .filter(AssetProduct.asset_id == asset_id)
-            .all()
-        )
-        if not asset_products:
-            return []
-
-        product_ids = [ap.product_id for ap in asset_products if ap.product_id]
-        base_query = self.session.query(Vulnerability)
-        cve_ids = set()
-        if product_ids:
-            cve_ids.update([row[0] for row in (
-                self.session.query(CVEProduct.cve_id)
-                .filter(CVEProduct.product_id.in_(product_ids))
-                .all()
-            )])
-            cve_ids.update([row[0] for row in (
-                self.session.query(VersionReference.cve_id)
-                .filter(VersionReference.product_id.in_(product_ids))
-                .all()
-            )])
-
-        if cve_ids:
-            base_query = base_query.filter(Vulnerability.cve_id.in_(list(cve_ids))).distinct()
-
-        vulns = base_query.all()
-        if not vulns:
+            from app.services.asset_correlation_service import AssetCorrelationService
+            return AssetCorrelationService(self.session).get_vulnerabilities_by_asset(asset_id)
+        except Exception as e:
+            from app.utils.terminal_feedback import terminal_feedback
+            terminal_feedback.warning(f"⚠️ Falha na correlação de vulnerabilidades do ativo {asset_id}: {e}")
             return []
 
-        # Pós-processamento por regex: versão / modelo / SO
-        meta_by_pid = {}
-        for ap in asset_products:
-            meta_by_pid.setdefault(ap.product_id, []).append({
-                'model_name': (ap.model_name or '').strip(),
-                'operating_system': (ap.operating_system or '').strip(),
-                'installed_version': (ap.installed_version or '').strip(),
-            })
-
-        def matches_meta(v: Vulnerability) -> bool:
-            if not meta_by_pid:
-                return True
-            desc = (v.description or '').lower()
-            refs = self.session.query(VersionReference).filter(VersionReference.cve_id == v.cve_id).all()
-            # Corrigir FK: Vulnerability usa chave primária 'cve_id', não 'id'
-            affs = self.session.query(AffectedProduct).filter(AffectedProduct.vulnerability_id == v.cve_id).all()
-            affected_map = {}
-            for r in refs:
-                affected_map.setdefault(r.product_id, []).append(r.affected_version or '')
-            for a in affs:
-                affected_map.setdefault(a.product_id, []).append(a.affected_versions or '')
-            for pid, metas in meta_by_pid.items():
-                for meta in metas:
-                    model = meta['model_name'].lower() if meta['model_name'] else ''
-                    os_ = meta['operating_system'].lower() if meta['operating_system'] else ''
-                    installed = meta['installed_version']
-                    model_ok = True if not model else (model in desc)
-                    os_ok = True if not os_ else (os_ in desc)
-                    version_ok = True
-                    if installed:
-                        patterns = [p for p in affected_map.get(pid, []) if p]
-                        if patterns:
-                            version_ok = False
-                            for pat in patterns:
-                                try:
-                                    rx = re.compile(pat.strip(), flags=re.IGNORECASE)
-                                    if rx.search(installed):
-                                        version_ok = True
-                                        break
-                                except re.error:
-                                    if pat.lower() in installed.lower():
-                                        version_ok = True
-                                        break
-                    if model_ok and os_ok and version_ok:
-                        return True
-            return False
-
-        filtered = [v for v in vulns if matches_meta(v)]
-        return filtered
-
     def _process_parts(self, cve_id: str, cpe_configurations: List[Dict]) -> None:
         """Extrai e persiste os "parts" das CPEs para uma CVE.
 
@@ -1799,21 +1935,7 @@ class VulnerabilityService:
             # Remover associações anteriores para esta CVE
             self.session.query(CVEPart).filter_by(cve_id=cve_id).delete()
 
-            parts_found = set()
-            for config in cpe_configurations or []:
-                nodes = config.get('nodes', []) if isinstance(config, dict) else []
-                for node in nodes:
-                    cpe_matches = node.get('cpeMatch', []) if isinstance(node, dict) else []
-                    for cpe_match in cpe_matches:
-                        cpe_uri = cpe_match.get('criteria', '') if isinstance(cpe_match, dict) else ''
-                        if isinstance(cpe_uri, str) and cpe_uri.startswith('cpe:2.3:'):
-                            parts = cpe_uri.split(':')
-                            if len(parts) > 2:
-                                part_letter = parts[2]
-                                if part_letter in ('a', 'o', 'h'):
-                                    parts_found.add(part_letter)
-
-            for part_letter in parts_found:
+            for part_letter in _cpe_parts_from_configurations(cpe_configurations):
                 self.session.add(CVEPart(cve_id=cve_id, part=part_letter))
 
         except Exception as e:
@@ -1860,8 +1982,7 @@ class VulnerabilityService:
                     tags_str = ', '.join(tags) if tags else None
                     
                     # Check if this reference indicates a patch
-                    patch_tags = ['Patch', 'Vendor Advisory', 'Mitigation', 'Fix']
-                    is_patch = any(tag in tags for tag in patch_tags) if tags else False
+                    is_patch = any(tag in tags for tag in _PATCH_REFERENCE_TAGS) if tags else False
                     
                     reference = Reference(
                         cve_id=cve_id,
@@ -1918,34 +2039,15 @@ class VulnerabilityService:
                     self.session.add(product)
                     self.session.flush()  # Get the ID
                 
-                # Create version reference only if we have a valid affected version
-                affected_version = version_range.get('version')
-                if not affected_version:
-                    # If no specific version, use version range info to construct one
-                    if version_range.get('version_start_including'):
-                        affected_version = f">= {version_range['version_start_including']}"
-                    elif version_range.get('version_start_excluding'):
-                        affected_version = f"> {version_range['version_start_excluding']}"
-                    elif version_range.get('version_end_including'):
-                        affected_version = f"<= {version_range['version_end_including']}"
-                    elif version_range.get('version_end_excluding'):
-                        affected_version = f"< {version_range['version_end_excluding']}"
-                    else:
-                        affected_version = "*"  # Fallback for unknown version
-                
+                # Create version reference (affected/fixed derived from the version range)
+                affected_version, fixed_version, fixed_inclusive, affected_versions_str = _version_range_labels(version_range)
                 version_ref = VersionReference(
                     cve_id=cve_id,
                     product_id=product.id,
                     affected_version=affected_version,
-                    fixed_version=None  # Will be determined from version ranges
+                    fixed_version=fixed_version,
+                    fixed_inclusive=fixed_inclusive
                 )
-                
-                # Determine fixed version from version ranges
-                if version_range.get('version_end_including'):
-                    version_ref.fixed_version = version_range.get('version_end_including')
-                elif version_range.get('version_end_excluding'):
-                    version_ref.fixed_version = version_range.get('version_end_excluding')
-                
                 self.session.add(version_ref)
                 
                 # Create or update affected product entry
@@ -1955,24 +2057,6 @@ class VulnerabilityService:
                 ).first()
                 
                 if not affected_product:
-                    # Build affected versions string from version range
-                    affected_versions_parts = []
-                    
-                    if version_range.get('version'):
-                        affected_versions_parts.append(f"v{version_range['version']}")
-                    
-                    if version_range.get('version_start_including'):
-                        affected_versions_parts.append(f">= {version_range['version_start_including']}")
-                    elif version_range.get('version_start_excluding'):
-                        affected_versions_parts.append(f"> {version_range['version_start_excluding']}")
-                    
-                    if version_range.get('version_end_including'):
-                        affected_versions_parts.append(f"<= {version_range['version_end_including']}")
-                    elif version_range.get('version_end_excluding'):
-                        affected_versions_parts.append(f"< {version_range['version_end_excluding']}")
-                    
-                    affected_versions_str = ", ".join(affected_versions_parts) if affected_versions_parts else None
-                    
                     affected_product = AffectedProduct(
                         vulnerability_id=cve_id,
                         product_id=product.id,
@@ -2137,10 +2221,18 @@ class VulnerabilityService:
 
         return created_count
 
-    def sync_all_assets(self, limit_per_asset: int = 1000, only_active: bool = True) -> int:
+    def sync_all_assets(self, limit_per_asset: int = 1000, only_active: bool = True, fleet: bool = True, incremental: bool = True) -> int:
         """Create AssetVulnerability links for all assets with a vendor assigned.
         Returns total number of created associations across all assets.
+
+        With `fleet=True` (default) links are computed for the whole fleet with set-based
+        SQL, only for CVEs touched since the previous run (see AssetSyncService);
+        `limit_per_asset` only applies to the legacy per-asset loop.
         """
+        if fleet:
+            from app.services.asset_sync_service import AssetSyncService
+            return AssetSyncService(self.session).sync_fleet(only_active=only_active, incremental=incremental).created
+
         from app.models.asset import Asset
         total_created = 0
         q = self.session.query(Asset).filter(Asset.vendor_id.isnot(None))
@@ -110,6 +110,24 @@ class BaseConfig:
     WKHTMLTOPDF_PATH = os.getenv('WKHTMLTOPDF_PATH')
     # Base URL used by HTML-to-PDF generators to resolve assets
     BASE_URL = os.getenv('BASE_URL', 'http://localhost:4443')
+    # Renderização de PDF: processos dedicados (0 = inline na thread chamadora), timeout por
+    # renderização (s) e tempo até tentar de novo uma engine que falhou (s)
+    PDF_RENDER_WORKERS = getenv_typed('PDF_RENDER_WORKERS', int, 0)
+    PDF_RENDER_TIMEOUT = getenv_typed('PDF_RENDER_TIMEOUT', float, 120.0)
+    PDF_ENGINE_RETRY_SECONDS = getenv_typed('PDF_ENGINE_RETRY_SECONDS', float, 300.0)
+    # Cache de PDFs por hash do conteúdo do relatório (subdiretório de TEMP_DIR; 0 MB = desativado)
+    PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR', 'pdf_cache')
+    PDF_CACHE_MAX_MB = getenv_typed('PDF_CACHE_MAX_MB', int, 512)
+    # Exportação de vulnerabilidades em streaming: linhas buscadas por ida ao cursor do banco
+    EXPORT_STREAM_BATCH_SIZE = getenv_typed('EXPORT_STREAM_BATCH_SIZE', int, 1000)
+    # Fila de geração de relatórios (tabela report_jobs): threads por processo (0 = só enfileirar,
+    # outro processo consome), limite global de jobs em execução (0 = sem limite), tentativas,
+    # backoff inicial (s) e tempo sem heartbeat até um job voltar para a fila (s)
+    REPORT_JOB_WORKERS = getenv_typed('REPORT_JOB_WORKERS', int, 2)
+    REPORT_JOB_MAX_RUNNING = getenv_typed('REPORT_JOB_MAX_RUNNING', int, 0)
+    REPORT_JOB_MAX_ATTEMPTS = getenv_typed('REPORT_JOB_MAX_ATTEMPTS', int, 3)
+    REPORT_JOB_RETRY_SECONDS = getenv_typed('REPORT_JOB_RETRY_SECONDS', float, 30.0)
+    REPORT_JOB_STALE_SECONDS = getenv_typed('REPORT_JOB_STALE_SECONDS', float, 300.0)
     CSP = {
         'default-src': ["'self'"],
         'script-src':  [
@@ -168,10 +186,21 @@ class BaseConfig:
     # não há serviço Redis local. Pode ser habilitado via variável de ambiente.
     REDIS_CACHE_ENABLED = getenv_typed('REDIS_CACHE_ENABLED', lambda x: x.lower() == 'true', False)
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    # TTL (s) do snapshot de bootstrap usado pelo guard de primeiro acesso; invalidado via Redis pub/sub quando habilitado
+    BOOTSTRAP_STATE_TTL = getenv_typed('BOOTSTRAP_STATE_TTL', float, 30.0)
+    # Stream SSE de progresso da sync (/api/v1/sync/progress/stream): conexões simultâneas por processo
+    # (cada uma ocupa uma thread do gunicorn), duração máxima (s) antes de o cliente reconectar e
+    # intervalo (s) de releitura do banco quando não há Redis nem eventos locais
+    SYNC_PROGRESS_STREAM_MAX = getenv_typed('SYNC_PROGRESS_STREAM_MAX', int, 2)
+    SYNC_PROGRESS_STREAM_TIMEOUT = getenv_typed('SYNC_PROGRESS_STREAM_TIMEOUT', float, 300.0)
+    SYNC_PROGRESS_RESEED_SECONDS = getenv_typed('SYNC_PROGRESS_RESEED_SECONDS', float, 30.0)
     REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
     REDIS_PORT = getenv_typed('REDIS_PORT', int, 6379)
     REDIS_DB = getenv_typed('REDIS_DB', int, 0)
     REDIS_PASSWORD = os.getenv('REDIS_PASSWORD')
+    # Codec dos valores do cache: compressor 'auto' (zstd > lz4 > zlib, conforme instalado), 'zstd', 'lz4', 'zlib' ou 'none'
+    CACHE_COMPRESSOR = os.getenv('CACHE_COMPRESSOR', 'auto')
+    CACHE_FORMAT = os.getenv('CACHE_FORMAT', 'auto')  # 'auto' (orjson se instalado) ou 'json'
     
     # OpenAI Configuration
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
@@ -181,6 +210,21 @@ class BaseConfig:
     OPENAI_TIMEOUT = getenv_typed('OPENAI_TIMEOUT', int, 30)
     OPENAI_MAX_RETRIES = getenv_typed('OPENAI_MAX_RETRIES', int, 2)
     OPENAI_RETRY_BACKOFF = getenv_typed('OPENAI_RETRY_BACKOFF', float, 1.5)
+    # Chamadas simultâneas ao provedor por processo (todas as gerações de relatório)
+    OPENAI_MAX_CONCURRENCY = getenv_typed('OPENAI_MAX_CONCURRENCY', int, 4)
+    # Análises de IA de um relatório: quantas em paralelo (1 = sequencial), prazo (s) de cada uma
+    # e orçamento de tokens compartilhado entre elas (0 = sem limite)
+    AI_ANALYSIS_CONCURRENCY = getenv_typed('AI_ANALYSIS_CONCURRENCY', int, 4)
+    AI_ANALYSIS_TIMEOUT = getenv_typed('AI_ANALYSIS_TIMEOUT', float, 120.0)
+    AI_REPORT_TOKEN_BUDGET = getenv_typed('AI_REPORT_TOKEN_BUDGET', int, 0)
+    # Cache de respostas de LLM (relatórios e análise de risco por CVE): backend 'auto' (Redis com
+    # REDIS_CACHE_ENABLED, senão SQLite em LLM_CACHE_DIR), 'redis', 'disk' ou 'none'; validade (h),
+    # janela extra (h) em que a resposta vencida é servida enquanto é regenerada e limite de tamanho (LRU)
+    LLM_CACHE_BACKEND = os.getenv('LLM_CACHE_BACKEND', 'auto')
+    LLM_CACHE_DIR = os.getenv('LLM_CACHE_DIR', str(INSTANCE_PATH / 'cache' / 'llm'))
+    LLM_CACHE_TTL_HOURS = getenv_typed('LLM_CACHE_TTL_HOURS', float, 168.0)
+    LLM_CACHE_STALE_HOURS = getenv_typed('LLM_CACHE_STALE_HOURS', float, 720.0)
+    LLM_CACHE_MAX_MB = getenv_typed('LLM_CACHE_MAX_MB', int, 256)
     OPENAI_STREAMING = getenv_typed('OPENAI_STREAMING', int, 0) == 1
     
     # Email Configuration
@@ -192,6 +236,31 @@ class BaseConfig:
     MAIL_USE_SSL = getenv_typed('MAIL_USE_SSL', lambda x: x.lower() == 'true', False)
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', 'noreply@opencvereport.com')
     
+    # Pipeline de páginas do NVDFetcher: páginas em voo simultaneamente (1 = sequencial)
+    # e páginas baixadas aguardando gravação antes de pausar os fetchers
+    NVD_PIPELINE_DEPTH = getenv_typed('NVD_PIPELINE_DEPTH', int, 1)
+    NVD_PIPELINE_QUEUE_SIZE = getenv_typed('NVD_PIPELINE_QUEUE_SIZE', int, 2)
+    # Gravação set-based dos lotes de CVEs (upsert nativo + DELETE/INSERT multi-linha por tabela filha)
+    NVD_BULK_PERSIST = getenv_typed('NVD_BULK_PERSIST', lambda x: x.lower() == 'true', True)
+    # Cache de páginas da NVD em NVD_CACHE_DIR: limite de tamanho (LRU), validade de janelas
+    # fechadas/abertas e modo replay (serve qualquer página em disco, sem TTL)
+    NVD_CACHE_ENABLED = getenv_typed('NVD_CACHE_ENABLED', lambda x: x.lower() == 'true', True)
+    NVD_CACHE_MAX_MB = getenv_typed('NVD_CACHE_MAX_MB', int, 2048)
+    NVD_CACHE_TTL_HOURS = getenv_typed('NVD_CACHE_TTL_HOURS', float, 168.0)
+    NVD_CACHE_OPEN_TTL = getenv_typed('NVD_CACHE_OPEN_TTL', float, 600.0)
+    NVD_CACHE_REPLAY = getenv_typed('NVD_CACHE_REPLAY', lambda x: x.lower() == 'true', False)
+    # Leitura incremental das páginas: itens de `vulnerabilities` lidos um a um do disco
+    NVD_STREAM_PARSE = getenv_typed('NVD_STREAM_PARSE', lambda x: x.lower() == 'true', True)
+    # Processos para a extração de CVEs (-1 = núcleos disponíveis - 1; 0 = sem pool)
+    NVD_EXTRACT_WORKERS = getenv_typed('NVD_EXTRACT_WORKERS', int, -1)
+    NVD_EXTRACT_START_METHOD = os.getenv('NVD_EXTRACT_START_METHOD', 'spawn')
+    # Alertas de monitoramento: só avalia CVEs com written_at mais antigo que este atraso,
+    # para que lotes gravados em paralelo já estejam confirmados quando o cursor passar por eles
+    MONITORING_SETTLE_SECONDS = getenv_typed('MONITORING_SETTLE_SECONDS', float, 300.0)
+    # Sincronização incremental da frota de ativos: marca d'água de written_at fica este atraso
+    # atrás do início da execução (lotes ainda não confirmados são relidos na execução seguinte)
+    ASSET_SYNC_SETTLE_SECONDS = getenv_typed('ASSET_SYNC_SETTLE_SECONDS', float, 300.0)
+
     # NVD API Configuration - loaded dynamically to ensure .env is loaded first
     @property
     def NVD_API_BASE(self):
@@ -211,7 +280,7 @@ class BaseConfig:
     
     @property
     def NVD_CACHE_DIR(self):
-        return os.getenv('NVD_CACHE_DIR', 'cache')
+        return os.getenv('NVD_CACHE_DIR', str(self.INSTANCE_PATH / 'cache' / 'nvd'))
     
     @property
     def NVD_REQUEST_TIMEOUT(self):
@@ -70,7 +70,36 @@
       .then(function(json){ return normalizeSyncProgressPayload(json || {}); });
   }
 
+  // Progresso via Server-Sent Events: 'snapshot' traz o estado completo e 'progress' só os campos alterados.
+  // Devolve o EventSource (ou null sem suporte); onError é chamado quando o stream é recusado (ex.: 503)
+  // para que a página volte ao polling de getSyncProgress.
+  function subscribeSyncProgress(onProgress, onError) {
+    if (typeof window.EventSource !== 'function') { return null; }
+    var live = {};
+    var es;
+    try { es = new EventSource('/api/v1/sync/progress/stream'); } catch(_) { return null; }
+    function emit(data, replace) {
+      try {
+        var delta = JSON.parse(data || '{}');
+        if (replace) { live = {}; }
+        for (var k in delta) { if (Object.prototype.hasOwnProperty.call(delta, k)) { live[k] = delta[k]; } }
+        onProgress(normalizeSyncProgressPayload({ live: live, total_estimate: live.total }));
+      } catch(_) {}
+    }
+    es.addEventListener('snapshot', function(e){ emit(e.data, true); });
+    es.addEventListener('progress', function(e){ emit(e.data, false); });
+    es.onerror = function(){
+      // Erros de rede reconectam sozinhos; CLOSED indica resposta não-SSE (401/403/503)
+      if (es.readyState === 2) {
+        es.close();
+        if (typeof onError === 'function') { onError(); }
+      }
+    };
+    return es;
+  }
+
   window.getSyncProgress = getSyncProgress;
+  window.subscribeSyncProgress = subscribeSyncProgress;
   window.computeSyncPollingInterval = computeSyncPollingInterval;
   window.normalizeSyncProgressPayload = normalizeSyncProgressPayload;
 
@@ -3,13 +3,14 @@
 Middleware de rate limiting para Flask API
 """
 
+import math
 import time
 import logging
 from functools import wraps
 from typing import Dict, Optional, Callable, Any
 from flask import request, jsonify, g
 from werkzeug.exceptions import TooManyRequests
-from app.utils.rate_limiter import RateLimitConfig, AdvancedRateLimiter
+from app.utils.rate_limit_backends import RateLimitDecision, create_rate_limit_backend
 from app.config.rate_limiter_config import get_rate_limiter_config
 
 logger = logging.getLogger(__name__)
@@ -21,16 +22,9 @@ class FlaskRateLimiter:
     
     def __init__(self, app=None, config=None):
         self.app = app
-        self.limiters: Dict[str, AdvancedRateLimiter] = {}
         self.config = config or get_rate_limiter_config()
-        self.default_config = RateLimitConfig(
-            requests=100,
-            window_seconds=60,
-            burst_allowance=10,
-            backoff_factor=1.5,
-            max_backoff=300.0,
-            jitter=True
-        )
+        # Backend GCRA (memória ou Redis), criado em init_app ou na primeira verificação
+        self.backend = None
         
         if app is not None:
             self.init_app(app)
@@ -43,9 +37,12 @@ class FlaskRateLimiter:
         
         # Configurações padrão
         app.config.setdefault('RATE_LIMIT_ENABLED', True)
-        app.config.setdefault('RATE_LIMIT_STORAGE', 'memory')  # memory, redis, etc.
+        app.config.setdefault('RATE_LIMIT_STORAGE', 'redis' if getattr(self.config, 'USE_REDIS', False) else 'memory')  # memory, redis
         app.config.setdefault('RATE_LIMIT_STRATEGY', 'ip')  # ip, user, endpoint
         
+        self.backend = None
+        self._get_backend()
+        
         # Registrar middleware
         app.before_request(self._before_request)
         app.after_request(self._after_request)
@@ -91,97 +88,74 @@ class FlaskRateLimiter:
             'unknown'
         )
     
-    def _get_limiter(self, client_id: str, config: Optional[RateLimitConfig] = None, endpoint: str = None) -> AdvancedRateLimiter:
+    def _get_backend(self):
         """
-        Obtém ou cria um rate limiter para o cliente
+        Obtém (criando na primeira chamada) o backend de contagem
         """
-        if client_id not in self.limiters:
-            if config is None:
-                # Get endpoint-specific configuration
-                endpoint_config = self.config.get_rate_limit_for_endpoint(endpoint or '')
-                limiter_config = RateLimitConfig(
-                    requests=endpoint_config['requests'],
-                    window_seconds=endpoint_config['window'],
-                    burst_allowance=10,
-                    backoff_factor=1.5,
-                    max_backoff=300.0,
-                    jitter=True
-                )
-            else:
-                limiter_config = config
-            
-            self.limiters[client_id] = AdvancedRateLimiter(
-                limiter_config, 
-                f"Flask API ({client_id})"
-            )
-        
-        return self.limiters[client_id]
-    
+        if self.backend is None:
+            storage = 'redis' if getattr(self.config, 'USE_REDIS', False) else 'memory'
+            redis_url = getattr(self.config, 'REDIS_URL', None)
+            if self.app is not None:
+                storage = self.app.config.get('RATE_LIMIT_STORAGE', storage) or storage
+                redis_url = self.app.config.get('REDIS_URL', redis_url)
+            self.backend = create_rate_limit_backend(storage, redis_url)
+        return self.backend
+
+    def _check(self, key: str, requests: int, window: int) -> RateLimitDecision:
+        return self._get_backend().hit(key, requests, window)
+
+    @staticmethod
+    def _set_headers(response, decision: RateLimitDecision, window: int) -> None:
+        response.headers['X-RateLimit-Limit'] = str(decision.limit)
+        response.headers['X-RateLimit-Remaining'] = str(decision.remaining)
+        response.headers['X-RateLimit-Reset'] = str(int(time.time() + math.ceil(decision.reset_after)))
+        response.headers['X-RateLimit-Window'] = str(window)
+
     def _before_request(self):
         """
         Middleware executado antes de cada requisição
         """
-        logger.info(f"Rate limiter _before_request called for {request.path}")
-        
         if not self.app.config.get('RATE_LIMIT_ENABLED', True):
-            logger.info("Rate limiting disabled in config")
             return
         
         # Pular rate limiting para rotas específicas
         if self._should_skip_rate_limiting():
-            logger.info(f"Skipping rate limiting for {request.path}")
             return
         
-        logger.info(f"Applying rate limiting to {request.path}")
-        
         client_id = self._get_client_id()
         # Use request.path para obter configuração específica por categoria (/api, /auth, etc.)
-        limiter = self._get_limiter(client_id, endpoint=request.path)
-        
-        # Verificar se pode fazer a requisição
-        now = time.time()
-        limiter._cleanup_old_requests(now)
-        wait_time = limiter._calculate_wait_time(now)
+        endpoint_config = self.config.get_rate_limit_for_endpoint(request.path or '')
+        requests_, window = endpoint_config['requests'], endpoint_config['window']
+        decision = self._check(f"{client_id}:{requests_}/{window}", requests_, window)
         
-        if wait_time > 0:
+        if not decision.allowed:
             # Rate limit excedido
-            stats = limiter.get_stats()
-            
+            retry_after = int(decision.retry_after) + 1
             logger.warning(
                 f"Rate limit excedido para {client_id}. "
                 f"Endpoint: {request.endpoint}, "
-                f"Aguardando: {wait_time:.2f}s"
+                f"Aguardando: {decision.retry_after:.2f}s"
             )
             
             # Retornar erro 429
             response = jsonify({
                 'error': 'Rate limit exceeded',
-                'message': f'Too many requests. Try again in {wait_time:.0f} seconds.',
-                'retry_after': int(wait_time) + 1,
+                'message': f'Too many requests. Try again in {retry_after} seconds.',
+                'retry_after': retry_after,
                 'stats': {
-                    'requests_in_window': stats['requests_in_window'],
-                    'window_utilization': f"{stats['window_utilization']:.1f}%"
+                    'requests_in_window': decision.limit - decision.remaining,
+                    'window_utilization': f"{(decision.limit - decision.remaining) / decision.limit * 100:.1f}%"
                 }
             })
             response.status_code = 429
-            response.headers['Retry-After'] = str(int(wait_time) + 1)
-            response.headers['X-RateLimit-Limit'] = str(limiter.config.requests)
-            response.headers['X-RateLimit-Remaining'] = str(
-                max(0, limiter.config.requests - len(limiter.request_times))
-            )
-            response.headers['X-RateLimit-Reset'] = str(
-                int(now + limiter.config.window_seconds)
-            )
+            response.headers['Retry-After'] = str(retry_after)
+            self._set_headers(response, decision, window)
             
             raise TooManyRequests(response=response)
         
-        # Registrar a requisição
-        limiter.request_times.append(now)
-        limiter.stats['total_requests'] += 1
-        
-        # Armazenar limiter no contexto da requisição
-        g.rate_limiter = limiter
-        g.rate_limiter_endpoint_path = request.path
+        # Armazenar decisão no contexto da requisição
+        g.rate_limit_decision = decision
+        g.rate_limit_window = window
     
     def _after_request(self, response):
         """
@@ -191,21 +165,9 @@ class FlaskRateLimiter:
             return response
         
         # Adicionar headers de rate limiting
-        if hasattr(g, 'rate_limiter') and self.config.INCLUDE_HEADERS:
-            limiter = g.rate_limiter
-            now = time.time()
-            # Utilize o path para determinar a categoria de rate limit
-            endpoint_path = getattr(g, 'rate_limiter_endpoint_path', '')
-            endpoint_config = self.config.get_rate_limit_for_endpoint(endpoint_path or '')
-            
-            response.headers['X-RateLimit-Limit'] = str(endpoint_config['requests'])
-            response.headers['X-RateLimit-Remaining'] = str(
-                max(0, limiter.config.requests - len(limiter.request_times))
-            )
-            response.headers['X-RateLimit-Reset'] = str(
-                int(now + limiter.config.window_seconds)
-            )
-            response.headers['X-RateLimit-Window'] = str(endpoint_config['window'])
+        decision = getattr(g, 'rate_limit_decision', None)
+        if decision is not None and self.config.INCLUDE_HEADERS:
+            self._set_headers(response, decision, getattr(g, 'rate_limit_window', 0))
         
         return response
     
@@ -215,21 +177,18 @@ class FlaskRateLimiter:
         """
         # Check if rate limiting is enabled
         if not self.config.RATE_LIMITING_ENABLED:
-            logger.info(f"Rate limiting disabled in config: {self.config.RATE_LIMITING_ENABLED}")
             return True
         
         # Skip for configured routes
         if self.config.should_skip_route(request.path):
-            logger.info(f"Skipping route {request.path} - in skip list")
             return True
         
         # Skip for whitelisted IPs
         client_ip = self._get_client_id_by_ip()
         if self.config.is_whitelisted_ip(client_ip):
-            logger.info(f"Skipping IP {client_ip} - whitelisted")
+            logger.debug(f"Skipping IP {client_ip} - whitelisted")
             return True
         
-        logger.info(f"Rate limiting should be applied to {request.path} from {client_ip}")
         return False
     
     def limit(self, requests: int, window: int = 60, **kwargs):
@@ -239,7 +198,7 @@ class FlaskRateLimiter:
         Args:
             requests: Número de requisições permitidas
             window: Janela de tempo em segundos
-            **kwargs: Argumentos adicionais para RateLimitConfig
+            **kwargs: Aceitos por compatibilidade (backoff/jitter não se aplicam ao GCRA)
         """
         def decorator(f):
             @wraps(f)
@@ -249,23 +208,11 @@ class FlaskRateLimiter:
                 
                 client_id = self._get_client_id()
                 
-                # Criar configuração específica para esta rota
-                config = RateLimitConfig(
-                    requests=requests,
-                    window_seconds=window,
-                    **kwargs
-                )
-                
-                # Usar limiter específico para esta rota
-                route_key = f"{client_id}_{request.endpoint}"
-                limiter = self._get_limiter(route_key, config)
+                # Usar chave específica para esta rota
+                route_key = f"{client_id}_{request.endpoint}:{requests}/{window}"
+                decision = self._check(route_key, requests, window)
                 
-                # Verificar rate limit
-                now = time.time()
-                limiter._cleanup_old_requests(now)
-                wait_time = limiter._calculate_wait_time(now)
-                
-                if wait_time > 0:
+                if not decision.allowed:
                     logger.warning(
                         f"Rate limit específico excedido para {client_id} "
                         f"na rota {request.endpoint}"
@@ -273,92 +220,50 @@ class FlaskRateLimiter:
                     
                     return jsonify({
                         'error': 'Rate limit exceeded',
-                        'message': f'Too many requests for this endpoint. Try again in {wait_time:.0f} seconds.',
-                        'retry_after': int(wait_time) + 1
+                        'message': f'Too many requests for this endpoint. Try again in {decision.retry_after:.0f} seconds.',
+                        'retry_after': int(decision.retry_after) + 1
                     }), 429
                 
-                # Registrar requisição
-                limiter.request_times.append(now)
-                limiter.stats['total_requests'] += 1
-                
                 return f(*args, **kwargs)
             
             return decorated_function
         return decorator
     
-    def get_stats(self, client_id: Optional[str] = None) -> Dict[str, Any]:
+    def get_stats(self) -> Dict[str, Any]:
         """
         Obtém estatísticas de rate limiting
         
-        Args:
-            client_id: ID específico do cliente (opcional)
-            
         Returns:
-            Dicionário com estatísticas
+            Dicionário com estatísticas do backend
         """
-        if client_id and client_id in self.limiters:
-            return self.limiters[client_id].get_stats()
-        
-        # Retornar estatísticas agregadas
-        total_stats = {
-            'total_clients': len(self.limiters),
-            'total_requests': 0,
-            'total_rate_limited': 0,
-            'clients': {}
+        stats = self._get_backend().get_stats()
+        return {
+            **stats,
+            'total_rate_limited': stats.get('rate_limited_requests', 0),
         }
-        
-        for cid, limiter in self.limiters.items():
-            stats = limiter.get_stats()
-            total_stats['total_requests'] += stats['total_requests']
-            total_stats['total_rate_limited'] += stats['rate_limited_requests']
-            total_stats['clients'][cid] = stats
-        
-        return total_stats
     
     def reset_stats(self, client_id: Optional[str] = None) -> None:
         """
-        Reseta estatísticas de rate limiting
+        Zera o estado de rate limiting
         
         Args:
-            client_id: ID específico do cliente (opcional)
+            client_id: Chave específica (opcional; sem ela, todas)
         """
-        if client_id and client_id in self.limiters:
-            self.limiters[client_id].reset_stats()
-        else:
-            for limiter in self.limiters.values():
-                limiter.reset_stats()
+        self._get_backend().reset(client_id)
     
     def cleanup_old_limiters(self, max_age: int = 3600) -> int:
         """
-        Remove limiters antigos para economizar memória
+        Remove estado de chaves ociosas (buckets já cheios) do backend em memória
         
         Args:
-            max_age: Idade máxima em segundos
+            max_age: Mantido por compatibilidade; o GCRA sabe quando a chave deixa de importar
             
         Returns:
-            Número de limiters removidos
+            Número de chaves removidas
         """
-        now = time.time()
-        removed = 0
-        
-        # Identificar limiters para remoção
-        to_remove = []
-        for client_id, limiter in self.limiters.items():
-            if limiter.request_times:
-                last_request = max(limiter.request_times)
-                if now - last_request > max_age:
-                    to_remove.append(client_id)
-            elif now - limiter.stats.get('created_at', now) > max_age:
-                to_remove.append(client_id)
-        
-        # Remover limiters antigos
-        for client_id in to_remove:
-            del self.limiters[client_id]
-            removed += 1
-        
+        removed = self._get_backend().purge()
         if removed > 0:
-            logger.info(f"Removidos {removed} rate limiters antigos")
-        
+            logger.debug(f"Removidos {removed} estados de rate limit ociosos")
         return removed
 
 # Instância global para uso fácil
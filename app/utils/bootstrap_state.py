@@ -0,0 +1,179 @@
+"""
+Snapshot em memória do estado de bootstrap usado pelo guard de primeiro acesso.
+
+O guard `_first_user_guard` (main_startup) consulta usuários e chaves de
+SyncMetadata a cada request. Depois do bootstrap (root criado e primeira
+sincronização concluída) esse estado praticamente não muda, então o snapshot
+"estável" é mantido por processo com TTL curto e invalidado:
+
+- localmente, no commit de qualquer sessão que alterou usuários ou as chaves
+  de bootstrap em SyncMetadata (eventos ORM);
+- nos demais processos, via Redis pub/sub quando REDIS_CACHE_ENABLED está ativo.
+
+Sem Redis, o TTL limita o tempo em que outro processo pode ver estado antigo.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Chaves de SyncMetadata que alteram a decisão do guard
+BOOTSTRAP_KEYS = frozenset({
+    'require_root_setup',
+    'nvd_first_sync_completed',
+    'nvd_first_sync_scheduled',
+    'nvd_sync_progress_status',
+})
+
+INVALIDATION_CHANNEL = 'open_monitor:bootstrap_state'
+
+_SESSION_DIRTY_FLAG = 'bootstrap_state_dirty'
+
+
+@dataclass
+class BootstrapSnapshot:
+    """Estado de bootstrap lido do banco pelo guard."""
+    total_users: int = 0
+    active_users: int = 0
+    require_setup: bool = True
+    first_sync_done: bool = False
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def steady(self) -> bool:
+        """Root configurado e primeira sincronização concluída: o guard não redireciona."""
+        return self.first_sync_done and not self.require_setup
+
+
+class BootstrapStateCache:
+    """Cache por processo do snapshot estável de bootstrap."""
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._snapshot: Optional[BootstrapSnapshot] = None
+        self._lock = threading.Lock()
+        self._redis = None
+        self._listener: Optional[threading.Thread] = None
+
+    def configure(self, app) -> None:
+        """Aplica TTL da configuração e, com Redis habilitado, assina o canal de invalidação."""
+        try:
+            self.ttl = float(app.config.get('BOOTSTRAP_STATE_TTL', self.ttl))
+        except Exception:
+            pass
+        if not app.config.get('REDIS_CACHE_ENABLED') or self._listener is not None:
+            return
+        try:
+            import redis
+            self._redis = redis.from_url(
+                app.config.get('REDIS_URL', 'redis://localhost:6379/0'),
+                socket_connect_timeout=2,
+                socket_timeout=2,
+            )
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            self._listener = threading.Thread(target=self._listen, args=(pubsub,), daemon=True)
+            self._listener.start()
+        except Exception as e:
+            logger.debug(f"Invalidação via Redis indisponível para bootstrap state: {e}")
+            self._redis = None
+            self._listener = None
+
+    def _listen(self, pubsub) -> None:
+        while True:
+            try:
+                for message in pubsub.listen():
+                    if message and message.get('type') == 'message':
+                        self.invalidate(broadcast=False)
+            except Exception as e:
+                # Conexão perdida: descartar snapshot (TTL cobre o intervalo) e reassinar
+                self.invalidate(broadcast=False)
+                logger.debug(f"Listener de bootstrap state reconectando: {e}")
+                time.sleep(5)
+                try:
+                    pubsub.subscribe(INVALIDATION_CHANNEL)
+                except Exception:
+                    pass
+
+    def get(self) -> Optional[BootstrapSnapshot]:
+        """Retorna o snapshot estável se ainda dentro do TTL."""
+        snap = self._snapshot
+        if snap is None or (time.monotonic() - snap.loaded_at) > self.ttl:
+            return None
+        return snap
+
+    def store(self, snapshot: BootstrapSnapshot) -> None:
+        """Guarda o snapshot apenas quando estável; estados de bootstrap sempre vão ao banco."""
+        with self._lock:
+            self._snapshot = snapshot if snapshot.steady else None
+
+    def invalidate(self, broadcast: bool = True) -> None:
+        with self._lock:
+            self._snapshot = None
+        if broadcast and self._redis is not None:
+            try:
+                self._redis.publish(INVALIDATION_CHANNEL, b'1')
+            except Exception as e:
+                logger.debug(f"Falha ao publicar invalidação de bootstrap state: {e}")
+
+
+bootstrap_state_cache = BootstrapStateCache()
+
+
+def mark_bootstrap_dirty(session: Any) -> None:
+    """Sinaliza que a sessão alterou estado de bootstrap; o snapshot cai no próximo commit."""
+    try:
+        session.info[_SESSION_DIRTY_FLAG] = True
+    except Exception:
+        bootstrap_state_cache.invalidate()
+
+
+def _on_sync_metadata_change(mapper, connection, target) -> None:
+    if getattr(target, 'key', None) in BOOTSTRAP_KEYS:
+        from sqlalchemy.orm import object_session
+        sess = object_session(target)
+        if sess is not None:
+            mark_bootstrap_dirty(sess)
+        else:
+            bootstrap_state_cache.invalidate()
+
+
+def _on_user_change(mapper, connection, target) -> None:
+    from sqlalchemy.orm import object_session
+    sess = object_session(target)
+    if sess is not None:
+        mark_bootstrap_dirty(sess)
+    else:
+        bootstrap_state_cache.invalidate()
+
+
+@event.listens_for(Session, 'after_commit')
+def _on_commit(session) -> None:
+    if session.info.pop(_SESSION_DIRTY_FLAG, False):
+        bootstrap_state_cache.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _on_rollback(session) -> None:
+    session.info.pop(_SESSION_DIRTY_FLAG, None)
+
+
+def _register_model_listeners() -> None:
+    from app.models.sync_metadata import SyncMetadata
+    from app.models.user import User
+
+    for evt in ('after_insert', 'after_update', 'after_delete'):
+        if not event.contains(SyncMetadata, evt, _on_sync_metadata_change):
+            event.listen(SyncMetadata, evt, _on_sync_metadata_change)
+        if not event.contains(User, evt, _on_user_change):
+            event.listen(User, evt, _on_user_change)
+
+
+_register_model_listeners()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Codecs de serialização dos valores guardados no cache Redis.
+
+Formato v1: ``MAGIC (0xC1) | codec (1 byte) | corpo``. O byte de codec combina o
+formato (orjson/json/pickle, nibble alto) e o compressor (nenhum/zlib/zstd/lz4,
+nibble baixo). 0xC1 nunca inicia um valor gravado pelo formato anterior
+(``JSON:``, ``PICKLE:``, ``GZIP_PICKLE:`` ou JSON puro), então entradas antigas
+continuam legíveis durante a transição.
+
+O valor é serializado uma única vez; a compressão só é aplicada acima do limiar e
+o nível diminui com o tamanho, limitando o custo de CPU dos payloads grandes.
+Dependências opcionais (orjson, zstandard, lz4) são usadas quando instaladas.
+"""
+
+import gzip
+import json
+import logging
+import pickle
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover
+    lz4_frame = None
+
+MAGIC = 0xC1
+
+FORMAT_ORJSON = 1
+FORMAT_JSON = 2
+FORMAT_PICKLE = 3
+
+COMPRESS_NONE = 0
+COMPRESS_ZLIB = 1
+COMPRESS_ZSTD = 2
+COMPRESS_LZ4 = 3
+
+# Acima deste tamanho usa-se o nível mais rápido de cada compressor
+LARGE_PAYLOAD_BYTES = 256 * 1024
+
+
+def _json_default(value: Any) -> str:
+    return str(value)
+
+
+def _dumps_orjson(value: Any) -> bytes:
+    return orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _dumps_json(value: Any) -> bytes:
+    return json.dumps(value, default=_json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _loads_json(data: bytes) -> Any:
+    return json.loads(data)
+
+
+FORMATS: Dict[int, Tuple[Optional[Callable[[Any], bytes]], Callable[[bytes], Any]]] = {
+    FORMAT_ORJSON: (_dumps_orjson if orjson else None, orjson.loads if orjson else _loads_json),
+    FORMAT_JSON: (_dumps_json, _loads_json),
+    FORMAT_PICKLE: (lambda v: pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+}
+
+
+def _zstd_compress(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+# compressor -> (comprimir(dados, grande?), descomprimir); None quando indisponível
+COMPRESSORS: Dict[int, Tuple[Optional[Callable[[bytes, bool], bytes]], Optional[Callable[[bytes], bytes]]]] = {
+    COMPRESS_ZLIB: (lambda d, large: zlib.compress(d, 1 if large else 3), zlib.decompress),
+    COMPRESS_ZSTD: (
+        (lambda d, large: _zstd_compress(d, 1 if large else 3)) if zstandard else None,
+        _zstd_decompress if zstandard else None,
+    ),
+    COMPRESS_LZ4: (
+        (lambda d, large: lz4_frame.compress(d, compression_level=0 if large else 3)) if lz4_frame else None,
+        lz4_frame.decompress if lz4_frame else None,
+    ),
+}
+
+_COMPRESSOR_NAMES = {'none': COMPRESS_NONE, 'zlib': COMPRESS_ZLIB, 'zstd': COMPRESS_ZSTD, 'lz4': COMPRESS_LZ4}
+
+
+def best_compressor() -> int:
+    """zstd > lz4 > zlib, conforme o que estiver instalado."""
+    for cid in (COMPRESS_ZSTD, COMPRESS_LZ4):
+        if COMPRESSORS[cid][0] is not None:
+            return cid
+    return COMPRESS_ZLIB
+
+
+class CacheCodec:
+    """Serializa/deserializa valores do cache (formato v1 com leitura do formato legado).
+
+    Args:
+        compression_threshold: Tamanho (bytes) a partir do qual o corpo é comprimido
+        use_compression: Desliga a compressão quando False
+        compressor: 'auto', 'zstd', 'lz4', 'zlib' ou 'none'
+        fmt: 'auto' (orjson se instalado), 'orjson' ou 'json'
+    """
+
+    def __init__(self, compression_threshold: int = 1024, use_compression: bool = True,
+                 compressor: str = 'auto', fmt: str = 'auto'):
+        self.compression_threshold = compression_threshold
+        if not use_compression or compressor == 'none':
+            self.compressor = COMPRESS_NONE
+        elif compressor == 'auto':
+            self.compressor = best_compressor()
+        else:
+            cid = _COMPRESSOR_NAMES.get(compressor)
+            if cid is None or COMPRESSORS[cid][0] is None:
+                logger.warning(f"Compressor de cache '{compressor}' indisponível; usando o melhor disponível")
+                cid = best_compressor()
+            self.compressor = cid
+        if fmt == 'json' or orjson is None:
+            self.format = FORMAT_JSON
+        else:
+            self.format = FORMAT_ORJSON
+
+    def encode(self, value: Any) -> bytes:
+        fmt = self.format
+        try:
+            body = FORMATS[fmt][0](value)
+        except (TypeError, ValueError, OverflowError):
+            # Referências circulares, inteiros enormes...: pickle
+            fmt = FORMAT_PICKLE
+            body = FORMATS[fmt][0](value)
+        compressor = COMPRESS_NONE
+        if self.compressor != COMPRESS_NONE and len(body) > self.compression_threshold:
+            compressed = COMPRESSORS[self.compressor][0](body, len(body) > LARGE_PAYLOAD_BYTES)
+            if len(compressed) < len(body):
+                body, compressor = compressed, self.compressor
+        return bytes((MAGIC, (fmt << 4) | compressor)) + body
+
+    def decode(self, data: bytes) -> Any:
+        if data[:1] == b'\xc1' and len(data) >= 2:
+            fmt, compressor = data[1] >> 4, data[1] & 0x0F
+            body = memoryview(data)[2:]
+            if compressor != COMPRESS_NONE:
+                decompress = COMPRESSORS.get(compressor, (None, None))[1]
+                if decompress is None:
+                    raise ValueError(f"Compressor {compressor} do cache não está instalado")
+                body = decompress(body)
+            loads = FORMATS.get(fmt, (None, None))[1]
+            if loads is None:
+                raise ValueError(f"Formato {fmt} de cache desconhecido")
+            return loads(bytes(body) if isinstance(body, memoryview) else body)
+        return self.decode_legacy(data)
+
+    @staticmethod
+    def decode_legacy(data: bytes) -> Any:
+        """Formato anterior (prefixos textuais ou JSON puro)."""
+        if data.startswith(b'JSON:'):
+            return json.loads(data[5:].decode('utf-8'))
+        if data.startswith(b'PICKLE:'):
+            return pickle.loads(data[7:])
+        if data.startswith(b'GZIP_PICKLE:'):
+            return pickle.loads(gzip.decompress(data[12:]))
+        return json.loads(data.decode('utf-8'))
+
+    def describe(self) -> str:
+        names = {v: k for k, v in _COMPRESSOR_NAMES.items()}
+        return f"{'orjson' if self.format == FORMAT_ORJSON else 'json'}+{names[self.compressor]}"
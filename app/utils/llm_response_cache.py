@@ -0,0 +1,517 @@
+"""
+Cache compartilhado de respostas de LLM (ReportAIService e RiskReportService).
+
+As entradas são endereçadas por ``<tipo de análise>:<modelo>:<sha256 do prompt>``
+(mensagens de sistema e usuário), de modo que qualquer mudança nos dados que
+entram no prompt gera uma chave nova. O armazenamento é compartilhado entre os
+workers do gunicorn e sobrevive a reinícios:
+
+- ``redis``: valores em ``open_monitor:llm:<chave>`` com expiração nativa; um
+  sorted set (último acesso) e um hash (tamanhos) dão o LRU e a contagem de bytes;
+- ``disk``: índice SQLite (WAL) em ``<LLM_CACHE_DIR>/llm_responses.sqlite3`` com os
+  valores inline (respostas têm poucos KB).
+
+Validade:
+
+- até ``ttl`` a entrada é servida diretamente (``fresh``);
+- até ``ttl + stale_ttl`` é servida imediatamente (``stale``) e revalidada em
+  segundo plano, uma vez por chave e processo (stale-while-revalidate);
+- depois disso é tratada como ausente e removida no próximo despejo.
+
+O total de bytes é limitado por ``max_bytes`` com despejo LRU. Os valores são
+serializados com o CacheCodec do cache Redis. Contadores de acertos/falhas ficam
+em `stats()` (por processo) junto com o uso do armazenamento.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from app.utils.cache_codec import CacheCodec
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = 'llm_responses.sqlite3'
+# Padrão de LLM_CACHE_DIR: dentro de instance/ na raiz do projeto, não no diretório atual
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / 'instance' / 'cache' / 'llm'
+REDIS_PREFIX = 'open_monitor:llm:'
+REDIS_LRU_KEY = 'open_monitor:llm_index:lru'
+REDIS_SIZES_KEY = 'open_monitor:llm_index:sizes'
+
+STATE_FRESH = 'fresh'
+STATE_STALE = 'stale'
+STATE_MISS = 'miss'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    cache_key TEXT PRIMARY KEY,
+    analysis_type TEXT NOT NULL,
+    model TEXT,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at);
+CREATE INDEX IF NOT EXISTS ix_responses_created_at ON responses (created_at);
+"""
+
+
+@dataclass
+class LLMCacheStats:
+    """Contadores do processo atual."""
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    refreshes: int = 0
+    evictions: int = 0
+    errors: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.stale_hits + self.misses
+        return ((self.hits + self.stale_hits) / total * 100) if total else 0.0
+
+
+class DiskLLMBackend:
+    """Entradas num SQLite local; vários processos podem abrir o mesmo arquivo."""
+
+    name = 'disk'
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Conexões SQLite não podem atravessar um fork (workers do gunicorn com preload)
+        if self._conn is None or self._pid != os.getpid():
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.cache_dir / INDEX_FILENAME), check_same_thread=False,
+                                   isolation_level=None, timeout=10)
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+            except sqlite3.DatabaseError:
+                pass
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute('SELECT value, created_at FROM responses WHERE cache_key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                'UPDATE responses SET accessed_at = ?, hits = hits + 1 WHERE cache_key = ?', (time.time(), key),
+            )
+        return bytes(row[0]), float(row[1])
+
+    def put(self, key: str, analysis_type: str, model: Optional[str], data: bytes) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection().execute(
+                'INSERT OR REPLACE INTO responses '
+                '(cache_key, analysis_type, model, value, size, created_at, accessed_at, hits) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, 0)',
+                (key, analysis_type, model, sqlite3.Binary(data), len(data), now, now),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._connection().execute('DELETE FROM responses WHERE cache_key = ?', (key,))
+
+    def evict(self, max_bytes: int, max_age: float) -> int:
+        """Remove entradas além da janela de validade e, depois, as menos usadas até caber em max_bytes."""
+        with self._lock:
+            conn = self._connection()
+            removed = conn.execute('DELETE FROM responses WHERE created_at < ?', (time.time() - max_age,)).rowcount or 0
+            if not max_bytes:
+                return removed
+            total = int(conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0] or 0)
+            if total <= max_bytes:
+                return removed
+            doomed: List[str] = []
+            for key, size in conn.execute('SELECT cache_key, size FROM responses ORDER BY accessed_at ASC'):
+                if total <= max_bytes:
+                    break
+                doomed.append(key)
+                total -= int(size or 0)
+            conn.executemany('DELETE FROM responses WHERE cache_key = ?', [(k,) for k in doomed])
+        return removed + len(doomed)
+
+    def usage(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._connection().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+            ).fetchone()
+        return {'entries': int(entries), 'bytes': int(total), 'path': str(self.cache_dir / INDEX_FILENAME)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute('DELETE FROM responses')
+
+
+class RedisLLMBackend:
+    """Entradas no Redis compartilhado; o índice LRU/tamanhos fica em duas chaves auxiliares."""
+
+    name = 'redis'
+
+    def __init__(self, client):
+        self.client = client
+
+    def _value_key(self, key: str) -> str:
+        return f"{REDIS_PREFIX}{key}"
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        raw = self.client.get(self._value_key(key))
+        if raw is None:
+            return None
+        self.client.zadd(REDIS_LRU_KEY, {key: time.time()})
+        # 8 bytes iniciais: created_at (ms)
+        return bytes(raw[8:]), int.from_bytes(raw[:8], 'big') / 1000.0
+
+    def put(
+        self, key: str, analysis_type: str, model: Optional[str], data: bytes, expire: Optional[int] = None,
+    ) -> None:
+        now = time.time()
+        payload = int(now * 1000).to_bytes(8, 'big') + data
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(self._value_key(key), payload, ex=expire)
+        pipe.zadd(REDIS_LRU_KEY, {key: now})
+        pipe.hset(REDIS_SIZES_KEY, key, len(payload))
+        pipe.execute()
+
+    def delete(self, key: str) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(self._value_key(key))
+        pipe.zrem(REDIS_LRU_KEY, key)
+        pipe.hdel(REDIS_SIZES_KEY, key)
+        pipe.execute()
+
+    def _forget(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(*[self._value_key(k) for k in keys])
+        pipe.zrem(REDIS_LRU_KEY, *keys)
+        pipe.hdel(REDIS_SIZES_KEY, *keys)
+        pipe.execute()
+
+    def evict(self, max_bytes: int, max_age: float) -> int:
+        # Entradas sem acesso além da janela já expiraram no Redis; limpa o índice
+        expired = [k.decode() if isinstance(k, bytes) else k
+                   for k in self.client.zrangebyscore(REDIS_LRU_KEY, 0, time.time() - max_age)]
+        self._forget(expired)
+        if not max_bytes:
+            return len(expired)
+        sizes = self.client.hgetall(REDIS_SIZES_KEY)
+        total = sum(int(v) for v in sizes.values())
+        if total <= max_bytes:
+            return len(expired)
+        doomed: List[str] = []
+        for raw_key in self.client.zrange(REDIS_LRU_KEY, 0, -1):
+            if total <= max_bytes:
+                break
+            key = raw_key.decode() if isinstance(raw_key, bytes) else raw_key
+            doomed.append(key)
+            total -= int(sizes.get(raw_key, sizes.get(key, 0)) or 0)
+        self._forget(doomed)
+        return len(expired) + len(doomed)
+
+    def usage(self) -> Dict[str, Any]:
+        sizes = self.client.hgetall(REDIS_SIZES_KEY)
+        return {'entries': len(sizes), 'bytes': sum(int(v) for v in sizes.values())}
+
+    def clear(self) -> None:
+        keys = [k.decode() if isinstance(k, bytes) else k for k in self.client.zrange(REDIS_LRU_KEY, 0, -1)]
+        self._forget(keys)
+
+
+class LLMResponseCache:
+    """Cache de respostas de LLM com LRU por bytes, TTL e stale-while-revalidate.
+
+    Args:
+        backend: DiskLLMBackend ou RedisLLMBackend
+        ttl: Segundos em que a entrada é servida sem revalidação
+        stale_ttl: Segundos adicionais em que a entrada vencida ainda é servida enquanto é regenerada
+        max_bytes: Limite do armazenamento (0 = sem limite)
+    """
+
+    def __init__(self, backend, ttl: float = 7 * 86400, stale_ttl: float = 30 * 86400,
+                 max_bytes: int = 256 * 1024 * 1024, codec: Optional[CacheCodec] = None):
+        self.backend = backend
+        self.ttl = max(0.0, float(ttl))
+        self.stale_ttl = max(0.0, float(stale_ttl))
+        self.max_bytes = max(0, int(max_bytes))
+        self.codec = codec or CacheCodec(compression_threshold=2048)
+        self.metrics = LLMCacheStats()
+        self._metrics_lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._key_locks_guard = threading.Lock()
+        self._refreshing: set = set()
+        self._stores_since_evict = 0
+
+    # ------------------------------------------------------------------
+    # Chaves
+    # ------------------------------------------------------------------
+    @staticmethod
+    def make_key(
+        analysis_type: str, model: Optional[str], prompt: Union[str, List[Dict[str, Any]], Dict[str, Any]],
+    ) -> str:
+        """``tipo:modelo:sha256`` do prompt (texto ou lista de mensagens)."""
+        if isinstance(prompt, str):
+            serialized = prompt
+        else:
+            serialized = json.dumps(prompt, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+        return f"{analysis_type}:{model or '-'}:{digest}"
+
+    def _count(self, field: str, n: int = 1) -> None:
+        with self._metrics_lock:
+            setattr(self.metrics, field, getattr(self.metrics, field) + n)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._key_locks_guard:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                if len(self._key_locks) > 1024:
+                    self._key_locks = {k: v for k, v in self._key_locks.items() if v.locked()}
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    # ------------------------------------------------------------------
+    # Leitura / escrita
+    # ------------------------------------------------------------------
+    def lookup(self, key: str) -> Tuple[Optional[Any], str]:
+        """Valor e estado (fresh/stale/miss) sem alterar os contadores de acerto."""
+        try:
+            found = self.backend.get(key)
+        except Exception as e:
+            self._count('errors')
+            logger.debug(f"Falha ao ler cache de LLM ({key[:48]}): {e}")
+            return None, STATE_MISS
+        if found is None:
+            return None, STATE_MISS
+        data, created_at = found
+        age = time.time() - created_at
+        if age > self.ttl + self.stale_ttl:
+            return None, STATE_MISS
+        try:
+            value = self.codec.decode(data)
+        except Exception as e:
+            self._count('errors')
+            logger.warning(f"Entrada corrompida no cache de LLM ({key[:48]}): {e}. Removendo.")
+            self.invalidate(key)
+            return None, STATE_MISS
+        return value, (STATE_FRESH if age <= self.ttl else STATE_STALE)
+
+    def store(self, key: str, value: Any) -> None:
+        analysis_type, _, rest = key.partition(':')
+        model = rest.rpartition(':')[0] or None
+        try:
+            data = self.codec.encode(value)
+            if isinstance(self.backend, RedisLLMBackend):
+                self.backend.put(key, analysis_type, model, data, expire=int(self.ttl + self.stale_ttl) or None)
+            else:
+                self.backend.put(key, analysis_type, model, data)
+            self._count('stores')
+        except Exception as e:
+            self._count('errors')
+            logger.debug(f"Falha ao gravar cache de LLM ({key[:48]}): {e}")
+            return
+        # Despejo amortizado: na primeira gravação do processo e depois a cada 16
+        if self._stores_since_evict % 16 == 0:
+            self.evict()
+        self._stores_since_evict += 1
+
+    def invalidate(self, key: str) -> None:
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            logger.debug(f"Falha ao remover entrada do cache de LLM: {e}")
+
+    def evict(self) -> int:
+        try:
+            removed = self.backend.evict(self.max_bytes, self.ttl + self.stale_ttl)
+        except Exception as e:
+            self._count('errors')
+            logger.debug(f"Falha no despejo do cache de LLM: {e}")
+            return 0
+        if removed:
+            self._count('evictions', removed)
+            logger.debug(f"Cache de LLM: {removed} entradas despejadas")
+        return removed
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any],
+                       cacheable: Optional[Callable[[Any], bool]] = None,
+                       allow_stale: bool = True) -> Any:
+        """Valor em cache ou `compute()`; entradas vencidas são servidas e regeneradas em segundo plano.
+
+        Exceções de `compute` não são armazenadas e chegam ao chamador. `cacheable`
+        pode recusar resultados (ex.: respostas de demonstração).
+        """
+        value, state = self.lookup(key)
+        if state == STATE_FRESH:
+            self._count('hits')
+            return value
+        if state == STATE_STALE and allow_stale:
+            self._count('stale_hits')
+            self._refresh_in_background(key, compute, cacheable)
+            return value
+
+        # Ausente: uma única geração por chave neste processo
+        with self._key_lock(key):
+            value, state = self.lookup(key)
+            if state == STATE_FRESH:
+                self._count('hits')
+                return value
+            self._count('misses')
+            value = compute()
+            if cacheable is None or cacheable(value):
+                self.store(key, value)
+            return value
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Any],
+                               cacheable: Optional[Callable[[Any], bool]]) -> None:
+        with self._key_locks_guard:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _run():
+            try:
+                value = compute()
+                if cacheable is None or cacheable(value):
+                    self.store(key, value)
+                    self._count('refreshes')
+            except Exception as e:
+                logger.info(f"Revalidação do cache de LLM falhou ({key[:48]}); mantendo a entrada anterior: {e}")
+            finally:
+                with self._key_locks_guard:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_run, name='llm-cache-refresh', daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            result = asdict(self.metrics)
+            result['hit_rate'] = round(self.metrics.hit_rate, 2)
+        try:
+            result.update(self.backend.usage())
+        except Exception as e:
+            result['usage_error'] = str(e)
+        result.update({
+            'backend': self.backend.name,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl,
+            'stale_ttl_seconds': self.stale_ttl,
+            'refreshing': len(self._refreshing),
+        })
+        return result
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+class _NullLLMCache:
+    """Usado com LLM_CACHE_BACKEND=none: sempre calcula."""
+
+    @staticmethod
+    def make_key(analysis_type, model, prompt) -> str:
+        return LLMResponseCache.make_key(analysis_type, model, prompt)
+
+    def get_or_compute(self, key, compute, cacheable=None, allow_stale=True):
+        return compute()
+
+    def lookup(self, key):
+        return None, STATE_MISS
+
+    def store(self, key, value) -> None:
+        pass
+
+    def invalidate(self, key) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': 'none'}
+
+    def clear(self) -> None:
+        pass
+
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def _build_backend(app):
+    config = app.config
+    backend = str(config.get('LLM_CACHE_BACKEND') or 'auto').lower()
+    if backend == 'none':
+        return None
+    if backend in ('auto', 'redis') and (backend == 'redis' or config.get('REDIS_CACHE_ENABLED')):
+        try:
+            from app.services.redis_cache_service import get_cache_service
+
+            cache = get_cache_service(app)
+            if cache.available:
+                return RedisLLMBackend(cache.redis_client)
+            logger.warning("Redis indisponível para o cache de LLM; usando disco")
+        except Exception as e:
+            logger.warning(f"Redis indisponível para o cache de LLM ({e}); usando disco")
+    return DiskLLMBackend(config.get('LLM_CACHE_DIR') or DEFAULT_CACHE_DIR)
+
+
+def get_llm_cache(app=None):
+    """Instância do processo, criada a partir da configuração da aplicação (current_app por padrão)."""
+    global _instance
+    if _instance is not None:
+        return _instance
+    with _instance_lock:
+        if _instance is None:
+            if app is None:
+                from flask import current_app
+                app = current_app._get_current_object()
+            config = app.config
+
+            def _get(name, cast, default):
+                try:
+                    value = config.get(name)
+                    return default if value in (None, '') else cast(value)
+                except Exception:
+                    return default
+
+            try:
+                backend = _build_backend(app)
+            except Exception as e:
+                logger.warning(f"Cache de LLM desabilitado: {e}")
+                backend = None
+            if backend is None:
+                _instance = _NullLLMCache()
+            else:
+                codec = CacheCodec(
+                    compression_threshold=2048,
+                    compressor=config.get('CACHE_COMPRESSOR', 'auto') or 'auto',
+                    fmt=config.get('CACHE_FORMAT', 'auto') or 'auto',
+                )
+                _instance = LLMResponseCache(
+                    backend,
+                    ttl=_get('LLM_CACHE_TTL_HOURS', float, 168.0) * 3600,
+                    stale_ttl=_get('LLM_CACHE_STALE_HOURS', float, 720.0) * 3600,
+                    max_bytes=int(_get('LLM_CACHE_MAX_MB', float, 256.0) * 1024 * 1024),
+                    codec=codec,
+                )
+                logger.info(f"Cache de respostas de LLM: backend={backend.name}")
+        return _instance
@@ -0,0 +1,394 @@
+"""
+Cache em disco das páginas da API NVD, endereçado por conteúdo.
+
+Cada página é gravada uma única vez como JSON comprimido (gzip) em
+``<cache_dir>/blobs/<xx>/<sha256>.json.gz``; páginas idênticas (ex.: páginas vazias)
+compartilham o mesmo blob. Um índice SQLite (``<cache_dir>/nvd_pages.sqlite3``)
+mapeia a chave da página (modo, janela, startIndex, resultsPerPage) para o blob,
+com fetched_at, accessed_at, ETag e tamanhos.
+
+Regras de validade:
+
+- janelas fechadas (fim no passado) valem por ``ttl`` — uma ressincronização
+  completa dentro desse prazo é reproduzida do disco, sem rede;
+- janelas abertas (fim ≈ "agora") usam a chave ``open`` e valem por ``open_ttl``,
+  o que permite retomar uma sincronização incremental interrompida;
+- com ``replay`` ativo qualquer entrada é servida, independentemente da idade;
+- entradas vencidas com ETag são revalidadas com If-None-Match (ver NVDFetcher).
+
+O diretório e o índice só são criados no primeiro uso (consulta ou gravação), não
+ao construir o cache. O tamanho total dos blobs é limitado por ``max_bytes`` com
+despejo LRU (accessed_at).
+As gravações comprimem o corpo à medida que ele chega (PageWriter) e as leituras
+descomprimem em streaming (gzip.open).
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = 'nvd_pages.sqlite3'
+# Padrão de NVD_CACHE_DIR: dentro de instance/ na raiz do projeto, não no diretório atual
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / 'instance' / 'cache' / 'nvd'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page_key TEXT PRIMARY KEY,
+    window_mode TEXT NOT NULL,
+    window_start TEXT,
+    window_end TEXT,
+    start_index INTEGER NOT NULL,
+    page_size INTEGER NOT NULL,
+    closed INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    raw_size INTEGER NOT NULL,
+    total_results INTEGER,
+    etag TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_pages_accessed_at ON pages (accessed_at);
+CREATE INDEX IF NOT EXISTS ix_pages_digest ON pages (digest);
+"""
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class PageKey:
+    """Chave normalizada de uma página da NVD."""
+    mode: str
+    start: Optional[str]
+    end: Optional[str]
+    start_index: int
+    page_size: int
+    closed: bool
+
+    @property
+    def value(self) -> str:
+        return f"{self.mode}|{self.start or '-'}|{self.end or '-'}|{self.start_index}|{self.page_size}"
+
+
+@dataclass
+class CachedPage:
+    """Entrada do índice; `fresh` indica se pode ser servida sem consultar a API."""
+    key: PageKey
+    digest: str
+    size: int
+    etag: Optional[str]
+    fetched_at: float
+    fresh: bool
+
+
+class NVDPageCache:
+    """Armazena páginas da NVD como blobs gzip endereçados por SHA-256, com índice SQLite."""
+
+    def __init__(
+        self,
+        cache_dir,
+        max_bytes: int = 2 * 1024 ** 3,
+        ttl: float = 7 * 86400,
+        open_ttl: float = 600,
+        open_slack: float = 3600,
+        replay: bool = False,
+        compresslevel: int = 6,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.blob_dir = self.cache_dir / 'blobs'
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl = float(ttl)
+        self.open_ttl = float(open_ttl)
+        self.open_slack = float(open_slack)
+        self.replay = bool(replay)
+        self.compresslevel = int(compresslevel)
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _ensure_open(self) -> sqlite3.Connection:
+        """Cria o diretório de blobs e abre o índice na primeira utilização."""
+        if self._connection is None:
+            with self._open_lock:
+                if self._connection is None:
+                    self.blob_dir.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(
+                        str(self.cache_dir / INDEX_FILENAME), check_same_thread=False, isolation_level=None,
+                    )
+                    try:
+                        conn.execute('PRAGMA journal_mode=WAL')
+                    except sqlite3.DatabaseError:
+                        pass
+                    conn.executescript(_SCHEMA)
+                    self._connection = conn
+        return self._connection
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        return self._ensure_open()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'NVDPageCache':
+        """Cria o cache a partir do dicionário de configuração do NVDFetcher."""
+        def _get(name, cast, default):
+            try:
+                value = config.get(name)
+                return default if value in (None, '') else cast(value)
+            except Exception:
+                return default
+
+        return cls(
+            config.get('NVD_CACHE_DIR') or DEFAULT_CACHE_DIR,
+            max_bytes=_get('NVD_CACHE_MAX_MB', float, 2048.0) * 1024 * 1024,
+            ttl=_get('NVD_CACHE_TTL_HOURS', float, 168.0) * 3600,
+            open_ttl=_get('NVD_CACHE_OPEN_TTL', float, 600.0),
+            replay=_get('NVD_CACHE_REPLAY', lambda v: str(v).lower() in ('1', 'true', 'yes'), False),
+        )
+
+    # ------------------------------------------------------------------
+    # Chaves
+    # ------------------------------------------------------------------
+    def make_key(
+        self,
+        start_index: int,
+        window_start: Optional[str],
+        window_end: Optional[str],
+        window_mode: str,
+        page_size: int,
+    ) -> PageKey:
+        """Normaliza a janela: timestamps em segundos UTC e fim recente (ou ausente) como ``open``."""
+        if not window_start:
+            return PageKey('full', None, None, int(start_index), int(page_size), False)
+        mode = 'pub' if str(window_mode).lower() == 'pub' else 'lastmod'
+        start_dt = _parse_timestamp(window_start)
+        start = start_dt.strftime('%Y-%m-%dT%H:%M:%SZ') if start_dt else str(window_start)
+        end_dt = _parse_timestamp(window_end)
+        now = datetime.now(timezone.utc)
+        if end_dt is None or (now - end_dt).total_seconds() < self.open_slack:
+            return PageKey(mode, start, 'open', int(start_index), int(page_size), False)
+        return PageKey(mode, start, end_dt.strftime('%Y-%m-%dT%H:%M:%SZ'), int(start_index), int(page_size), True)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / f"{digest}.json.gz"
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+    def lookup(self, key: PageKey) -> Optional[CachedPage]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT digest, size, etag, fetched_at FROM pages WHERE page_key = ?', (key.value,)
+            ).fetchone()
+        if row is None:
+            return None
+        digest, size, etag, fetched_at = row
+        if not self._blob_path(digest).exists():
+            self._drop(key.value)
+            return None
+        age = time.time() - fetched_at
+        fresh = self.replay or age < (self.ttl if key.closed else self.open_ttl)
+        return CachedPage(key=key, digest=digest, size=size, etag=etag, fetched_at=fetched_at, fresh=fresh)
+
+    def open_blob(self, digest: str):
+        """Arquivo binário descomprimido em streaming do blob da página."""
+        return gzip.open(self._blob_path(digest), 'rb')
+
+    def load(self, entry: CachedPage) -> Optional[Dict]:
+        """Lê o JSON da página e atualiza accessed_at; None se o blob estiver corrompido."""
+        try:
+            with self.open_blob(entry.digest) as fh:
+                data = json.load(fh)
+        except (OSError, EOFError, ValueError) as e:
+            logger.warning(f"Corrupted NVD cache blob {entry.digest[:12]} for {entry.key.value}: {e}. Dropping.")
+            self._drop(entry.key.value)
+            return None
+        if not isinstance(data, dict) or 'vulnerabilities' not in data or 'totalResults' not in data:
+            logger.warning(f"NVD cache entry {entry.key.value} is incomplete. Dropping.")
+            self._drop(entry.key.value)
+            return None
+        self.touch(entry.key)
+        return data
+
+    def touch(self, key: PageKey, revalidated: bool = False) -> None:
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self._conn.execute(
+                    'UPDATE pages SET accessed_at = ?, fetched_at = ? WHERE page_key = ?', (now, now, key.value),
+                )
+            else:
+                self._conn.execute('UPDATE pages SET accessed_at = ? WHERE page_key = ?', (now, key.value))
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+    def writer(self, key: PageKey) -> 'PageWriter':
+        """Gravação incremental do corpo da resposta, chunk a chunk (ver PageWriter)."""
+        return PageWriter(self, key)
+
+    def put(self, key: PageKey, raw: bytes, etag: Optional[str] = None, total_results: Optional[int] = None) -> str:
+        """Grava o corpo bruto da resposta (bytes JSON) e indexa a página. Retorna o digest."""
+        writer = self.writer(key)
+        try:
+            writer.write(raw)
+            return writer.commit(etag=etag, total_results=total_results)
+        except BaseException:
+            writer.abort()
+            raise
+
+    def _index(
+        self,
+        key: PageKey,
+        digest: str,
+        size: int,
+        raw_size: int,
+        etag: Optional[str],
+        total_results: Optional[int],
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO pages (page_key, window_mode, window_start, window_end, start_index, '
+                'page_size, closed, digest, size, raw_size, total_results, etag, fetched_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key.value, key.mode, key.start, key.end, key.start_index, key.page_size, int(key.closed),
+                 digest, size, raw_size, total_results, etag, now, now),
+            )
+        self.evict()
+
+    # ------------------------------------------------------------------
+    # Despejo
+    # ------------------------------------------------------------------
+    def total_bytes(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM pages GROUP BY digest)'
+            ).fetchone()
+        return int(row[0] or 0)
+
+    def _drop(self, page_key: str) -> int:
+        """Remove a entrada e o blob se nenhuma outra página o referenciar. Retorna bytes liberados."""
+        with self._lock:
+            row = self._conn.execute('SELECT digest, size FROM pages WHERE page_key = ?', (page_key,)).fetchone()
+            if row is None:
+                return 0
+            self._conn.execute('DELETE FROM pages WHERE page_key = ?', (page_key,))
+            shared = self._conn.execute('SELECT 1 FROM pages WHERE digest = ? LIMIT 1', (row[0],)).fetchone()
+        if shared:
+            return 0
+        try:
+            self._blob_path(row[0]).unlink()
+        except FileNotFoundError:
+            pass
+        return int(row[1] or 0)
+
+    def evict(self) -> int:
+        """Despeja as páginas menos usadas até caber em max_bytes. Retorna o número de entradas removidas."""
+        if not self.max_bytes:
+            return 0
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+        with self._lock:
+            candidates = [r[0] for r in self._conn.execute('SELECT page_key FROM pages ORDER BY accessed_at ASC')]
+        removed = 0
+        for page_key in candidates:
+            if total <= self.max_bytes:
+                break
+            total -= self._drop(page_key)
+            removed += 1
+        if removed:
+            logger.debug(f"NVD page cache evicted {removed} pages (now {total / 1024 / 1024:.1f} MB).")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pages, blobs = self._conn.execute('SELECT COUNT(*), COUNT(DISTINCT digest) FROM pages').fetchone()
+        return {'pages': pages, 'blobs': blobs, 'bytes': self.total_bytes(), 'max_bytes': self.max_bytes}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class PageWriter:
+    """Comprime e calcula o SHA-256 do corpo enquanto ele chega; o blob só aparece no commit.
+
+    Os bytes são gravados como recebidos (sem reserializar) num arquivo temporário
+    no diretório de blobs; `commit` move o arquivo para o caminho endereçado pelo
+    digest (ou o descarta, se o blob já existir) e indexa a página.
+    """
+
+    def __init__(self, cache: NVDPageCache, key: PageKey):
+        self.cache = cache
+        self.key = key
+        self.raw_size = 0
+        self._sha = hashlib.sha256()
+        cache._ensure_open()
+        self._tmp = cache.blob_dir / f".{os.getpid()}.{threading.get_ident()}.{id(self)}.tmp"
+        self._fh = gzip.GzipFile(filename='', mode='wb', fileobj=open(self._tmp, 'wb'),
+                                 compresslevel=cache.compresslevel, mtime=0)
+
+    def write(self, chunk: bytes) -> None:
+        self._sha.update(chunk)
+        self._fh.write(chunk)
+        self.raw_size += len(chunk)
+
+    def _close(self) -> None:
+        fileobj = self._fh.fileobj
+        self._fh.close()
+        if fileobj is not None:
+            fileobj.close()
+
+    def commit(self, etag: Optional[str] = None, total_results: Optional[int] = None) -> str:
+        self._close()
+        digest = self._sha.hexdigest()
+        path = self.cache._blob_path(digest)
+        if path.exists():
+            self._tmp.unlink(missing_ok=True)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._tmp, path)
+        self.cache._index(self.key, digest, path.stat().st_size, self.raw_size, etag, total_results)
+        return digest
+
+    def abort(self) -> None:
+        try:
+            self._close()
+        finally:
+            self._tmp.unlink(missing_ok=True)
+
+
+_instances: Dict[str, NVDPageCache] = {}
+_instances_lock = threading.Lock()
+
+
+def get_page_cache(config: Dict[str, Any]) -> NVDPageCache:
+    """Instância compartilhada por diretório de cache (vários NVDFetcher no mesmo processo)."""
+    path = str(Path(config.get('NVD_CACHE_DIR') or DEFAULT_CACHE_DIR).resolve())
+    with _instances_lock:
+        cache = _instances.get(path)
+        if cache is None:
+            cache = _instances[path] = NVDPageCache.from_config(config)
+        return cache
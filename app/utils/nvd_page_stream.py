@@ -0,0 +1,277 @@
+"""
+Leitura incremental das páginas da API NVD.
+
+Uma página da NVD é um objeto JSON com alguns campos escalares (resultsPerPage,
+startIndex, totalResults, ...) e o array ``vulnerabilities`` com até 2000 CVEs.
+`JSONArrayStreamParser` recebe o texto em pedaços e devolve um item do array por
+vez, guardando os demais campos de topo em ``header``; assim a página nunca é
+materializada inteira em memória.
+
+`NVDPage` representa uma página já baixada (blob do cache em disco, arquivo
+temporário ou, no modo não-incremental, um dicionário) e expõe o cabeçalho e um
+iterador dos itens.
+"""
+
+import codecs
+import json
+import os
+from itertools import islice
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional
+
+CHUNK_SIZE = 64 * 1024
+ARRAY_KEY = 'vulnerabilities'
+
+_WS = ' \t\n\r'
+
+
+class JSONArrayStreamParser:
+    """Parser push de um objeto JSON cujo array `array_key` é emitido item a item.
+
+    Args:
+        array_key: Campo de topo cujo array é percorrido em streaming.
+        header_only: Para de consumir ao chegar no array (apenas o cabeçalho).
+    """
+
+    def __init__(self, array_key: str = ARRAY_KEY, header_only: bool = False):
+        self.array_key = array_key
+        self.header_only = header_only
+        self.header: Dict[str, Any] = {}
+        self.items_seen = 0
+        self.done = False
+        self.in_array = False
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._state = 'start'
+        self._key: Optional[str] = None
+        # Evita re-decodificar um item grande a cada pedaço: só tenta de novo quando o buffer dobrar
+        self._retry_at = 0
+
+    def feed(self, data: bytes, final: bool = False) -> List[Any]:
+        """Acrescenta bytes e devolve os itens do array completados por eles."""
+        if self.done:
+            return []
+        self._buf += self._text.decode(data, final)
+        if not final and len(self._buf) < self._retry_at:
+            return []
+        items = self._parse(final)
+        if self._pos > CHUNK_SIZE:
+            self._buf = self._buf[self._pos:]
+            self._retry_at = max(0, self._retry_at - self._pos)
+            self._pos = 0
+        return items
+
+    def close(self) -> List[Any]:
+        items = self.feed(b'', final=True)
+        if not self.done and not (self.header_only and self.in_array):
+            raise ValueError('Truncated NVD page: JSON document ended early')
+        return items
+
+    def _skip_ws(self) -> Optional[str]:
+        buf, pos = self._buf, self._pos
+        while pos < len(buf) and buf[pos] in _WS:
+            pos += 1
+        self._pos = pos
+        return buf[pos] if pos < len(buf) else None
+
+    def _decode_value(self, final: bool):
+        """Decodifica o valor na posição atual; None se precisar de mais dados."""
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            remaining = len(self._buf) - self._pos
+            self._retry_at = len(self._buf) + max(remaining, CHUNK_SIZE)
+            return None
+        # Número/literal no fim do buffer pode estar incompleto ("20" de "2000")
+        if end >= len(self._buf) and not final:
+            return None
+        self._pos = end
+        self._retry_at = 0
+        return (value,)
+
+    def _parse(self, final: bool) -> List[Any]:
+        items: List[Any] = []
+        while not self.done:
+            ch = self._skip_ws()
+            if ch is None:
+                break
+            if self._state == 'start':
+                if ch != '{':
+                    raise ValueError(f"Unexpected character {ch!r} at start of NVD page")
+                self._pos += 1
+                self._state = 'key'
+            elif self._state == 'key':
+                if ch == '}':
+                    self._pos += 1
+                    self.done = True
+                elif ch == ',':
+                    self._pos += 1
+                else:
+                    decoded = self._decode_value(final)
+                    if decoded is None:
+                        break
+                    self._key = decoded[0]
+                    self._state = 'colon'
+            elif self._state == 'colon':
+                if ch != ':':
+                    raise ValueError(f"Expected ':' after key {self._key!r}")
+                self._pos += 1
+                self._state = 'value'
+            elif self._state == 'value':
+                if self._key == self.array_key and ch == '[':
+                    self._pos += 1
+                    self._state = 'array'
+                    self.in_array = True
+                    if self.header_only:
+                        break
+                else:
+                    decoded = self._decode_value(final)
+                    if decoded is None:
+                        break
+                    self.header[self._key] = decoded[0]
+                    self._state = 'key'
+            elif self._state == 'array':
+                if ch == ']':
+                    self._pos += 1
+                    self._state = 'key'
+                    self.in_array = False
+                elif ch == ',':
+                    self._pos += 1
+                else:
+                    decoded = self._decode_value(final)
+                    if decoded is None:
+                        break
+                    self.items_seen += 1
+                    items.append(decoded[0])
+        return items
+
+
+def iter_array_items(fh: IO[bytes], header: Optional[Dict[str, Any]] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Itera os itens de ``vulnerabilities`` lendo `fh` em pedaços; preenche `header` ao longo da leitura."""
+    parser = JSONArrayStreamParser()
+    while True:
+        chunk = fh.read(chunk_size)
+        if not chunk:
+            break
+        yield from parser.feed(chunk)
+        if header is not None:
+            header.update(parser.header)
+    yield from parser.close()
+    if header is not None:
+        header.update(parser.header)
+
+
+def read_header(fh: IO[bytes], chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """Campos de topo que precedem o array (na NVD: resultsPerPage, startIndex, totalResults...)."""
+    parser = JSONArrayStreamParser(header_only=True)
+    while not (parser.in_array or parser.done):
+        chunk = fh.read(chunk_size)
+        if not chunk:
+            parser.close()
+            break
+        parser.feed(chunk)
+    return parser.header
+
+
+class NVDPage:
+    """Página da NVD já baixada, lida sob demanda.
+
+    Args:
+        opener: Função que abre o corpo da página (bytes JSON descomprimidos).
+        header: Campos de topo já conhecidos (ex.: obtidos durante o download).
+        data: Página materializada (modo não-incremental ou respostas sintéticas).
+        cleanup: Chamado em `close` (ex.: remover o arquivo temporário).
+    """
+
+    def __init__(
+        self,
+        opener: Optional[Callable[[], IO[bytes]]] = None,
+        header: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        cleanup: Optional[Callable[[], None]] = None,
+    ):
+        self._opener = opener
+        self._data = data
+        self._cleanup = cleanup
+        self.header: Dict[str, Any] = dict(header or {})
+        if data is not None:
+            self.header.update({k: v for k, v in data.items() if k != ARRAY_KEY})
+        self.items_read = 0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'NVDPage':
+        return cls(data=data)
+
+    @classmethod
+    def from_file(cls, path: str, header: Optional[Dict[str, Any]] = None, delete: bool = False) -> 'NVDPage':
+        cleanup = (lambda: os.path.exists(path) and os.unlink(path)) if delete else None
+        return cls(opener=lambda: open(path, 'rb'), header=header, cleanup=cleanup)
+
+    @property
+    def total_results(self) -> int:
+        if 'totalResults' not in self.header and self._opener is not None:
+            with self._opener() as fh:
+                self.header.update(read_header(fh))
+        try:
+            return int(self.header.get('totalResults', 0) or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def iter_vulnerabilities(self) -> Iterator[Dict[str, Any]]:
+        """Itens de ``vulnerabilities`` um a um (cada um com a chave ``cve``)."""
+        if self._data is not None:
+            for item in self._data.get(ARRAY_KEY) or []:
+                self.items_read += 1
+                yield item
+            return
+        if self._opener is None:
+            return
+        with self._opener() as fh:
+            for item in iter_array_items(fh, self.header):
+                self.items_read += 1
+                yield item
+
+    def iter_batches(self, size: int) -> Iterator[List[Dict[str, Any]]]:
+        items = self.iter_vulnerabilities()
+        while True:
+            batch = list(islice(items, size))
+            if not batch:
+                return
+            yield batch
+
+    def has_vulnerabilities(self) -> bool:
+        if self._data is not None:
+            return bool(self._data.get(ARRAY_KEY))
+        items = self.iter_vulnerabilities()
+        try:
+            return next(items, None) is not None
+        finally:
+            items.close()
+            self.items_read = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materializa a página inteira (compatibilidade com quem espera o dicionário da API)."""
+        if self._data is not None:
+            return self._data
+        if self._opener is None:
+            return {**self.header, ARRAY_KEY: []}
+        with self._opener() as fh:
+            data = json.load(fh)
+        return data if isinstance(data, dict) else {**self.header, ARRAY_KEY: []}
+
+    def close(self) -> None:
+        if self._cleanup is not None:
+            try:
+                self._cleanup()
+            except OSError:
+                pass
+            self._cleanup = None
+
+    def __enter__(self) -> 'NVDPage':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,314 @@
+"""
+Renderização de PDFs fora da thread do request, com cache de saída em disco.
+
+O template Jinja continua sendo renderizado pelo serviço (precisa do contexto
+da aplicação); aqui ficam apenas funções de nível de módulo que recebem dados
+simples (HTML, CSS, dicionários) e gravam o PDF direto em um arquivo, de modo
+que possam rodar em um ``ProcessPoolExecutor``:
+
+- `render_weasyprint` / `render_pdfkit` / `render_reportlab` escrevem em um
+  arquivo temporário e fazem ``os.replace`` no destino, sem manter cópias do
+  PDF em memória;
+- a folha de estilo do WeasyPrint e o ``FontConfiguration`` são montados uma
+  vez por processo e reutilizados entre renderizações;
+- `PDFOutputCache` guarda os PDFs por hash do conteúdo do relatório, para que
+  relatórios inalterados não sejam renderizados de novo;
+- `mark_engine_failed` / `engine_blocked` evitam pagar a cada exportação o
+  custo de uma engine que já falhou (indisponível ou com erro recente).
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ('weasyprint', 'reportlab', 'pdfkit')
+
+# Serializa o WeasyPrint dentro de um processo: o FontConfiguration compartilhado
+# não é seguro para uso concorrente entre threads
+_weasy_lock = threading.Lock()
+
+
+def _atomic_target(target: str) -> str:
+    return f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _finish(tmp_path: str, target: str) -> int:
+    os.replace(tmp_path, target)
+    return os.path.getsize(target)
+
+
+def _discard(tmp_path: str) -> None:
+    try:
+        os.unlink(tmp_path)
+    except OSError:
+        pass
+
+
+# ----------------------------------------------------------------------
+# Engines (executadas no processo atual ou em um processo do pool)
+# ----------------------------------------------------------------------
+@lru_cache(maxsize=4)
+def _weasyprint_stylesheet(css_content: str):
+    """CSS já analisado + FontConfiguration, reutilizados entre renderizações do processo."""
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    font_config = FontConfiguration()
+    return CSS(string=css_content, font_config=font_config), font_config
+
+
+def render_weasyprint(html_content: str, css_content: str, base_url: Optional[str], target: str) -> int:
+    """Converte HTML em PDF com WeasyPrint gravando em `target`; retorna o tamanho em bytes."""
+    from weasyprint import HTML
+
+    tmp_path = _atomic_target(target)
+    try:
+        with _weasy_lock:
+            stylesheet, font_config = _weasyprint_stylesheet(css_content)
+            HTML(string=html_content, base_url=base_url).write_pdf(
+                tmp_path, stylesheets=[stylesheet], font_config=font_config
+            )
+        return _finish(tmp_path, target)
+    except Exception:
+        _discard(tmp_path)
+        raise
+
+
+def render_pdfkit(html_content: str, pdf_options: Dict[str, Any], wkhtml_path: Optional[str], target: str) -> int:
+    """Converte HTML em PDF com wkhtmltopdf gravando em `target`; retorna o tamanho em bytes."""
+    import pdfkit
+
+    configuration = None
+    if wkhtml_path:
+        try:
+            configuration = pdfkit.configuration(wkhtmltopdf=wkhtml_path)
+        except Exception as e:
+            logger.warning(f"Configuração wkhtmltopdf inválida ({wkhtml_path}): {e}")
+    tmp_path = _atomic_target(target)
+    try:
+        pdfkit.from_string(html_content, tmp_path, options=pdf_options, configuration=configuration)
+        return _finish(tmp_path, target)
+    except Exception:
+        _discard(tmp_path)
+        raise
+
+
+def render_reportlab(document: Dict[str, Any], target: str) -> int:
+    """Monta o PDF resumido com ReportLab a partir de dados simples (ver `_reportlab_document`)."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, letter
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    tmp_path = _atomic_target(target)
+    try:
+        page_size = A4 if document.get('page_size') == 'A4' else letter
+        doc = SimpleDocTemplate(tmp_path, pagesize=page_size,
+                                rightMargin=72, leftMargin=72,
+                                topMargin=72, bottomMargin=18)
+
+        styles = getSampleStyleSheet()
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            textColor=colors.HexColor('#2c3e50')
+        )
+
+        story = [Paragraph(document['title'], title_style), Spacer(1, 12)]
+
+        basic_table = Table(document['basic_info'], colWidths=[2*inch, 4*inch])
+        basic_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.grey),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('BACKGROUND', (1, 0), (1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(basic_table)
+        story.append(Spacer(1, 20))
+
+        if document.get('vuln_table'):
+            story.append(Paragraph("Resumo de Vulnerabilidades", styles['Heading2']))
+            vuln_table = Table(document['vuln_table'], colWidths=[3*inch, 2*inch])
+            vuln_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            story.append(vuln_table)
+
+        doc.build(story)
+        return _finish(tmp_path, target)
+    except Exception:
+        _discard(tmp_path)
+        raise
+
+
+# ----------------------------------------------------------------------
+# Pool de processos
+# ----------------------------------------------------------------------
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    global _pool, _pool_workers
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            import multiprocessing
+            # spawn: o processo da aplicação tem threads (scheduler, fila de jobs) e
+            # fork poderia herdar locks presos; os workers só importam este módulo
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def run_render(func, *args, workers: int = 0, timeout: Optional[float] = None) -> int:
+    """Executa `func(*args)` no pool de processos (ou inline com `workers` = 0)."""
+    pool = _get_pool(workers)
+    if pool is None:
+        return func(*args)
+    from concurrent.futures.process import BrokenProcessPool
+    try:
+        return pool.submit(func, *args).result(timeout=timeout)
+    except BrokenProcessPool:
+        # Worker morto (ex.: OOM): recria o pool na próxima exportação
+        _reset_pool()
+        raise
+
+
+# ----------------------------------------------------------------------
+# Engines com falha recente
+# ----------------------------------------------------------------------
+# engine -> instante (monotonic) até o qual não deve ser tentada; inf = indisponível
+_engine_blocked_until: Dict[str, float] = {}
+
+
+def mark_engine_failed(engine: str, error: BaseException, retry_seconds: float) -> None:
+    """Registra a falha; engines que nem carregam ficam fora até reiniciar o processo.
+
+    Indisponível = ImportError ou OSError sem errno (biblioteca nativa ausente no
+    WeasyPrint, executável wkhtmltopdf não encontrado); erros de arquivo e
+    timeouts do pool são tratados como transitórios.
+    """
+    from concurrent.futures.process import BrokenProcessPool
+    if isinstance(error, BrokenProcessPool):
+        return  # falha do pool (recriado na próxima chamada), não da engine
+    unavailable = isinstance(error, ImportError) or (
+        isinstance(error, OSError) and error.errno is None and not isinstance(error, TimeoutError)
+    )
+    _engine_blocked_until[engine] = float('inf') if unavailable else time.monotonic() + max(0.0, retry_seconds)
+
+
+def engine_blocked(engine: str) -> bool:
+    return _engine_blocked_until.get(engine, 0.0) > time.monotonic()
+
+
+def clear_engine_failure(engine: str) -> None:
+    _engine_blocked_until.pop(engine, None)
+
+
+# ----------------------------------------------------------------------
+# Cache de saída por hash do conteúdo
+# ----------------------------------------------------------------------
+class PDFOutputCache:
+    """PDFs renderizados em `directory`, nomeados por ``<chave>.<engine>.pdf``.
+
+    A ordem de uso é o mtime (atualizado a cada acerto); acima de `max_bytes`
+    os arquivos menos recentes são removidos.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def path_for(self, key: str, engine: str) -> Path:
+        return self.directory / f"{key}.{engine}.pdf"
+
+    def lookup(self, key: str, engine: str) -> Optional[Path]:
+        path = self.path_for(key, engine)
+        try:
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+
+    def lock(self, key: str) -> threading.Lock:
+        """Lock por chave: exportações simultâneas do mesmo relatório renderizam uma vez."""
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                if len(self._locks) > 256:
+                    self._locks = {k: v for k, v in self._locks.items() if v.locked()}
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def evict(self) -> int:
+        if self.max_bytes <= 0:
+            return 0
+        try:
+            entries = []
+            for path in self.directory.glob('*.pdf'):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                    removed += 1
+                except OSError:
+                    continue
+            return removed
+        except Exception as e:
+            logger.debug(f"Falha ao limpar cache de PDFs: {e}")
+            return 0
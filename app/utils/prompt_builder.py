@@ -0,0 +1,197 @@
+"""
+Montagem de prompts de LLM limitada por orçamento de tokens.
+
+O encoder do tiktoken é resolvido uma vez por modelo (`get_encoder`) e reutilizado
+por ReportAIService e ChatService. `PromptBuilder` recebe as partes do prompt na
+ordem final:
+
+- textos fixos (`add`), sempre incluídos e contados primeiro;
+- grupos de linhas (`add_rows`), formatados sob demanda e incluídos linha a linha,
+  na ordem de declaração, até esgotar o orçamento restante.
+
+Cada trecho é codificado uma única vez, então o custo é linear no tamanho do
+prompt final (listas grandes param de ser formatadas quando o orçamento acaba) e
+não há reencodificação do texto inteiro para truncá-lo. Quando tudo cabe, o
+resultado é idêntico à concatenação simples das partes.
+"""
+
+import logging
+import math
+import re
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except Exception:  # pragma: no cover - dependência opcional
+    tiktoken = None
+
+DEFAULT_ENCODING = 'cl100k_base'
+TRUNCATION_MARKER = "\n\n...\n\n"
+
+
+@lru_cache(maxsize=32)
+def get_encoder(model: Optional[str] = None):
+    """Encoder do tiktoken para o modelo (cl100k_base se desconhecido); None sem tiktoken."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model or '')
+    except Exception:
+        try:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+        except Exception as e:
+            logger.debug(f"tiktoken indisponível ({e}); usando estimativa por palavras")
+            return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Tokens de `text` (estimativa palavras * 1.3 sem tiktoken)."""
+    if not text:
+        return 0
+    enc = get_encoder(model)
+    if enc is not None:
+        try:
+            return len(enc.encode(text, disallowed_special=()))
+        except Exception:
+            pass
+    return int(len(text.split()) * 1.3)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None, head_ratio: float = 0.6) -> str:
+    """Corta `text` para no máximo `max_tokens`, mantendo início e fim (uma única codificação)."""
+    if not text or max_tokens <= 0:
+        return '' if max_tokens <= 0 else text
+    enc = get_encoder(model)
+    if enc is None:
+        # Mesma aproximação de count_tokens: palavras (com o espaço que as precede) * 1.3
+        words = re.findall(r'\s*\S+', text)
+        limit = max(1, int(max_tokens / 1.3) - 1)
+        if len(words) <= limit:
+            return text
+        head = int(limit * head_ratio)
+        return ''.join(words[:head]) + TRUNCATION_MARKER + ''.join(words[len(words) - (limit - head):]).lstrip()
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    keep = max(1, max_tokens - 4)  # marcador
+    head = int(keep * head_ratio)
+    tail = keep - head
+    return enc.decode(tokens[:head]) + TRUNCATION_MARKER + (enc.decode(tokens[-tail:]) if tail else '')
+
+
+class _RowGroup:
+    __slots__ = ('rows', 'formatter', 'limit', 'empty', 'separator', 'overflow', 'text')
+
+    def __init__(self, rows, formatter, limit, empty, separator, overflow):
+        self.rows = rows
+        self.formatter = formatter
+        self.limit = limit
+        self.empty = empty
+        self.separator = separator
+        self.overflow = overflow
+        self.text = ''
+
+
+class PromptBuilder:
+    """Prompt montado por partes dentro de `budget` tokens (None = sem limite).
+
+    Args:
+        model: Modelo usado para escolher o encoder
+        budget: Máximo de tokens do prompt
+        margin: Folga para diferenças de tokenização nas junções entre partes
+    """
+
+    def __init__(self, model: Optional[str] = None, budget: Optional[int] = None, margin: int = 8):
+        self.model = model
+        self.budget = budget
+        self.margin = margin
+        self._parts: List[Any] = []
+        self._fixed_tokens = 0
+        self.tokens = 0
+        self.omitted_rows = 0
+
+    def count(self, text: str) -> int:
+        if get_encoder(self.model) is None:
+            # Arredonda para cima por trecho para que a soma não subestime o total
+            return math.ceil(len(text.split()) * 1.3) if text else 0
+        return count_tokens(text, self.model)
+
+    def add(self, text: str) -> 'PromptBuilder':
+        """Texto fixo (instruções, cabeçalhos, números agregados)."""
+        if text:
+            self._parts.append(text)
+            self._fixed_tokens += self.count(text)
+        return self
+
+    def add_rows(self, rows: Iterable[Any], formatter: Callable[[Any], str], limit: Optional[int] = None,
+                 empty: str = '', separator: str = "\n",
+                 overflow: Optional[Callable[[int], str]] = None) -> 'PromptBuilder':
+        """Linhas formatadas sob demanda (até `limit`), incluídas enquanto houver orçamento.
+
+        `empty` é usado quando não há linhas; `overflow(n)` gera uma nota para as
+        linhas que ficaram de fora por falta de orçamento (apenas quando `rows` tem len()).
+        """
+        self._parts.append(_RowGroup(rows, formatter, limit, empty, separator, overflow))
+        return self
+
+    def _fill(self, group: _RowGroup, available: Optional[int]) -> int:
+        rows = group.rows or []
+        if group.limit is not None:
+            total = min(len(rows), group.limit) if hasattr(rows, '__len__') else None
+            iterator = islice(rows, group.limit)
+        else:
+            total = len(rows) if hasattr(rows, '__len__') else None
+            iterator = iter(rows)
+        lines: List[str] = []
+        used = 0
+        sep_tokens = self.count(group.separator) if group.separator.strip() else 0
+        for row in iterator:
+            try:
+                line = group.formatter(row)
+            except Exception as e:
+                logger.debug(f"Linha ignorada no prompt: {e}")
+                continue
+            if not line:
+                continue
+            cost = self.count(line) + (sep_tokens if lines else 0)
+            if available is not None and used + cost > available:
+                break
+            lines.append(line)
+            used += cost
+        omitted = (total - len(lines)) if total is not None else 0
+        note = group.overflow(omitted) if (omitted and group.overflow) else ''
+        if note and available is not None:
+            # A nota de omissão também precisa caber: remove linhas até caber
+            note_cost = self.count(note) + (sep_tokens if lines else 0)
+            while lines and used + note_cost > available:
+                used -= self.count(lines.pop()) + (sep_tokens if lines else 0)
+                omitted += 1
+            note = group.overflow(omitted)
+        self.omitted_rows += omitted
+        if not lines and not note:
+            group.text = group.empty
+            return self.count(group.empty) if group.empty else 0
+        group.text = group.separator.join(lines + ([note] if note else []))
+        return used + (self.count(note) if note else 0)
+
+    def build(self) -> str:
+        available = None
+        if self.budget is not None:
+            available = max(0, self.budget - self.margin - self._fixed_tokens)
+        used = 0
+        for part in self._parts:
+            if isinstance(part, _RowGroup):
+                used += self._fill(part, None if available is None else max(0, available - used))
+        text = ''.join(p.text if isinstance(p, _RowGroup) else p for p in self._parts)
+        self.tokens = self._fixed_tokens + used
+        if self.budget is not None and self.tokens > self.budget:
+            # Só as partes fixas já excedem o orçamento: corte final preservando início e fim
+            text = truncate_to_tokens(text, self.budget, self.model)
+            self.tokens = min(self.tokens, self.budget)
+        if self.omitted_rows:
+            logger.debug(f"Prompt limitado a {self.budget} tokens: {self.omitted_rows} linhas omitidas")
+        return text
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Backends de rate limiting por chave (cliente/rota) usados pela API Flask.
+
+Ambos implementam GCRA (Generic Cell Rate Algorithm): por chave guarda-se apenas o
+"theoretical arrival time" (TAT), de modo que cada verificação é O(1) e equivale a
+um token bucket de capacidade `limit` reabastecido a `limit / window` por segundo.
+
+- `MemoryRateLimitBackend`: estado no processo, protegido por lock (threads do gunicorn);
+- `RedisRateLimitBackend`: estado no Redis, atualizado por um script Lua atômico com o
+  relógio do próprio Redis, logo o limite é exato entre workers e hosts. Se o Redis
+  falhar, cai para o backend em memória (limite por processo) até voltar.
+"""
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateLimitDecision:
+    """Resultado de uma verificação de rate limit."""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+    # Segundos até o bucket voltar a ficar cheio
+    reset_after: float = 0.0
+
+
+def _gcra(tat: Optional[float], now: float, limit: int, window: float, cost: int = 1):
+    """Aplica GCRA; devolve (decisão, novo TAT ou None se negado)."""
+    limit = max(1, int(limit))
+    interval = window / limit
+    tat = max(tat or now, now)
+    new_tat = tat + interval * cost
+    allow_at = new_tat - window
+    if now < allow_at:
+        remaining = max(0, int(math.floor((window - (tat - now)) / interval + 1e-9)))
+        return RateLimitDecision(False, limit, remaining, allow_at - now, tat - now), None
+    remaining = max(0, int(math.floor((window - (new_tat - now)) / interval + 1e-9)))
+    return RateLimitDecision(True, limit, remaining, 0.0, new_tat - now), new_tat
+
+
+class MemoryRateLimitBackend:
+    """GCRA em memória: um float por chave, verificação O(1) sob lock."""
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self._tat: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.stats = {'total_requests': 0, 'rate_limited_requests': 0}
+
+    def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitDecision:
+        now = time.monotonic()
+        with self._lock:
+            decision, new_tat = _gcra(self._tat.get(key), now, limit, window, cost)
+            if new_tat is not None:
+                self._tat[key] = new_tat
+                self.stats['total_requests'] += 1
+            else:
+                self.stats['rate_limited_requests'] += 1
+            if now >= self._next_sweep:
+                self._sweep(now)
+        return decision
+
+    def _sweep(self, now: float) -> int:
+        """Remove chaves cujo bucket já está cheio (TAT no passado): equivalem a chave ausente."""
+        expired = [k for k, tat in self._tat.items() if tat <= now]
+        for k in expired:
+            del self._tat[k]
+        self._next_sweep = now + self._sweep_interval
+        return len(expired)
+
+    def purge(self) -> int:
+        with self._lock:
+            return self._sweep(time.monotonic())
+
+    def reset(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._tat.clear()
+            else:
+                self._tat.pop(key, None)
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'backend': 'memory', 'tracked_keys': len(self._tat)}
+
+
+# KEYS[1] = chave; ARGV = limit, window (s), cost. Devolve {allowed, remaining, retry_after_ms, reset_after_ms}.
+_GCRA_LUA = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2]) * 1000
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = window / limit
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then tat = now end
+local new_tat = tat + interval * cost
+local allow_at = new_tat - window
+if now < allow_at then
+    local remaining = math.floor((window - (tat - now)) / interval)
+    return {0, remaining, math.ceil(allow_at - now), math.ceil(tat - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now) + 1000)
+local remaining = math.floor((window - (new_tat - now)) / interval)
+return {1, remaining, 0, math.ceil(new_tat - now)}
+"""
+
+
+class RedisRateLimitBackend:
+    """GCRA no Redis via script Lua (uma ida ao servidor por verificação)."""
+
+    def __init__(self, client, key_prefix: str = 'ratelimit:', retry_interval: float = 30.0):
+        self.client = client
+        self.key_prefix = key_prefix
+        self._script = client.register_script(_GCRA_LUA)
+        self._fallback = MemoryRateLimitBackend()
+        self._retry_interval = retry_interval
+        self._down_until = 0.0
+        self.stats = {'total_requests': 0, 'rate_limited_requests': 0, 'redis_errors': 0}
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisRateLimitBackend':
+        import redis
+
+        client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return cls(client, **kwargs)
+
+    def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitDecision:
+        limit = max(1, int(limit))
+        if time.monotonic() >= self._down_until:
+            try:
+                allowed, remaining, retry_ms, reset_ms = self._script(
+                    keys=[self.key_prefix + key], args=[limit, window, cost]
+                )
+            except Exception as e:
+                self.stats['redis_errors'] += 1
+                self._down_until = time.monotonic() + self._retry_interval
+                logger.warning(
+                    f"Redis rate limit backend unavailable ({e}); "
+                    f"using in-process limits for {self._retry_interval:.0f}s"
+                )
+            else:
+                decision = RateLimitDecision(
+                    bool(allowed), limit, max(0, int(remaining)), retry_ms / 1000.0, reset_ms / 1000.0,
+                )
+                self.stats['total_requests' if decision.allowed else 'rate_limited_requests'] += 1
+                return decision
+        return self._fallback.hit(key, limit, window, cost)
+
+    def purge(self) -> int:
+        # Chaves no Redis expiram sozinhas (PX)
+        return self._fallback.purge()
+
+    def reset(self, key: Optional[str] = None) -> None:
+        self._fallback.reset(key)
+        try:
+            if key is not None:
+                self.client.delete(self.key_prefix + key)
+            else:
+                for k in self.client.scan_iter(match=self.key_prefix + '*', count=500):
+                    self.client.delete(k)
+        except Exception as e:
+            logger.warning(f"Failed to reset rate limit keys in Redis: {e}")
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'backend': 'redis', 'fallback': self._fallback.get_stats()}
+
+
+def create_rate_limit_backend(storage: str = 'memory', redis_url: Optional[str] = None, key_prefix: str = 'ratelimit:'):
+    """Cria o backend configurado; sem Redis disponível usa o backend em memória."""
+    if storage == 'redis' and redis_url:
+        try:
+            return RedisRateLimitBackend.from_url(redis_url, key_prefix=key_prefix)
+        except Exception as e:
+            logger.warning(f"Redis rate limit backend unavailable ({e}); falling back to in-process limits")
+    return MemoryRateLimitBackend()
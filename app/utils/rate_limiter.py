@@ -5,8 +5,9 @@ Sistema avançado de rate limiting para APIs externas
 
 import asyncio
 import time
+from collections import deque
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Deque, Dict, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import random
@@ -39,10 +40,14 @@ class AdvancedRateLimiter:
     def __init__(self, config: RateLimitConfig, api_name: str = "API"):
         self.config = config
         self.api_name = api_name
-        self.request_times: List[float] = []
+        # Instantes das requisições na janela, em ordem crescente (expiram pela esquerda)
+        self.request_times: Deque[float] = deque()
         self.consecutive_rate_limits = 0
         self.last_rate_limit_time = 0
         self.current_backoff = 1.0
+        # Serializa acquire() entre corrotinas concorrentes (ex.: pipeline de páginas NVD)
+        self._acquire_lock: Optional[asyncio.Lock] = None
+        self._acquire_lock_loop = None
         
         # Estatísticas
         self.stats = {
@@ -53,10 +58,27 @@ class AdvancedRateLimiter:
             'avg_wait_time': 0
         }
         
+    def _get_acquire_lock(self) -> asyncio.Lock:
+        """
+        Retorna o lock de aquisição do event loop corrente (recriado se o loop mudar)
+        """
+        loop = asyncio.get_running_loop()
+        if self._acquire_lock is None or self._acquire_lock_loop is not loop:
+            self._acquire_lock = asyncio.Lock()
+            self._acquire_lock_loop = loop
+        return self._acquire_lock
+
     async def acquire(self) -> None:
         """
-        Adquire permissão para fazer uma requisição
+        Adquire permissão para fazer uma requisição.
+
+        Chamadas concorrentes são serializadas para que várias requisições em voo
+        compartilhem o mesmo orçamento de tokens sem ultrapassar a janela.
         """
+        async with self._get_acquire_lock():
+            await self._acquire_unlocked()
+
+    async def _acquire_unlocked(self) -> None:
         now = time.time()
         
         # Remove requisições antigas da janela
@@ -99,7 +121,9 @@ class AdvancedRateLimiter:
         Remove requisições antigas da janela de tempo
         """
         cutoff_time = now - self.config.window_seconds
-        self.request_times = [t for t in self.request_times if t > cutoff_time]
+        request_times = self.request_times
+        while request_times and request_times[0] <= cutoff_time:
+            request_times.popleft()
     
     def _calculate_wait_time(self, now: float) -> float:
         """
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 
 from app.extensions import db
 from app.models.sync_metadata import SyncMetadata
+from app.utils.bootstrap_state import BOOTSTRAP_KEYS, mark_bootstrap_dirty
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +52,9 @@ def upsert_sync_metadata(
             raise RuntimeError("Não foi possível resolver engine/bind para sessão do SQLAlchemy")
 
         dialect_name = engine.dialect.name
+        if key in BOOTSTRAP_KEYS:
+            # Upserts via Core não disparam eventos ORM: invalidar snapshot do guard no commit
+            mark_bootstrap_dirty(sess)
         now_dt = last_modified or datetime.now(timezone.utc)
         # Limitar tamanho de value/status para evitar erros em colunas pequenas
         safe_value = (value or '').strip()
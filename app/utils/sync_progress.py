@@ -0,0 +1,279 @@
+"""
+Canal de progresso da sincronização NVD (push) para o endpoint SSE.
+
+`SyncProgressBroadcaster` mantém, por processo, o último estado conhecido
+(status, current, total, last_cve_id, saving_count, saving_start) e um número de
+sequência. Eventos chegam por:
+
+- commits de SyncMetadata nas chaves ``nvd_sync_progress_*`` (eventos ORM, como
+  em bootstrap_state), o que cobre todos os pontos que já gravam o status;
+- `publish_progress`, chamado pelo NVDFetcher a cada página concluída (sem
+  gravar no banco).
+
+Com REDIS_CACHE_ENABLED os eventos são publicados no tópico
+``open_monitor:sync_progress`` e aplicados por um listener em cada processo; o
+último estado também fica numa chave para semear processos novos. Sem Redis o
+canal é local ao processo e, na ausência de eventos, o estado é relido do banco
+no máximo a cada `reseed_interval` segundos (uma consulta por processo, não por
+cliente).
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_CHANNEL = 'open_monitor:sync_progress'
+SNAPSHOT_KEY = 'open_monitor:sync_progress:snapshot'
+
+# Chave de SyncMetadata -> campo do evento
+PROGRESS_KEYS = {
+    'nvd_sync_progress_status': 'status',
+    'nvd_sync_progress_current': 'current',
+    'nvd_sync_progress_total': 'total',
+    'nvd_sync_progress_last_cve': 'last_cve_id',
+    'nvd_sync_progress_saving': 'saving_count',
+    'nvd_sync_progress_saving_start': 'saving_start',
+}
+_INT_FIELDS = frozenset({'current', 'total', 'saving_count', 'saving_start'})
+
+_SESSION_PENDING = 'sync_progress_pending'
+
+
+def _coerce(field: str, value: Any) -> Any:
+    if field in _INT_FIELDS and value is not None:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    return value
+
+
+class SyncProgressBroadcaster:
+    """Estado de progresso por processo com espera bloqueante por novos eventos."""
+
+    def __init__(self, reseed_interval: float = 30.0):
+        self.reseed_interval = reseed_interval
+        self._state: Dict[str, Any] = {}
+        self._seq = 0
+        self._updated_at = 0.0
+        self._cond = threading.Condition()
+        self._redis = None
+        self._listener: Optional[threading.Thread] = None
+        self._streams = 0
+
+    # ------------------------------------------------------------------
+    # Configuração
+    # ------------------------------------------------------------------
+    def configure(self, app) -> None:
+        """Com Redis habilitado, publica no tópico e assina-o para receber eventos de outros processos."""
+        try:
+            self.reseed_interval = float(app.config.get('SYNC_PROGRESS_RESEED_SECONDS', self.reseed_interval))
+        except Exception:
+            pass
+        if not app.config.get('REDIS_CACHE_ENABLED') or self._listener is not None:
+            return
+        try:
+            from app.services.redis_cache_service import get_cache_service
+
+            cache = get_cache_service(app)
+            if not cache.available:
+                return
+            self._redis = cache.redis_client
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(PROGRESS_CHANNEL)
+            self._listener = threading.Thread(target=self._listen, args=(pubsub,), daemon=True)
+            self._listener.start()
+        except Exception as e:
+            logger.debug(f"Canal de progresso via Redis indisponível: {e}")
+            self._redis = None
+            self._listener = None
+
+    def _listen(self, pubsub) -> None:
+        while True:
+            try:
+                for message in pubsub.listen():
+                    if message and message.get('type') == 'message':
+                        try:
+                            self._apply(json.loads(message['data']))
+                        except (TypeError, ValueError):
+                            continue
+            except Exception as e:
+                logger.debug(f"Listener de progresso reconectando: {e}")
+                time.sleep(5)
+                try:
+                    pubsub.subscribe(PROGRESS_CHANNEL)
+                except Exception:
+                    pass
+
+    # ------------------------------------------------------------------
+    # Publicação
+    # ------------------------------------------------------------------
+    def publish(self, fields: Dict[str, Any]) -> None:
+        """Publica um delta (campos alterados). Com Redis, o estado local é atualizado pelo listener."""
+        delta = {k: _coerce(k, v) for k, v in fields.items() if k in _INT_FIELDS or k in ('status', 'last_cve_id')}
+        if not delta:
+            return
+        if self._redis is not None:
+            try:
+                payload = json.dumps(delta, separators=(',', ':'))
+                pipe = self._redis.pipeline(transaction=False)
+                pipe.publish(PROGRESS_CHANNEL, payload)
+                pipe.execute()
+                self._store_snapshot(delta)
+                return
+            except Exception as e:
+                logger.debug(f"Falha ao publicar progresso no Redis: {e}")
+        self._apply(delta)
+
+    def _store_snapshot(self, delta: Dict[str, Any]) -> None:
+        try:
+            with self._cond:
+                snapshot = {**self._state, **delta}
+            self._redis.set(SNAPSHOT_KEY, json.dumps(snapshot, separators=(',', ':')), ex=86400)
+        except Exception:
+            pass
+
+    def _apply(self, delta: Dict[str, Any]) -> None:
+        with self._cond:
+            changed = {k: v for k, v in delta.items() if self._state.get(k) != v}
+            self._updated_at = time.monotonic()
+            if not changed:
+                return
+            self._state.update(changed)
+            self._seq += 1
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+    def snapshot(self) -> Tuple[int, Dict[str, Any]]:
+        with self._cond:
+            return self._seq, dict(self._state)
+
+    def ensure_seeded(self, loader: Callable[[], Dict[str, Any]]) -> None:
+        """Semeia/reatualiza o estado quando não há eventos recentes (Redis ou `loader`, tipicamente o banco)."""
+        with self._cond:
+            stale = not self._state or (
+                self._listener is None and time.monotonic() - self._updated_at > self.reseed_interval
+            )
+            if not stale:
+                return
+            # Marca antes de ler para que apenas uma thread faça a consulta
+            self._updated_at = time.monotonic()
+        state = None
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(SNAPSHOT_KEY)
+                state = json.loads(raw) if raw else None
+            except Exception:
+                state = None
+        if state is None:
+            try:
+                state = loader()
+            except Exception as e:
+                logger.debug(f"Falha ao ler progresso para semear o canal: {e}")
+                state = None
+        if state:
+            self._apply(state)
+
+    def wait(self, seq: int, timeout: float) -> int:
+        """Bloqueia até o número de sequência passar de `seq` ou o timeout; devolve a sequência atual."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != seq, timeout=timeout)
+            return self._seq
+
+    def try_open_stream(self, limit: int) -> bool:
+        with self._cond:
+            if self._streams >= limit:
+                return False
+            self._streams += 1
+            return True
+
+    def close_stream(self) -> None:
+        with self._cond:
+            self._streams = max(0, self._streams - 1)
+
+    def stream(self, loader: Callable[[], Dict[str, Any]], heartbeat: float = 15.0,
+               max_duration: float = 300.0) -> Iterator[str]:
+        """Eventos SSE: ``snapshot`` com o estado completo e, depois, ``progress`` só com os campos alterados."""
+        self.ensure_seeded(loader)
+        seq, sent = self.snapshot()
+        yield f"retry: 3000\nid: {seq}\nevent: snapshot\ndata: {json.dumps(sent, separators=(',', ':'))}\n\n"
+        deadline = time.monotonic() + max_duration
+        while time.monotonic() < deadline:
+            new_seq = self.wait(seq, min(heartbeat, max(0.0, deadline - time.monotonic())))
+            if new_seq == seq:
+                self.ensure_seeded(loader)
+                new_seq, _ = self.snapshot()
+                if new_seq == seq:
+                    yield ": keep-alive\n\n"
+                    continue
+            seq, state = self.snapshot()
+            delta = {k: v for k, v in state.items() if sent.get(k) != v}
+            sent = state
+            if delta:
+                yield f"id: {seq}\nevent: progress\ndata: {json.dumps(delta, separators=(',', ':'))}\n\n"
+
+
+sync_progress = SyncProgressBroadcaster()
+
+
+def publish_progress(**fields: Any) -> None:
+    """Atalho para publicar um delta de progresso (ex.: current/total a cada página)."""
+    try:
+        sync_progress.publish(fields)
+    except Exception as e:
+        logger.debug(f"Falha ao publicar progresso: {e}")
+
+
+def load_progress_from_db(session) -> Dict[str, Any]:
+    """Estado atual das chaves de progresso em SyncMetadata (uma consulta)."""
+    from app.models.sync_metadata import SyncMetadata
+
+    rows = session.query(SyncMetadata.key, SyncMetadata.value).filter(
+        SyncMetadata.key.in_(list(PROGRESS_KEYS))
+    ).all()
+    return {PROGRESS_KEYS[key]: _coerce(PROGRESS_KEYS[key], value) for key, value in rows}
+
+
+def _on_sync_metadata_change(mapper, connection, target) -> None:
+    field = PROGRESS_KEYS.get(getattr(target, 'key', None))
+    if field is None:
+        return
+    from sqlalchemy.orm import object_session
+
+    sess = object_session(target)
+    if sess is None:
+        publish_progress(**{field: target.value})
+    else:
+        sess.info.setdefault(_SESSION_PENDING, {})[field] = target.value
+
+
+@event.listens_for(Session, 'after_commit')
+def _on_commit(session) -> None:
+    pending = session.info.pop(_SESSION_PENDING, None)
+    if pending:
+        publish_progress(**pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _on_rollback(session) -> None:
+    session.info.pop(_SESSION_PENDING, None)
+
+
+def _register_model_listeners() -> None:
+    from app.models.sync_metadata import SyncMetadata
+
+    for evt in ('after_insert', 'after_update'):
+        if not event.contains(SyncMetadata, evt, _on_sync_metadata_change):
+            event.listen(SyncMetadata, evt, _on_sync_metadata_change)
+
+
+_register_model_listeners()
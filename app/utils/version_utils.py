@@ -0,0 +1,211 @@
+"""
+Comparação de versões de produtos (CPE/semver) e índices de intervalos de versões.
+
+As versões são convertidas em chaves de ordenação totais (tuplas comparáveis):
+
+- segmentos numéricos comparam como inteiros ("1.10" > "1.9");
+- zeros à direita do release são ignorados ("1.0" == "1.0.0");
+- marcadores de pré-release (alpha, beta, rc, dev, ...) ficam antes do release ("2.0-rc1" < "2.0");
+- sufixos alfabéticos comuns em CPE ficam depois ("1.0.2k" > "1.0.2"), inclusive letras
+  isoladas como a/b/c ("1.0.2a", "1.1.1c"): só as palavras acima marcam pré-release.
+
+Os intervalos seguem os limites da NVD (versionStart/EndIncluding/Excluding).
+"""
+
+import bisect
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+VersionKey = Tuple[Tuple[int, int, str], ...]
+
+_TOKEN_RE = re.compile(r'\d+|[a-zA-Z]+')
+# Apenas palavras: letras isoladas após o release são sufixos pós-release (estilo OpenSSL)
+_PRE_RELEASE_RANK = {
+    'dev': 0, 'snapshot': 0, 'alpha': 1, 'beta': 2,
+    'pre': 3, 'preview': 3, 'rc': 4, 'cr': 4,
+}
+_WILDCARDS = {'', '*', '-', 'any', 'all'}
+# Terminador: garante que "1.0" > "1.0rc1" e "1.0" < "1.0.1" / "1.0a" sem preenchimento
+_END = (0, 0, '')
+
+
+@lru_cache(maxsize=65536)
+def version_key(version: str) -> Optional[VersionKey]:
+    """Chave de ordenação de uma versão; None para curingas ou textos sem dígitos/letras."""
+    text = (version or '').strip().lower()
+    if text.startswith('v') and text[1:2].isdigit():
+        text = text[1:]
+    if text in _WILDCARDS:
+        return None
+    # Epoch ("2:1.0") é descartado
+    if ':' in text:
+        text = text.split(':', 1)[1]
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+
+    release: List[int] = []
+    rest: List[str] = []
+    for i, tok in enumerate(tokens):
+        if tok.isdigit() and not rest:
+            release.append(int(tok))
+        else:
+            rest = tokens[i:]
+            break
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+
+    key: List[Tuple[int, int, str]] = [(1, n, '') for n in release]
+    for tok in rest:
+        if tok.isdigit():
+            key.append((1, int(tok), ''))
+        elif tok in _PRE_RELEASE_RANK:
+            key.append((-1, _PRE_RELEASE_RANK[tok], ''))
+        else:
+            key.append((0, 1, tok))
+    key.append(_END)
+    return tuple(key)
+
+
+def compare_versions(a: str, b: str) -> int:
+    """-1, 0 ou 1; curingas/inválidos são considerados iguais a qualquer versão."""
+    ka, kb = version_key(a), version_key(b)
+    if ka is None or kb is None:
+        return 0
+    return (ka > kb) - (ka < kb)
+
+
+@dataclass(frozen=True)
+class VersionRange:
+    """Intervalo de versões afetadas; limites None são abertos."""
+    start: Optional[VersionKey] = None
+    start_inclusive: bool = True
+    end: Optional[VersionKey] = None
+    end_inclusive: bool = False
+
+    def contains(self, key: VersionKey) -> bool:
+        if self.start is not None:
+            if key < self.start or (key == self.start and not self.start_inclusive):
+                return False
+        if self.end is not None:
+            if key > self.end or (key == self.end and not self.end_inclusive):
+                return False
+        return True
+
+    @classmethod
+    def exact(cls, version: str) -> Optional['VersionRange']:
+        key = version_key(version)
+        if key is None:
+            return cls()
+        return cls(start=key, start_inclusive=True, end=key, end_inclusive=True)
+
+    @classmethod
+    def from_bounds(
+        cls,
+        start_including: Optional[str] = None,
+        start_excluding: Optional[str] = None,
+        end_including: Optional[str] = None,
+        end_excluding: Optional[str] = None,
+    ) -> 'VersionRange':
+        """Constrói a partir dos campos versionStart/End(In|Ex)cluding da NVD."""
+        start = version_key(start_including or start_excluding or '')
+        end = version_key(end_including or end_excluding or '')
+        return cls(
+            start=start,
+            start_inclusive=bool(start_including),
+            end=end,
+            end_inclusive=bool(end_including),
+        )
+
+
+_BOUND_RE = re.compile(r'^\s*(>=|<=|>|<|==|=)?\s*v?(\S+)\s*$')
+
+
+def parse_range_expression(
+    expression: str,
+    fixed_version: Optional[str] = None,
+    fixed_inclusive: bool = False,
+) -> Optional[VersionRange]:
+    """Interpreta os rótulos gravados em version_ref/affected_products.
+
+    Aceita "v1.2", "1.2", ">= 7.0.1", "> 1, < 2", ">= 1, <= 2" e "*". `fixed_version`
+    completa rótulos de início (">= a") com o fim do intervalo, inclusivo quando
+    `fixed_inclusive` (versionEndIncluding) e exclusivo caso contrário.
+
+    Returns:
+        VersionRange, ou None quando o texto não é interpretável
+    """
+    text = (expression or '').strip()
+    if text.lower() in _WILDCARDS:
+        return VersionRange()
+
+    start = end = None
+    start_inc, end_inc = True, False
+    exact = None
+    for part in text.split(','):
+        m = _BOUND_RE.match(part)
+        if not m:
+            return None
+        op, value = m.group(1), m.group(2)
+        key = version_key(value)
+        if key is None:
+            continue
+        if op in (None, '=', '=='):
+            exact = key
+        elif op in ('>=', '>'):
+            start, start_inc = key, op == '>='
+        else:
+            end, end_inc = key, op == '<='
+    if exact is not None and start is None and end is None:
+        return VersionRange(start=exact, start_inclusive=True, end=exact, end_inclusive=True)
+    if start is not None and end is None and fixed_version:
+        end = version_key(fixed_version)
+        end_inc = bool(fixed_inclusive)
+    if start is None and end is None and exact is None:
+        return None
+    return VersionRange(start=start, start_inclusive=start_inc, end=end, end_inclusive=end_inc)
+
+
+class IntervalIndex:
+    """Índice de intervalos de versões de um produto, ordenado pelo início.
+
+    `add` acumula (intervalo, payload); `build` ordena uma vez; `stab` devolve os
+    payloads cujos intervalos contêm a versão, usando bisect para descartar os
+    intervalos que começam depois dela.
+    """
+
+    _MIN: VersionKey = ((-2, 0, ''),)
+
+    def __init__(self):
+        self._items: List[Tuple[VersionKey, VersionRange, object]] = []
+        self._starts: List[VersionKey] = []
+        self._built = False
+
+    def add(self, interval: VersionRange, payload: object) -> None:
+        self._items.append((interval.start if interval.start is not None else self._MIN, interval, payload))
+        self._built = False
+
+    def build(self) -> 'IntervalIndex':
+        self._items.sort(key=lambda item: item[0])
+        self._starts = [item[0] for item in self._items]
+        self._built = True
+        return self
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stab(self, key: VersionKey) -> List[object]:
+        if not self._built:
+            self.build()
+        limit = bisect.bisect_right(self._starts, key)
+        return [payload for _, interval, payload in self._items[:limit] if interval.contains(key)]
+
+    def stab_many(self, keys: Iterable[VersionKey]) -> List[object]:
+        """Payloads que contêm qualquer uma das versões (uma passada por versão)."""
+        seen = {}
+        for key in keys:
+            for payload in self.stab(key):
+                seen.setdefault(payload, None)
+        return list(seen)
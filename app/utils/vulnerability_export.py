@@ -0,0 +1,148 @@
+"""
+Exportação de vulnerabilidades em streaming (CSV ou NDJSON, opcionalmente gzip).
+
+A consulta seleciona apenas as colunas exportadas e é executada com
+``yield_per``/``stream_results`` (cursor do lado do servidor quando o driver
+suporta), de modo que nenhum objeto ORM é hidratado e a memória fica constante
+independentemente do número de linhas. As linhas são agrupadas em blocos de
+~64 KB antes de serem enviadas ao cliente.
+"""
+
+import csv
+import io
+import json
+import logging
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+from app.models.vulnerability import Vulnerability
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = (
+    Vulnerability.cve_id,
+    Vulnerability.base_severity,
+    Vulnerability.cvss_score,
+    Vulnerability.published_date,
+    Vulnerability.nvd_vendors_data,
+    Vulnerability.nvd_products_data,
+    Vulnerability.patch_available,
+    Vulnerability.assigner,
+)
+
+CSV_HEADER = ['CVE ID', 'Severidade', 'CVSS', 'Publicado em', 'Vendor', 'Produto', 'Patch Disponível', 'Assigner']
+
+CHUNK_BYTES = 64 * 1024
+
+
+def _first_name(items: Any, key_name: str = 'name') -> str:
+    """Primeiro vendor/produto da lista NVD (string, dict ou objeto com .name)."""
+    if not items:
+        return ''
+    first = items[0]
+    if isinstance(first, str):
+        return first
+    if isinstance(first, dict):
+        return str(first.get(key_name, ''))
+    return str(getattr(first, key_name, '') or '')
+
+
+def iter_export_rows(query, batch_size: int = 1000) -> Iterator[Sequence[Any]]:
+    """Executa `query` (Query de Vulnerability já filtrada/ordenada) só com as colunas exportadas."""
+    rows = query.with_entities(*EXPORT_COLUMNS).execution_options(
+        yield_per=batch_size, stream_results=True
+    )
+    yield from rows
+
+
+def _csv_values(row: Sequence[Any]) -> List[Any]:
+    cve_id, severity, cvss, published, vendors, products, patch, assigner = row
+    try:
+        vendor = _first_name(vendors)
+    except Exception:
+        vendor = ''
+    try:
+        product = _first_name(products)
+    except Exception:
+        product = ''
+    return [
+        cve_id,
+        severity or '',
+        cvss if cvss is not None else '',
+        published.strftime('%Y-%m-%d') if published else '',
+        vendor,
+        product,
+        'Sim' if patch else 'Não',
+        assigner or '',
+    ]
+
+
+def _ndjson_record(row: Sequence[Any]) -> Dict[str, Any]:
+    cve_id, severity, cvss, published, vendors, products, patch, assigner = row
+    return {
+        'cve_id': cve_id,
+        'base_severity': severity,
+        'cvss_score': cvss,
+        'published_date': published.isoformat() if published else None,
+        'vendors': vendors or [],
+        'products': products or [],
+        'patch_available': bool(patch),
+        'assigner': assigner,
+    }
+
+
+def stream_csv(rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """Gera o CSV em blocos de ~CHUNK_BYTES (cabeçalho incluído)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for row in rows:
+        writer.writerow(_csv_values(row))
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def stream_ndjson(rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """Gera um objeto JSON por linha, em blocos de ~CHUNK_BYTES."""
+    parts: List[str] = []
+    size = 0
+    for row in rows:
+        line = json.dumps(_ndjson_record(row), ensure_ascii=False, default=str)
+        parts.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_BYTES:
+            parts.append('')
+            yield '\n'.join(parts).encode('utf-8')
+            parts, size = [], 0
+    if parts:
+        parts.append('')
+        yield '\n'.join(parts).encode('utf-8')
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Comprime o stream incrementalmente (formato gzip, Content-Encoding: gzip)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def logged_stream(chunks: Iterable[bytes], label: str) -> Iterator[bytes]:
+    """Registra falhas no meio do stream (o status HTTP já foi enviado e não pode mudar)."""
+    total = 0
+    try:
+        for chunk in chunks:
+            total += len(chunk)
+            yield chunk
+    except GeneratorExit:
+        logger.info(f"{label}: cliente desconectou após {total} bytes")
+        raise
+    except Exception as e:
+        logger.error(f"{label}: falha durante o streaming após {total} bytes: {e}", exc_info=True)
+        raise
@@ -0,0 +1,168 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+PAST = datetime(2020, 1, 1)
+
+
+@pytest.fixture
+def fleet_session():
+    """Banco SQLite em memória com as tabelas da sincronização da frota."""
+    import app.models  # noqa: F401 - registra todos os mappers
+    from app.extensions import db
+    from app.models.affected_product import AffectedProduct
+    from app.models.asset import Asset
+    from app.models.asset_product import AssetProduct
+    from app.models.asset_vulnerability import AssetVulnerability
+    from app.models.cve_product import CVEProduct
+    from app.models.cve_vendor import CVEVendor
+    from app.models.product import Product
+    from app.models.sync_metadata import SyncMetadata
+    from app.models.vendor import Vendor
+    from app.models.version_reference import VersionReference
+    from app.models.vulnerability import Vulnerability
+
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine, tables=[
+        Vulnerability.__table__, Vendor.__table__, Product.__table__, CVEVendor.__table__,
+        CVEProduct.__table__, VersionReference.__table__, AffectedProduct.__table__,
+        Asset.__table__, AssetProduct.__table__, AssetVulnerability.__table__, SyncMetadata.__table__,
+    ])
+    session = Session(engine)
+
+    vendor = Vendor(name='acme')
+    session.add(vendor)
+    session.flush()
+    product = Product(vendor_id=vendor.id, name='gateway')
+    session.add(product)
+    session.flush()
+    by_vendor = Asset(name='by-vendor', ip_address='10.0.0.1', status='active', vendor_id=vendor.id,
+                      created_at=PAST, updated_at=PAST)
+    by_product = Asset(name='by-product', ip_address='10.0.0.2', status='active',
+                       created_at=PAST, updated_at=PAST)
+    session.add_all([by_vendor, by_product])
+    session.flush()
+    session.add(AssetProduct(asset_id=by_product.id, product_id=product.id, installed_version='2.0'))
+
+    _add_cve(session, 'CVE-2020-0001', written_at=PAST)
+    session.add(CVEVendor(cve_id='CVE-2020-0001', vendor_id=vendor.id, created_at=PAST))
+    # Fim vindo de versionEndIncluding: a versão 2.0 instalada é afetada
+    _add_cve(session, 'CVE-2020-0002', written_at=PAST)
+    session.add(VersionReference(cve_id='CVE-2020-0002', product_id=product.id, affected_version='>= 1.0',
+                                 fixed_version='2.0', fixed_inclusive=True))
+    # Intervalo que ainda não alcança a versão instalada
+    _add_cve(session, 'CVE-2020-0003', written_at=PAST)
+    session.add(VersionReference(cve_id='CVE-2020-0003', product_id=product.id, affected_version='< 1.5'))
+    session.commit()
+
+    session.info['ids'] = {'vendor': vendor.id, 'by_vendor': by_vendor.id, 'by_product': by_product.id}
+    yield session
+    session.close()
+
+
+def _add_cve(session, cve_id, written_at, last_update=PAST):
+    from app.models.vulnerability import Vulnerability
+
+    vuln = Vulnerability(cve_id=cve_id, description=f'{cve_id} overflow', published_date=PAST,
+                         last_update=last_update, base_severity='HIGH', cvss_score=7.5)
+    vuln.written_at = written_at
+    session.add(vuln)
+    return vuln
+
+
+def _links(session):
+    from app.models.asset_vulnerability import AssetVulnerability
+
+    return {(a, v) for a, v in session.query(AssetVulnerability.asset_id, AssetVulnerability.vulnerability_id)}
+
+
+def _state(session):
+    from app.models.sync_metadata import SyncMetadata
+    from app.services.asset_sync_service import FLEET_SYNC_STATE_KEY
+
+    return session.query(SyncMetadata.value).filter_by(key=FLEET_SYNC_STATE_KEY).scalar()
+
+
+def _later():
+    from app.models.vulnerability import ingestion_time
+
+    return ingestion_time() + timedelta(seconds=1)
+
+
+def test_full_then_incremental_sync(fleet_session):
+    from app.models.cve_vendor import CVEVendor
+    from app.services.asset_sync_service import AssetSyncService
+
+    ids = fleet_session.info['ids']
+    service = AssetSyncService(fleet_session, settle_seconds=0)
+
+    full = service.sync_fleet()
+    assert full.incremental is False
+    assert _links(fleet_session) == {(ids['by_vendor'], 'CVE-2020-0001'), (ids['by_product'], 'CVE-2020-0002')}
+
+    _add_cve(fleet_session, 'CVE-2020-0004', written_at=_later())
+    fleet_session.add(CVEVendor(cve_id='CVE-2020-0004', vendor_id=ids['vendor'], created_at=_later()))
+    fleet_session.commit()
+
+    incremental = service.sync_fleet()
+    assert incremental.incremental is True
+    assert incremental.skipped is False
+    assert incremental.delta_cves == 1
+    assert incremental.created == 1
+    assert (ids['by_vendor'], 'CVE-2020-0004') in _links(fleet_session)
+
+
+def test_incremental_sync_skips_without_advancing_watermark(fleet_session):
+    from app.services.asset_sync_service import AssetSyncService
+
+    service = AssetSyncService(fleet_session, settle_seconds=0)
+    service.sync_fleet()
+    state = _state(fleet_session)
+
+    stats = service.sync_fleet()
+    assert stats.skipped is True
+    assert stats.created == 0
+    assert _state(fleet_session) == state
+
+
+def test_resaved_cve_with_changed_range_is_linked(fleet_session):
+    from app.models.version_reference import VersionReference
+    from app.models.vulnerability import Vulnerability
+    from app.services.asset_sync_service import AssetSyncService
+
+    ids = fleet_session.info['ids']
+    service = AssetSyncService(fleet_session, settle_seconds=0)
+    service.sync_fleet()
+    assert (ids['by_product'], 'CVE-2020-0003') not in _links(fleet_session)
+
+    # Mesmas associações de vendor/produto, novo intervalo; lastModified mais antigo que
+    # o de outras CVEs (janela sincronizada fora de ordem), mas gravada agora
+    fleet_session.query(VersionReference).filter_by(cve_id='CVE-2020-0003').update({'affected_version': '< 2.5'})
+    fleet_session.get(Vulnerability, 'CVE-2020-0003').written_at = _later()
+    fleet_session.commit()
+
+    stats = service.sync_fleet()
+    assert stats.skipped is False
+    assert stats.product_links == 1
+    assert (ids['by_product'], 'CVE-2020-0003') in _links(fleet_session)
+
+
+def test_changed_asset_is_relinked(fleet_session):
+    from app.models.asset import Asset
+    from app.models.asset_product import AssetProduct
+    from app.services.asset_sync_service import AssetSyncService
+
+    ids = fleet_session.info['ids']
+    service = AssetSyncService(fleet_session, settle_seconds=0)
+    service.sync_fleet()
+
+    fleet_session.query(AssetProduct).filter_by(asset_id=ids['by_product']).update({'installed_version': '1.2'})
+    fleet_session.get(Asset, ids['by_product']).updated_at = _later()
+    fleet_session.commit()
+
+    stats = service.sync_fleet()
+    assert stats.changed_assets == 1
+    assert stats.delta_cves == 0
+    assert (ids['by_product'], 'CVE-2020-0003') in _links(fleet_session)
@@ -27,3 +27,34 @@ def test_sync_progress_endpoint_accessible_in_initial_state():
     if resp.status_code == 200:
         data = resp.get_json()
         assert 'status' in data
+
+
+def test_bootstrap_guard_caches_steady_state_until_metadata_changes():
+    from app.extensions import db
+    from app.models.user import User
+    from app.models.sync_metadata import SyncMetadata
+    from app.utils.bootstrap_state import bootstrap_state_cache
+
+    app = create_app('testing')
+    _init_db(app)
+    with app.app_context():
+        if not db.session.query(User).filter_by(username='guard_root').first():
+            db.session.add(User(username='guard_root', email='guard_root@example.com', password='Str0ng!Passw0rd', is_admin=True))
+        for key, value in (('require_root_setup', 'false'), ('nvd_first_sync_completed', 'true')):
+            meta = db.session.query(SyncMetadata).filter_by(key=key).first()
+            if meta:
+                meta.value = value
+            else:
+                db.session.add(SyncMetadata(key=key, value=value))
+        db.session.commit()
+
+    bootstrap_state_cache.invalidate(broadcast=False)
+    client = app.test_client()
+    client.get('/api/v1/system/bootstrap')
+    assert bootstrap_state_cache.get() is not None
+
+    with app.app_context():
+        meta = db.session.query(SyncMetadata).filter_by(key='require_root_setup').first()
+        meta.value = 'true'
+        db.session.commit()
+    assert bootstrap_state_cache.get() is None
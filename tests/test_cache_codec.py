@@ -0,0 +1,79 @@
+import gzip
+import json
+import pickle
+import zlib
+from datetime import datetime
+
+import pytest
+
+from app.utils import cache_codec
+from app.utils.cache_codec import (
+    COMPRESS_NONE,
+    COMPRESS_ZLIB,
+    FORMAT_JSON,
+    FORMAT_PICKLE,
+    MAGIC,
+    CacheCodec,
+    best_compressor,
+)
+
+
+def _header(data):
+    assert data[0] == MAGIC
+    return data[1] >> 4, data[1] & 0x0F
+
+
+@pytest.mark.parametrize('fmt', ['auto', 'json'])
+@pytest.mark.parametrize('compressor', ['auto', 'zlib', 'none'])
+def test_round_trip(fmt, compressor):
+    codec = CacheCodec(compression_threshold=64, compressor=compressor, fmt=fmt)
+    small = {'cve_id': 'CVE-2024-0001', 'score': 9.8, 'tags': ['rce']}
+    large = [{'id': i, 'description': 'Estouro de buffer remoto ção'} for i in range(200)]
+    assert codec.decode(codec.encode(small)) == small
+    assert codec.decode(codec.encode(large)) == large
+    if compressor != 'auto':
+        assert codec.describe().endswith('+' + compressor)
+
+
+def test_compression_only_above_threshold_and_when_smaller(monkeypatch):
+    codec = CacheCodec(compression_threshold=100, compressor='zlib', fmt='json')
+    assert _header(codec.encode('x' * 50)) == (FORMAT_JSON, COMPRESS_NONE)
+    assert _header(codec.encode('x' * 500)) == (FORMAT_JSON, COMPRESS_ZLIB)
+
+    # Compressão que não reduz o corpo é descartada
+    monkeypatch.setitem(cache_codec.COMPRESSORS, COMPRESS_ZLIB, (lambda d, large: d + b'!', zlib.decompress))
+    assert _header(codec.encode('x' * 500)) == (FORMAT_JSON, COMPRESS_NONE)
+
+    disabled = CacheCodec(compression_threshold=0, use_compression=False)
+    assert _header(disabled.encode('x' * 500))[1] == COMPRESS_NONE
+
+
+def test_non_json_values_fall_back_to_pickle_and_defaults_stringify():
+    codec = CacheCodec(fmt='json')
+    circular = []
+    circular.append(circular)
+    encoded = codec.encode(circular)
+    assert _header(encoded)[0] == FORMAT_PICKLE
+    decoded = codec.decode(encoded)
+    assert decoded[0] is decoded
+
+    when = datetime(2024, 5, 1, 12, 0)
+    assert codec.decode(codec.encode({'at': when})) == {'at': str(when)}
+
+
+def test_legacy_entries_remain_readable():
+    value = {'a': [1, 2, 3]}
+    codec = CacheCodec()
+    assert codec.decode(b'JSON:' + json.dumps(value).encode()) == value
+    assert codec.decode(b'PICKLE:' + pickle.dumps(value)) == value
+    assert codec.decode(b'GZIP_PICKLE:' + gzip.compress(pickle.dumps(value))) == value
+    assert codec.decode(json.dumps(value).encode()) == value
+
+
+def test_unknown_codec_bytes_and_unavailable_compressor():
+    codec = CacheCodec()
+    with pytest.raises(ValueError):
+        codec.decode(bytes((MAGIC, 0x0F)) + b'{}')
+    with pytest.raises(ValueError):
+        codec.decode(bytes((MAGIC, 0xF0)) + b'{}')
+    assert CacheCodec(compressor='brotli').compressor == best_compressor()
@@ -0,0 +1,187 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def stats_session(monkeypatch):
+    """Banco SQLite em memória com as tabelas dos agregados diários."""
+    import app.models  # noqa: F401 - registra todos os mappers
+    from app.extensions import db
+    from app.models.cve_part import CVEPart
+    from app.models.cve_product import CVEProduct
+    from app.models.cve_vendor import CVEVendor
+    from app.models.product import Product
+    from app.models.severity_daily_rollup import SeverityDailyRollup
+    from app.models.sync_metadata import SyncMetadata
+    from app.models.vendor import Vendor
+    from app.models.vulnerability import Vulnerability
+    from app.models.vulnerability_daily_stats import VulnerabilityDailyStats
+    from app.services.daily_stats_service import DailyStatsService
+    from app.services.vendor_scope_service import VendorScopeService
+
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine, tables=[
+        Vulnerability.__table__, Vendor.__table__, Product.__table__, CVEVendor.__table__,
+        CVEProduct.__table__, CVEPart.__table__, SyncMetadata.__table__,
+        SeverityDailyRollup.__table__, VulnerabilityDailyStats.__table__,
+    ])
+    monkeypatch.setattr(DailyStatsService, '_tables_ready', None)
+    monkeypatch.setattr(DailyStatsService, '_populated', False)
+    monkeypatch.setattr(DailyStatsService, '_rebuild_started', False)
+    # Sem tabelas de escopo materializado: consulta multi-vendor usa a UNION direta
+    monkeypatch.setattr(VendorScopeService, '_tables_ready', False)
+
+    session = Session(engine)
+    yield session
+    session.close()
+
+
+def test_single_vendor_daily_counts_include_product_linked_cves(stats_session):
+    from app.models.cve_product import CVEProduct
+    from app.models.cve_vendor import CVEVendor
+    from app.models.product import Product
+    from app.models.vendor import Vendor
+    from app.models.vulnerability import Vulnerability
+    from app.services.daily_stats_service import DailyStatsService
+
+    session = stats_session
+    service = DailyStatsService(session)
+    # Antes das inserções: o inspector usa a mesma conexão do SQLite em memória e faz rollback ao devolvê-la
+    assert service.tables_ready()
+    day = date(2001, 2, 3)
+    published = datetime(2001, 2, 3, 12, 0)
+    vendor = Vendor(name='daily-stats-vendor')
+    session.add(vendor)
+    session.flush()
+    product = Product(vendor_id=vendor.id, name='daily-stats-product')
+    session.add(product)
+    for cve_id in ('CVE-2001-90001', 'CVE-2001-90002'):
+        session.add(Vulnerability(
+            cve_id=cve_id, description='daily stats test', published_date=published,
+            last_update=published, base_severity='HIGH', cvss_score=7.5,
+        ))
+    session.flush()
+    # Uma CVE associada diretamente ao vendor e outra apenas via produto (e ambas no caso da primeira)
+    session.add(CVEVendor(cve_id='CVE-2001-90001', vendor_id=vendor.id))
+    session.add(CVEProduct(cve_id='CVE-2001-90001', product_id=product.id))
+    session.add(CVEProduct(cve_id='CVE-2001-90002', product_id=product.id))
+    session.flush()
+
+    assert service.refresh_days([day]) == 1
+    session.commit()
+
+    single = service.daily_counts(day, day, vendor_ids=[vendor.id])
+    multi = service.daily_counts(day, day, vendor_ids=[vendor.id, vendor.id + 100000])
+    assert single[day.isoformat()]['HIGH'] == 2
+    assert single == multi
+
+
+def _add_vulns(session, published, severities, prefix='CVE-2002-9'):
+    from app.models.vulnerability import Vulnerability
+
+    ids = []
+    for n, severity in enumerate(severities):
+        cve_id = f'{prefix}{n:04d}'
+        session.add(Vulnerability(
+            cve_id=cve_id, description='severity count test', published_date=published,
+            last_update=published, base_severity=severity, cvss_score=5.0,
+        ))
+        ids.append(cve_id)
+    session.flush()
+    return ids
+
+
+def test_dashboard_counts_read_the_rollup_without_scope(stats_session):
+    from app.services.daily_stats_service import DailyStatsService
+    from app.services.vulnerability_service import VulnerabilityService
+
+    session = stats_session
+    stats = DailyStatsService(session)
+    assert stats.tables_ready()
+    _add_vulns(session, datetime(2002, 5, 1), ['CRITICAL', 'HIGH', 'HIGH', 'MEDIUM', 'LOW'])
+    assert stats.rebuild_all() == 4
+    session.commit()
+
+    expected = {'critical': 1, 'high': 2, 'medium': 1, 'total': 5}
+    assert stats.severity_totals() == expected
+    # CVE gravada sem atualizar o agregado: o total sem escopo vem do rollup
+    _add_vulns(session, datetime(2002, 5, 2), ['CRITICAL'], prefix='CVE-2002-8')
+    session.commit()
+    assert VulnerabilityService(session).get_dashboard_counts() == expected
+
+
+def test_scoped_and_weekly_counts_group_by_severity(stats_session):
+    from app.models.cve_vendor import CVEVendor
+    from app.models.vendor import Vendor
+    from app.services.daily_stats_service import DailyStatsService
+    from app.services.vulnerability_service import VulnerabilityService
+
+    session = stats_session
+    assert DailyStatsService(session).tables_ready()
+    vendor = Vendor(name='severity-count-vendor')
+    session.add(vendor)
+    old = _add_vulns(session, datetime(2002, 5, 1), ['CRITICAL', 'HIGH'])
+    recent = _add_vulns(session, datetime.now(), ['HIGH', 'MEDIUM', 'LOW'], prefix='CVE-2026-9')
+    session.add_all(CVEVendor(cve_id=cve_id, vendor_id=vendor.id) for cve_id in (old[0], recent[0], recent[1]))
+    session.commit()
+
+    service = VulnerabilityService(session)
+    assert service.get_dashboard_counts(vendor_ids=[vendor.id]) == {
+        'critical': 1, 'high': 1, 'medium': 1, 'total': 3,
+    }
+    assert service.get_weekly_counts() == {'critical': 0, 'high': 1, 'medium': 1, 'total': 3}
+    assert service.get_weekly_counts(vendor_ids=[vendor.id]) == {'critical': 0, 'high': 1, 'medium': 1, 'total': 2}
+
+
+def test_refresh_days_leaves_other_days_untouched(stats_session):
+    from app.models.cve_vendor import CVEVendor
+    from app.models.vendor import Vendor
+    from app.models.vulnerability_daily_stats import VulnerabilityDailyStats
+    from app.services.daily_stats_service import DailyStatsService
+
+    session = stats_session
+    service = DailyStatsService(session)
+    assert service.tables_ready()
+    vendor = Vendor(name='refresh-days-vendor')
+    session.add(vendor)
+    first = _add_vulns(session, datetime(2002, 6, 1), ['HIGH'])
+    second = _add_vulns(session, datetime(2002, 6, 2), ['LOW'], prefix='CVE-2002-8')
+    session.add_all(CVEVendor(cve_id=cve_id, vendor_id=vendor.id) for cve_id in first + second)
+    session.flush()
+    assert service.refresh_days([date(2002, 6, 1)]) == 1
+
+    rows = session.query(VulnerabilityDailyStats.day, VulnerabilityDailyStats.cve_count).filter_by(
+        vendor_id=vendor.id, part=VulnerabilityDailyStats.ALL_PARTS,
+    ).all()
+    assert rows == [(date(2002, 6, 1), 1)]
+
+
+def test_ensure_populated_schedules_rebuild_instead_of_running_it(stats_session, monkeypatch):
+    from app.services.daily_stats_service import DailyStatsService
+
+    session = stats_session
+    service = DailyStatsService(session)
+    assert service.tables_ready()
+    scheduled = []
+    monkeypatch.setattr(DailyStatsService, 'schedule_rebuild', lambda self: scheduled.append(True) or True)
+
+    assert service.ensure_populated() is False
+    _add_vulns(session, datetime(2002, 7, 1), ['HIGH'])
+    session.commit()
+    assert service.ensure_populated() is False
+    assert scheduled == [True]
+    assert service.severity_totals() is None
+
+    service.rebuild_all()
+    session.commit()
+    assert service.ensure_populated() is True
+
+
+def test_schedule_rebuild_needs_app_context(stats_session):
+    from app.services.daily_stats_service import DailyStatsService
+
+    assert DailyStatsService(stats_session).schedule_rebuild() is False
+    assert DailyStatsService._rebuild_started is False
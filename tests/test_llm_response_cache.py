@@ -0,0 +1,151 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from app.utils.llm_response_cache import (
+    STATE_FRESH,
+    STATE_MISS,
+    STATE_STALE,
+    DiskLLMBackend,
+    LLMResponseCache,
+)
+
+
+@pytest.fixture
+def llm_cache(tmp_path):
+    return LLMResponseCache(DiskLLMBackend(tmp_path / 'llm'), ttl=3600, stale_ttl=3600, max_bytes=0)
+
+
+def _wait_for_refresh(timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not any(t.name == 'llm-cache-refresh' for t in threading.enumerate()):
+            return
+        time.sleep(0.01)
+    raise AssertionError('revalidação em segundo plano não terminou')
+
+
+def test_make_key_depends_on_type_model_and_prompt():
+    messages = [{'role': 'user', 'content': 'CVE-2024-0001'}]
+    key = LLMResponseCache.make_key('risk_analysis', 'gpt-4o', messages)
+    assert key.startswith('risk_analysis:gpt-4o:')
+    assert key == LLMResponseCache.make_key('risk_analysis', 'gpt-4o', [dict(messages[0])])
+    assert key != LLMResponseCache.make_key('risk_analysis', 'gpt-4o-mini', messages)
+    assert key != LLMResponseCache.make_key('risk_analysis', 'gpt-4o', [{'role': 'user', 'content': 'CVE-2024-0002'}])
+    assert LLMResponseCache.make_key('summary', None, 'texto').startswith('summary:-:')
+
+
+def test_disk_backend_is_created_on_first_use(tmp_path):
+    backend = DiskLLMBackend(tmp_path / 'llm')
+    assert not (tmp_path / 'llm').exists()
+    LLMResponseCache(backend).store('a:m:1', 'valor')
+    assert (tmp_path / 'llm' / 'llm_responses.sqlite3').exists()
+
+
+def test_get_or_compute_caches_and_skips_failures(llm_cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'markdown': '# Análise', 'tokens': 42}
+
+    assert llm_cache.get_or_compute('risk:m:1', compute) == {'markdown': '# Análise', 'tokens': 42}
+    assert llm_cache.get_or_compute('risk:m:1', compute) == {'markdown': '# Análise', 'tokens': 42}
+    assert len(calls) == 1
+    assert llm_cache.metrics.hits == 1 and llm_cache.metrics.misses == 1
+
+    def failing():
+        raise RuntimeError('timeout')
+
+    with pytest.raises(RuntimeError):
+        llm_cache.get_or_compute('risk:m:2', failing)
+    assert llm_cache.lookup('risk:m:2') == (None, STATE_MISS)
+
+    llm_cache.get_or_compute('risk:m:3', lambda: 'demo', cacheable=lambda v: v != 'demo')
+    assert llm_cache.lookup('risk:m:3') == (None, STATE_MISS)
+
+
+def test_stale_entries_are_served_and_refreshed_in_background(tmp_path):
+    cache = LLMResponseCache(DiskLLMBackend(tmp_path), ttl=0, stale_ttl=3600, max_bytes=0)
+    cache.store('risk:m:1', 'antiga')
+    time.sleep(0.01)
+    assert cache.lookup('risk:m:1') == ('antiga', STATE_STALE)
+
+    assert cache.get_or_compute('risk:m:1', lambda: 'nova') == 'antiga'
+    _wait_for_refresh()
+    assert cache.lookup('risk:m:1')[0] == 'nova'
+    assert cache.metrics.stale_hits == 1 and cache.metrics.refreshes == 1
+
+    # Sem janela de revalidação a entrada vencida é ausente
+    expired = LLMResponseCache(DiskLLMBackend(tmp_path), ttl=0, stale_ttl=0, max_bytes=0)
+    assert expired.lookup('risk:m:1') == (None, STATE_MISS)
+
+
+def test_lru_eviction_by_bytes_and_corrupted_entries(tmp_path):
+    backend = DiskLLMBackend(tmp_path)
+    cache = LLMResponseCache(backend, ttl=3600, stale_ttl=0, max_bytes=0)
+    for i in range(3):
+        cache.store(f'risk:m:{i}', 'x' * 100)
+        time.sleep(0.01)
+    cache.lookup('risk:m:0')  # acesso recente: sobrevive ao despejo
+
+    cache.max_bytes = backend.usage()['bytes'] - 1
+    assert cache.evict() == 1
+    assert cache.lookup('risk:m:1') == (None, STATE_MISS)
+    assert cache.lookup('risk:m:0')[1] == STATE_FRESH
+
+    backend.put('risk:m:bad', 'risk', 'm', b'\x00not-a-codec-payload')
+    assert cache.lookup('risk:m:bad') == (None, STATE_MISS)
+    assert backend.get('risk:m:bad') is None
+
+
+def test_background_risk_analysis_reloads_the_vulnerability(monkeypatch):
+    from app import create_app
+    from app.extensions import db
+    from app.main_startup import initialize_database
+    from app.models.vulnerability import Vulnerability
+    from app.services.risk_report_service import RiskReportService
+    import app.utils.llm_response_cache as llm_module
+
+    class _BackgroundCache:
+        """Executa o compute numa thread sem contexto de aplicação, como a revalidação."""
+
+        def make_key(self, *parts):
+            return 'risk_analysis:test'
+
+        def get_or_compute(self, key, compute):
+            result = {}
+            worker = threading.Thread(target=lambda: result.setdefault('value', compute()))
+            worker.start()
+            worker.join(10)
+            return result['value']
+
+    received = []
+
+    def fake_generate(self, vulnerability, messages):
+        received.append((vulnerability, vulnerability.cve_id, vulnerability.description))
+        return '# Análise'
+
+    monkeypatch.setattr(llm_module, 'get_llm_cache', lambda app=None: _BackgroundCache())
+    monkeypatch.setattr(RiskReportService, '_risks_column_available', lambda self: False)
+    monkeypatch.setattr(RiskReportService, '_generate_risk_markdown', fake_generate)
+
+    app = create_app('testing')
+    with app.app_context():
+        initialize_database(app)
+    cve_id = 'CVE-2001-90101'
+    with app.test_request_context('/'):
+        if db.session.get(Vulnerability, cve_id) is None:
+            published = datetime(2001, 1, 1)
+            db.session.add(Vulnerability(cve_id=cve_id, description='risk cache test', published_date=published,
+                                         last_update=published, base_severity='HIGH', cvss_score=7.5))
+            db.session.commit()
+        request_instance = db.session.get(Vulnerability, cve_id)
+
+        assert RiskReportService().get_risk_analysis(cve_id) == '# Análise'
+
+    instance, received_id, description = received[0]
+    assert instance is not request_instance
+    assert (received_id, description) == (cve_id, 'risk cache test')
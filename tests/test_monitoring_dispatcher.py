@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+
+def _row(cve_id, written_at, severity='HIGH', cvss=7.5, description='Buffer overflow in http_server'):
+    return SimpleNamespace(cve_id=cve_id, written_at=written_at, base_severity=severity,
+                           cvss_score=cvss, description=description)
+
+
+@pytest.fixture
+def monitoring_session():
+    """Banco SQLite em memória com as tabelas usadas pelo dispatcher."""
+    import app.models  # noqa: F401 - registra todos os mappers
+    from app.extensions import db
+    from app.models.cve_product import CVEProduct
+    from app.models.cve_vendor import CVEVendor
+    from app.models.monitoring_rule import MonitoringRule
+    from app.models.monitoring_rule_cursor import MonitoringRuleCursor
+    from app.models.product import Product
+    from app.models.vendor import Vendor
+    from app.models.vulnerability import Vulnerability
+
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine, tables=[
+        Vulnerability.__table__, Vendor.__table__, Product.__table__, CVEVendor.__table__,
+        CVEProduct.__table__, MonitoringRule.__table__, MonitoringRuleCursor.__table__,
+    ])
+    session = Session(engine)
+    yield session
+    session.close()
+
+
+def _add_cve(session, cve_id, last_update, written_at, severity='HIGH'):
+    from app.models.vulnerability import Vulnerability
+
+    vuln = Vulnerability(cve_id=cve_id, description=f'{cve_id} overflow', published_date=datetime(2020, 1, 1),
+                         last_update=last_update, base_severity=severity, cvss_score=7.5)
+    vuln.written_at = written_at
+    session.add(vuln)
+    return vuln
+
+
+def test_compiled_rule_matches_all_conditions():
+    from app.jobs.monitoring_dispatcher import CompiledRule
+    from app.models.monitoring_rule import MonitoringRule
+
+    cursor = (datetime(2024, 1, 1), 'CVE-2024-0005')
+    rule = MonitoringRule(id=1, name='r', rule_type='cve', user_id=1, conditions={
+        'keywords': 'HTTP_SERVER overflow', 'severities': ['high', 'critical'],
+        'min_cvss': '7.0', 'vendors': ['Apache'],
+    })
+    compiled = CompiledRule.from_rule(rule, cursor, {'apache': 10})
+
+    assert compiled.severities == {'HIGH', 'CRITICAL'}
+    assert compiled.vendor_ids == {10}
+    after = datetime(2024, 1, 2)
+    assert compiled.matches(_row('CVE-2024-0001', after), frozenset({10, 11}))
+    # Cursor: mesma marca de tempo só avança pelo cve_id
+    assert not compiled.matches(_row('CVE-2024-0005', cursor[0]), frozenset({10}))
+    assert compiled.matches(_row('CVE-2024-0006', cursor[0]), frozenset({10}))
+    assert not compiled.matches(_row('CVE-2024-0001', after, severity='LOW'), frozenset({10}))
+    assert not compiled.matches(_row('CVE-2024-0001', after, cvss=6.9), frozenset({10}))
+    assert not compiled.matches(_row('CVE-2024-0001', after), frozenset({11}))
+    assert not compiled.matches(_row('CVE-2024-0001', after, description='Overflow in ftp'), frozenset({10}))
+
+
+def test_compiled_rule_without_conditions_matches_everything_after_cursor():
+    from app.jobs.monitoring_dispatcher import CompiledRule
+    from app.models.monitoring_rule import MonitoringRule
+
+    cursor = (datetime(2024, 1, 1), '')
+    compiled = CompiledRule.from_rule(MonitoringRule(id=2, name='r', rule_type='cve', user_id=1, conditions=None), cursor, {})
+
+    assert compiled.matches(_row('CVE-2024-0001', datetime(2024, 1, 1), severity=None, cvss=None), frozenset())
+    assert not compiled.matches(_row('CVE-2024-0001', datetime(2023, 12, 31)), frozenset())
+
+
+def test_delta_is_keyed_on_written_at_and_skips_unsettled_rows(monitoring_session):
+    from app.jobs.monitoring_dispatcher import MonitoringDispatcher
+    from app.models.vulnerability import ingestion_time
+
+    now = ingestion_time()
+    old = datetime(2020, 1, 1)
+    # NVD lastModified antigo, mas gravado depois do cursor: precisa entrar no delta
+    _add_cve(monitoring_session, 'CVE-2020-0003', last_update=old, written_at=now - timedelta(hours=2))
+    _add_cve(monitoring_session, 'CVE-2020-0001', last_update=datetime(2023, 5, 1), written_at=now - timedelta(hours=2))
+    _add_cve(monitoring_session, 'CVE-2020-0002', last_update=datetime(2023, 5, 1), written_at=now - timedelta(hours=1))
+    _add_cve(monitoring_session, 'CVE-2020-0009', last_update=datetime(2023, 5, 1), written_at=now - timedelta(days=2))
+    # Gravada há poucos segundos: fica para a próxima execução
+    _add_cve(monitoring_session, 'CVE-2020-0004', last_update=old, written_at=now - timedelta(seconds=5))
+    monitoring_session.commit()
+
+    dispatcher = MonitoringDispatcher(batch_size=2, settle_seconds=60)
+    since = (now - timedelta(days=1), '')
+    pages = list(dispatcher._iter_delta(monitoring_session, since, dispatcher._settled_until()))
+
+    assert [[r.cve_id for r in page] for page in pages] == [['CVE-2020-0001', 'CVE-2020-0003'], ['CVE-2020-0002']]
+    position = (pages[0][-1].written_at, pages[0][-1].cve_id)
+    assert [r.cve_id for page in dispatcher._iter_delta(monitoring_session, position, now) for r in page] == [
+        'CVE-2020-0002', 'CVE-2020-0004',
+    ]
+
+
+def test_evaluate_advances_only_to_the_last_settled_row(monitoring_session):
+    from app.jobs.monitoring_dispatcher import MonitoringDispatcher
+    from app.models.monitoring_rule import MonitoringRule
+    from app.models.monitoring_rule_cursor import MonitoringRuleCursor
+    from app.models.vulnerability import ingestion_time
+
+    now = ingestion_time()
+    monitoring_session.add(MonitoringRule(id=1, name='critical', rule_type='cve', user_id=1,
+                                          conditions={'severities': ['CRITICAL']}))
+    monitoring_session.add(MonitoringRuleCursor(rule_id=1, written_at=now - timedelta(days=1), cve_id=''))
+    _add_cve(monitoring_session, 'CVE-2020-0001', datetime(2023, 1, 1), now - timedelta(hours=1), severity='CRITICAL')
+    _add_cve(monitoring_session, 'CVE-2020-0002', datetime(2023, 1, 1), now - timedelta(minutes=30), severity='LOW')
+    _add_cve(monitoring_session, 'CVE-2020-0003', datetime(2023, 1, 1), now, severity='CRITICAL')
+    monitoring_session.commit()
+
+    dispatcher = MonitoringDispatcher(settle_seconds=60)
+    rules = monitoring_session.query(MonitoringRule).all()
+    compiled = dispatcher.compile_rules(monitoring_session, rules, dispatcher._load_cursors(monitoring_session, rules))
+    matches, last = dispatcher.evaluate(monitoring_session, compiled)
+
+    assert [v.cve_id for v in matches[1].vulnerabilities] == ['CVE-2020-0001']
+    assert last == (now - timedelta(minutes=30), 'CVE-2020-0002')
+
+
+def test_written_at_changes_only_when_last_update_changes(monitoring_session):
+    from app.models.vulnerability import Vulnerability
+    from app.services.bulk_database_service import BulkDatabaseService
+
+    marker = datetime(2021, 1, 1)
+    vuln = _add_cve(monitoring_session, 'CVE-2020-0001', datetime(2023, 1, 1), marker)
+    monitoring_session.commit()
+
+    vuln.last_update = datetime(2023, 1, 1)
+    assert vuln.written_at == marker
+    vuln.last_update = datetime(2023, 2, 1)
+    assert vuln.written_at > marker
+    monitoring_session.rollback()
+
+    bulk = BulkDatabaseService()
+    bulk.db_dialect = 'sqlite'
+    row = {'cve_id': 'CVE-2020-0001', 'description': 'resync', 'published_date': datetime(2020, 1, 1),
+           'last_update': datetime(2023, 1, 1), 'base_severity': 'HIGH', 'cvss_score': 7.5}
+    bulk._native_upsert_vulnerabilities([row], monitoring_session, only_newer=False)
+    assert monitoring_session.query(Vulnerability.written_at).scalar() == marker
+
+    bulk._native_upsert_vulnerabilities([dict(row, last_update=datetime(2023, 3, 1))], monitoring_session, only_newer=False)
+    assert monitoring_session.query(Vulnerability.written_at).scalar() > marker
+
+    bulk._native_upsert_vulnerabilities([dict(row, cve_id='CVE-2020-0002')], monitoring_session, only_newer=False)
+    assert monitoring_session.get(Vulnerability, 'CVE-2020-0002').written_at is not None
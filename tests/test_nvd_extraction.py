@@ -0,0 +1,62 @@
+import asyncio
+
+
+def _item(cve_id, score=9.8, severity='CRITICAL'):
+    return {'cve': {
+        'id': cve_id,
+        'published': '2024-02-01T10:00:00.000',
+        'lastModified': '2024-02-03T10:00:00.000',
+        'descriptions': [{'lang': 'en', 'value': f'{cve_id} remote code execution in acme gateway'}],
+        'metrics': {'cvssMetricV31': [{
+            'type': 'Primary',
+            'cvssData': {
+                'version': '3.1', 'baseScore': score, 'baseSeverity': severity,
+                'vectorString': 'CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H',
+            },
+        }]},
+        'weaknesses': [{'description': [{'lang': 'en', 'value': 'CWE-787'}]}],
+        'configurations': [{'nodes': [{'cpeMatch': [{
+            'vulnerable': True,
+            'criteria': 'cpe:2.3:a:acme:gateway:*:*:*:*:*:*:*:*',
+            'versionEndExcluding': '2.0',
+        }]}]}],
+        'references': [{'url': f'https://example.test/{cve_id}', 'tags': ['Patch']}],
+    }}
+
+
+def _batch():
+    return [_item('CVE-2024-0001'), {'cve': {}}, _item('CVE-2024-0002', 5.3, 'MEDIUM')]
+
+
+def test_spawn_pool_matches_in_process_extraction():
+    from app.jobs.nvd_extraction import ExtractionPool
+
+    local = ExtractionPool(0).extract_local(_batch())
+    pool = ExtractionPool(1, start_method='spawn')
+    try:
+        assert pool.parallel
+        remote = asyncio.run(pool.extract(_batch()))
+        assert pool._executor is not None
+    finally:
+        pool.shutdown()
+
+    assert [r['cve_id'] for r in remote] == ['CVE-2024-0001', 'CVE-2024-0002']
+    assert remote == local
+    assert remote[0]['base_severity'] == 'CRITICAL'
+    assert 'acme' in remote[0]['vendors']
+
+
+def test_pool_that_cannot_start_extracts_in_process():
+    from app.jobs.nvd_extraction import ExtractionPool
+
+    pool = ExtractionPool(2, start_method='no-such-method')
+    results = asyncio.run(pool.extract(_batch()))
+
+    assert pool.workers == 0 and not pool.parallel
+    assert [r['cve_id'] for r in results] == ['CVE-2024-0001', 'CVE-2024-0002']
+
+
+def test_default_worker_count_leaves_a_core_free():
+    from app.jobs.nvd_extraction import default_worker_count
+
+    assert 0 <= default_worker_count() <= 8
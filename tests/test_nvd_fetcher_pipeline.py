@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+class _FakePage:
+    def __init__(self, total_results):
+        self.total_results = total_results
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fetcher():
+    from app.jobs.nvd_fetcher import NVDFetcher
+
+    f = NVDFetcher(None, {
+        'NVD_API_KEY': 'test-key',
+        'NVD_PAGE_SIZE': 10,
+        'NVD_CACHE_ENABLED': False,
+        'NVD_EXTRACT_WORKERS': 0,
+        'NVD_PIPELINE_DEPTH': 3,
+        'NVD_PIPELINE_QUEUE_SIZE': 1,
+        'NVD_MAX_WINDOW_DAYS': 120,
+    })
+    yield f
+    f.close()
+
+
+def test_pipeline_fetches_every_page_of_every_window_once(fetcher):
+    windows = [{'start': 'a', 'end': 'b'}, {'start': 'c', 'end': 'd', 'mode': 'pub'}]
+    totals = {0: 25, 1: 7}
+    fetched, persisted, pages = [], [], []
+    in_flight = {'now': 0, 'max': 0}
+
+    async def fetch_page_stream(start_index, start, end, mode):
+        win_idx = 0 if start == 'a' else 1
+        fetched.append((win_idx, start_index, mode))
+        in_flight['now'] += 1
+        in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        await asyncio.sleep(0.01)
+        in_flight['now'] -= 1
+        page = _FakePage(totals[win_idx])
+        pages.append(page)
+        return page
+
+    async def persist_page(page, service, total_before=0, offload=False):
+        assert offload is True
+        persisted.append(page)
+        return 10
+
+    fetcher.fetch_page_stream = fetch_page_stream
+    fetcher._persist_page = persist_page
+
+    total, ok = asyncio.run(fetcher._run_pipeline(windows, vulnerability_service=None))
+
+    assert ok is True
+    assert sorted(fetched) == [
+        (0, 0, 'lastmod'), (0, 10, 'lastmod'), (0, 20, 'lastmod'), (1, 0, 'pub'),
+    ]
+    assert total == 40 and len(persisted) == 4
+    assert 1 < in_flight['max'] <= 3
+    assert all(p.closed for p in pages)
+    assert fetcher._progress_total == 32
+
+
+def test_pipeline_reports_failed_pages_and_keeps_going(fetcher):
+    async def fetch_page_stream(start_index, start, end, mode):
+        if start == 'bad':
+            return None
+        return _FakePage(5)
+
+    async def persist_page(page, service, total_before=0, offload=False):
+        return 5
+
+    fetcher.fetch_page_stream = fetch_page_stream
+    fetcher._persist_page = persist_page
+
+    total, ok = asyncio.run(fetcher._run_pipeline(
+        [{'start': 'bad', 'end': 'x'}, {'start': 'good', 'end': 'y'}], vulnerability_service=None,
+    ))
+    assert (total, ok) == (5, False)
+
+
+def test_build_windows_chunks_incremental_ranges(fetcher):
+    last = datetime.now(timezone.utc) - timedelta(days=300)
+    windows = fetcher._build_windows(full=False, last_synced_time=last)
+    assert len(windows) == 3
+    assert all('mode' not in w for w in windows)
+
+    full = fetcher._build_windows(full=True, last_synced_time=last)
+    assert full[0]['start'].startswith('1999-01-01') and full[0]['mode'] == 'pub'
+
+
+def test_last_index_for():
+    from app.jobs.nvd_fetcher import NVDFetcher
+
+    assert NVDFetcher._last_index_for(0, 10) == 0
+    assert NVDFetcher._last_index_for(10, 10) == 0
+    assert NVDFetcher._last_index_for(25, 10) == 20
+
+
+def test_rate_limiter_serializes_concurrent_acquires():
+    from app.utils.rate_limiter import NVDRateLimiter
+
+    limiter = NVDRateLimiter.create_for_nvd(has_api_key=True)
+    active = {'now': 0, 'max': 0}
+    original = limiter._acquire_unlocked
+
+    async def tracked():
+        active['now'] += 1
+        active['max'] = max(active['max'], active['now'])
+        await asyncio.sleep(0)
+        await original()
+        active['now'] -= 1
+
+    limiter._acquire_unlocked = tracked
+
+    async def run():
+        await asyncio.gather(*(limiter.acquire() for _ in range(5)))
+
+    asyncio.run(run())
+    assert active['max'] == 1
@@ -0,0 +1,43 @@
+import json
+
+from app.utils.nvd_page_cache import DEFAULT_CACHE_DIR, NVDPageCache, get_page_cache
+
+
+def _page(total=1):
+    return json.dumps({'totalResults': total, 'vulnerabilities': [{'cve': {'id': 'CVE-2024-0001'}}]}).encode()
+
+
+def test_cache_directory_is_created_on_first_use(tmp_path):
+    cache = NVDPageCache(tmp_path / 'nvd')
+    assert not (tmp_path / 'nvd').exists()
+
+    key = cache.make_key(0, '2020-01-01T00:00:00.000Z', '2020-02-01T00:00:00.000Z', 'lastmod', 2000)
+    assert key.closed
+    digest = cache.put(key, _page(), etag='"abc"', total_results=1)
+
+    entry = cache.lookup(key)
+    assert entry.digest == digest and entry.fresh and entry.etag == '"abc"'
+    assert cache.load(entry)['totalResults'] == 1
+    assert (tmp_path / 'nvd' / 'nvd_pages.sqlite3').exists()
+    cache.close()
+
+
+def test_identical_pages_share_a_blob_and_lru_eviction(tmp_path):
+    cache = NVDPageCache(tmp_path, max_bytes=1)
+    first = cache.make_key(0, None, None, 'lastmod', 2000)
+    second = cache.make_key(2000, None, None, 'lastmod', 2000)
+    cache.put(first, _page())
+    assert cache.stats()['pages'] == 0  # acima de max_bytes: despejada
+
+    cache.max_bytes = 0
+    cache.put(first, _page())
+    cache.put(second, _page())
+    assert cache.stats()['pages'] == 2 and cache.stats()['blobs'] == 1
+    cache.close()
+
+
+def test_get_page_cache_defaults_to_instance_dir():
+    cache = get_page_cache({})
+    assert cache.cache_dir == DEFAULT_CACHE_DIR
+    assert DEFAULT_CACHE_DIR.parent.parent.name == 'instance'
+    assert get_page_cache({'NVD_CACHE_DIR': str(DEFAULT_CACHE_DIR)}) is cache
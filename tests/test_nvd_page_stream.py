@@ -0,0 +1,96 @@
+import io
+import json
+
+import pytest
+
+from app.utils.nvd_page_stream import JSONArrayStreamParser, NVDPage, iter_array_items, read_header
+
+
+def _page_bytes(count=3, trailing=True):
+    page = {
+        'resultsPerPage': count,
+        'startIndex': 0,
+        'totalResults': 2000,
+        'format': 'NVD_CVE',
+        'vulnerabilities': [
+            {'cve': {'id': f'CVE-2024-{i:04d}', 'descriptions': [{'lang': 'pt', 'value': 'Estouro de memória ção'}]}}
+            for i in range(count)
+        ],
+    }
+    if trailing:
+        page['timestamp'] = '2024-05-01T00:00:00.000'
+    return json.dumps(page, ensure_ascii=False, indent=1).encode('utf-8')
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 1 << 20])
+def test_stream_matches_json_load_for_any_chunking(chunk_size):
+    raw = _page_bytes()
+    header = {}
+    items = list(iter_array_items(io.BytesIO(raw), header, chunk_size=chunk_size))
+
+    expected = json.loads(raw)
+    assert items == expected['vulnerabilities']
+    assert header == {k: v for k, v in expected.items() if k != 'vulnerabilities'}
+
+
+def test_numbers_split_across_chunks_are_not_truncated():
+    parser = JSONArrayStreamParser()
+    assert parser.feed(b'{"totalResults": 20') == []
+    assert 'totalResults' not in parser.header
+    assert parser.feed(b'00, "vulnerabilities": [1, 2') == [1]
+    assert parser.header['totalResults'] == 2000
+    assert parser.feed(b'3]}') == [23]
+    assert parser.close() == []
+    assert parser.items_seen == 2
+
+
+def test_incomplete_item_waits_for_more_data_before_retrying():
+    parser = JSONArrayStreamParser()
+    assert parser.feed(b'{"vulnerabilities": [{"cve": {"id": "A"}}, {"cve"') == [{'cve': {'id': 'A'}}]
+    # Item incompleto: só é decodificado de novo com mais um pedaço inteiro (ou no fim)
+    assert parser.feed(b': {"id": "B"}}]}') == []
+    assert parser.close() == [{'cve': {'id': 'B'}}]
+    assert parser.done
+
+
+def test_truncated_and_invalid_pages_raise():
+    truncated = _page_bytes()[:-40]
+    with pytest.raises(ValueError):
+        list(iter_array_items(io.BytesIO(truncated)))
+    with pytest.raises(ValueError):
+        JSONArrayStreamParser().feed(b'[1, 2]')
+
+
+def test_read_header_stops_at_the_array():
+    class _Counting(io.BytesIO):
+        reads = 0
+
+        def read(self, size=-1):
+            self.reads += 1
+            return super().read(size)
+
+    fh = _Counting(_page_bytes(count=200))
+    header = read_header(fh, chunk_size=64)
+    assert header['totalResults'] == 2000
+    assert 'timestamp' not in header  # depois do array
+    assert fh.reads < 10
+
+
+def test_nvd_page_from_file_and_dict(tmp_path):
+    path = tmp_path / 'page.json'
+    path.write_bytes(_page_bytes(count=5))
+
+    with NVDPage.from_file(str(path), delete=True) as page:
+        assert page.total_results == 2000
+        assert page.has_vulnerabilities()
+        assert [len(b) for b in page.iter_batches(2)] == [2, 2, 1]
+        assert page.items_read == 5
+        assert page.header['timestamp'] == '2024-05-01T00:00:00.000'
+        assert page.to_dict()['resultsPerPage'] == 5
+    assert not path.exists()
+
+    data = json.loads(_page_bytes(count=1))
+    page = NVDPage.from_dict(data)
+    assert page.total_results == 2000
+    assert [i['cve']['id'] for i in page.iter_vulnerabilities()] == ['CVE-2024-0000']
+    assert not NVDPage.from_dict({'totalResults': 0, 'vulnerabilities': []}).has_vulnerabilities()
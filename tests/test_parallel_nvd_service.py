@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+WINDOW = {'start': '2024-01-01T00:00:00.000Z', 'end': '2024-04-30T00:00:00.000Z'}
+
+
+@pytest.fixture
+def metadata_session():
+    """Banco SQLite em memória só com a tabela de checkpoints."""
+    import app.models  # noqa: F401 - registra todos os mappers
+    from app.extensions import db
+    from app.models.sync_metadata import SyncMetadata
+
+    # Checkpoints são gravados via asyncio.to_thread: a conexão precisa ser compartilhada entre threads
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    db.metadata.create_all(engine, tables=[SyncMetadata.__table__])
+    session = Session(engine)
+    yield session
+    session.close()
+
+
+class _FakePage:
+    def __init__(self, total_results, items_read=10):
+        self.total_results = total_results
+        self.items_read = items_read
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeFetcher:
+    """Janela de 25 resultados em páginas de 10; falha uma vez no índice ``fail_at``."""
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.requested = []
+        self.pages = []
+
+    def _effective_page_step(self):
+        return 10
+
+    @staticmethod
+    def _last_index_for(total, step):
+        from app.jobs.nvd_fetcher import NVDFetcher
+
+        return NVDFetcher._last_index_for(total, step)
+
+    async def fetch_page_stream(self, start_index, start, end, mode):
+        self.requested.append(start_index)
+        if start_index == self.fail_at:
+            self.fail_at = None
+            return None
+        page = _FakePage(25)
+        self.pages.append(page)
+        return page
+
+    async def _persist_page(self, page, service, total_before=0, offload=False):
+        return page.items_read
+
+
+def _run_window(service, fetcher, session, start_index):
+    async def run():
+        service._persist_lock = asyncio.Lock()
+        return await service._sync_window(fetcher, WINDOW, 1, start_index, SimpleNamespace(session=session))
+
+    return asyncio.run(run())
+
+
+def test_interrupted_window_resumes_from_checkpoint(metadata_session):
+    from app.services.parallel_nvd_service import ParallelNVDService
+
+    service = ParallelNVDService({}, max_concurrent_requests=2)
+    fetcher = _FakeFetcher(fail_at=10)
+
+    assert _run_window(service, fetcher, metadata_session, 0) is False
+    checkpoints = service._load_checkpoints(metadata_session)
+    assert service._resume_index(WINDOW, checkpoints) == 10
+
+    assert _run_window(service, fetcher, metadata_session, 10) is True
+    assert fetcher.requested == [0, 10, 10, 20]
+    assert all(p.closed for p in fetcher.pages)
+    assert service.metrics.total_cves_saved == 30
+    assert service.metrics.failed_pages == 1
+
+    checkpoints = service._load_checkpoints(metadata_session)
+    assert service._resume_index(WINDOW, checkpoints) is None
+
+    service._clear_checkpoints(metadata_session)
+    assert service._load_checkpoints(metadata_session) == {}
+
+
+def test_open_window_with_moved_end_restarts(metadata_session):
+    from app.services.parallel_nvd_service import ParallelNVDService
+
+    service = ParallelNVDService({})
+    service._save_checkpoint(metadata_session, WINDOW, 20, completed=True)
+    checkpoints = service._load_checkpoints(metadata_session)
+
+    moved = dict(WINDOW, end='2024-05-15T00:00:00.000Z')
+    assert service._resume_index(moved, checkpoints) == 0
+    # Mesmo início em outro modo é outra janela
+    assert service._resume_index(dict(WINDOW, mode='pub'), checkpoints) == 0
+
+
+def test_parse_checkpoint_and_concurrency_config():
+    from app.services.parallel_nvd_service import ParallelNVDService
+
+    assert ParallelNVDService._parse_checkpoint('2024-04-30|30') == ('2024-04-30', 30)
+    assert ParallelNVDService._parse_checkpoint('2024-04-30|x') == ('2024-04-30', 0)
+    assert ParallelNVDService._parse_checkpoint(None) == (None, 0)
+    assert ParallelNVDService({'MAX_CONCURRENT_REQUESTS': 3}).max_concurrent_requests == 3
+    assert ParallelNVDService({}, max_concurrent_requests=0).max_concurrent_requests == 1
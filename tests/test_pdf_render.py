@@ -0,0 +1,108 @@
+import errno
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+from flask import Flask
+
+from app.utils import pdf_render
+from app.utils.pdf_render import PDFOutputCache
+
+
+def test_output_cache_lookup_touches_and_evicts_least_recent(tmp_path):
+    cache = PDFOutputCache(tmp_path / 'pdf', max_bytes=250)
+    keys = [PDFOutputCache.make_key('report', i) for i in range(3)]
+    assert len(set(keys)) == 3
+    assert cache.lookup(keys[0], 'weasyprint') is None
+
+    for age, key in zip((300, 200, 100), keys):
+        path = cache.path_for(key, 'weasyprint')
+        path.write_bytes(b'x' * 100)
+        os.utime(path, (path.stat().st_atime - age, path.stat().st_mtime - age))
+    assert cache.lookup(keys[0], 'weasyprint') == cache.path_for(keys[0], 'weasyprint')
+    assert cache.lookup(keys[0], 'reportlab') is None
+
+    assert cache.evict() == 1
+    assert not cache.path_for(keys[1], 'weasyprint').exists()
+    assert cache.path_for(keys[0], 'weasyprint').exists()
+    assert cache.lock(keys[0]) is cache.lock(keys[0])
+
+
+def test_make_key_separates_parts():
+    assert PDFOutputCache.make_key('ab', 'c') != PDFOutputCache.make_key('a', 'bc')
+    assert PDFOutputCache.make_key(b'ab', 1) == PDFOutputCache.make_key('ab', '1')
+
+
+def test_engine_failures_block_until_retry_or_restart(monkeypatch):
+    monkeypatch.setattr(pdf_render, '_engine_blocked_until', {})
+
+    pdf_render.mark_engine_failed('weasyprint', OSError('cannot load library libpango'), retry_seconds=60)
+    pdf_render.mark_engine_failed('pdfkit', OSError(errno.ENOSPC, 'No space left'), retry_seconds=0)
+    pdf_render.mark_engine_failed('reportlab', ImportError('reportlab'), retry_seconds=0)
+    assert pdf_render.engine_blocked('weasyprint')
+    assert not pdf_render.engine_blocked('pdfkit')
+    assert pdf_render.engine_blocked('reportlab')
+    assert pdf_render._engine_blocked_until['reportlab'] == float('inf')
+
+    from concurrent.futures.process import BrokenProcessPool
+    pdf_render.clear_engine_failure('weasyprint')
+    pdf_render.mark_engine_failed('weasyprint', BrokenProcessPool(), retry_seconds=60)
+    assert not pdf_render.engine_blocked('weasyprint')
+
+
+class _Report:
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def to_dict(self):
+        return dict(self.fields)
+
+
+def test_report_content_key_ignores_export_bookkeeping_but_not_the_day():
+    from app.services.pdf_export_service import PDFExportService
+
+    service = PDFExportService()
+    base = {'id': 1, 'title': 'Mensal', 'content': {'total': 3}, 'metadata': {'notify_completion': True}}
+
+    def key(report_fields, export_date, options=None):
+        report_data = {'report': _Report(**report_fields), 'export_date': export_date,
+                       'company_info': {'name': 'ACME'}, 'export_metadata': {'version': '1.0.0'}}
+        return service._report_content_key(report_data, 'reports/pdf/default_pdf.html', options or {})
+
+    with Flask(__name__).app_context():
+        morning = key(base, datetime(2026, 10, 16, 9, 0))
+        assert morning == key(dict(base, file_path='/tmp/r.pdf', updated_at='x',
+                                   metadata={'notify_completion': True, 'auto_export_result': {'format': 'pdf'}}),
+                              datetime(2026, 10, 16, 18, 30))
+        assert morning != key(base, datetime(2026, 10, 17, 9, 0))
+        assert morning != key(dict(base, title='Anual'), datetime(2026, 10, 16, 9, 0))
+        assert morning != key(base, datetime(2026, 10, 16, 9, 0), options={'page_size': 'A4'})
+
+
+def test_run_render_inline_without_pool():
+    assert pdf_render.run_render(pow, 2, 10, workers=0) == 1024
+
+
+def test_persist_export_copies_cached_pdf_out_of_the_cache(tmp_path):
+    from app.services.pdf_export_service import PDFExportService
+
+    service = PDFExportService()
+    service.temp_dir = tmp_path
+    service._output_cache = PDFOutputCache(tmp_path / 'pdf_cache', max_bytes=1)
+    key = PDFOutputCache.make_key('report', 7)
+    cached = service._output_cache.path_for(key, 'reportlab')
+    cached.write_bytes(b'%PDF-1.4 cached')
+
+    with Flask(__name__).app_context():
+        result = service.persist_export(SimpleNamespace(id=7), {'filepath': str(cached), 'size': 15, 'cached': True})
+        kept = {'filepath': str(tmp_path / 'other.pdf')}
+        assert service.persist_export(SimpleNamespace(id=7), kept) is kept
+
+    copy = result['filepath']
+    assert os.path.dirname(copy) == str(tmp_path)
+    # O evict do cache não afeta o arquivo guardado
+    service._output_cache.path_for(PDFOutputCache.make_key('report', 8), 'reportlab').write_bytes(b'x')
+    service._output_cache.evict()
+    assert not cached.exists()
+    with open(copy, 'rb') as fh:
+        assert fh.read() == b'%PDF-1.4 cached'
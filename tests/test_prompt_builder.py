@@ -0,0 +1,67 @@
+import pytest
+
+from app.utils import prompt_builder
+from app.utils.prompt_builder import TRUNCATION_MARKER, PromptBuilder, count_tokens, truncate_to_tokens
+
+
+@pytest.fixture(autouse=True)
+def word_estimate(monkeypatch):
+    """Usa a estimativa por palavras (determinística, sem baixar encodings do tiktoken)."""
+    monkeypatch.setattr(prompt_builder, 'tiktoken', None)
+    prompt_builder.get_encoder.cache_clear()
+    yield
+    prompt_builder.get_encoder.cache_clear()
+
+
+def test_count_and_truncate_without_tiktoken():
+    assert count_tokens('') == 0
+    assert count_tokens('um dois tres quatro') == 5
+
+    text = ' '.join(f'w{i}' for i in range(100))
+    assert truncate_to_tokens(text, 1000) == text
+    assert truncate_to_tokens(text, 0) == ''
+    cut = truncate_to_tokens(text, 26)
+    head, tail = cut.split(TRUNCATION_MARKER)
+    assert head.startswith('w0 ') and tail.endswith('w99')
+    assert count_tokens(head) + count_tokens(tail) <= 26
+
+
+def test_build_without_budget_is_plain_concatenation():
+    builder = PromptBuilder()
+    builder.add('Cabeçalho\n').add_rows(['a', 'b', 'c'], str.upper).add('\nFim')
+    assert builder.build() == 'Cabeçalho\nA\nB\nC\nFim'
+    assert builder.omitted_rows == 0
+
+
+def test_rows_stop_at_the_budget_and_note_fits():
+    rows = [f'CVE-2024-{i:04d} crítica' for i in range(50)]
+    builder = PromptBuilder(budget=40, margin=0)
+    builder.add('Instruções fixas do relatório\n')
+    builder.add_rows(rows, lambda r: r, overflow=lambda n: f'... e mais {n} CVEs')
+    text = builder.build()
+
+    assert text.startswith('Instruções fixas do relatório\nCVE-2024-0000 crítica')
+    assert builder.tokens <= 40
+    assert builder.omitted_rows > 0
+    assert text.endswith(f'... e mais {builder.omitted_rows} CVEs')
+    assert count_tokens(text) <= 40
+
+
+def test_limit_empty_and_failing_formatter():
+    def formatter(row):
+        if row == 2:
+            raise KeyError('campo ausente')
+        return f'linha {row}'
+
+    builder = PromptBuilder(budget=1000)
+    builder.add_rows(range(10), formatter, limit=4).add('|').add_rows([], str, empty='(nenhum)')
+    assert builder.build() == 'linha 0\nlinha 1\nlinha 3|(nenhum)'
+
+
+def test_fixed_parts_over_budget_are_truncated():
+    builder = PromptBuilder(budget=10, margin=0)
+    builder.add(' '.join(f'w{i}' for i in range(40)))
+    builder.add_rows(['nunca incluída'], str)
+    text = builder.build()
+    assert TRUNCATION_MARKER in text and 'nunca' not in text
+    assert builder.tokens == 10
@@ -0,0 +1,92 @@
+import pytest
+
+from app.utils import rate_limit_backends
+from app.utils.rate_limit_backends import (
+    MemoryRateLimitBackend,
+    RedisRateLimitBackend,
+    _gcra,
+    create_rate_limit_backend,
+)
+
+
+def test_gcra_allows_a_burst_of_limit_then_refills_at_the_rate():
+    tat, now = None, 100.0
+    for expected_remaining in (2, 1, 0):
+        decision, tat = _gcra(tat, now, limit=3, window=30.0)
+        assert decision.allowed and decision.remaining == expected_remaining
+
+    decision, new_tat = _gcra(tat, now, limit=3, window=30.0)
+    assert not decision.allowed and new_tat is None
+    assert decision.retry_after == pytest.approx(10.0)
+    assert decision.reset_after == pytest.approx(30.0)
+
+    # Um intervalo (window / limit) depois, exatamente uma requisição volta a passar
+    decision, tat = _gcra(tat, now + 10.0, limit=3, window=30.0)
+    assert decision.allowed and decision.remaining == 0
+    assert not _gcra(tat, now + 10.0, limit=3, window=30.0)[0].allowed
+
+
+def test_gcra_cost_and_idle_keys():
+    decision, tat = _gcra(None, 0.0, limit=10, window=10.0, cost=4)
+    assert decision.allowed and decision.remaining == 6
+    assert not _gcra(tat, 0.0, limit=10, window=10.0, cost=7)[0].allowed
+
+    # TAT no passado equivale a bucket cheio
+    decision, _ = _gcra(5.0, 1000.0, limit=10, window=10.0)
+    assert decision.allowed and decision.remaining == 9
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit_backends.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_memory_backend_limits_per_key_and_sweeps_idle_keys(clock):
+    backend = MemoryRateLimitBackend(sweep_interval=60.0)
+    assert [backend.hit('a', 2, 10.0).allowed for _ in range(3)] == [True, True, False]
+    assert backend.hit('b', 2, 10.0).allowed
+    assert backend.get_stats() == {'total_requests': 3, 'rate_limited_requests': 1,
+                                   'backend': 'memory', 'tracked_keys': 2}
+
+    backend.reset('a')
+    assert backend.hit('a', 2, 10.0).allowed
+
+    clock[0] += 60.0
+    backend.hit('c', 2, 10.0)  # dispara a varredura periódica
+    assert backend.get_stats()['tracked_keys'] == 1
+    clock[0] += 60.0
+    assert backend.purge() == 1
+    backend.reset()
+    assert backend.get_stats()['tracked_keys'] == 0
+
+
+class _FailingRedis:
+    def __init__(self):
+        self.calls = 0
+
+    def register_script(self, source):
+        def script(keys, args):
+            self.calls += 1
+            raise ConnectionError('redis down')
+        return script
+
+
+def test_redis_backend_falls_back_to_memory_while_redis_is_down(clock):
+    client = _FailingRedis()
+    backend = RedisRateLimitBackend(client, retry_interval=30.0)
+
+    assert [backend.hit('k', 1, 10.0).allowed for _ in range(2)] == [True, False]
+    assert client.calls == 1  # não insiste no Redis durante a janela de espera
+    assert backend.get_stats()['redis_errors'] == 1
+    assert backend.get_stats()['fallback']['rate_limited_requests'] == 1
+
+    clock[0] += 30.0
+    backend.hit('k', 1, 10.0)
+    assert client.calls == 2
+
+
+def test_create_backend_without_redis_uses_memory():
+    assert isinstance(create_rate_limit_backend(), MemoryRateLimitBackend)
+    assert isinstance(create_rate_limit_backend('redis', None), MemoryRateLimitBackend)
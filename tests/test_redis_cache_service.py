@@ -0,0 +1,110 @@
+import pytest
+from flask import Flask
+
+from app.services import redis_cache_service
+from app.services.redis_cache_service import RedisCacheService, get_cache_service
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def setex(self, key, ttl, value):
+        self.ops.append((key, ttl, value))
+        return self
+
+    def execute(self):
+        self.client.round_trips += 1
+        for key, ttl, value in self.ops:
+            self.client.setex(key, ttl, value, count=False)
+        return [True] * len(self.ops)
+
+
+class _FakeRedis:
+    """Subconjunto do cliente redis-py usado por get_many/set_many, contando idas ao servidor."""
+
+    def __init__(self, fail_with=None):
+        self.data = {}
+        self.ttls = {}
+        self.round_trips = 0
+        self.fail_with = fail_with
+
+    def ping(self):
+        return True
+
+    def mget(self, keys):
+        self.round_trips += 1
+        if self.fail_with:
+            raise self.fail_with
+        return [self.data.get(k) for k in keys]
+
+    def setex(self, key, ttl, value, count=True):
+        if count:
+            self.round_trips += 1
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        self.ttls[key] = ttl
+        return True
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(redis_cache_service, '_POOLS', {})
+    monkeypatch.setattr(redis_cache_service, '_AVAILABILITY', {})
+    service = RedisCacheService({'REDIS_CACHE_ENABLED': True, 'CACHE_DEFAULT_TTL': 120, 'CACHE_KEY_PREFIX': 't:'})
+    service.redis_client = _FakeRedis()
+    service._availability = [True, float('inf')]
+    return service
+
+
+def test_set_many_and_get_many_use_one_round_trip_each(cache):
+    client = cache.redis_client
+    values = {'CVE-1': {'score': 9.8}, 'CVE-2': ['a', 'b'], 'CVE-3': 'x' * 5000}
+
+    assert cache.set_many(values, namespace='cve') is True
+    assert client.round_trips == 1
+    assert client.ttls['t:cve:CVE-1'] == 120
+    assert 't:cve:CVE-1:metadata' in client.data
+
+    found = cache.get_many(['CVE-1', 'missing', 'CVE-2', 'CVE-3'], namespace='cve')
+    assert client.round_trips == 2
+    assert found == values
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.sets) == (3, 1, 3)
+
+
+def test_get_many_skips_undecodable_values(cache):
+    cache.redis_client.data['t:default:bad'] = b'\xff not a codec payload'
+    cache.set_many({'good': 1}, ttl=30)
+
+    assert cache.get_many(['good', 'bad']) == {'good': 1}
+    assert cache.stats.errors == 1
+
+
+def test_connection_error_marks_redis_unavailable(cache):
+    from redis.exceptions import ConnectionError as RedisConnectionError
+
+    cache.redis_client = _FakeRedis(fail_with=RedisConnectionError('down'))
+    assert cache.get_many(['a']) == {}
+    assert cache._availability[0] is False
+    # Sem PING até o fim do intervalo: nenhuma nova ida ao servidor
+    assert cache.set_many({'a': 1}) is False
+    assert cache.get_many(['a']) == {}
+    assert cache.redis_client.round_trips == 1
+
+
+def test_get_cache_service_shares_instances_and_pool(monkeypatch):
+    monkeypatch.setattr(redis_cache_service, '_POOLS', {})
+    monkeypatch.setattr(redis_cache_service, '_AVAILABILITY', {})
+    app = Flask(__name__)
+    app.config.update(REDIS_CACHE_ENABLED=True, REDIS_URL='redis://localhost:6399/0')
+
+    default = get_cache_service(app)
+    assert get_cache_service(app) is default
+    prefixed = get_cache_service(app, CACHE_KEY_PREFIX='other:')
+    assert prefixed is not default
+    assert prefixed.key_prefix == 'other:'
+    assert prefixed.redis_client.connection_pool is default.redis_client.connection_pool
+    assert prefixed._availability is default._availability
@@ -0,0 +1,105 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from app.services.report_ai_service import ReportAIService, TokenBudget, TokenBudgetExceeded
+
+
+class _FakeCompletions:
+    def __init__(self, total_tokens):
+        self.total_tokens = total_tokens
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = SimpleNamespace(content='# Análise')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)],
+                               usage=SimpleNamespace(total_tokens=self.total_tokens))
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(OPENAI_MAX_CONCURRENCY=4)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def service(app):
+    service = ReportAIService()
+    service._initialize_openai()
+    service.max_tokens = 100
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions(total_tokens=120)))
+    return service
+
+
+def test_token_budget_reserves_and_settles_actual_usage():
+    budget = TokenBudget(300)
+
+    assert budget.reserve(200)
+    assert not budget.reserve(150)
+    budget.settle(200, 80)
+    assert budget.used == 80 and budget.remaining == 220
+    budget.settle(100, None)
+    assert budget.used == 80
+
+
+def test_analyses_run_concurrently_and_keep_task_order(service):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def task(name):
+        def _run():
+            barrier.wait()
+            return name.upper()
+        return _run
+
+    def failing():
+        raise ValueError('sem dados')
+
+    tasks = {'executive': task('executive'), 'failing': failing, 'bia': task('bia'), 'plan': task('plan')}
+    results = service.run_analyses(tasks, max_workers=4, on_error=lambda name, e: f'erro: {e}')
+
+    assert list(results) == ['executive', 'failing', 'bia', 'plan']
+    assert results == {'executive': 'EXECUTIVE', 'failing': 'erro: sem dados', 'bia': 'BIA', 'plan': 'PLAN'}
+
+
+def test_analysis_past_its_deadline_yields_partial_result(service):
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return 'tarde demais'
+
+    started = time.monotonic()
+    try:
+        results = service.run_analyses({'slow': slow, 'fast': lambda: 'ok'}, max_workers=2, timeout=0.2,
+                                       on_timeout=lambda name: f'{name}: indisponível')
+    finally:
+        release.set()
+
+    assert time.monotonic() - started < 2
+    assert results == {'slow': 'slow: indisponível', 'fast': 'ok'}
+
+
+def test_shared_token_budget_stops_later_calls(service):
+    completions = service.client.chat.completions
+    messages = [{'role': 'user', 'content': 'CVE-2024-0001'}]
+    seen_budgets = []
+
+    def analysis():
+        seen_budgets.append(service._local.budget)
+        return service._chat_completion_with_retries(messages, meta={'analysis_type': 'test'})
+
+    results = service.run_analyses({'first': analysis, 'second': analysis}, max_workers=1, timeout=30,
+                                   token_budget=200, on_error=lambda name, e: e)
+
+    assert results['first'].choices[0].message.content == '# Análise'
+    assert isinstance(results['second'], TokenBudgetExceeded)
+    assert len(completions.calls) == 1
+    # O prazo da análise também limita a requisição HTTP
+    assert 1.0 <= completions.calls[0]['timeout'] <= 30
+    assert seen_budgets[0] is seen_budgets[1] and seen_budgets[0].used == 120
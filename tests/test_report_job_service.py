@@ -0,0 +1,147 @@
+from datetime import timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import update
+
+
+@pytest.fixture
+def job_app(tmp_path):
+    """Aplicação mínima com apenas a tabela report_jobs em um SQLite temporário."""
+    import app.models  # noqa: F401 - registra todos os mappers
+    from app.extensions import db
+    from app.models.report_job import ReportJob
+
+    flask_app = Flask(__name__)
+    flask_app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'jobs.sqlite'}",
+        REPORT_JOB_WORKERS=0,
+        REPORT_JOB_MAX_ATTEMPTS=3,
+        REPORT_JOB_RETRY_SECONDS=30,
+        REPORT_JOB_STALE_SECONDS=60,
+    )
+    db.init_app(flask_app)
+    with flask_app.app_context():
+        db.metadata.create_all(db.engine, tables=[ReportJob.__table__])
+        yield flask_app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _service(flask_app, runner=None, failure_handler=None):
+    from app.services.report_job_service import ReportJobService
+
+    return ReportJobService(flask_app, runner or (lambda report_id, attempt, max_attempts: None), failure_handler)
+
+
+def _job(job_id):
+    from app.extensions import db
+    from app.models.report_job import ReportJob
+
+    db.session.expire_all()
+    return db.session.get(ReportJob, job_id)
+
+
+def test_claim_follows_priority_and_reuses_active_job(job_app):
+    from app.services.report_job_service import PRIORITY_HIGH
+
+    service = _service(job_app)
+    normal = service.enqueue(1)
+    urgent = service.enqueue(2, priority=PRIORITY_HIGH)
+    assert service.enqueue(1) == normal
+
+    assert service._claim() == (urgent, 2, 1, 3)
+    assert service._claim() == (normal, 1, 1, 3)
+    assert service._claim() is None
+    job = _job(urgent)
+    assert job.status == 'running' and job.locked_by == service.worker_id
+
+
+def test_claim_skips_jobs_waiting_for_retry(job_app):
+    from app.extensions import db
+    from app.models.report_job import ReportJob
+    from app.services.report_job_service import _utcnow
+
+    service = _service(job_app)
+    job_id = service.enqueue(1)
+    with db.engine.begin() as conn:
+        conn.execute(update(ReportJob.__table__).where(ReportJob.__table__.c.id == job_id)
+                     .values(run_after=_utcnow() + timedelta(minutes=5)))
+    assert service._claim() is None
+
+
+def test_run_retries_with_backoff_then_fails_on_last_attempt(job_app):
+    from app.extensions import db
+    from app.models.report_job import ReportJob
+
+    calls = []
+
+    def runner(report_id, attempt, max_attempts):
+        calls.append((report_id, attempt, max_attempts))
+        raise RuntimeError('boom')
+
+    service = _service(job_app, runner)
+    service.max_attempts = 2
+    job_id = service.enqueue(7)
+
+    service._run(*service._claim())
+    job = _job(job_id)
+    assert job.status == 'queued' and job.error == 'boom' and job.locked_by is None
+    assert job.run_after is not None
+
+    with db.engine.begin() as conn:
+        conn.execute(update(ReportJob.__table__).values(run_after=None))
+    claimed = service._claim()
+    assert claimed[2:] == (2, 2)
+    service._run(*claimed)
+    assert _job(job_id).status == 'failed'
+    assert calls == [(7, 1, 2), (7, 2, 2)]
+
+
+def test_finish_is_ignored_when_the_job_was_reclaimed(job_app):
+    from app.extensions import db
+    from app.models.report_job import ReportJob
+
+    service = _service(job_app)
+    job_id = service.enqueue(1)
+    _, _, attempt, _ = service._claim()
+    with db.engine.begin() as conn:
+        conn.execute(update(ReportJob.__table__).where(ReportJob.__table__.c.id == job_id)
+                     .values(locked_by='other-host:1', attempts=attempt + 1))
+
+    assert service._finish(job_id, attempt, 'succeeded') is False
+    assert _job(job_id).status == 'running'
+    assert service._finish(job_id, attempt + 1, 'succeeded') is False
+
+    service.worker_id = 'other-host:1'
+    assert service._finish(job_id, attempt + 1, 'succeeded') is True
+    assert _job(job_id).status == 'succeeded'
+
+
+def test_requeue_stale_requeues_or_fails_through_the_failure_handler(job_app):
+    from app.extensions import db
+    from app.models.report_job import ReportJob
+    from app.services.report_job_service import _utcnow
+
+    failures = []
+    service = _service(job_app, failure_handler=lambda *args: failures.append(args))
+    retry_id = service.enqueue(1)
+    last_id = service.enqueue(2)
+    alive_id = service.enqueue(3)
+    for _ in range(3):
+        service._claim()
+    jobs = ReportJob.__table__
+    old = _utcnow() - timedelta(minutes=5)
+    with db.engine.begin() as conn:
+        conn.execute(update(jobs).where(jobs.c.id.in_([retry_id, last_id])).values(heartbeat_at=old))
+        conn.execute(update(jobs).where(jobs.c.id == last_id).values(attempts=3))
+
+    assert service._requeue_stale() == 1
+    assert _job(retry_id).status == 'queued'
+    assert _job(last_id).status == 'failed'
+    assert _job(alive_id).status == 'running'
+    assert failures == [(2, 'Worker stopped responding', 3, 3)]
+
+    # Uma segunda passada não notifica de novo
+    assert service._requeue_stale() == 0
+    assert len(failures) == 1
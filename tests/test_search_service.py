@@ -0,0 +1,132 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def search_session(monkeypatch):
+    """Banco SQLite em memória só com as tabelas da busca e índice FTS5."""
+    import app.models  # noqa: F401 - registra todos os mappers
+    from app.extensions import db
+    from app.models.cve_search_document import CVESearchDocument
+    from app.models.cve_vendor import CVEVendor
+    from app.models.cve_product import CVEProduct
+    from app.models.product import Product
+    from app.models.vendor import Vendor
+    from app.models.vulnerability import Vulnerability
+    from app.models.weakness import Weakness
+    from app.services.search_service import CVESearchService
+
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine, tables=[
+        Vulnerability.__table__, Vendor.__table__, Product.__table__, CVEVendor.__table__,
+        CVEProduct.__table__, Weakness.__table__, CVESearchDocument.__table__,
+    ])
+    if not CVESearchService._ensure_fts_table(engine):
+        pytest.skip('SQLite sem FTS5')
+    monkeypatch.setattr(CVESearchService, '_populated', False)
+    monkeypatch.setattr(CVESearchService, '_coverage_checked_at', None)
+
+    session = Session(engine)
+    vendor = Vendor(name='apache')
+    session.add(vendor)
+    session.flush()
+    published = datetime(2021, 6, 1)
+    for cve_id, description, severity in (
+        ('CVE-2021-0001', 'Buffer overflow in http_server request parsing', 'CRITICAL'),
+        ('CVE-2021-0002', 'Cross-site scripting in admin console', 'MEDIUM'),
+        ('CVE-2021-0003', 'Heap overflow in http_server overflow handler overflow', 'HIGH'),
+        ('CVE-2021-0004', 'Denial of service in http_server', 'LOW'),
+    ):
+        session.add(Vulnerability(
+            cve_id=cve_id, description=description, published_date=published,
+            last_update=published, base_severity=severity, cvss_score=5.0,
+        ))
+    session.flush()
+    session.add(CVEVendor(cve_id='CVE-2021-0001', vendor_id=vendor.id))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_fts5_match_expression_quotes_user_input():
+    from app.services.search_service import fts5_match_expression
+
+    assert fts5_match_expression('apache "http_server" OR') == '"apache" "http_server" "OR"'
+    assert fts5_match_expression('  ') is None
+
+
+def test_cursor_round_trip_and_invalid_cursor():
+    from app.services.search_service import decode_cursor, encode_cursor
+
+    assert decode_cursor(encode_cursor(1.5, 'CVE-2021-0001')) == (1.5, 'CVE-2021-0001')
+    assert decode_cursor('not-a-cursor') is None
+
+
+def test_incomplete_index_falls_back_to_like_without_rebuilding(search_session):
+    from app.models.cve_search_document import CVESearchDocument
+    from app.services.search_service import CVESearchService
+
+    service = CVESearchService(search_session, backend='fts5')
+    service.index_cves(['CVE-2021-0001'])
+    search_session.commit()
+
+    assert service.ensure_populated() is False
+    assert search_session.query(CVESearchDocument).count() == 1
+    assert service.search('console').backend == 'like'
+
+
+def test_ranked_search_pages_by_keyset_with_facets(search_session):
+    from app.services.search_service import CVESearchService
+
+    service = CVESearchService(search_session, backend='fts5')
+    service.index_cves(['CVE-2021-0001', 'CVE-2021-0002', 'CVE-2021-0003', 'CVE-2021-0004'])
+    search_session.commit()
+    assert service.ensure_populated() is True
+
+    first = service.search('http_server overflow', limit=1)
+    assert first.backend == 'fts5'
+    assert first.total == 2
+    assert first.results[0]['cve_id'] == 'CVE-2021-0003'  # mais ocorrências, maior bm25
+    assert {f['value'] for f in first.facets['severity']} == {'CRITICAL', 'HIGH'}
+
+    second = service.search('http_server overflow', cursor=first.next_cursor, limit=1, with_facets=False)
+    assert [r['cve_id'] for r in second.results] == ['CVE-2021-0001']
+    assert second.next_cursor is None
+
+    by_vendor = service.search('apache')
+    assert [r['cve_id'] for r in by_vendor.results] == ['CVE-2021-0001']
+    assert by_vendor.facets['vendor'][0]['label'] == 'apache'
+
+
+def test_vendor_facet_counts_match_vendor_filter(search_session, monkeypatch):
+    from app.models.cve_product import CVEProduct
+    from app.models.product import Product
+    from app.models.vendor import Vendor
+    from app.services.search_service import CVESearchService
+    from app.services.vendor_scope_service import VendorScopeService
+
+    monkeypatch.setattr(VendorScopeService, '_tables_ready', False)
+    vendor = search_session.query(Vendor).filter_by(name='apache').one()
+    product = Product(vendor_id=vendor.id, name='http_server')
+    search_session.add(product)
+    search_session.flush()
+    # CVE-2021-0003 pertence ao vendor apenas via produto
+    search_session.add(CVEProduct(cve_id='CVE-2021-0003', product_id=product.id))
+    search_session.commit()
+
+    service = CVESearchService(search_session, backend='fts5')
+    service.index_cves(['CVE-2021-0001', 'CVE-2021-0002', 'CVE-2021-0003', 'CVE-2021-0004'])
+    search_session.commit()
+
+    page = service.search('overflow')
+    facet = next(f for f in page.facets['vendor'] if f['value'] == vendor.id)
+    filtered = service.search('overflow', vendor_id=vendor.id)
+    assert facet['count'] == filtered.total == 2
+
+    # Facetas de vendor respeitam os demais filtros aplicados à busca
+    high_only = service.search('overflow', severity='HIGH')
+    assert high_only.facets['vendor'] == [{'value': vendor.id, 'label': 'apache', 'count': 1}]
+    assert service.search('scripting').facets['vendor'] == []
@@ -0,0 +1,121 @@
+import json
+
+from app import create_app
+
+
+def _events(chunks):
+    events = []
+    for chunk in chunks:
+        fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_stream_sends_snapshot_then_only_changed_fields():
+    from app.utils.sync_progress import SyncProgressBroadcaster
+
+    loads = []
+    broadcaster = SyncProgressBroadcaster()
+    stream = broadcaster.stream(lambda: loads.append(1) or {'status': 'processing', 'current': 0, 'total': 100},
+                                heartbeat=0.05, max_duration=5)
+
+    first = next(stream)
+    assert first.startswith('retry: 3000\n')
+    broadcaster.publish({'current': '40', 'status': 'processing', 'ignored': 'x'})
+    second = next(stream)
+    broadcaster.publish({'status': 'saving'})
+    third = next(stream)
+    stream.close()
+
+    assert _events([first, second, third]) == [
+        ('snapshot', {'status': 'processing', 'current': 0, 'total': 100}),
+        ('progress', {'current': 40}),
+        ('progress', {'status': 'saving'}),
+    ]
+    assert loads == [1]
+
+
+def test_idle_stream_sends_keep_alive():
+    from app.utils.sync_progress import SyncProgressBroadcaster
+
+    broadcaster = SyncProgressBroadcaster()
+    stream = broadcaster.stream(lambda: {'status': 'idle'}, heartbeat=0.01, max_duration=5)
+    next(stream)
+    assert next(stream) == ': keep-alive\n\n'
+    stream.close()
+
+
+def test_stream_slots_are_limited():
+    from app.utils.sync_progress import SyncProgressBroadcaster
+
+    broadcaster = SyncProgressBroadcaster()
+    assert broadcaster.try_open_stream(1)
+    assert not broadcaster.try_open_stream(1)
+    broadcaster.close_stream()
+    assert broadcaster.try_open_stream(1)
+
+
+def _app(monkeypatch, **config):
+    from app.controllers import api_controller
+    from app.main_startup import initialize_database
+
+    # Acesso ao progresso depende do estado da primeira sincronização no banco de teste
+    monkeypatch.setattr(api_controller, '_sync_progress_auth_error', lambda: None)
+    app = create_app('testing')
+    app.config.update(config)
+    with app.app_context():
+        initialize_database(app)
+    return app
+
+
+def _set_meta(session, key, value):
+    from app.models.sync_metadata import SyncMetadata
+
+    row = session.query(SyncMetadata).filter_by(key=key).first()
+    if value is None:
+        if row is not None:
+            session.delete(row)
+    elif row is None:
+        session.add(SyncMetadata(key=key, value=value))
+    else:
+        row.value = value
+    session.commit()
+
+
+def test_stream_endpoint_returns_503_when_slots_are_taken(monkeypatch):
+    app = _app(monkeypatch, SYNC_PROGRESS_STREAM_MAX=0)
+    resp = app.test_client().get('/api/v1/sync/progress/stream')
+
+    assert resp.status_code == 503
+    assert resp.headers['Retry-After'] == '30'
+    # O cliente volta ao polling, que continua disponível
+    polled = app.test_client().get('/api/v1/sync/progress')
+    assert polled.status_code == 200 and 'status' in polled.get_json()
+
+
+def test_stream_endpoint_streams_events_and_releases_its_slot(monkeypatch):
+    from app.extensions import db
+    from app.models.sync_metadata import SyncMetadata
+    from app.utils.sync_progress import sync_progress
+
+    app = _app(monkeypatch, SYNC_PROGRESS_STREAM_MAX=1, SYNC_PROGRESS_STREAM_TIMEOUT=0.05)
+    with app.app_context():
+        previous = db.session.query(SyncMetadata.value).filter_by(key='nvd_sync_progress_total').scalar()
+        _set_meta(db.session, 'nvd_sync_progress_total', '1234')
+
+    try:
+        resp = app.test_client().get('/api/v1/sync/progress/stream')
+        assert resp.status_code == 200
+        assert resp.mimetype == 'text/event-stream'
+        body = resp.get_data(as_text=True)
+        resp.close()
+    finally:
+        with app.app_context():
+            _set_meta(db.session, 'nvd_sync_progress_total', previous)
+
+    kind, data = _events(body.split('\n\n'))[0]
+    assert kind == 'snapshot' and data['total'] == 1234
+    # O slot é devolvido ao fechar a resposta
+    assert sync_progress.try_open_stream(1)
+    sync_progress.close_stream()
@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def scope_session(tmp_path, monkeypatch):
+    """SQLite em arquivo: o conjunto de escopo é materializado numa conexão própria."""
+    import app.models  # noqa: F401 - registra todos os mappers
+    from app.extensions import db
+    from app.models.cve_product import CVEProduct
+    from app.models.cve_vendor import CVEVendor
+    from app.models.product import Product
+    from app.models.sync_metadata import SyncMetadata
+    from app.models.vendor import Vendor
+    from app.models.vendor_scope import VendorScopeCVE, VendorScopeSet
+    from app.models.vulnerability import Vulnerability
+    from app.services.vendor_scope_service import VendorScopeService
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'scope.sqlite'}")
+    db.metadata.create_all(engine, tables=[
+        Vulnerability.__table__, Vendor.__table__, Product.__table__, CVEVendor.__table__,
+        CVEProduct.__table__, SyncMetadata.__table__, VendorScopeSet.__table__, VendorScopeCVE.__table__,
+    ])
+    monkeypatch.setattr(VendorScopeService, '_tables_ready', None)
+    session = Session(engine)
+
+    acme, globex = Vendor(name='acme'), Vendor(name='globex')
+    session.add_all([acme, globex])
+    session.flush()
+    router = Product(vendor_id=acme.id, name='router')
+    session.add(router)
+    for n in range(1, 5):
+        session.add(Vulnerability(cve_id=f'CVE-2023-000{n}', description='scope test',
+                                  published_date=datetime(2023, 1, n), last_update=datetime(2023, 1, n),
+                                  base_severity='MEDIUM', cvss_score=5.0))
+    session.flush()
+    session.add_all([
+        CVEVendor(cve_id='CVE-2023-0001', vendor_id=acme.id),
+        CVEProduct(cve_id='CVE-2023-0001', product_id=router.id),
+        CVEProduct(cve_id='CVE-2023-0002', product_id=router.id),
+        CVEVendor(cve_id='CVE-2023-0003', vendor_id=globex.id),
+    ])
+    session.commit()
+    session.info['ids'] = {'acme': acme.id, 'globex': globex.id}
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _scoped_ids(session, vendor_ids):
+    from app.models.vulnerability import Vulnerability
+    from app.services.vendor_scope_service import VendorScopeService
+
+    query = VendorScopeService(session).apply(session.query(Vulnerability.cve_id), vendor_ids)
+    return sorted(row[0] for row in query)
+
+
+def test_parse_vendor_ids():
+    from app.services.vendor_scope_service import parse_vendor_ids
+
+    assert parse_vendor_ids(['3', '1,2'], '2, x, 4', None) == [1, 2, 3, 4]
+    assert parse_vendor_ids([]) == []
+
+
+def test_scope_unions_direct_and_product_links(scope_session):
+    ids = scope_session.info['ids']
+
+    assert _scoped_ids(scope_session, [ids['acme']]) == ['CVE-2023-0001', 'CVE-2023-0002']
+    assert _scoped_ids(scope_session, [ids['acme'], ids['globex']]) == [
+        'CVE-2023-0001', 'CVE-2023-0002', 'CVE-2023-0003',
+    ]
+    assert len(_scoped_ids(scope_session, [])) == 4
+
+
+def test_scope_set_is_materialized_once_per_generation(scope_session):
+    from app.models.cve_vendor import CVEVendor
+    from app.models.vendor_scope import VendorScopeSet
+    from app.services.vendor_scope_service import VendorScopeService, bump_scope_generation
+
+    ids = scope_session.info['ids']
+    service = VendorScopeService(scope_session)
+    assert _scoped_ids(scope_session, [ids['acme']]) == ['CVE-2023-0001', 'CVE-2023-0002']
+    assert service.scope_size([ids['acme']]) == 2
+    (first_key,) = scope_session.execute(select(VendorScopeSet.scope_key)).scalars().all()
+
+    # Associação nova sem avançar a geração: o conjunto materializado continua valendo
+    scope_session.add(CVEVendor(cve_id='CVE-2023-0004', vendor_id=ids['acme']))
+    scope_session.commit()
+    assert _scoped_ids(scope_session, [ids['acme']]) == ['CVE-2023-0001', 'CVE-2023-0002']
+
+    bump_scope_generation(scope_session)
+    scope_session.commit()
+    assert _scoped_ids(scope_session, [ids['acme']]) == ['CVE-2023-0001', 'CVE-2023-0002', 'CVE-2023-0004']
+    # Conjuntos da geração anterior são coletados
+    keys = scope_session.execute(select(VendorScopeSet.scope_key)).scalars().all()
+    assert len(keys) == 1 and first_key not in keys
+
+
+def test_pairs_select_filters_both_arms(scope_session):
+    from app.services.vendor_scope_service import VendorScopeService
+
+    ids = scope_session.info['ids']
+    pairs = VendorScopeService.pairs_select(vendor_ids=[ids['acme']], cve_ids=['CVE-2023-0002', 'CVE-2023-0003'])
+    rows = scope_session.execute(select(pairs.c.cve_id, pairs.c.vendor_id)).all()
+    assert rows == [('CVE-2023-0002', ids['acme'])]
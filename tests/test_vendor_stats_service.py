@@ -0,0 +1,111 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def stats_session(monkeypatch):
+    """Banco SQLite em memória com as associações e o agregado vendor_cve_stats."""
+    import app.models  # noqa: F401 - registra todos os mappers
+    from app.extensions import db
+    from app.models.cve_part import CVEPart
+    from app.models.cve_product import CVEProduct
+    from app.models.cve_vendor import CVEVendor
+    from app.models.product import Product
+    from app.models.vendor import Vendor
+    from app.models.vendor_cve_stats import VendorCVEStats
+    from app.models.vulnerability import Vulnerability
+    from app.services.vendor_stats_service import VendorStatsService
+
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine, tables=[
+        Vulnerability.__table__, Vendor.__table__, Product.__table__, CVEVendor.__table__,
+        CVEProduct.__table__, CVEPart.__table__, VendorCVEStats.__table__,
+    ])
+    monkeypatch.setattr(VendorStatsService, '_rebuild_started', False)
+    session = Session(engine)
+
+    acme, globex = Vendor(name='acme'), Vendor(name='globex')
+    session.add_all([acme, globex])
+    session.flush()
+    gateway = Product(vendor_id=acme.id, name='gateway')
+    session.add(gateway)
+    session.flush()
+    for cve_id, severity in (('CVE-2022-0001', 'CRITICAL'), ('CVE-2022-0002', 'HIGH'), ('CVE-2022-0003', 'LOW')):
+        session.add(Vulnerability(cve_id=cve_id, description='vendor stats test', published_date=datetime(2022, 1, 1),
+                                  last_update=datetime(2022, 1, 1), base_severity=severity, cvss_score=5.0))
+    session.flush()
+    # 0001: vendor e produto (conta uma vez); 0002: só via produto; 0003: outro vendor
+    session.add_all([
+        CVEVendor(cve_id='CVE-2022-0001', vendor_id=acme.id),
+        CVEProduct(cve_id='CVE-2022-0001', product_id=gateway.id),
+        CVEProduct(cve_id='CVE-2022-0002', product_id=gateway.id),
+        CVEVendor(cve_id='CVE-2022-0003', vendor_id=globex.id),
+        CVEPart(cve_id='CVE-2022-0001', part='a'),
+        CVEPart(cve_id='CVE-2022-0002', part='o'),
+    ])
+    session.commit()
+    session.info['ids'] = {'acme': acme.id, 'globex': globex.id}
+    yield session
+    session.close()
+
+
+def _stats(session):
+    from app.models.vendor_cve_stats import VendorCVEStats
+
+    return {
+        (row.vendor_id, row.part): (row.cve_count, row.critical_count, row.high_count)
+        for row in session.query(VendorCVEStats)
+    }
+
+
+def test_refresh_counts_product_linked_cves_once(stats_session):
+    from app.services.vendor_stats_service import VendorStatsService
+
+    ids = stats_session.info['ids']
+    assert VendorStatsService(stats_session).refresh_for_vendors([ids['acme']]) == 1
+
+    assert _stats(stats_session) == {
+        (ids['acme'], '*'): (2, 1, 1),
+        (ids['acme'], 'a'): (1, 1, 0),
+        (ids['acme'], 'o'): (1, 0, 1),
+    }
+
+
+def test_rebuild_all_and_vendor_page_query(stats_session):
+    from app.services.vendor_stats_service import VendorStatsService
+
+    ids = stats_session.info['ids']
+    service = VendorStatsService(stats_session)
+    assert service.rebuild_all() == 4
+
+    everyone = {row.name: row.cve_count for row in service.vendor_page_query()}
+    assert everyone == {'acme': 2, 'globex': 1}
+    apps = [(row.id, row.cve_count) for row in service.vendor_page_query(part='o')]
+    assert apps == [(ids['acme'], 1)]
+
+
+def test_ensure_populated_schedules_rebuild_instead_of_running_it(stats_session, monkeypatch):
+    from app.services.vendor_stats_service import VendorStatsService
+
+    scheduled = []
+    monkeypatch.setattr(VendorStatsService, 'schedule_rebuild', lambda self: scheduled.append(True) or True)
+    service = VendorStatsService(stats_session)
+
+    assert service.ensure_populated() is False
+    assert scheduled == [True]
+    assert _stats(stats_session) == {}
+
+    service.rebuild_all()
+    stats_session.commit()
+    assert service.ensure_populated() is True
+    assert scheduled == [True]
+
+
+def test_schedule_rebuild_needs_app_context(stats_session):
+    from app.services.vendor_stats_service import VendorStatsService
+
+    assert VendorStatsService(stats_session).schedule_rebuild() is False
+    assert VendorStatsService._rebuild_started is False
@@ -0,0 +1,86 @@
+import pytest
+
+from app.utils.version_utils import (
+    IntervalIndex,
+    VersionRange,
+    compare_versions,
+    parse_range_expression,
+    version_key,
+)
+
+
+@pytest.mark.parametrize('a, b, expected', [
+    ('1.10', '1.9', 1),
+    ('1.0', '1.0.0', 0),
+    ('v2.4.1', '2.4.1', 0),
+    ('2.0-rc1', '2.0', -1),
+    ('2.0-alpha', '2.0-beta', -1),
+    ('2.0.dev1', '2.0-alpha1', -1),
+    ('1.0.2k', '1.0.2', 1),
+    # Letras isoladas são sufixos pós-release, também a/b/c
+    ('1.0.2a', '1.0.2', 1),
+    ('1.1.1c', '1.1.1', 1),
+    ('1.0.2b', '1.0.2a', 1),
+    ('1.0.2k', '1.0.3', -1),
+    ('2:1.0', '1.0', 0),
+    ('*', '9.9', 0),
+])
+def test_compare_versions(a, b, expected):
+    assert compare_versions(a, b) == expected
+    assert compare_versions(b, a) == -expected
+
+
+def test_version_key_wildcards_and_invalid():
+    assert version_key('*') is None
+    assert version_key('-') is None
+    assert version_key('...') is None
+
+
+def test_parse_range_expression_bounds():
+    bounded = parse_range_expression('>= 1.0, < 1.0.2b')
+    assert bounded.contains(version_key('1.0'))
+    assert bounded.contains(version_key('1.0.2'))
+    assert bounded.contains(version_key('1.0.2a'))
+    assert not bounded.contains(version_key('1.0.2b'))
+    assert not bounded.contains(version_key('0.9'))
+
+    assert parse_range_expression('< 1.0.2b').contains(version_key('1.0.2'))
+    assert parse_range_expression('<= 2').contains(version_key('2.0.0'))
+    assert not parse_range_expression('> 2').contains(version_key('2.0'))
+
+    exact = parse_range_expression('v1.2')
+    assert exact.contains(version_key('1.2.0'))
+    assert not exact.contains(version_key('1.2.1'))
+
+
+def test_parse_range_expression_fixed_version_and_wildcards():
+    open_start = parse_range_expression('>= 7.0.1', fixed_version='7.0.5')
+    assert open_start.contains(version_key('7.0.4'))
+    assert not open_start.contains(version_key('7.0.5'))
+
+    # fixed_version vindo de versionEndIncluding ainda é afetada
+    inclusive = parse_range_expression('>= 7.0.1', fixed_version='7.0.5', fixed_inclusive=True)
+    assert inclusive.contains(version_key('7.0.5'))
+    assert not inclusive.contains(version_key('7.0.6'))
+
+    assert parse_range_expression('*') == VersionRange()
+    assert parse_range_expression('>= *') is None
+    assert parse_range_expression('> 1 2') is None
+
+
+def test_interval_index_stab():
+    index = IntervalIndex()
+    index.add(VersionRange.from_bounds(start_including='1.0', end_excluding='1.5'), 'a')
+    index.add(VersionRange.from_bounds(start_excluding='1.4', end_including='2.0'), 'b')
+    index.add(VersionRange.from_bounds(end_excluding='1.1'), 'c')
+    index.add(VersionRange.exact('3.0'), 'd')
+    index.build()
+
+    assert len(index) == 4
+    assert sorted(index.stab(version_key('1.0.5'))) == ['a', 'c']
+    assert index.stab(version_key('1.4')) == ['a']
+    assert sorted(index.stab(version_key('1.4.1'))) == ['a', 'b']
+    assert index.stab(version_key('2.0.0')) == ['b']
+    assert index.stab(version_key('3')) == ['d']
+    assert index.stab(version_key('2.5')) == []
+    assert sorted(index.stab_many([version_key('0.5'), version_key('3.0'), version_key('1.2')])) == ['a', 'c', 'd']
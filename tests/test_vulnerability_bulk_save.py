@@ -0,0 +1,153 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+PUBLISHED = datetime(2021, 3, 4, 10, 0)
+
+
+@pytest.fixture
+def bulk_service(monkeypatch):
+    """VulnerabilityService sobre SQLite em memória com as tabelas gravadas pelo caminho em lote."""
+    import app.models  # noqa: F401 - registra todos os mappers
+    from app.extensions import db
+    from app.models.affected_product import AffectedProduct
+    from app.models.cve_part import CVEPart
+    from app.models.cve_product import CVEProduct
+    from app.models.cve_vendor import CVEVendor
+    from app.models.cvss_metric import CVSSMetric
+    from app.models.product import Product
+    from app.models.references import Reference
+    from app.models.sync_metadata import SyncMetadata
+    from app.models.vendor import Vendor
+    from app.models.vendor_cve_stats import VendorCVEStats
+    from app.models.version_reference import VersionReference
+    from app.models.vulnerability import Vulnerability
+    from app.models.weakness import Weakness
+    from app.services.bulk_database_service import BulkDatabaseService
+    from app.services.daily_stats_service import DailyStatsService
+    from app.services.search_service import CVESearchService
+    from app.services.vendor_scope_service import VendorScopeService
+    from app.services.vulnerability_service import VulnerabilityService
+
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine, tables=[
+        Vulnerability.__table__, Vendor.__table__, Product.__table__, CVEVendor.__table__,
+        CVEProduct.__table__, CVEPart.__table__, CVSSMetric.__table__, Weakness.__table__,
+        Reference.__table__, VersionReference.__table__, AffectedProduct.__table__,
+        SyncMetadata.__table__, VendorCVEStats.__table__,
+    ])
+    monkeypatch.setattr(BulkDatabaseService, '_detect_database_dialect', lambda self: 'sqlite')
+    # Agregados opcionais ausentes: evita o inspector, que faria rollback da conexão compartilhada
+    monkeypatch.setattr(DailyStatsService, '_tables_ready', False)
+    monkeypatch.setattr(VendorScopeService, '_tables_ready', False)
+    monkeypatch.setattr(CVESearchService, '_backend', '')
+
+    session = Session(engine)
+    yield VulnerabilityService(session)
+    session.close()
+
+
+def _payload(cve_id, **overrides):
+    data = {
+        'cve_id': cve_id,
+        'description': f'{cve_id} buffer overflow',
+        'published_date': PUBLISHED,
+        'last_update': PUBLISHED,
+        'base_severity': 'HIGH',
+        'cvss_score': 8.1,
+        'vendors': ['acme'],
+        'products': ['gateway'],
+        'weaknesses': ['CWE-787', 'NVD-CWE-Other', 'CWE-787'],
+        'references': [
+            {'url': f'https://example.test/{cve_id}', 'source': 'acme', 'tags': ['Patch']},
+            {'source': 'no-url'},
+        ],
+        'cvss_metrics': [{'cvss_version': '3.1', 'base_score': 8.1, 'base_severity': 'high',
+                          'base_vector': 'CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H'}],
+        'cpe_configurations': [{'nodes': [{'cpeMatch': [
+            {'criteria': 'cpe:2.3:a:acme:gateway:*:*:*:*:*:*:*:*'},
+            {'criteria': 'cpe:2.3:o:acme:firmware:*:*:*:*:*:*:*:*'},
+        ]}]}],
+        'version_ranges': [
+            {'vendor': 'acme', 'product': 'gateway', 'version_start_including': '1.0', 'version_end_including': '2.0'},
+        ],
+    }
+    data.update(overrides)
+    return data
+
+
+def _rows(session, model, cve_id):
+    return session.query(model).filter(model.cve_id == cve_id).all()
+
+
+def test_bulk_save_writes_parents_and_children(bulk_service):
+    from app.models.cve_part import CVEPart
+    from app.models.cve_vendor import CVEVendor
+    from app.models.references import Reference
+    from app.models.vendor import Vendor
+    from app.models.version_reference import VersionReference
+    from app.models.vulnerability import Vulnerability
+    from app.models.weakness import Weakness
+
+    session = bulk_service.session
+    saved = bulk_service.save_vulnerabilities_batch(
+        [_payload('CVE-2021-0001'), _payload('CVE-2021-0002'), _payload('CVE-2021-0001', cvss_score=9.0)],
+        bulk=True,
+    )
+    assert saved == 2
+
+    # Última ocorrência de cada CVE vence
+    assert session.get(Vulnerability, 'CVE-2021-0001').cvss_score == 9.0
+    assert sorted(v.name for v in session.query(Vendor)) == ['Unknown', 'acme']
+    assert len(_rows(session, CVEVendor, 'CVE-2021-0001')) == 1
+    assert {p.part for p in _rows(session, CVEPart, 'CVE-2021-0001')} == {'a', 'o'}
+    assert [w.cwe_id for w in _rows(session, Weakness, 'CVE-2021-0001')] == ['CWE-787']
+    refs = _rows(session, Reference, 'CVE-2021-0001')
+    assert len(refs) == 1 and refs[0].is_patch is True
+    (vref,) = _rows(session, VersionReference, 'CVE-2021-0002')
+    assert (vref.affected_version, vref.fixed_version, vref.fixed_inclusive) == ('>= 1.0', '2.0', True)
+
+
+def test_bulk_resave_replaces_children_without_duplicates(bulk_service):
+    from app.models.cve_vendor import CVEVendor
+    from app.models.product import Product
+    from app.models.vendor import Vendor
+    from app.models.vulnerability import Vulnerability
+    from app.models.weakness import Weakness
+
+    session = bulk_service.session
+    bulk_service.save_vulnerabilities_batch([_payload('CVE-2021-0003')], bulk=True)
+    saved = bulk_service.save_vulnerabilities_batch(
+        [_payload('CVE-2021-0003', description='updated', vendors=['acme', 'globex'], weaknesses=['CWE-79'])],
+        bulk=True,
+    )
+    assert saved == 1
+
+    assert session.get(Vulnerability, 'CVE-2021-0003').description == 'updated'
+    assert session.query(Vendor).filter_by(name='acme').count() == 1
+    # Produto sem vendor reusa o acme/gateway criado a partir do version range
+    assert session.query(Product).filter_by(name='gateway').count() == 1
+    assert len(_rows(session, CVEVendor, 'CVE-2021-0003')) == 2
+    assert [w.cwe_id for w in _rows(session, Weakness, 'CVE-2021-0003')] == ['CWE-79']
+
+
+def test_failed_bulk_batch_is_rolled_back_before_fallback(bulk_service, monkeypatch):
+    from app.models.vulnerability import Vulnerability
+
+    session = bulk_service.session
+    fallback = []
+
+    def broken_bulk(data):
+        session.add(Vulnerability(cve_id='CVE-2021-9999', description='partial', published_date=PUBLISHED,
+                                  last_update=PUBLISHED, base_severity='LOW', cvss_score=1.0))
+        session.flush()
+        raise RuntimeError('constraint violated')
+
+    monkeypatch.setattr(bulk_service, '_save_vulnerabilities_bulk', broken_bulk)
+    monkeypatch.setattr(bulk_service, '_vendor_ids_for_cves', lambda ids: fallback.append(ids) or set())
+    bulk_service.save_vulnerabilities_batch([_payload('CVE-2021-0004')], bulk=True)
+
+    assert fallback and fallback[0] == ['CVE-2021-0004']
+    assert session.get(Vulnerability, 'CVE-2021-9999') is None
@@ -0,0 +1,126 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def export_session():
+    import app.models  # noqa: F401 - registra todos os mappers
+    from app.extensions import db
+    from app.models.vulnerability import Vulnerability
+
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine, tables=[Vulnerability.__table__])
+    session = Session(engine)
+    session.add_all([
+        Vulnerability(cve_id='CVE-2024-0001', description='export test', base_severity='CRITICAL',
+                      cvss_score=9.8, published_date=datetime(2024, 3, 2), last_update=datetime(2024, 3, 2),
+                      nvd_vendors_data=['acme'], nvd_products_data=[{'name': 'router'}],
+                      patch_available=True, assigner='cna@acme.test'),
+        Vulnerability(cve_id='CVE-2024-0002', description='export test', base_severity='LOW',
+                      cvss_score=3.1, published_date=datetime(2024, 3, 1), last_update=datetime(2024, 3, 1)),
+    ])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _rows(session):
+    from app.models.vulnerability import Vulnerability
+    from app.utils.vulnerability_export import iter_export_rows
+
+    query = session.query(Vulnerability).order_by(Vulnerability.cve_id)
+    return iter_export_rows(query, batch_size=1)
+
+
+def test_csv_export_reads_only_export_columns(export_session):
+    from app.utils.vulnerability_export import CSV_HEADER, stream_csv
+
+    body = b''.join(stream_csv(_rows(export_session))).decode('utf-8')
+    rows = list(csv.reader(io.StringIO(body)))
+
+    assert rows[0] == CSV_HEADER
+    assert rows[1] == ['CVE-2024-0001', 'CRITICAL', '9.8', '2024-03-02', 'acme', 'router', 'Sim', 'cna@acme.test']
+    assert rows[2] == ['CVE-2024-0002', 'LOW', '3.1', '2024-03-01', '', '', 'Não', '']
+
+
+def test_ndjson_export_writes_one_record_per_line(export_session):
+    from app.utils.vulnerability_export import stream_ndjson
+
+    body = b''.join(stream_ndjson(_rows(export_session))).decode('utf-8')
+    assert body.endswith('\n')
+    records = [json.loads(line) for line in body.splitlines()]
+
+    assert [r['cve_id'] for r in records] == ['CVE-2024-0001', 'CVE-2024-0002']
+    assert records[0]['published_date'] == '2024-03-02T00:00:00'
+    assert records[0]['products'] == [{'name': 'router'}]
+    assert records[1]['vendors'] == [] and records[1]['patch_available'] is False
+
+
+def test_streams_are_chunked_and_gzip_round_trips(monkeypatch):
+    from app.utils import vulnerability_export
+    from app.utils.vulnerability_export import gzip_stream, stream_csv
+
+    monkeypatch.setattr(vulnerability_export, 'CHUNK_BYTES', 256)
+    rows = [(f'CVE-2024-{n:04d}', 'HIGH', 7.5, None, ['acme'], [], False, None) for n in range(200)]
+    chunks = list(stream_csv(rows))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) < 512 for chunk in chunks)
+    assert gzip.decompress(b''.join(gzip_stream(iter(chunks)))) == b''.join(chunks)
+
+
+def test_logged_stream_propagates_mid_stream_failures():
+    from app.utils.vulnerability_export import logged_stream
+
+    def broken():
+        yield b'header\n'
+        raise RuntimeError('cursor lost')
+
+    stream = logged_stream(broken(), 'teste')
+    assert next(stream) == b'header\n'
+    with pytest.raises(RuntimeError):
+        next(stream)
+
+
+def test_export_endpoint_streams_ndjson_and_gzip():
+    from app import create_app
+    from app.extensions import db
+    from app.main_startup import initialize_database
+    from app.models.vulnerability import Vulnerability
+
+    app = create_app('testing')
+    with app.app_context():
+        initialize_database(app)
+        db.session.add(Vulnerability(cve_id='CVE-2099-90001', description='export endpoint test',
+                                     base_severity='CRITICAL', cvss_score=9.1, published_date=datetime.now(),
+                                     last_update=datetime.now()))
+        db.session.commit()
+
+    try:
+        client = app.test_client()
+        resp = client.get('/api/vulnerabilities/export?severity=critical&period=week&format=ndjson&compress=none')
+        assert resp.status_code == 200
+        assert resp.mimetype == 'application/x-ndjson'
+        assert 'Content-Encoding' not in resp.headers
+        assert '.ndjson"' in resp.headers['Content-Disposition']
+        records = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        assert 'CVE-2099-90001' in {r['cve_id'] for r in records}
+        assert {r['base_severity'] for r in records} == {'CRITICAL'}
+
+        resp = client.get('/api/vulnerabilities/export?severity=critical', headers={'Accept-Encoding': 'gzip'})
+        assert resp.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in resp.headers['Vary']
+        body = gzip.decompress(resp.get_data()).decode('utf-8')
+        assert body.startswith('CVE ID,') and 'CVE-2099-90001' in body
+    finally:
+        with app.app_context():
+            db.session.query(Vulnerability).filter_by(cve_id='CVE-2099-90001').delete()
+            db.session.commit()